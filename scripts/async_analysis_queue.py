@@ -27,6 +27,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from state_store import get_connection, DBBusyError
 import llm_client
+import tracing
 
 # Test mode: set ASYNC_TEST_MODE=1 to add deliberate sleep after claim
 TEST_MODE = os.environ.get("ASYNC_TEST_MODE") == "1"
@@ -586,6 +587,13 @@ def process_task(task_id: str, entity_id: str, task_type: str, attempts_now: int
     All parameters come from claim_task() (authoritative DB values).
     attempts_now is the post-increment value — NEVER modified here.
     """
+    with tracing.span("async.process_task", task_id=task_id, position_id=entity_id,
+                      task_type=task_type, attempt=attempts_now):
+        _process_task(task_id, entity_id, task_type, attempts_now)
+
+
+def _process_task(task_id: str, entity_id: str, task_type: str, attempts_now: int):
+    """process_task body; the span picks up the position's decision_id once loaded."""
     _log(f"Processing task {task_id} (type={task_type}, position={entity_id}, attempt={attempts_now})")
     
     started_at = datetime.now(timezone.utc).isoformat()
@@ -605,6 +613,7 @@ def process_task(task_id: str, entity_id: str, task_type: str, attempts_now: int
                 raise ValueError(f"Position {entity_id} not found")
             
             position_data = dict(row)
+        tracing.current().set(decision_id=position_data.get("decision_id"))
         
         token_symbol = position_data.get("token_address", "UNKNOWN")
         
@@ -619,21 +628,24 @@ def process_task(task_id: str, entity_id: str, task_type: str, attempts_now: int
         _log(f"Running Cold Path for {token_symbol}")
         
         # Step 1: Sanad verification
-        sanad_result = run_sanad_verification(position_data, signal_payload, task_id)
+        with tracing.span("async.sanad"):
+            sanad_result = run_sanad_verification(position_data, signal_payload, task_id)
         
         # Step 2: Bull/Bear debate (parallel if configured)
-        if PARALLEL_BULL_BEAR:
-            with ThreadPoolExecutor(max_workers=2) as executor:
-                bull_future = executor.submit(run_bull_analysis, signal_payload, token_symbol, task_id)
-                bear_future = executor.submit(run_bear_analysis, signal_payload, token_symbol, task_id)
-                bull_result = bull_future.result(timeout=TIMEOUT_SECONDS)
-                bear_result = bear_future.result(timeout=TIMEOUT_SECONDS)
-        else:
-            bull_result = run_bull_analysis(signal_payload, token_symbol, task_id)
-            bear_result = run_bear_analysis(signal_payload, token_symbol, task_id)
+        with tracing.span("async.debate", parallel=PARALLEL_BULL_BEAR):
+            if PARALLEL_BULL_BEAR:
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    bull_future = executor.submit(run_bull_analysis, signal_payload, token_symbol, task_id)
+                    bear_future = executor.submit(run_bear_analysis, signal_payload, token_symbol, task_id)
+                    bull_result = bull_future.result(timeout=TIMEOUT_SECONDS)
+                    bear_result = bear_future.result(timeout=TIMEOUT_SECONDS)
+            else:
+                bull_result = run_bull_analysis(signal_payload, token_symbol, task_id)
+                bear_result = run_bear_analysis(signal_payload, token_symbol, task_id)
         
         # Step 3: Judge verdict
-        judge_result = run_judge_verdict(signal_payload, sanad_result, bull_result, bear_result, token_symbol, task_id)
+        with tracing.span("async.judge"):
+            judge_result = run_judge_verdict(signal_payload, sanad_result, bull_result, bear_result, token_symbol, task_id)
         
         completed_at = datetime.now(timezone.utc).isoformat()
         duration_sec = time.perf_counter() - perf_start
@@ -694,6 +706,7 @@ def process_task(task_id: str, entity_id: str, task_type: str, attempts_now: int
             conn.commit()
         
         _log(f"Task {task_id} completed in {duration_sec:.1f}s (verdict={verdict}, confidence={confidence}%)")
+        tracing.current().set(verdict=verdict, confidence=confidence)
         mark_task_done(task_id)
         
     except ValueError as e:
@@ -706,12 +719,14 @@ def process_task(task_id: str, entity_id: str, task_type: str, attempts_now: int
             error_code = "ERR_VALIDATION"
         
         _log(f"Task {task_id} failed: {error_code}: {error_msg}")
+        tracing.current().mark_error(f"{error_code}: {error_msg}")
         mark_task_failed(task_id, error_code, error_msg, attempts_now)
         
     except Exception as e:
         _log(f"Task {task_id} failed: {e}")
         import traceback
         _log(traceback.format_exc())
+        tracing.current().mark_error(f"ERR_WORKER: {e}")
         mark_task_failed(task_id, "ERR_WORKER", str(e), attempts_now)
 
 
@@ -755,8 +770,10 @@ def main():
 
 
 if __name__ == "__main__":
+    from sampling_profiler import profile as _profile  # opt-in: SANAD_PROFILE=1
     try:
-        main()
+        with _profile("async_analysis_queue"):
+            main()
     except KeyboardInterrupt:
         _log("Worker interrupted by user")
     except Exception as e:
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Bandit Stats Service — in-memory Thompson / UCB1 counters.
+Deterministic Python + NumPy. No LLMs.
+
+The learning tables (bandit_strategy_stats, source_ucb_stats) are written
+only by learning_loop (per closed position, or per batch in run()), but
+read on every router cycle and every strategy selection. This module
+keeps them in memory as compact arrays:
+
+  alpha, beta : float64 [n_strategies × n_regimes]  (1.0 where no row)
+  n           : int64   [n_strategies × n_regimes]  (0 where no row)
+  source_n, source_reward : per-source UCB1 counters
+
+Invalidation: every writer bumps meta.bandit_stats_version in the same
+transaction as the stat update (state_store.bump_bandit_version). refresh()
+is one single-row meta lookup; the tables are re-read only when the version
+moved, as one consistent snapshot.
+
+    svc = get_service()                      # refreshed, per-DB singleton
+    svc.sample_all("BULL_NORMAL_VOL")        # one rng.beta call for every strategy
+    svc.ucb1_grades()                        # router runtime_state shape
+
+Used by:
+- thompson_sampler.select_strategy / rank_strategies
+- signal_router (UCB1 source weighting, hot path runtime_state)
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import state_store
+
+_rng = np.random.default_rng()
+
+
+class BanditStats:
+    """Array-backed snapshot of bandit_strategy_stats + source_ucb_stats."""
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path
+        self.version = -1
+        self.loads = 0
+        self._lock = threading.Lock()
+        self._set_snapshot({"version": -1, "strategies": [], "sources": []})
+
+    # ── loading ──
+
+    def _set_snapshot(self, snap: dict):
+        strategies = sorted({r[0] for r in snap["strategies"]})
+        regimes = sorted({r[1] for r in snap["strategies"]})
+        s_idx = {s: i for i, s in enumerate(strategies)}
+        r_idx = {r: j for j, r in enumerate(regimes)}
+
+        alpha = np.ones((len(strategies), len(regimes)))
+        beta = np.ones((len(strategies), len(regimes)))
+        n = np.zeros((len(strategies), len(regimes)), dtype=np.int64)
+        for strategy_id, regime_tag, a, b, count in snap["strategies"]:
+            i, j = s_idx[strategy_id], r_idx[regime_tag]
+            alpha[i, j], beta[i, j], n[i, j] = a, b, count
+
+        sources = [r[0] for r in snap["sources"]]
+        source_n = np.array([r[1] for r in snap["sources"]], dtype=np.int64)
+        source_reward = np.array([r[2] for r in snap["sources"]], dtype=np.float64)
+
+        # Swap everything at once; readers never see a half-built snapshot
+        self.__dict__.update(
+            strategies=strategies, regimes=regimes, _strategy_idx=s_idx, _regime_idx=r_idx,
+            alpha=alpha, beta=beta, n=n,
+            sources=sources, _source_idx={s: i for i, s in enumerate(sources)},
+            source_n=source_n, source_reward=source_reward,
+            version=snap["version"],
+        )
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reload if meta.bandit_stats_version changed. Returns True if reloaded."""
+        if not force and state_store.get_bandit_version(self.db_path) == self.version:
+            return False
+        with self._lock:
+            snap = state_store.get_bandit_snapshot(self.db_path)
+            if not force and snap["version"] == self.version:
+                return False
+            self._set_snapshot(snap)
+            self.loads += 1
+            return True
+
+    # ── Thompson ──
+
+    def _params(self, regime: str, strategies=None, prior: dict = None):
+        """(names, alpha, beta, n) vectors for `regime`; prior (default Beta(1,1)) where no row."""
+        names = list(self.strategies if strategies is None else strategies)
+        j = self._regime_idx.get(regime)
+        if j is None:
+            k = len(names)
+            alpha, beta, n = np.ones(k), np.ones(k), np.zeros(k, dtype=np.int64)
+        elif strategies is None:
+            alpha, beta, n = self.alpha[:, j].copy(), self.beta[:, j].copy(), self.n[:, j].copy()
+        else:
+            rows = np.array([self._strategy_idx.get(s, -1) for s in names], dtype=np.int64)
+            known = rows >= 0
+            alpha, beta = np.ones(len(names)), np.ones(len(names))
+            n = np.zeros(len(names), dtype=np.int64)
+            alpha[known] = self.alpha[rows[known], j]
+            beta[known] = self.beta[rows[known], j]
+            n[known] = self.n[rows[known], j]
+
+        if prior:
+            missing = n == 0
+            for k in np.flatnonzero(missing):
+                p = prior.get(names[k])
+                if p:
+                    alpha[k], beta[k] = p
+        return names, alpha, beta, n
+
+    def sample_all(self, regime: str, strategies=None, prior: dict = None, rng=None) -> dict:
+        """One Beta(α, β) draw per strategy for `regime`, in a single NumPy call.
+
+        strategies: names to sample (default: every strategy with stats)
+        prior: {name: (alpha, beta)} used where the DB has no row for (name, regime)
+        """
+        names, alpha, beta, _ = self._params(regime, strategies, prior)
+        draws = (rng or _rng).beta(alpha, beta)
+        return dict(zip(names, draws.tolist()))
+
+    def expected_all(self, regime: str, strategies=None, prior: dict = None) -> dict:
+        """Posterior mean α / (α + β) per strategy for `regime`."""
+        names, alpha, beta, _ = self._params(regime, strategies, prior)
+        return dict(zip(names, (alpha / (alpha + beta)).tolist()))
+
+    def get(self, strategy_id: str, regime_tag: str) -> dict | None:
+        """{"alpha", "beta", "n"} for one (strategy, regime), or None if never traded."""
+        i = self._strategy_idx.get(strategy_id)
+        j = self._regime_idx.get(regime_tag)
+        if i is None or j is None or self.n[i, j] == 0:
+            return None
+        return {"alpha": float(self.alpha[i, j]), "beta": float(self.beta[i, j]), "n": int(self.n[i, j])}
+
+    def thompson_state(self) -> dict:
+        """{strategy_id: {regime_tag: {"alpha", "beta", "n"}}} (fast_decision_engine runtime_state)."""
+        out = {}
+        for i, j in zip(*np.nonzero(self.n)):
+            out.setdefault(self.strategies[i], {})[self.regimes[j]] = {
+                "alpha": float(self.alpha[i, j]), "beta": float(self.beta[i, j]), "n": int(self.n[i, j]),
+            }
+        return out
+
+    # ── UCB1 sources ──
+
+    def source_stats(self, source_id: str) -> dict | None:
+        """{"n", "reward_sum"} like state_store.get_source_ucb_stats()[source_id]."""
+        k = self._source_idx.get(source_id)
+        if k is None:
+            return None
+        return {"n": int(self.source_n[k]), "reward_sum": float(self.source_reward[k])}
+
+    def total_source_trades(self) -> int:
+        return int(self.source_n.sum())
+
+    def ucb1_grades(self) -> dict:
+        """{source_id: {"grade", "score", "cold_start"[, "n"]}} — win_rate × 100, no exploration bonus."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = np.where(self.source_n > 0, self.source_reward / self.source_n, 0.0) * 100
+        grades = {}
+        for source_id, n, score in zip(self.sources, self.source_n.tolist(), scores.tolist()):
+            if n == 0:
+                grades[source_id] = {"grade": "C", "score": 50, "cold_start": True}
+            else:
+                grade = "A" if score >= 80 else "B" if score >= 60 else "C" if score >= 40 else "D"
+                grades[source_id] = {"grade": grade, "score": score, "cold_start": False, "n": n}
+        return grades
+
+
+# ─────────────────────────────────────────────────────────
+# Per-process service
+# ─────────────────────────────────────────────────────────
+_services: dict = {}
+_services_lock = threading.Lock()
+
+
+def get_service(db_path=None, refresh: bool = True) -> BanditStats:
+    """Shared BanditStats for `db_path` (default state_store.DB_PATH), version-checked."""
+    key = str(db_path or state_store.DB_PATH)
+    svc = _services.get(key)
+    if svc is None:
+        with _services_lock:
+            svc = _services.setdefault(key, BanditStats(db_path or state_store.DB_PATH))
+    if refresh:
+        svc.refresh()
+    return svc
+
+
+def sample_all(regime: str, strategies=None, prior: dict = None, rng=None, db_path=None) -> dict:
+    """Module-level shortcut for get_service().sample_all()."""
+    return get_service(db_path).sample_all(regime, strategies=strategies, prior=prior, rng=rng)
+
+
+if __name__ == "__main__":
+    svc = get_service()
+    print(f"bandit_stats_version={svc.version} strategies={len(svc.strategies)} "
+          f"regimes={len(svc.regimes)} sources={len(svc.sources)}")
+    for regime in svc.regimes:
+        ev = svc.expected_all(regime)
+        print(f"\n  {regime}")
+        for name, value in sorted(ev.items(), key=lambda x: x[1], reverse=True):
+            stats = svc.get(name, regime)
+            if stats:
+                print(f"    {name:<25} E[v]={value:.3f} n={stats['n']}")
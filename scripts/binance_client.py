@@ -22,13 +22,16 @@ References:
 """
 
 import os
+import sys
 import json
 import time
 import hmac
 import hashlib
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from collections import deque
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import breaker_registry
 
 # Load environment
 BASE_DIR = Path(os.environ.get("SANAD_HOME", "/data/.openclaw/workspace/trading"))
@@ -55,54 +58,36 @@ class ErrorTracker:
     """
     Tracks errors per component for circuit breaker logic.
     Trip threshold: 5 errors in 60 seconds (from thresholds.yaml).
+    Breaker state is the shared breaker_registry entry, so every process
+    sees the same trip; request totals stay per process (Gate #10).
     """
 
     def __init__(self, component="binance_api", window_sec=60, trip_threshold=5):
         self.component = component
         self.window_sec = window_sec
         self.trip_threshold = trip_threshold
-        self.errors = deque()  # timestamps of recent errors
+        self.breaker = breaker_registry.breaker(component, trip_errors=trip_threshold,
+                                                window_s=window_sec, cooldown_s=300)  # 5 min cooldown
         self.total_requests = 0
         self.total_errors = 0
-        self._tripped = False
-        self._cooldown_until = None
 
     def record_success(self):
         self.total_requests += 1
 
     def record_error(self, error_msg=""):
-        now = time.time()
         self.total_requests += 1
         self.total_errors += 1
-        self.errors.append(now)
-
-        # Clean old errors outside window
-        cutoff = now - self.window_sec
-        while self.errors and self.errors[0] < cutoff:
-            self.errors.popleft()
-
-        # Check trip condition
-        if len(self.errors) >= self.trip_threshold:
-            self._tripped = True
-            self._cooldown_until = now + 300  # 5 min cooldown
-            self._update_state_file()
-            print(f"[BINANCE] CIRCUIT BREAKER TRIPPED: {len(self.errors)} errors in {self.window_sec}s")
+        if self.breaker.record_failure(error_msg):
+            print(f"[BINANCE] CIRCUIT BREAKER TRIPPED: {self.trip_threshold} errors in {self.window_sec}s")
 
     def is_tripped(self):
-        if self._tripped:
-            if time.time() >= self._cooldown_until:
-                # Cooldown expired → half-open (allow 1 test request)
-                return False
-            return True
-        return False
+        # Open → blocked; after the cooldown the breaker is half-open (allow 1 test request)
+        return not self.breaker.allow()
 
     def reset_after_success(self):
-        """Called after a successful half-open test request."""
-        self._tripped = False
-        self._cooldown_until = None
-        self.errors.clear()
-        self._update_state_file()
-        print(f"[BINANCE] Circuit breaker RESET after successful test")
+        """Called after every successful request; closes a tripped (half-open) breaker."""
+        if self.breaker.record_success():
+            print(f"[BINANCE] Circuit breaker RESET after successful test")
 
     def get_error_rate_pct(self, window_minutes=15):
         """Error rate over last N minutes for Gate #10."""
@@ -111,37 +96,19 @@ class ErrorTracker:
         # Simple: total errors / total requests
         return self.total_errors / self.total_requests if self.total_requests > 0 else 0.0
 
-    def _update_state_file(self):
-        """Update circuit_breakers.json state file."""
-        try:
-            cb_path = STATE_DIR / "circuit_breakers.json"
-            with open(cb_path, "r") as f:
-                cb_state = json.load(f)
-
-            cb_state[self.component] = {
-                "state": "open" if self._tripped else "closed",
-                "failure_count": len(self.errors),
-                "last_failure_at": datetime.now(timezone.utc).isoformat() if self.errors else None,
-                "cooldown_until": datetime.fromtimestamp(self._cooldown_until, tz=timezone.utc).isoformat() if self._cooldown_until else None
-            }
-
-            with open(cb_path, "w") as f:
-                json.dump(cb_state, f, indent=2)
-        except Exception as e:
-            print(f"[BINANCE] Error updating circuit breaker state: {e}")
-
 
 # Global error tracker
 _error_tracker = ErrorTracker()
 
 
 # ─────────────────────────────────────────────
-# HTTP CLIENT (using urllib — no extra deps)
+# HTTP CLIENT (pooled keep-alive session — http_transport)
 # ─────────────────────────────────────────────
 
-import urllib.request
 import urllib.parse
-import urllib.error
+import lazy_imports
+requests = lazy_imports.lazy("requests")  # deferred: price_snapshot imports this module on every run
+http_transport = lazy_imports.lazy("http_transport")
 
 
 def _sign_params(params):
@@ -187,30 +154,29 @@ def _request(method, endpoint, params=None, signed=False, timeout=10):
         if method == "GET":
             if params:
                 url += "?" + urllib.parse.urlencode(params)
-            req = urllib.request.Request(url, headers=headers, method="GET")
+            response = http_transport.request("GET", url, headers=headers, timeout=timeout)
         elif method == "POST":
             data = urllib.parse.urlencode(params).encode('utf-8')
-            req = urllib.request.Request(url, data=data, headers=headers, method="POST")
+            headers['Content-Type'] = "application/x-www-form-urlencoded"
+            response = http_transport.request("POST", url, data=data, headers=headers, timeout=timeout)
         else:
-            req = urllib.request.Request(url, headers=headers, method=method)
+            response = http_transport.request(method, url, headers=headers, timeout=timeout)
 
-        with urllib.request.urlopen(req, timeout=timeout) as response:
-            body = response.read().decode('utf-8')
-            result = json.loads(body)
+        if response.status_code >= 400:
+            print(f"[BINANCE] HTTP {response.status_code}: {response.text}")
+            _error_tracker.record_error(f"HTTP {response.status_code}")
+            return None
 
-            _error_tracker.record_success()
-            _error_tracker.reset_after_success()  # Always close after success (handles HALF_OPEN→CLOSED)
+        result = response.json()
 
-            return result
+        _error_tracker.record_success()
+        _error_tracker.reset_after_success()  # Always close after success (handles HALF_OPEN→CLOSED)
 
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode('utf-8') if e.fp else str(e)
-        print(f"[BINANCE] HTTP {e.code}: {error_body}")
-        _error_tracker.record_error(f"HTTP {e.code}")
-        return None
-    except urllib.error.URLError as e:
-        print(f"[BINANCE] URL Error: {e.reason}")
-        _error_tracker.record_error(f"URL Error: {e.reason}")
+        return result
+
+    except requests.exceptions.ConnectionError as e:
+        print(f"[BINANCE] URL Error: {e}")
+        _error_tracker.record_error(f"URL Error: {e}")
         return None
     except Exception as e:
         print(f"[BINANCE] Request error: {e}")
@@ -276,6 +242,17 @@ def get_exchange_info(symbol=None):
     return _request("GET", "/api/v3/exchangeInfo", params)
 
 
+def get_klines(symbol, interval="1d", limit=100, start_time=None):
+    """
+    Get candlesticks, oldest first: [open_time, open, high, low, close, volume, close_time, ...].
+    start_time (ms) returns only candles opened at or after it — used for incremental refresh.
+    """
+    params = {"symbol": symbol.upper(), "interval": interval, "limit": limit}
+    if start_time is not None:
+        params["startTime"] = int(start_time)
+    return _request("GET", "/api/v3/klines", params, timeout=15)
+
+
 # ─────────────────────────────────────────────
 # ACCOUNT DATA (Authenticated)
 # ─────────────────────────────────────────────
@@ -322,58 +299,23 @@ def get_open_orders(symbol=None):
 def estimate_slippage_bps(symbol, side, quantity_usd):
     """
     Estimate slippage for a given order size using real order book.
-    Returns estimated slippage in basis points (bps).
+    Returns estimated slippage in basis points (bps) vs the book mid.
     Used by Gate #6 (Liquidity Gate: max 300 bps).
 
+    Reads the shared depth_cache snapshot, so Gate #6 and Gate #7 on the
+    same symbol cost one depth request between them.
+
     Args:
         symbol: e.g., 'BTCUSDT'
         side: 'BUY' or 'SELL'
         quantity_usd: USD value of the order
     """
-    book = get_order_book(symbol, limit=100)
-    if not book:
-        return None
+    from depth_cache import get_book
 
-    price = get_price(symbol)
-    if not price:
-        return None
-
-    quantity = quantity_usd / price
-
-    if side == "BUY":
-        levels = book.get("asks", [])
-    else:
-        levels = book.get("bids", [])
-
-    if not levels:
+    book = get_book(symbol, need_usd=quantity_usd)
+    if not book:
         return None
-
-    filled_qty = 0
-    total_cost = 0
-    mid_price = price
-
-    for level_price_str, level_qty_str in levels:
-        level_price = float(level_price_str)
-        level_qty = float(level_qty_str)
-
-        remaining = quantity - filled_qty
-        fill_at_level = min(remaining, level_qty)
-
-        total_cost += fill_at_level * level_price
-        filled_qty += fill_at_level
-
-        if filled_qty >= quantity:
-            break
-
-    if filled_qty < quantity * 0.95:
-        # Couldn't fill 95% of order — depth insufficient
-        return 99999  # Signal insufficient depth
-
-    avg_price = total_cost / filled_qty
-    slippage_pct = abs(avg_price - mid_price) / mid_price
-    slippage_bps = slippage_pct * 10000
-
-    return round(slippage_bps, 1)
+    return book.slippage_bps(side, quantity_usd)  # 99999 = insufficient depth
 
 
 def get_spread_bps(symbol):
@@ -381,20 +323,12 @@ def get_spread_bps(symbol):
     Get current bid-ask spread in basis points.
     Used by Gate #7 (Spread Gate: max 200 bps).
     """
-    book = get_order_book(symbol, limit=5)
-    if not book or not book.get("bids") or not book.get("asks"):
-        return None
+    from depth_cache import get_book
 
-    best_bid = float(book["bids"][0][0])
-    best_ask = float(book["asks"][0][0])
-
-    if best_bid <= 0:
+    book = get_book(symbol)
+    if not book:
         return None
-
-    spread_pct = (best_ask - best_bid) / best_bid
-    spread_bps = spread_pct * 10000
-
-    return round(spread_bps, 1)
+    return book.spread_bps()
 
 
 # ─────────────────────────────────────────────
@@ -607,11 +541,10 @@ def snapshot_prices(symbols):
         print("[BINANCE] Price snapshot: no prices fetched")
         return False
 
-    # Update price_cache.json
+    # Update price_cache.json — merged, so dex_price_poller's token-address entries survive
     try:
-        cache_path = STATE_DIR / "price_cache.json"
-        with open(cache_path, "w") as f:
-            json.dump(cache, f, indent=2)
+        from dex_price_poller import merge_price_cache
+        merge_price_cache(cache, STATE_DIR / "price_cache.json")
     except Exception as e:
         print(f"[BINANCE] Error saving price cache: {e}")
 
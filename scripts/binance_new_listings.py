@@ -54,6 +54,13 @@ def check_new_listings():
         _log(f"ERROR fetching exchangeInfo: {e}")
         return []
 
+    # Same response refreshes the shared listing index (and clears its "not listed" cache)
+    try:
+        import listing_index
+        listing_index.ingest("binance", data)
+    except Exception as e:
+        _log(f"WARNING: listing index update failed: {e}")
+
     # Filter USDT trading pairs that are TRADING status
     current_symbols = set()
     for s in data.get("symbols", []):
@@ -30,6 +30,13 @@ BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
 CONFIG_ENV = BASE_DIR / "config" / ".env"
 SIGNALS_DIR = BASE_DIR / "signals" / "birdeye"
 WATCHLIST_PATH = BASE_DIR / "config" / "watchlist.json"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import breaker_registry
+import detail_pool
+import enrichment_cache
+import http_transport
+import rate_limiter
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -39,13 +46,13 @@ DEFAULT_HEADERS = {"x-chain": "solana", "accept": "application/json"}
 
 # Rate limiting — Lite tier ~15 req/min observed safe
 MAX_CALLS_PER_MINUTE = 12
-_call_timestamps: list[float] = []
+_bucket = rate_limiter.bucket("birdeye", MAX_CALLS_PER_MINUTE, 60)
 
-# Circuit breaker
-_consecutive_failures = 0
-_circuit_open_until = 0.0
+# Circuit breaker (shared across processes — breaker_registry)
 CIRCUIT_BREAKER_THRESHOLD = 3
 CIRCUIT_BREAKER_COOLDOWN = 300
+_breaker = breaker_registry.breaker("birdeye_api", trip_consecutive=CIRCUIT_BREAKER_THRESHOLD,
+                                    cooldown_s=CIRCUIT_BREAKER_COOLDOWN)
 
 
 def _load_api_key() -> str:
@@ -71,41 +78,27 @@ def _log(msg: str):
 # Rate limiter
 # ---------------------------------------------------------------------------
 def _rate_limit():
-    global _call_timestamps
-    now = time.time()
-    _call_timestamps = [t for t in _call_timestamps if now - t < 60]
-    if len(_call_timestamps) >= MAX_CALLS_PER_MINUTE:
-        sleep_for = 60 - (now - _call_timestamps[0]) + 1.0
-        if sleep_for > 0:
-            _log(f"Rate limit: sleeping {sleep_for:.1f}s")
-            time.sleep(sleep_for)
-    _call_timestamps.append(time.time())
+    # Shared across processes; raises rate_limiter.RateLimited when this caller's
+    # priority can't wait for budget (hot path fails fast instead of stalling)
+    _bucket.limit()
 
 
 # ---------------------------------------------------------------------------
 # Circuit breaker
 # ---------------------------------------------------------------------------
 def _check_circuit():
-    global _circuit_open_until
-    if _consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD:
-        if time.time() < _circuit_open_until:
-            remaining = int(_circuit_open_until - time.time())
-            raise RuntimeError(f"Circuit breaker OPEN — {remaining}s remaining")
-        _reset_circuit()
+    remaining = _breaker.open_for_s()
+    if remaining:
+        raise RuntimeError(f"Circuit breaker OPEN — {remaining:.0f}s remaining")
 
 
 def _record_failure():
-    global _consecutive_failures, _circuit_open_until
-    _consecutive_failures += 1
-    if _consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD:
-        _circuit_open_until = time.time() + CIRCUIT_BREAKER_COOLDOWN
+    if _breaker.record_failure():
         _log(f"Circuit breaker OPENED — pausing API calls for {CIRCUIT_BREAKER_COOLDOWN}s")
 
 
 def _reset_circuit():
-    global _consecutive_failures, _circuit_open_until
-    _consecutive_failures = 0
-    _circuit_open_until = 0.0
+    _breaker.record_success()
 
 
 # ---------------------------------------------------------------------------
@@ -117,15 +110,16 @@ def _get(path: str, params: dict | None = None) -> dict | list:
     url = f"{BASE_URL}{path}"
     headers = {**DEFAULT_HEADERS, "X-API-KEY": API_KEY}
     try:
-        resp = requests.get(url, headers=headers, params=params, timeout=8)
+        resp = http_transport.get(url, headers=headers, params=params, timeout=8)
         if resp.status_code in (401, 403):
             _log(f"API key error ({resp.status_code})")
             _record_failure()
             raise RuntimeError(f"Auth error HTTP {resp.status_code}")
         if resp.status_code == 429:
-            _log("Rate limited (429) — sleeping 60s and retrying once")
-            time.sleep(60)
-            resp = requests.get(url, headers=headers, params=params, timeout=8)
+            # Back off in every process; retry once if this caller can afford the wait
+            _bucket.penalize(rate_limiter.retry_after_s(resp.headers, 60))
+            _bucket.limit()
+            resp = http_transport.get(url, headers=headers, params=params, timeout=8)
         resp.raise_for_status()
         _reset_circuit()
         data = resp.json()
@@ -169,12 +163,14 @@ def get_new_listing(limit=20) -> list[dict]:
     return (data.get("data") or {}).get("items", []) if isinstance(data, dict) else []
 
 
+@enrichment_cache.cached("overview", provider="birdeye")
 def get_token_overview(address: str) -> dict:
     """GET /defi/token_overview — detailed token data."""
     data = _get("/defi/token_overview", params={"address": address})
     return data.get("data", {}) if isinstance(data, dict) else {}
 
 
+@enrichment_cache.cached("security", provider="birdeye")
 def get_token_security(address: str) -> dict:
     """GET /defi/token_security — rug detection data.
     Returns: top10HolderPercent, creatorPercentage, mutableMetadata, fakeToken, etc.
@@ -191,6 +187,7 @@ def get_holder_distribution(token_address: str) -> dict:
     return data.get("data", {}) if isinstance(data, dict) else {}
 
 
+@enrichment_cache.cached("creation", provider="birdeye")
 def get_token_creation_info(address: str) -> dict:
     """GET /defi/token_creation_info — token age, creator wallet."""
     data = _get("/defi/token_creation_info", params={"address": address})
@@ -414,6 +411,56 @@ def _build_signal(
 # ---------------------------------------------------------------------------
 # Main scan
 # ---------------------------------------------------------------------------
+def _enrich_candidate(token: dict) -> tuple:
+    """Overlay overview data on `token` (in place) → (top10_pct, rug_flags, age_hours)."""
+    addr = token["address"]
+    top10_pct = None
+    rug_flags: list[str] = []
+    age_hours = None
+
+    # Token overview for detailed data
+    try:
+        overview = get_token_overview(addr)
+        if overview:
+            enriched_data = _normalize_overview(overview)
+            # Merge: keep signal_type, overlay enriched fields
+            for k, v in enriched_data.items():
+                if v and (k not in token or not token[k]):
+                    token[k] = v
+            # Override price/volume/etc from overview (fresher)
+            if enriched_data.get("price"):
+                token["price"] = enriched_data["price"]
+            if enriched_data.get("volume_24h"):
+                token["volume_24h"] = enriched_data["volume_24h"]
+            if enriched_data.get("market_cap"):
+                token["market_cap"] = enriched_data["market_cap"]
+            if enriched_data.get("holder_count"):
+                token["holder_count"] = enriched_data["holder_count"]
+            if enriched_data.get("price_change_1h_pct"):
+                token["price_change_1h_pct"] = enriched_data["price_change_1h_pct"]
+            if enriched_data.get("price_change_24h_pct"):
+                token["price_change_24h_pct"] = enriched_data["price_change_24h_pct"]
+    except Exception as e:
+        _log(f"  Overview error for {token.get('symbol', '?')}: {e}")
+
+    # Token security (rug detection)
+    try:
+        top10_pct, rug_flags, _sec = _analyze_security(addr)
+    except Exception as e:
+        rug_flags = ["security_data_error"]
+        _log(f"  Security error for {token.get('symbol', '?')}: {e}")
+
+    # Creation info (token age)
+    try:
+        creation = get_token_creation_info(addr)
+        if creation:
+            age_hours = _token_age_hours_from_creation(creation)
+    except Exception as e:
+        _log(f"  Creation info error for {token.get('symbol', '?')}: {e}")
+
+    return top10_pct, rug_flags, age_hours
+
+
 def run_scan():
     now = datetime.now(timezone.utc)
     ts_label = now.strftime("%Y-%m-%d_%H-%M")
@@ -478,62 +525,15 @@ def run_scan():
 
     _log(f"Total candidates after dedup: {len(candidates)}")
 
-    # --- 5. Enrich top 3 with overview + security + creation ---
-    _log(f"Enriching top {min(3, len(candidates))} with overview + security + creation info...")
+    # --- 5. Enrich top 3 with overview + security + creation (concurrently) ---
+    picks = [i for i, (t, _) in enumerate(candidates) if t.get("address")][:3]
+    _log(f"Enriching top {len(picks)} with overview + security + creation info...")
+    details = dict(zip(picks, detail_pool.fan_out(lambda i: _enrich_candidate(candidates[i][0]), picks)))
 
     signals = []
-    enriched = 0
-
-    for token, stype in candidates:
-        addr = token.get("address", "")
-        top10_pct = None
-        rug_flags: list[str] = []
-        age_hours = None
-
-        if enriched < 3 and addr:
-            # Token overview for detailed data
-            try:
-                overview = get_token_overview(addr)
-                if overview:
-                    enriched_data = _normalize_overview(overview)
-                    # Merge: keep signal_type, overlay enriched fields
-                    for k, v in enriched_data.items():
-                        if v and (k not in token or not token[k]):
-                            token[k] = v
-                    # Override price/volume/etc from overview (fresher)
-                    if enriched_data.get("price"):
-                        token["price"] = enriched_data["price"]
-                    if enriched_data.get("volume_24h"):
-                        token["volume_24h"] = enriched_data["volume_24h"]
-                    if enriched_data.get("market_cap"):
-                        token["market_cap"] = enriched_data["market_cap"]
-                    if enriched_data.get("holder_count"):
-                        token["holder_count"] = enriched_data["holder_count"]
-                    if enriched_data.get("price_change_1h_pct"):
-                        token["price_change_1h_pct"] = enriched_data["price_change_1h_pct"]
-                    if enriched_data.get("price_change_24h_pct"):
-                        token["price_change_24h_pct"] = enriched_data["price_change_24h_pct"]
-            except Exception as e:
-                _log(f"  Overview error for {token.get('symbol', '?')}: {e}")
-
-            # Token security (rug detection)
-            try:
-                top10_pct, rug_flags, _sec = _analyze_security(addr)
-            except Exception as e:
-                rug_flags = ["security_data_error"]
-                _log(f"  Security error for {token.get('symbol', '?')}: {e}")
-
-            # Creation info (token age)
-            try:
-                creation = get_token_creation_info(addr)
-                if creation:
-                    age_hours = _token_age_hours_from_creation(creation)
-            except Exception as e:
-                _log(f"  Creation info error for {token.get('symbol', '?')}: {e}")
-
-            enriched += 1
-        else:
-            rug_flags = ["not_enriched"]
+
+    for i, (token, stype) in enumerate(candidates):
+        top10_pct, rug_flags, age_hours = details.get(i, (None, ["not_enriched"], None))
 
         # Skip fake or extremely concentrated tokens
         if any("skip_" in f for f in rug_flags):
@@ -600,6 +600,7 @@ def run_scan():
 # ---------------------------------------------------------------------------
 if __name__ == "__main__":
     from job_lease import acquire, release
+    rate_limiter.set_process_priority("background")  # scans yield budget to decision lookups
     
     lease = None
     try:
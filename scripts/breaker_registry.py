@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader v3.1 — Circuit Breaker Registry
+
+Each API client kept its own breaker: binance_client read and rewrote
+circuit_breakers.json on every success and every error, mexc_client and the
+Solana data clients (birdeye, dexscreener, helius, rugcheck) kept module
+globals no other process could see, and cex_price_provider parsed the JSON
+file on every price lookup to find out whether Binance was usable.
+
+One registry now serves every client and every reader:
+
+  - One Breaker per component ("binance_api", "helius_rpc", ...), stored as
+    a 72-byte struct in state/breakers/<component>.cb (struct_file). Writes
+    (failures, transitions) happen under fcntl.flock, so counters are exact
+    across processes; reads are a single lock-free pread — no JSON parsing.
+  - Trip rules: trip_errors within window_s (sliding-window counter) and/or
+    trip_consecutive failures. An open breaker half-opens after cooldown_s;
+    the next failure re-opens it, the next success closes it.
+  - A success only writes when there is something to clear, so the healthy
+    request path never touches the lock.
+  - Transitions (closed→open, half_open→open, →closed) are published to the
+    state_store circuit_breaker_events table.
+
+Client usage:
+  _breaker = breaker_registry.breaker("birdeye_api", trip_consecutive=3, cooldown_s=300)
+  if _breaker.open_for_s(): ...skip the request...
+  _breaker.record_failure() / _breaker.record_success()
+
+Readers:
+  breaker_registry.is_closed("binance_api")   # cex_price_provider
+  breaker_registry.all_states()               # policy_engine, heartbeat, watchdog
+
+CLI:
+  python3 scripts/breaker_registry.py         # every breaker + recent transitions
+"""
+
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
+STATE_DIR = BASE_DIR / "state" / "breakers"
+LEGACY_FILE = BASE_DIR / "state" / "circuit_breakers.json"
+
+sys.path.insert(0, str(SCRIPT_DIR))
+from struct_file import StructFile
+
+DB_PATH = None  # None → state_store.DB_PATH
+
+_Row = namedtuple("_Row", "tripped open_until consecutive window_start window_count prev_count "
+                          "last_failure_at trips errors")
+_STATE = struct.Struct("<9d")
+_EMPTY = _Row(0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+
+_warned = set()
+_schema_ready: set = set()
+
+
+def _log(msg: str):
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] [BREAKER] {msg}", flush=True)
+
+
+def _iso(ts: float) -> str | None:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat() if ts else None
+
+
+def _state_of(row: _Row, now: float) -> str:
+    if not row.tripped:
+        return "closed"
+    return "open" if now < row.open_until else "half_open"
+
+
+def _publish(component: str, from_state: str, to_state: str, reason: str, failures: int):
+    """Append a transition to circuit_breaker_events (never raises into the client)."""
+    _log(f"{component}: {from_state} → {to_state} ({reason})")
+    try:
+        import state_store
+        db = DB_PATH or state_store.DB_PATH
+        if str(db) not in _schema_ready:
+            state_store.ensure_tables(db)
+            _schema_ready.add(str(db))
+        state_store.record_breaker_event(component, from_state, to_state, reason, failures, db_path=db)
+    except Exception as e:
+        _log(f"{component}: could not publish transition: {e}")
+
+
+class Breaker:
+    """Circuit breaker for one component, shared by every process using STATE_DIR."""
+
+    def __init__(self, component: str, trip_errors: int = None, window_s: float = 60,
+                 trip_consecutive: int = None, cooldown_s: float = 300, state_dir: Path = None):
+        self.component = component
+        self.state_dir = state_dir
+        self.configure(trip_errors, window_s, trip_consecutive, cooldown_s)
+        self._shared = StructFile(lambda: Path(self.state_dir or STATE_DIR) / f"{component}.cb", _STATE,
+                                  default=lambda now: _EMPTY, wrap=_Row._make, on_unavailable=self._unavailable)
+
+    def configure(self, trip_errors=None, window_s=60, trip_consecutive=None, cooldown_s=300):
+        self.trip_errors = trip_errors
+        self.window_s = float(window_s or 0)
+        self.trip_consecutive = trip_consecutive
+        self.cooldown_s = float(cooldown_s)
+
+    # ── shared state ──
+
+    def _unavailable(self, e: OSError):
+        if self.component not in _warned:
+            _warned.add(self.component)
+            _log(f"{self.component}: shared breaker unavailable, tracking per process: {e}")
+
+    def _read(self) -> _Row:
+        return self._shared.read()
+
+    def _transact(self, fn):
+        """Apply fn(row, now) → (new_row, result) atomically across threads and processes."""
+        return self._shared.transact(fn)
+
+    def _windowed(self, row: _Row, now: float) -> float:
+        """Errors in the last window_s (sliding-window estimate from two fixed windows)."""
+        if not self.window_s:
+            return row.window_count
+        elapsed = now - row.window_start
+        if elapsed >= 2 * self.window_s:
+            return 0.0
+        if elapsed >= self.window_s:
+            return row.window_count * (1 - (elapsed - self.window_s) / self.window_s)
+        return row.window_count + row.prev_count * (1 - elapsed / self.window_s)
+
+    # ── reads (lock-free) ──
+
+    def state(self) -> str:
+        return _state_of(self._read(), time.time())
+
+    def open_for_s(self) -> float:
+        """Seconds until the breaker half-opens; 0.0 when requests may go out."""
+        row = self._read()
+        return max(0.0, row.open_until - time.time()) if row.tripped else 0.0
+
+    def allow(self) -> bool:
+        return self.open_for_s() <= 0
+
+    def snapshot(self) -> dict:
+        row, now = self._read(), time.time()
+        return {
+            "state": _state_of(row, now),
+            "failure_count": max(int(row.consecutive), int(round(self._windowed(row, now)))),
+            "consecutive_failures": int(row.consecutive),
+            "last_failure_at": _iso(row.last_failure_at),
+            "cooldown_until": _iso(row.open_until) if row.tripped else None,
+            "trips": int(row.trips),
+            "total_errors": int(row.errors),
+        }
+
+    # ── writes ──
+
+    def record_failure(self, error: str = "") -> bool:
+        """Count a failed request. True if this failure opened the breaker."""
+        def fail(row, now):
+            elapsed = now - row.window_start
+            if self.window_s and elapsed >= self.window_s:
+                prev = row.window_count if elapsed < 2 * self.window_s else 0.0
+                row = row._replace(window_start=now - elapsed % self.window_s if prev else now,
+                                   window_count=0.0, prev_count=prev)
+            row = row._replace(consecutive=row.consecutive + 1,
+                               window_count=row.window_count + (1 if self.window_s else 0),
+                               last_failure_at=now, errors=row.errors + 1)
+            before = _state_of(row, now)
+            if before == "open":
+                return row, None
+            windowed = self._windowed(row, now)
+            if before == "half_open" or (self.trip_consecutive and row.consecutive >= self.trip_consecutive):
+                failures = int(row.consecutive)
+            elif self.trip_errors and windowed >= self.trip_errors - 1e-9:
+                failures = int(round(windowed))
+            else:
+                return row, None
+            row = row._replace(tripped=1.0, open_until=now + self.cooldown_s, trips=row.trips + 1)
+            return row, (before, failures)
+
+        opened = self._transact(fail)
+        if opened:
+            before, failures = opened
+            reason = "probe failed" if before == "half_open" else f"{failures} failures"
+            _publish(self.component, before, "open", f"{reason}: {error}"[:200] if error else reason, failures)
+        return bool(opened)
+
+    def record_success(self) -> bool:
+        """Count a successful request: clears the failure streak. True if it closed the breaker."""
+        row = self._read()
+        if not row.tripped and not row.consecutive:
+            return False  # healthy path: nothing to write
+
+        def succeed(row, now):
+            before = _state_of(row, now) if row.tripped else None
+            if row.tripped:
+                row = row._replace(tripped=0.0, open_until=0.0, window_count=0.0, prev_count=0.0)
+            return row._replace(consecutive=0.0), before
+
+        before = self._transact(succeed)
+        if before:
+            _publish(self.component, before, "closed", "request succeeded", 0)
+        return bool(before)
+
+    def reset(self):
+        """Force closed and clear every counter except the lifetime totals."""
+        def clear(row, now):
+            before = _state_of(row, now) if row.tripped else None
+            return _EMPTY._replace(trips=row.trips, errors=row.errors), before
+
+        before = self._transact(clear)
+        if before:
+            _publish(self.component, before, "closed", "manual reset", 0)
+
+
+# ─────────────────────────────────────────────────────────
+# Per-process registry
+# ─────────────────────────────────────────────────────────
+_breakers: dict = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(component: str, **config) -> Breaker:
+    """Shared Breaker for `component`; config (trip_errors, window_s, trip_consecutive, cooldown_s)
+    is applied when given — readers may pass none."""
+    with _breakers_lock:
+        b = _breakers.get(component)
+        if b is None:
+            b = _breakers[component] = Breaker(component, **config)
+        elif config:
+            b.configure(**config)
+        return b
+
+
+def is_closed(component: str) -> bool:
+    """False only while `component` is open (a half-open breaker admits its probe)."""
+    return breaker(component).allow()
+
+
+def read(component: str) -> dict | None:
+    """Snapshot of `component`, or None if no process has registered it yet."""
+    if component not in _breakers and not (STATE_DIR / f"{component}.cb").exists():
+        return None
+    return breaker(component).snapshot()
+
+
+def all_states(include_legacy: bool = True) -> dict:
+    """{component: snapshot} for every registered breaker.
+
+    include_legacy: also report components only found in circuit_breakers.json
+    (written by tools outside the registry), in their original shape.
+    """
+    states = {}
+    if include_legacy and LEGACY_FILE.exists():
+        try:
+            states = {k: v for k, v in json.loads(LEGACY_FILE.read_text()).items() if isinstance(v, dict)}
+        except (OSError, json.JSONDecodeError):
+            states = {}
+    names = set(_breakers)
+    if STATE_DIR.exists():
+        names.update(p.stem for p in STATE_DIR.glob("*.cb"))
+    for name in sorted(names):
+        states[name] = breaker(name).snapshot()
+    return states
+
+
+def main():
+    states = all_states(include_legacy=False)
+    if not states:
+        print(f"No breakers in {STATE_DIR}")
+        return
+    print(f"{'component':<18} {'state':<10} {'failures':>8} {'trips':>6}  cooldown_until")
+    for name, s in states.items():
+        print(f"{name:<18} {s['state']:<10} {s['failure_count']:>8} {s['trips']:>6}  {s['cooldown_until'] or '-'}")
+    try:
+        import state_store
+        events = state_store.get_breaker_events(limit=10, db_path=DB_PATH or state_store.DB_PATH)
+    except Exception:
+        events = []
+    if events:
+        print("\nRecent transitions:")
+        for e in events:
+            print(f"  {e['at']}  {e['component']:<18} {e['from_state']} → {e['to_state']}  {e['reason'] or ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -17,6 +17,7 @@ Used by:
 """
 
 import json
+import sys
 import time
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
@@ -28,7 +29,9 @@ from typing import Optional, Dict, Any
 BASE_DIR = Path(__file__).parent.parent
 STATE_DIR = BASE_DIR / "state"
 CACHE_FILE = STATE_DIR / "price_cache.json"
-CIRCUIT_BREAKERS_FILE = STATE_DIR / "circuit_breakers.json"
+
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import breaker_registry
 
 # Cache TTL (seconds)
 CACHE_TTL_SEC = 120  # 2 minutes
@@ -37,16 +40,10 @@ CACHE_TTL_SEC = 120  # 2 minutes
 # Circuit Breaker Check
 # ---------------------------------------------------------------------------
 def _is_breaker_closed(exchange: str) -> bool:
-    """Check if circuit breaker is closed (exchange available)."""
+    """Check if circuit breaker is closed (exchange available) — shared registry, no file parse."""
     try:
-        if not CIRCUIT_BREAKERS_FILE.exists():
-            return True  # No breaker file = assume available
-        
-        breakers = json.load(open(CIRCUIT_BREAKERS_FILE))
-        breaker = breakers.get(f"{exchange}_api", {})
-        state = breaker.get("state", "closed")
-        return state == "closed"
-    except:
+        return breaker_registry.is_closed(f"{exchange}_api")
+    except Exception:
         return True  # Default to available on error
 
 
@@ -28,6 +28,9 @@ BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
 CONFIG_ENV = BASE_DIR / "config" / ".env"
 SIGNALS_DIR = BASE_DIR / "signals" / "coingecko"
 WATCHLIST_PATH = BASE_DIR / "config" / "watchlist.json"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import http_transport
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -132,11 +135,11 @@ def _get(path: str, params: dict | None = None) -> dict | list:
     headers = {"x-cg-pro-api-key": API_KEY, "accept": "application/json"}
 
     try:
-        resp = requests.get(url, headers=headers, params=params, timeout=10)
+        resp = http_transport.get(url, headers=headers, params=params, timeout=10)
         if resp.status_code == 429:
             _log("Rate limited (429) on PRO — sleeping 60s and retrying once")
             time.sleep(60)
-            resp = requests.get(url, headers=headers, params=params, timeout=10)
+            resp = http_transport.get(url, headers=headers, params=params, timeout=10)
         resp.raise_for_status()
         _reset_circuit()
         data = resp.json()
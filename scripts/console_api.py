@@ -51,6 +51,7 @@ app.add_middleware(
 # 8.2.4 — Auth: API Key (single user)
 # ─────────────────────────────────────────────────────────
 
+import breaker_registry
 import env_loader
 from fastapi import Request, Depends, Security
 from fastapi.security import APIKeyHeader
@@ -128,6 +129,8 @@ def system_status():
     for f in cb_files:
         data = _load_json(f)
         circuits[f.stem] = data.get("state", "UNKNOWN")
+    for name, cb in breaker_registry.all_states(include_legacy=False).items():
+        circuits[name] = cb["state"]
 
     # Uptime from heartbeat
     hb_ts = heartbeat.get("last_heartbeat", heartbeat.get("timestamp"))
@@ -383,6 +386,7 @@ def data_health():
     circuits = {}
     for f in STATE_DIR.glob("*circuit*"):
         circuits[f.stem] = _load_json(f)
+    circuits.update(breaker_registry.all_states(include_legacy=False))
 
     return {
         "price_feeds": len(price_cache),
@@ -579,6 +583,31 @@ def observability():
     }
 
 
+# ─────────────────────────────────────────────────────────
+# 8.5 — Hot-Path Traces (tracing.py → trace_spans)
+# ─────────────────────────────────────────────────────────
+
+@app.get("/api/traces/stats")
+def trace_stats(minutes: float = 60, name: Optional[str] = None):
+    """Per-stage latency percentiles (ms) over the last `minutes`."""
+    import tracing
+    return {"minutes": minutes, "stages": tracing.stage_stats(minutes, name=name)}
+
+
+@app.get("/api/traces/slowest")
+def trace_slowest(limit: int = 10, name: Optional[str] = None, minutes: float = 24 * 60):
+    """Slowest root spans (or spans named `name`) — drill down via /api/traces/{id}."""
+    import tracing
+    return tracing.slowest(min(limit, 100), name=name, since_minutes=minutes)
+
+
+@app.get("/api/traces/{trace_id}")
+def trace_detail(trace_id: str):
+    """Span tree for a trace_id or decision_id (hot path + async cold path)."""
+    import tracing
+    return {"id": trace_id, "spans": tracing.get_trace(trace_id)}
+
+
 # ─────────────────────────────────────────────────────────
 # Health check
 # ─────────────────────────────────────────────────────────
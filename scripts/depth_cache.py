@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader v3.1 — Order-Book Depth Cache
+
+Gate 6 (slippage) and Gate 7 (spread) each fetched their own Binance book
+for the same symbol moments apart — a 100-level book plus a ticker price for
+slippage, then a 5-level book for spread — and walked the levels in a Python
+loop. One evaluation now reads one snapshot:
+
+  - DepthBook holds both sides with prefix sums of quantity and notional, so
+    the fill cost of any size is one bisect + one partial level:
+    slippage_bps(), fill(), spread_bps() and mid all come from the same book.
+  - get_book(symbol) returns, in order: the in-process snapshot if younger
+    than BOOK_TTL_S; the ws_manager depth snapshot (state/depth/<SYMBOL>.json)
+    if younger than WS_MAX_AGE_S; otherwise a single REST depth request.
+  - ws_manager also records one book a minute per symbol (append_tape);
+    load_tape() returns them as DepthBooks for fill_engine replays. Day
+    files older than TAPE_RETENTION_DAYS are deleted as new days start.
+
+Usage:
+  book = depth_cache.get_book("PEPEUSDT")
+  book.mid, book.spread_bps(), book.slippage_bps("BUY", 200)
+
+CLI:
+  python3 scripts/depth_cache.py PEPEUSDT [--usd 200]
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timezone
+from itertools import accumulate
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
+DEPTH_DIR = BASE_DIR / "state" / "depth"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+BOOK_TTL_S = 5.0      # reuse a REST snapshot within one evaluation burst
+WS_MAX_AGE_S = 3.0    # ws_manager snapshots older than this are ignored
+REST_LIMIT = 100      # levels per side from /api/v3/depth
+MIN_FILL_RATIO = 0.95
+INSUFFICIENT_DEPTH_BPS = 99999  # sentinel Gate 6 treats as "depth insufficient"
+TAPE_RETENTION_DAYS = 14  # per-symbol tape day files kept for replays
+
+_books: dict = {}  # symbol → (monotonic fetched_at, DepthBook)
+_lock = threading.Lock()
+_counts = {"memory": 0, "ws": 0, "rest": 0, "errors": 0}
+
+
+def _log(msg: str):
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] [DEPTH] {msg}", flush=True)
+
+
+# ─────────────────────────────────────────────────────────
+# Book model
+# ─────────────────────────────────────────────────────────
+
+class _Side:
+    """One side of the book, best level first, with cumulative qty / notional."""
+
+    def __init__(self, levels, descending: bool):
+        rows = sorted(((float(p), float(q)) for p, q in levels if float(q) > 0),
+                      key=lambda r: r[0], reverse=descending)
+        self.prices = [p for p, _ in rows]
+        self.cum_qty = list(accumulate(q for _, q in rows))
+        self.cum_notional = list(accumulate(p * q for p, q in rows))
+
+    def __len__(self):
+        return len(self.prices)
+
+    def fill(self, quantity: float) -> tuple[float, float]:
+        """(filled_qty, cost) of taking `quantity` from the best level outward."""
+        if not self.prices or quantity <= 0:
+            return 0.0, 0.0
+        i = bisect_left(self.cum_qty, quantity)
+        if i == len(self.prices):
+            return self.cum_qty[-1], self.cum_notional[-1]
+        prev_qty = self.cum_qty[i - 1] if i else 0.0
+        prev_cost = self.cum_notional[i - 1] if i else 0.0
+        return quantity, prev_cost + (quantity - prev_qty) * self.prices[i]
+
+
+class DepthBook:
+    """Immutable order-book snapshot for one symbol."""
+
+    def __init__(self, symbol: str, bids, asks, ts: float = None, source: str = "rest"):
+        self.symbol = symbol.upper()
+        self.bids = _Side(bids or [], descending=True)
+        self.asks = _Side(asks or [], descending=False)
+        self.ts = ts if ts is not None else time.time()
+        self.source = source
+
+    @property
+    def best_bid(self) -> float | None:
+        return self.bids.prices[0] if self.bids.prices else None
+
+    @property
+    def best_ask(self) -> float | None:
+        return self.asks.prices[0] if self.asks.prices else None
+
+    @property
+    def mid(self) -> float | None:
+        if not self.best_bid or not self.best_ask:
+            return None
+        return (self.best_bid + self.best_ask) / 2
+
+    def age_s(self) -> float:
+        return time.time() - self.ts
+
+    def spread_bps(self) -> float | None:
+        """Bid-ask spread relative to best bid, in bps (Gate 7)."""
+        if not self.best_bid or not self.best_ask:
+            return None
+        return round((self.best_ask - self.best_bid) / self.best_bid * 10000, 1)
+
+    def fill(self, side: str, quantity: float) -> tuple[float, float]:
+        """(filled_qty, cost) for a market order of `quantity` base units."""
+        return (self.asks if side.upper() == "BUY" else self.bids).fill(quantity)
+
+    def depth_usd(self, side: str) -> float:
+        """Visible notional on the side a `side` market order would take."""
+        levels = self.asks if side.upper() == "BUY" else self.bids
+        return levels.cum_notional[-1] if len(levels) else 0.0
+
+    def slippage_bps(self, side: str, quantity_usd: float, reference: float = None) -> float | None:
+        """Average-fill slippage vs `reference` (default mid) for a quantity_usd order (Gate 6).
+
+        Returns INSUFFICIENT_DEPTH_BPS if the visible book fills < MIN_FILL_RATIO of it.
+        """
+        reference = reference or self.mid
+        if not reference:
+            return None
+        quantity = quantity_usd / reference
+        filled, cost = self.fill(side, quantity)
+        if filled <= 0 or filled < quantity * MIN_FILL_RATIO:
+            return INSUFFICIENT_DEPTH_BPS
+        avg_price = cost / filled
+        return round(abs(avg_price - reference) / reference * 10000, 1)
+
+
+# ─────────────────────────────────────────────────────────
+# Snapshot sources
+# ─────────────────────────────────────────────────────────
+
+def write_ws_snapshot(symbol: str, bids, asks, ts: float = None):
+    """ws_manager: publish the latest partial-depth book for other processes."""
+    DEPTH_DIR.mkdir(parents=True, exist_ok=True)
+    path = DEPTH_DIR / f"{symbol.upper()}.json"
+    tmp = path.with_suffix(f".tmp.{os.getpid()}")
+    tmp.write_text(json.dumps({"ts": ts if ts is not None else time.time(), "bids": bids, "asks": asks}))
+    os.replace(tmp, path)
+
+
+def append_tape(symbol: str, bids, asks, ts: float = None):
+    """ws_manager: record a snapshot to state/depth/tape/<SYMBOL>/<YYYY-MM-DD>.jsonl (fill_engine replays)."""
+    ts = ts if ts is not None else time.time()
+    day = datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+    path = DEPTH_DIR / "tape" / symbol.upper() / f"{day}.jsonl"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _prune_tape(path.parent, ts)  # once per symbol per day
+    with open(path, "a") as f:
+        f.write(json.dumps({"ts": ts, "bids": bids, "asks": asks}) + "\n")
+
+
+def _prune_tape(tape_dir: Path, now_ts: float):
+    oldest = datetime.fromtimestamp(now_ts - TAPE_RETENTION_DAYS * 86400, tz=timezone.utc).strftime("%Y-%m-%d")
+    for old in tape_dir.glob("*.jsonl"):
+        if old.stem < oldest:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+
+
+def load_tape(symbol: str, since_ts: float = 0.0, until_ts: float = None) -> list:
+    """Recorded snapshots for symbol as DepthBooks, ascending ts."""
+    tape_dir = DEPTH_DIR / "tape" / symbol.upper()
+    if not tape_dir.exists():
+        return []
+    until_ts = until_ts if until_ts is not None else time.time()
+    first_day = datetime.fromtimestamp(since_ts, tz=timezone.utc).strftime("%Y-%m-%d")
+    last_day = datetime.fromtimestamp(until_ts, tz=timezone.utc).strftime("%Y-%m-%d")
+    books = []
+    for path in sorted(tape_dir.glob("*.jsonl")):
+        if not first_day <= path.stem <= last_day:
+            continue
+        for line in path.read_text().splitlines():
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn last line
+            if since_ts <= row["ts"] <= until_ts:
+                books.append(DepthBook(symbol, row["bids"], row["asks"], ts=row["ts"], source="tape"))
+    books.sort(key=lambda b: b.ts)
+    return books
+
+
+def _from_ws(symbol: str) -> DepthBook | None:
+    try:
+        data = json.loads((DEPTH_DIR / f"{symbol}.json").read_text())
+    except (OSError, json.JSONDecodeError):
+        return None
+    if time.time() - float(data.get("ts", 0)) > WS_MAX_AGE_S:
+        return None
+    book = DepthBook(symbol, data.get("bids"), data.get("asks"), ts=float(data["ts"]), source="binance_ws")
+    return book if book.mid else None
+
+
+def _from_rest(symbol: str, limit: int) -> DepthBook | None:
+    import binance_client
+
+    raw = binance_client.get_order_book(symbol, limit=limit)
+    if not raw or not raw.get("bids") or not raw.get("asks"):
+        return None
+    return DepthBook(symbol, raw["bids"], raw["asks"], source="rest")
+
+
+def _deep_enough(book: DepthBook, need_usd: float) -> bool:
+    return not need_usd or min(book.depth_usd("BUY"), book.depth_usd("SELL")) >= need_usd
+
+
+def get_book(symbol: str, max_age_s: float = None, limit: int = REST_LIMIT,
+             need_usd: float = None) -> DepthBook | None:
+    """Freshest available snapshot for symbol; at most one REST request per BOOK_TTL_S.
+
+    need_usd: skip snapshots (the ws stream carries 20 levels) whose visible depth on
+    either side is below this order size, so the REST book (REST_LIMIT levels) is used.
+    """
+    symbol = symbol.upper()
+    max_age_s = BOOK_TTL_S if max_age_s is None else max_age_s
+    now = time.monotonic()
+    with _lock:
+        hit = _books.get(symbol)
+        if hit and now - hit[0] <= max_age_s and (hit[1].source == "rest" or _deep_enough(hit[1], need_usd)):
+            _counts["memory"] += 1
+            return hit[1]
+    book = _from_ws(symbol)
+    if book and not _deep_enough(book, need_usd):
+        book = None
+    source = "ws"
+    if not book:
+        try:
+            book = _from_rest(symbol, limit)
+        except Exception as e:
+            _log(f"{symbol}: depth fetch failed: {e}")
+        source = "rest" if book else "errors"
+    with _lock:
+        _counts[source] += 1
+        if book:
+            _books[symbol] = (now, book)
+    return book
+
+
+def invalidate(symbol: str = None):
+    with _lock:
+        if symbol:
+            _books.pop(symbol.upper(), None)
+        else:
+            _books.clear()
+
+
+def stats() -> dict:
+    with _lock:
+        return dict(_counts)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Order-book depth snapshot")
+    parser.add_argument("symbol")
+    parser.add_argument("--usd", type=float, default=200.0, help="order size for the slippage estimate")
+    args = parser.parse_args()
+    book = get_book(args.symbol)
+    if not book:
+        print(f"No book for {args.symbol.upper()}")
+        sys.exit(1)
+    print(f"{book.symbol} [{book.source}, {book.age_s():.1f}s old] "
+          f"bid {book.best_bid} / ask {book.best_ask} / mid {book.mid:.10g}")
+    print(f"  spread:   {book.spread_bps()} bps")
+    for side in ("BUY", "SELL"):
+        print(f"  {side:<4} ${args.usd:,.0f}: {book.slippage_bps(side, args.usd)} bps slippage")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader v3.1 — Shared Detail Pool
+
+Per-token detail fetches (Birdeye overview + security + creation,
+DexScreener pair lookups) used to run one after another inside each
+scanner. fan_out() runs them concurrently on one process-wide thread pool,
+so a scanner's detail phase takes about the slowest lookup, not the sum.
+
+  - Results keep input order; the first exception is re-raised only after
+    every call has finished.
+  - Each call runs in a copy of the caller's context, so rate_limiter
+    priority carries over to the pool thread.
+  - A fan_out() inside a detail call runs inline: nesting cannot starve the
+    pool.
+  - The pool is rebuilt lazily after fork (threads do not survive it).
+
+The API clients and scan_orchestrator both build on this module; it imports
+neither.
+
+Usage:
+  details = detail_pool.fan_out(lambda addr: get_token_overview(addr), addresses)
+"""
+
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+DETAIL_WORKERS = 8
+
+_detail_pool = None
+_detail_lock = threading.Lock()
+_in_detail = threading.local()
+
+
+def _reset_detail_pool():
+    global _detail_pool, _detail_lock
+    _detail_pool = None  # pool threads do not survive fork
+    _detail_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_detail_pool)
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _detail_pool
+    with _detail_lock:
+        if _detail_pool is None:
+            _detail_pool = ThreadPoolExecutor(max_workers=DETAIL_WORKERS, thread_name_prefix="scan-detail")
+        return _detail_pool
+
+
+def _detail_call(fn, item):
+    _in_detail.active = True
+    try:
+        return fn(item)
+    finally:
+        _in_detail.active = False
+
+
+def fan_out(fn, items) -> list:
+    """[fn(item) for item in items], run concurrently on the shared detail pool.
+
+    Results keep input order; the first exception is re-raised once every call
+    has finished. Each call runs in a copy of the caller's context (rate_limiter
+    priority). Inside a detail call it runs inline, so nesting cannot starve the pool.
+    """
+    items = list(items)
+    if len(items) < 2 or getattr(_in_detail, "active", False):
+        return [fn(item) for item in items]
+    pool = _pool()
+    futures = [pool.submit(contextvars.copy_context().run, _detail_call, fn, item) for item in items]
+    wait(futures)
+    return [f.result() for f in futures]
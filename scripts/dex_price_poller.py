@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader v3.1 — Batched DEX Price Poller
+
+price_cache.json is fed from Binance only (price_snapshot, ws_manager), so
+Solana DEX positions had no live price: heartbeat and position_monitor each
+fell back to one Birdeye token_overview call per position, serially.
+
+This poller prices every open DEX position and watchlist token address in
+bulk through DexScreener /tokens/v1/{chain}/{a,b,...} — BATCH_SIZE (30)
+addresses per request, so 300 positions take 10 requests — and merges the
+results into price_cache.json keyed by token address, in the same entry
+shape ws_manager writes:
+
+  {"price", "source": "dexscreener", "timestamp", "liquidity_usd",
+   "volume_24h", "pair_address"}
+
+The most liquid pair quoting the token as base wins. Addresses DexScreener
+does not list are reported as missing (callers keep their Birdeye fallback
+for those).
+
+  poll()                        # collect → fetch → merge; {address: entry}
+  fetch_prices(addresses)       # bulk pricing only, no writes
+  price_of(price_cache[key])    # float from either cache entry shape
+
+Cron: job_supervisor "dex_price_poller" every 60 s, or
+  python3 scripts/dex_price_poller.py [--dry-run]
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
+STATE_DIR = BASE_DIR / "state"
+PRICE_CACHE_PATH = STATE_DIR / "price_cache.json"
+WATCHLIST_PATH = BASE_DIR / "config" / "watchlist.json"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+BATCH_SIZE = 30  # DexScreener /tokens/v1 limit
+CEX_EXCHANGES = ("binance", "mexc")
+STALE_ENTRY_S = 3600  # timestamped cache entries older than this are dropped on merge
+
+
+def _log(msg: str):
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] [DEX-PRICE] {msg}", flush=True)
+
+
+def _sf(val, default=0.0) -> float:
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return default
+
+
+def price_of(entry) -> float | None:
+    """Price from a price_cache.json value (bare float or {"price", ...} dict); None if unusable."""
+    if isinstance(entry, dict):
+        entry = entry.get("price")
+    price = _sf(entry, 0.0)
+    return price if price > 0 else None
+
+
+# ─────────────────────────────────────────────────────────
+# What to price
+# ─────────────────────────────────────────────────────────
+
+def is_dex_position(pos: dict) -> bool:
+    return (pos.get("exchange") not in CEX_EXCHANGES
+            and (pos.get("chain") or "solana").lower() == "solana"
+            and bool(pos.get("token_address")))
+
+
+def _watchlist_addresses(path: Path = None) -> list[str]:
+    """Token addresses from watchlist entries like {"symbol", "token_address"} or "dex_tokens"."""
+    try:
+        data = json.loads(Path(path or WATCHLIST_PATH).read_text())
+    except (OSError, json.JSONDecodeError):
+        return []
+    entries = list(data.get("symbols", [])) + list(data.get("dex_tokens", []))
+    out = []
+    for e in entries:
+        if isinstance(e, dict):
+            if (e.get("chain") or "solana").lower() == "solana" and (e.get("token_address") or e.get("address")):
+                out.append(e.get("token_address") or e.get("address"))
+        elif isinstance(e, str) and not e.endswith("USDT") and len(e) >= 32:
+            out.append(e)  # bare Solana mint
+    return out
+
+
+def collect_addresses(positions: list = None, include_watchlist: bool = True) -> list[str]:
+    """Unique token addresses of open DEX positions (default: state_store) + watchlist tokens."""
+    if positions is None:
+        import state_store
+        positions = state_store.get_open_positions()
+    addresses = [p["token_address"] for p in positions if is_dex_position(p)]
+    if include_watchlist:
+        addresses += _watchlist_addresses()
+    return list(dict.fromkeys(addresses))
+
+
+# ─────────────────────────────────────────────────────────
+# Pricing
+# ─────────────────────────────────────────────────────────
+
+def fetch_prices(addresses: list[str], chain: str = "solana") -> dict:
+    """{address: entry} for every address DexScreener prices; one request per BATCH_SIZE addresses."""
+    import dexscreener_client
+
+    wanted = list(dict.fromkeys(a for a in addresses if a))
+    timestamp = datetime.now(timezone.utc).isoformat()
+    out = {}
+    for start in range(0, len(wanted), BATCH_SIZE):
+        chunk = wanted[start:start + BATCH_SIZE]
+        try:
+            pairs = dexscreener_client.get_tokens(chain, chunk)
+        except Exception as e:
+            _log(f"batch {start // BATCH_SIZE + 1}: {e}")
+            continue
+        members = set(chunk)
+        best = {}
+        for pair in pairs or []:
+            base = (pair.get("baseToken") or {}).get("address")
+            price = _sf(pair.get("priceUsd"))
+            if base not in members or price <= 0:
+                continue
+            liquidity = _sf((pair.get("liquidity") or {}).get("usd"))
+            if base not in best or liquidity > best[base]["liquidity_usd"]:
+                best[base] = {
+                    "price": price,
+                    "source": "dexscreener",
+                    "timestamp": timestamp,
+                    "liquidity_usd": liquidity,
+                    "volume_24h": _sf((pair.get("volume") or {}).get("h24")),
+                    "pair_address": pair.get("pairAddress"),
+                }
+        out.update(best)
+    return out
+
+
+def _is_stale(entry, cutoff: datetime) -> bool:
+    if not isinstance(entry, dict) or not entry.get("timestamp"):
+        return False  # undated (e.g. Binance snapshot floats, dated by price_history.json)
+    try:
+        ts = datetime.fromisoformat(str(entry["timestamp"]).replace("Z", "+00:00"))
+    except ValueError:
+        return True
+    return (ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)) < cutoff
+
+
+def merge_price_cache(entries: dict, path: Path = None, live: set = None) -> int:
+    """Merge entries into price_cache.json (flock + atomic replace). Returns keys written.
+
+    Entries timestamped more than STALE_ENTRY_S ago are dropped; with `live`, so are
+    dexscreener entries for addresses not in it (closed positions, removed watchlist tokens).
+    """
+    if not entries:
+        return 0
+    path = Path(path or PRICE_CACHE_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=STALE_ENTRY_S)
+    with open(path.with_suffix(".lock"), "w") as lockfile:
+        fcntl.flock(lockfile, fcntl.LOCK_EX)
+        try:
+            try:
+                cache = json.loads(path.read_text())
+            except (OSError, json.JSONDecodeError):
+                cache = {}
+            cache.update(entries)
+            for key in [k for k, v in cache.items() if _is_stale(v, cutoff) or (
+                    live is not None and k not in live and isinstance(v, dict)
+                    and v.get("source") == "dexscreener")]:
+                del cache[key]
+            tmp = path.with_suffix(f".tmp.{os.getpid()}")
+            tmp.write_text(json.dumps(cache, indent=2))
+            os.replace(tmp, path)
+        finally:
+            fcntl.flock(lockfile, fcntl.LOCK_UN)
+    return len(entries)
+
+
+def poll(positions: list = None, include_watchlist: bool = True, dry_run: bool = False) -> dict:
+    """Price all DEX addresses in bulk and merge them into price_cache.json. Returns {address: entry}."""
+    addresses = collect_addresses(positions, include_watchlist=include_watchlist)
+    if not addresses:
+        return {}
+    t0 = time.monotonic()
+    prices = fetch_prices(addresses)
+    requests_made = -(-len(addresses) // BATCH_SIZE)
+    missing = len(addresses) - len(prices)
+    _log(f"priced {len(prices)}/{len(addresses)} addresses in {requests_made} request(s), "
+         f"{time.monotonic() - t0:.1f}s" + (f" — {missing} not listed" if missing else ""))
+    if not dry_run:
+        # A full collection (job run) knows every live address; partial callers leave others alone
+        merge_price_cache(prices, live=set(addresses) if positions is None and include_watchlist else None)
+    return prices
+
+
+def run():
+    """job_supervisor entry point."""
+    poll()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched DEX price poller")
+    parser.add_argument("--dry-run", action="store_true", help="print prices, don't write price_cache.json")
+    args = parser.parse_args()
+    for address, entry in poll(dry_run=args.dry_run).items():
+        print(f"  {address}  ${entry['price']:.10g}  liq=${entry['liquidity_usd']:,.0f}")
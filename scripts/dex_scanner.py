@@ -21,7 +21,6 @@ from birdeye_client import _get, _log
 
 BASE_DIR = Path(os.environ.get("SANAD_HOME", Path(__file__).resolve().parents[1]))
 SIGNALS_DIR = BASE_DIR / "signals" / "dexscreener"
-CRON_HEALTH = BASE_DIR / "state" / "cron_health.json"
 
 def scan_trending() -> list[dict]:
     """Get trending Solana tokens from Birdeye."""
@@ -138,18 +137,12 @@ def main():
     
     # Update cron health
     try:
-        if CRON_HEALTH.exists():
-            health = json.loads(CRON_HEALTH.read_text())
-        else:
-            health = {}
-        
-        health["dex_scanner"] = {
+        from job_supervisor import update_cron_health
+        update_cron_health("dex_scanner", {
             "last_run": datetime.now(timezone.utc).isoformat(),
             "status": "OK",
             "signal_count": len(unique_signals)
-        }
-        
-        CRON_HEALTH.write_text(json.dumps(health, indent=2))
+        })
     except Exception as e:
         _log(f"Cron health update failed: {e}")
     
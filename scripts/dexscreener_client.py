@@ -27,6 +27,13 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
 SIGNALS_DIR = BASE_DIR / "signals" / "dexscreener"
 WATCHLIST_PATH = BASE_DIR / "config" / "watchlist.json"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import breaker_registry
+import detail_pool
+import enrichment_cache
+import http_transport
+import rate_limiter
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -35,13 +42,13 @@ BASE_URL = "https://api.dexscreener.com"
 
 # Rate limiting: max 60 calls/minute
 MAX_CALLS_PER_MINUTE = 60
-_call_timestamps: list[float] = []
+_bucket = rate_limiter.bucket("dexscreener", MAX_CALLS_PER_MINUTE, 60)
 
-# Circuit breaker
-_consecutive_failures = 0
-_circuit_open_until = 0.0
+# Circuit breaker (shared across processes — breaker_registry)
 CIRCUIT_BREAKER_THRESHOLD = 3
 CIRCUIT_BREAKER_COOLDOWN = 300
+_breaker = breaker_registry.breaker("dexscreener_api", trip_consecutive=CIRCUIT_BREAKER_THRESHOLD,
+                                    cooldown_s=CIRCUIT_BREAKER_COOLDOWN)
 
 
 def _log(msg: str):
@@ -52,44 +59,30 @@ def _log(msg: str):
 # Rate limiter
 # ---------------------------------------------------------------------------
 def _rate_limit():
-    global _call_timestamps
-    now = time.time()
-    _call_timestamps = [t for t in _call_timestamps if now - t < 60]
-    if len(_call_timestamps) >= MAX_CALLS_PER_MINUTE:
-        sleep_for = 60 - (now - _call_timestamps[0]) + 0.5
-        if sleep_for > 0:
-            _log(f"Rate limit: sleeping {sleep_for:.1f}s")
-            time.sleep(sleep_for)
-    _call_timestamps.append(time.time())
+    # Shared across processes; raises rate_limiter.RateLimited when this caller's
+    # priority can't wait for budget (hot path fails fast instead of stalling)
+    _bucket.limit()
 
 
 # ---------------------------------------------------------------------------
 # Circuit breaker
 # ---------------------------------------------------------------------------
 def _check_circuit():
-    global _circuit_open_until
-    if _consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD:
-        if time.time() < _circuit_open_until:
-            remaining = int(_circuit_open_until - time.time())
-            raise RuntimeError(
-                f"Circuit breaker OPEN — {remaining}s remaining after "
-                f"{CIRCUIT_BREAKER_THRESHOLD} consecutive failures"
-            )
-        _reset_circuit()
+    remaining = _breaker.open_for_s()
+    if remaining:
+        raise RuntimeError(
+            f"Circuit breaker OPEN — {remaining:.0f}s remaining after "
+            f"{CIRCUIT_BREAKER_THRESHOLD} consecutive failures"
+        )
 
 
 def _record_failure():
-    global _consecutive_failures, _circuit_open_until
-    _consecutive_failures += 1
-    if _consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD:
-        _circuit_open_until = time.time() + CIRCUIT_BREAKER_COOLDOWN
+    if _breaker.record_failure():
         _log(f"Circuit breaker OPENED — pausing API calls for {CIRCUIT_BREAKER_COOLDOWN}s")
 
 
 def _reset_circuit():
-    global _consecutive_failures, _circuit_open_until
-    _consecutive_failures = 0
-    _circuit_open_until = 0.0
+    _breaker.record_success()
 
 
 # ---------------------------------------------------------------------------
@@ -100,16 +93,17 @@ def _get(path: str, params: dict | None = None) -> dict | list:
     _rate_limit()
     url = f"{BASE_URL}{path}"
     try:
-        resp = requests.get(
+        resp = http_transport.get(
             url,
             params=params,
             headers={"accept": "application/json"},
             timeout=10,
         )
         if resp.status_code == 429:
-            _log("Rate limited (429) — sleeping 60s and retrying once")
-            time.sleep(60)
-            resp = requests.get(
+            # Back off in every process; retry once if this caller can afford the wait
+            _bucket.penalize(rate_limiter.retry_after_s(resp.headers, 60))
+            _bucket.limit()
+            resp = http_transport.get(
                 url, params=params,
                 headers={"accept": "application/json"}, timeout=10,
             )
@@ -198,12 +192,8 @@ def _load_watchlist_symbols() -> set[str]:
 # ---------------------------------------------------------------------------
 # Pair data enrichment
 # ---------------------------------------------------------------------------
-def _enrich_with_pair_data(token_address: str) -> dict | None:
-    """Search for Solana pairs for a token address and return best pair data."""
-    try:
-        pairs = search_pairs(token_address)
-    except Exception:
-        return None
+def _best_solana_pair(token_address: str) -> dict | None:
+    pairs = search_pairs(token_address)
 
     # Filter to Solana pairs only, pick highest volume
     sol_pairs = [p for p in pairs if p.get("chainId") == "solana"]
@@ -213,6 +203,15 @@ def _enrich_with_pair_data(token_address: str) -> dict | None:
     return sol_pairs[0]
 
 
+def _enrich_with_pair_data(token_address: str) -> dict | None:
+    """Search for Solana pairs for a token address and return best pair data (shared cache)."""
+    try:
+        return enrichment_cache.get_or_fetch("dexscreener", "solana", token_address, "pairs",
+                                             lambda: _best_solana_pair(token_address))
+    except Exception:
+        return None
+
+
 def _pair_age_hours(pair: dict) -> float | None:
     created = pair.get("pairCreatedAt")
     if not created:
@@ -364,34 +363,29 @@ def run_scan():
     _log(f"Solana boosts (totalAmount>=50): {len(sol_boosts)}")
     _log(f"Solana CTOs: {len(sol_ctos)}")
 
-    # 5. Enrich with pair data and apply quality filters
-    signals = []
+    # 5. Enrich with pair data (concurrently) and apply quality filters
+    picks = []
     seen_addresses = set()
-
-    for b in sol_boosts:
-        addr = b.get("tokenAddress", "")
+    for entry, stype in [(b, "BOOSTED_TOKEN") for b in sol_boosts] + [(c, "COMMUNITY_TAKEOVER") for c in sol_ctos]:
+        addr = entry.get("tokenAddress", "")
         if not addr or addr in seen_addresses:
             continue
         seen_addresses.add(addr)
-        pair = _enrich_with_pair_data(addr)
-        if not pair:
-            continue
-        if not _passes_quality_filter(pair):
-            continue
-        boost_amt = b.get("totalAmount") or b.get("amount") or 0
-        signals.append(_build_signal(b, pair, "BOOSTED_TOKEN", boost_amt))
+        picks.append((entry, stype))
 
-    for c in sol_ctos:
-        addr = c.get("tokenAddress", "")
-        if not addr or addr in seen_addresses:
-            continue
-        seen_addresses.add(addr)
-        pair = _enrich_with_pair_data(addr)
+    pairs = detail_pool.fan_out(lambda p: _enrich_with_pair_data(p[0]["tokenAddress"]), picks)
+
+    signals = []
+    for (entry, stype), pair in zip(picks, pairs):
         if not pair:
             continue
         if not _passes_quality_filter(pair):
             continue
-        signals.append(_build_signal(c, pair, "COMMUNITY_TAKEOVER", None))
+        if stype == "BOOSTED_TOKEN":
+            boost_amt = entry.get("totalAmount") or entry.get("amount") or 0
+            signals.append(_build_signal(entry, pair, stype, boost_amt))
+        else:
+            signals.append(_build_signal(entry, pair, stype, None))
 
     _log(f"Solana signals after filter: {len(signals)} found")
     for i, s in enumerate(signals, 1):
@@ -420,6 +414,8 @@ def run_scan():
 # Entry point
 # ---------------------------------------------------------------------------
 if __name__ == "__main__":
+    rate_limiter.set_process_priority("background")  # scans yield budget to decision lookups
+
     # Acquire lease for liveness tracking
     if HAS_LEASE:
         acquire("dex_scanner", ttl_seconds=300)  # 5 min
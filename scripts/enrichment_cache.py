@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader v3.1 — Token Enrichment Cache
+
+One cache for per-token provider lookups shared by the scanners, the router
+(market_data_enricher) and the pipeline (enrich_signal_with_onchain_data).
+The same token is looked up by several of them within minutes, each through
+rate-limited clients whose 429 handling sleeps 5–60 s.
+
+  - Keyed by (chain, address, field_group). Each group has its own TTL
+    (FIELD_TTLS): creation info never changes, security flags move slowly,
+    liquidity/price go stale in a minute.
+  - Two tiers: an in-process dict, then the state_store enrichment_cache
+    table so separate cron processes (scanners, router, pipeline) share
+    results.
+  - Request coalescing: concurrent misses for one key make one provider
+    call. Threads in a process wait on the leader's Future; other processes
+    see the leader's lease row and poll for its result (bounded by
+    COALESCE_WAIT_S, after which they fetch themselves).
+  - Empty results and exceptions are never cached — the next caller retries.
+    When the provider's shared budget is exhausted (rate_limiter.RateLimited)
+    the last known value is served even if expired, instead of failing.
+  - Per-provider hit/miss/coalesced/error counters, flushed to
+    enrichment_cache_stats every STATS_FLUSH_INTERVAL_S and at exit.
+
+DB errors degrade to in-process caching (warned once); a missing database
+is never created. SANAD_ENRICH_CACHE=0 bypasses the cache entirely.
+
+Usage:
+  @enrichment_cache.cached("overview", provider="birdeye")
+  def get_token_overview(address): ...
+
+  enrichment_cache.get_or_fetch("helius", "solana", mint, "holders",
+                                lambda: helius_client.get_token_holders(mint))
+
+CLI:
+  python3 scripts/enrichment_cache.py stats [--days 1]
+  python3 scripts/enrichment_cache.py prune
+"""
+
+import argparse
+import atexit
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import state_store
+from rate_limiter import RateLimited
+
+ENABLED = os.environ.get("SANAD_ENRICH_CACHE", "1") != "0"
+
+# Seconds each field group stays fresh
+FIELD_TTLS = {
+    "creation": 30 * 86400,   # creation tx / creator wallet — immutable
+    "security": 3600,         # mint/freeze authority, top-10 share, creator %
+    "rugcheck": 15 * 60,      # risk report (LP lock can change)
+    "holders": 10 * 60,       # top holder accounts
+    "pairs": 120,             # best DEX pair (liquidity, volume)
+    "overview": 60,           # price, liquidity, 24h volume
+    "ticker": 60,             # CEX 24h ticker
+}
+DEFAULT_TTL_S = 60
+LEASE_S = 15                  # cross-process in-flight lease (≥ one slow provider call)
+COALESCE_WAIT_S = 20
+POLL_INTERVAL_S = 0.1
+STATS_FLUSH_INTERVAL_S = 60
+MEMORY_MAX_ENTRIES = 5000
+DB_PATH = None  # None → state_store.DB_PATH
+
+_memory: dict = {}            # key → (expires_at, value_json)
+_memory_lock = threading.Lock()  # eviction iterates _memory; fan_out workers write it concurrently
+_inflight: dict = {}          # key → Future(value_json | None)
+_lock = threading.Lock()
+_tls = threading.local()
+_counts: dict = {}            # provider → Counter (lifetime of this process)
+_pending: dict = {}           # provider → Counter (not yet flushed)
+_stats_lock = threading.Lock()
+_last_stats_flush = time.monotonic()
+_db_warned = False
+
+
+def _log(msg: str):
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] [ENRICH-CACHE] {msg}", flush=True)
+
+
+def _key(chain: str, address: str, group: str) -> tuple:
+    address = (address or "").strip()
+    if address.startswith("0x"):
+        address = address.lower()  # EVM addresses are case-insensitive; base58 is not
+    return ((chain or "solana").lower(), address, group)
+
+
+def _db():
+    db = DB_PATH or state_store.DB_PATH
+    return db if Path(db).exists() else None
+
+
+def _db_call(fn, *args, **kwargs):
+    """Run a state_store helper; None on error (cache degrades to in-process)."""
+    global _db_warned
+    db = _db()
+    if db is None:
+        return None
+    try:
+        return fn(*args, db_path=db, **kwargs)
+    except Exception as e:
+        if not _db_warned:
+            _db_warned = True
+            _log(f"shared cache unavailable, using in-process only: {e}")
+        return None
+
+
+# ─────────────────────────────────────────────────────────
+# Metrics
+# ─────────────────────────────────────────────────────────
+
+def _count(provider: str, kind: str):
+    with _stats_lock:
+        _counts.setdefault(provider, Counter())[kind] += 1
+        _pending.setdefault(provider, Counter())[kind] += 1
+    if time.monotonic() - _last_stats_flush >= STATS_FLUSH_INTERVAL_S:
+        flush_stats()
+
+
+def flush_stats() -> int:
+    """Write pending counters to enrichment_cache_stats. Returns providers flushed."""
+    global _last_stats_flush
+    with _stats_lock:
+        pending = {p: dict(c) for p, c in _pending.items() if c}
+        _pending.clear()
+        _last_stats_flush = time.monotonic()
+    if not pending:
+        return 0
+    day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    _db_call(state_store.add_enrichment_stats, pending, day)
+    return len(pending)
+
+
+atexit.register(flush_stats)
+
+
+def _with_rate(counts: dict) -> dict:
+    out = {}
+    for provider, c in counts.items():
+        c = {k: int(c.get(k, 0) or 0) for k in ("hits", "misses", "coalesced", "errors")}
+        served = c["hits"] + c["coalesced"]
+        total = served + c["misses"]
+        c["hit_rate"] = round(served / total, 4) if total else 0.0
+        out[provider] = c
+    return out
+
+
+def stats() -> dict:
+    """This process's {provider: {"hits", "misses", "coalesced", "errors", "hit_rate"}}."""
+    with _stats_lock:
+        return _with_rate({p: dict(c) for p, c in _counts.items()})
+
+
+def provider_stats(days: int = 1) -> dict:
+    """Same shape as stats(), summed across processes over the last `days` UTC days."""
+    flush_stats()
+    since = (datetime.now(timezone.utc) - timedelta(days=max(days, 1) - 1)).strftime("%Y-%m-%d")
+    return _with_rate(_db_call(state_store.get_enrichment_stats, since) or {})
+
+
+# ─────────────────────────────────────────────────────────
+# Lookup
+# ─────────────────────────────────────────────────────────
+
+def _remember(key: tuple, value_json: str, expires_at: float):
+    with _memory_lock:
+        if len(_memory) >= MEMORY_MAX_ENTRIES:
+            now = time.time()
+            for k in [k for k, (exp, _) in _memory.items() if exp <= now]:
+                _memory.pop(k, None)
+            if len(_memory) >= MEMORY_MAX_ENTRIES:
+                for k in list(_memory)[:MEMORY_MAX_ENTRIES // 2]:  # oldest inserted first
+                    _memory.pop(k, None)
+        _memory[key] = (expires_at, value_json)
+
+
+def _from_db(key: tuple):
+    hit = _db_call(state_store.enrichment_cache_get, *key)
+    if hit:
+        _remember(key, *hit)
+        return hit[0]
+    return None
+
+
+def _stale(key: tuple):
+    """Last stored value for key regardless of expiry (rate-limited fallback), or None."""
+    entry = _memory.get(key)
+    if entry is not None:
+        return entry[1]
+    hit = _db_call(state_store.enrichment_cache_get, *key, now=0)
+    return hit[0] if hit else None
+
+
+def _resolve(provider: str, key: tuple, fetch, ttl: float):
+    """Leader path: shared cache, cross-process lease, then the provider. → (value, value_json)."""
+    value_json = _from_db(key)
+    if value_json is not None:
+        _count(provider, "hits")
+        return json.loads(value_json), value_json
+
+    owner = f"{os.getpid()}:{threading.get_ident()}"
+    claimed = _db_call(state_store.enrichment_cache_claim, *key, owner, LEASE_S)
+    if claimed is False:
+        # Another process is fetching this key — wait for its result
+        deadline = time.monotonic() + COALESCE_WAIT_S
+        while time.monotonic() < deadline:
+            time.sleep(POLL_INTERVAL_S)
+            value_json = _from_db(key)
+            if value_json is not None:
+                _count(provider, "coalesced")
+                return json.loads(value_json), value_json
+            if _db_call(state_store.enrichment_cache_claim, *key, owner, LEASE_S):
+                value_json = _from_db(key)  # the owner may have stored it just before releasing
+                if value_json is not None:
+                    _db_call(state_store.enrichment_cache_put, *key, provider, None, 0, owner=owner)
+                    _count(provider, "coalesced")
+                    return json.loads(value_json), value_json
+                break  # lease released/expired without a value: fetch ourselves
+
+    _count(provider, "misses")
+    _tls.last_cached = False
+    try:
+        value = fetch()
+    except Exception as e:
+        _count(provider, "errors")
+        _db_call(state_store.enrichment_cache_put, *key, provider, None, 0, owner=owner)
+        stale = _stale(key) if isinstance(e, RateLimited) else None
+        if stale is None:
+            raise
+        return json.loads(stale), stale
+    value_json = json.dumps(value, default=str) if value else None
+    if value_json is not None:
+        _remember(key, value_json, time.time() + ttl)
+    _db_call(state_store.enrichment_cache_put, *key, provider, value_json, ttl, owner=owner)
+    return value, value_json
+
+
+def get_or_fetch(provider: str, chain: str, address: str, group: str, fetch, ttl: float = None):
+    """Cached value for (chain, address, group), calling fetch() at most once per miss.
+
+    provider: metrics label ("birdeye", "rugcheck", ...)
+    fetch: zero-argument callable; its exceptions propagate (and are not cached)
+    ttl: seconds, default FIELD_TTLS[group]
+    Returned objects are private copies — callers may mutate them.
+    """
+    _tls.last_cached = True
+    if not ENABLED or not address:
+        _tls.last_cached = False
+        return fetch()
+    key = _key(chain, address, group)
+    entry = _memory.get(key)
+    if entry is not None and entry[0] > time.time():
+        _count(provider, "hits")
+        return json.loads(entry[1])
+
+    with _lock:
+        fut = _inflight.get(key)
+        leader = fut is None
+        if leader:
+            fut = _inflight[key] = Future()
+    if not leader:
+        try:
+            value_json = fut.result(timeout=COALESCE_WAIT_S)
+        except FutureTimeout:
+            _tls.last_cached = False
+            return fetch()  # leader stuck on a slow provider: don't stall this caller too
+        _count(provider, "coalesced")
+        return json.loads(value_json) if value_json is not None else None
+
+    try:
+        value, value_json = _resolve(provider, key, fetch, FIELD_TTLS.get(group, DEFAULT_TTL_S) if ttl is None else ttl)
+        fut.set_result(value_json)
+        return value
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+
+
+def last_lookup_cached() -> bool:
+    """True if this thread's last get_or_fetch() was served without calling the provider."""
+    return getattr(_tls, "last_cached", False)
+
+
+def cached(group: str, provider: str, chain: str = "solana", ttl: float = None):
+    """Decorator for single-address provider getters: fn(address) → cached fn(address).
+
+    The undecorated function stays available as fn.uncached.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(address):
+            return get_or_fetch(provider, chain, address, group, lambda: fn(address), ttl=ttl)
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
+
+
+def invalidate(chain: str, address: str, group: str = None):
+    """Drop in-process entries for a token (all groups unless `group`)."""
+    chain_key, addr_key, _ = _key(chain, address, group or "")
+    with _memory_lock:
+        for k in [k for k in _memory if k[0] == chain_key and k[1] == addr_key and (group is None or k[2] == group)]:
+            _memory.pop(k, None)
+
+
+def prune(db_path=None) -> int:
+    """Delete shared entries expired more than a day ago. Returns rows deleted."""
+    return state_store.prune_enrichment_cache(time.time() - 86400, db_path=db_path or DB_PATH or state_store.DB_PATH)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Token enrichment cache")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_stats = sub.add_parser("stats", help="per-provider hit rates")
+    p_stats.add_argument("--days", type=int, default=1)
+    sub.add_parser("prune", help="delete long-expired entries")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "stats":
+        rows = provider_stats(args.days)
+        if not rows:
+            print("No enrichment cache activity in window.")
+            return
+        print(f"{'provider':<14} {'hits':>8} {'coalesced':>10} {'misses':>8} {'errors':>7} {'hit_rate':>9}")
+        for provider, c in rows.items():
+            print(f"{provider:<14} {c['hits']:>8} {c['coalesced']:>10} {c['misses']:>8} "
+                  f"{c['errors']:>7} {c['hit_rate']:>9.1%}")
+    elif args.cmd == "prune":
+        print(f"Pruned {prune()} entries")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,12 +8,19 @@ Per-fold pass: candidate.trades >= min_trades AND candidate.net_pnl > baseline
 Run-level: promote if pass_rate >= 60% AND median improvement > 0
            AND sum(candidate.trades) >= min_trades * num_folds
 
+--simulate: both policies are scored on counterfactual trades re-decided
+from stored decisions (policy_simulator.py), folds in a process pool.
+Offline only — a simulated run never changes the active policy; its
+decision is SIMULATED_PASS (checks passed) or HOLD, never PROMOTE.
+
 Usage:
     python3 scripts/eval_walkforward.py \\
         --candidate pvB --baseline pvA \\
         --train-days 14 --test-days 3 --step-days 3 \\
         --min-trades 10 --promote-if-pass
 
+    python3 scripts/eval_walkforward.py --candidate pvB --simulate --workers 4
+
 For deterministic tests: --now-iso "2026-02-23T00:00:00+00:00"
 """
 import os
@@ -125,11 +132,15 @@ def run_eval(args):
     start_ts = now - timedelta(days=args.horizon_days)
 
     run_id = str(uuid.uuid4())
+    simulate = getattr(args, "simulate", False)
     baseline = args.baseline
     if not baseline or baseline == "auto":
         baseline = state_store.get_active_policy_version(db_path=db_path)
 
     candidate = args.candidate
+    if simulate and candidate == "auto":
+        _log("--simulate needs an explicit --candidate (no live trades to pick from)")
+        return {"decision": "HOLD", "reason": "simulate_requires_candidate"}
     if candidate == "auto":
         # Find all policy versions with closed positions, pick best non-baseline
         with state_store.get_connection(db_path) as conn:
@@ -190,12 +201,29 @@ def run_eval(args):
 
     _log(f"Generated {len(folds)} folds")
 
+    sim_trades = None
+    if simulate:
+        import policy_simulator
+        try:
+            sim_trades = policy_simulator.simulate_folds(
+                folds, candidate, baseline, db_path=db_path, workers=getattr(args, "workers", None)
+            )
+        except KeyError as e:
+            _log(f"Simulation aborted: {e}")
+            with state_store.get_connection(db_path) as conn:
+                conn.execute("UPDATE eval_runs SET status='FAILED', error=? WHERE run_id=?",
+                             (str(e), run_id))
+            return {"decision": "HOLD", "reason": "policy_config_missing"}
+
     # Evaluate each fold
     fold_results = []
     with state_store.get_connection(db_path) as conn:
         for i, fold in enumerate(folds):
-            base_trades = query_closed_positions(conn, baseline, fold["test_start"], fold["test_end"])
-            cand_trades = query_closed_positions(conn, candidate, fold["test_start"], fold["test_end"])
+            if sim_trades is not None:
+                base_trades, cand_trades = sim_trades[i]
+            else:
+                base_trades = query_closed_positions(conn, baseline, fold["test_start"], fold["test_end"])
+                cand_trades = query_closed_positions(conn, candidate, fold["test_start"], fold["test_end"])
 
             base_m = compute_metrics(base_trades)
             cand_m = compute_metrics(cand_trades)
@@ -249,6 +277,10 @@ def run_eval(args):
     )
 
     decision = "PROMOTE" if promote else "HOLD"
+    if simulate:
+        # Counterfactual evidence never promotes; don't let readers of `decision` think it did
+        decision = "SIMULATED_PASS" if promote else "HOLD"
+        promote = False
     reason_parts = []
     if pass_rate < 0.60:
         reason_parts.append(f"pass_rate={pass_rate:.0%}<60%")
@@ -260,6 +292,8 @@ def run_eval(args):
         reason_parts.append(f"base_trades={total_base_trades}<{args.min_trades*num_folds}")
     if not args.promote_if_pass:
         reason_parts.append("--promote-if-pass not set")
+    if simulate:
+        reason_parts.append("simulated (no promotion)")
 
     decision_summary = {
         "decision": decision,
@@ -273,6 +307,7 @@ def run_eval(args):
         "total_baseline_trades": total_base_trades,
         "reason": "; ".join(reason_parts) if reason_parts else "all_checks_passed",
         "promoted_policy": candidate if promote else None,
+        "simulated": simulate,
     }
 
     _log(f"Decision: {decision} (pass_rate={pass_rate:.0%}, median_improve=${median_improve:.2f})")
@@ -284,14 +319,14 @@ def run_eval(args):
             WHERE run_id=?
         """, (json.dumps(decision_summary), run_id))
 
-    # Execute promotion
+    # Execute promotion (never from a counterfactual run)
     if promote:
         state_store.set_active_policy_version(candidate, reason=f"walkforward {run_id}", db_path=db_path)
         _log(f"PROMOTED: active policy → {candidate}")
 
     # Print summary
     print(f"\n{'='*60}")
-    print(f"WALK-FORWARD EVAL: {decision}")
+    print(f"WALK-FORWARD EVAL: {decision}{' (SIMULATED)' if simulate else ''}")
     print(f"{'='*60}")
     print(f"Candidate: {candidate} | Baseline: {baseline}")
     print(f"Folds: {passed}/{num_folds} passed ({pass_rate:.0%})")
@@ -337,6 +372,9 @@ def main():
     parser.add_argument("--promote-if-pass", action="store_true")
     parser.add_argument("--notify", action="store_true")
     parser.add_argument("--now-iso", type=str, default=None, help="Override now (for tests)")
+    parser.add_argument("--simulate", action="store_true",
+                        help="Counterfactual: re-decide stored decisions under each policy config")
+    parser.add_argument("--workers", type=int, default=None, help="Simulation processes (default: CPU count)")
     args = parser.parse_args()
 
     run_eval(args)
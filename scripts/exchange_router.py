@@ -8,6 +8,10 @@ Logic:
 1. Token on Binance → use Binance (lower fees, deeper book)
 2. Not on Binance, on MEXC → use MEXC
 3. Solana token not on CEX → DEX route (future)
+
+Listings come from listing_index (bulk exchangeInfo), so routing is a dict
+lookup. Live price checks only run while the index is stale, and a miss is
+then cached for listing_index.NEGATIVE_TTL_S.
 """
 
 import sys
@@ -15,6 +19,7 @@ from pathlib import Path
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(SCRIPT_DIR))
+import listing_index
 
 
 def _log(msg):
@@ -23,24 +28,6 @@ def _log(msg):
     print(f"[ROUTER] {ts} {msg}", flush=True)
 
 
-_binance_cache = None
-
-
-def _get_binance_symbols() -> set:
-    global _binance_cache
-    if _binance_cache is not None:
-        return _binance_cache
-    try:
-        import json
-        state_path = SCRIPT_DIR.parent / "state" / "known_binance_symbols.json"
-        with open(state_path) as f:
-            data = json.load(f)
-        _binance_cache = set(data.get("symbols", []))
-        return _binance_cache
-    except Exception:
-        return set()
-
-
 def _check_binance_live(symbol: str) -> float | None:
     try:
         import binance_client
@@ -62,23 +49,27 @@ def route(symbol: str, chain: str = "unknown") -> dict:
     if not symbol.endswith("USDT"):
         symbol = f"{symbol}USDT"
 
-    # Check Binance first (preferred — lower fees, deeper liquidity)
-    binance_symbols = _get_binance_symbols()
-    if symbol in binance_symbols:
-        _log(f"{symbol} → BINANCE (in known symbols)")
-        return {"exchange": "binance", "reason": "Listed on Binance", "symbol": symbol, "chain": chain}
-
-    # If cache miss, try live
-    price = _check_binance_live(symbol)
-    if price and price > 0:
-        _log(f"{symbol} → BINANCE (live check, ${price:.6f})")
-        return {"exchange": "binance", "reason": "Listed on Binance (live)", "symbol": symbol, "chain": chain}
-
-    # Check MEXC
-    price = _check_mexc_live(symbol)
-    if price and price > 0:
-        _log(f"{symbol} → MEXC (${price:.6f})")
-        return {"exchange": "mexc", "reason": "Not on Binance, listed on MEXC", "symbol": symbol, "chain": chain}
+    # Listing index (bulk exchangeInfo, Binance preferred — lower fees, deeper liquidity)
+    exchange = listing_index.venue(symbol)
+    if exchange:
+        _log(f"{symbol} → {exchange.upper()} (listing index)")
+        reason = "Listed on Binance" if exchange == "binance" else "Not on Binance, listed on MEXC"
+        return {"exchange": exchange, "reason": reason, "symbol": symbol, "chain": chain}
+
+    # Index stale or missing: live check, remembered either way
+    if not listing_index.is_unlisted(symbol):
+        price = _check_binance_live(symbol)
+        if price and price > 0:
+            listing_index.mark_listed(symbol, "binance")
+            _log(f"{symbol} → BINANCE (live check, ${price:.6f})")
+            return {"exchange": "binance", "reason": "Listed on Binance (live)", "symbol": symbol, "chain": chain}
+
+        price = _check_mexc_live(symbol)
+        if price and price > 0:
+            listing_index.mark_listed(symbol, "mexc")
+            _log(f"{symbol} → MEXC (live check, ${price:.6f})")
+            return {"exchange": "mexc", "reason": "Not on Binance, listed on MEXC (live)", "symbol": symbol, "chain": chain}
+        listing_index.mark_unlisted(symbol)
 
     # Solana → DEX
     if chain.lower() == "solana":
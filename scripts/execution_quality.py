@@ -11,20 +11,20 @@ Tracks:
 4.3.4 — Events → Supabase (execution_quality table)
 4.3.5 — Cost per trade (fees + slippage + gas)
 
-Reads from: state/oms_orders.json, execution-logs/oms_paper_fills.jsonl
+Reads from: state_store OMS journal (oms_orders), execution-logs/oms_paper_fills.jsonl
 Writes to: state/execution_quality.json, Supabase
 """
 
 import json
 import os
 import statistics
+import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
 STATE_DIR = BASE_DIR / "state"
-OMS_ORDERS_PATH = STATE_DIR / "oms_orders.json"
 EQ_STATE_PATH = STATE_DIR / "execution_quality.json"
 FILLS_LOG = BASE_DIR / "execution-logs" / "oms_paper_fills.jsonl"
 
@@ -141,7 +141,9 @@ def calc_trade_cost(order: dict) -> dict:
 
 def analyze_all_orders() -> dict:
     """Analyze all OMS orders for execution quality metrics."""
-    orders = _load_json(OMS_ORDERS_PATH, {})
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import oms
+    orders = {o["client_order_id"]: o for o in oms.get_orders_by_state()}
     if not orders:
         _log("No orders to analyze")
         return {"total_orders": 0}
@@ -31,6 +31,9 @@ sys.path.insert(0, str(SCRIPTS_DIR))
 # Import Ticket 1-2 modules
 import ids
 import state_store
+import lazy_imports
+import tracing
+import regime_classifier
 
 # Import existing v3.0 modules (reuse)
 try:
@@ -63,11 +66,9 @@ try:
 except ImportError:
     HAS_PAPER = False
 
-try:
-    import binance_client
-    HAS_BINANCE = True
-except ImportError:
-    HAS_BINANCE = False
+# Deferred: only price lookups for Binance symbols need it (urllib/http.client stack)
+binance_client = lazy_imports.optional("binance_client")
+HAS_BINANCE = binance_client is not None
 
 
 # ============================================================================
@@ -597,7 +598,7 @@ def stage_3_strategy_selection(signal, portfolio, runtime_state, timings, start_
     
     # Fallback: default strategy + Kelly sizing
     strategy_id = "default"
-    regime_tag = runtime_state.get("regime_tag", "NEUTRAL")
+    regime_tag = regime_classifier.get_regime_tag(signal, default=runtime_state.get("regime_tag", "NEUTRAL"))
     position_usd, _sizing = kelly_position_size(strategy_id, regime_tag, portfolio, runtime_state)
     eligible = [strategy_id]
     
@@ -788,7 +789,7 @@ def stage_5_execute(signal, decision_id, strategy_id, position_usd,
     position_payload = {
         "position_id": position_id,
         "size_token": position_usd / exec_entry_price if exec_entry_price > 0 else 0,
-        "regime_tag": signal.get("regime_tag", "NEUTRAL"),
+        "regime_tag": signal.get("regime_tag") or regime_classifier.get_regime_tag(signal, default="NEUTRAL"),
         "features": {
             "entry_signal": signal,
             "strategy_id": strategy_id
@@ -958,6 +959,15 @@ def evaluate_signal_fast(
     
     Performance guarantee: <3000ms total
     """
+    with tracing.span("fast.evaluate", correlation_id=signal.get("correlation_id")) as sp:
+        record = _evaluate_signal_fast(signal, portfolio, runtime_state, policy_version)
+        sp.set(decision_id=record.get("decision_id"), result=record.get("result"),
+               stage=record.get("stage"), reason_code=record.get("reason_code"))
+    return record
+
+
+def _evaluate_signal_fast(signal, portfolio, runtime_state, policy_version):
+    """evaluate_signal_fast body; each stage runs in its own trace span."""
     if policy_version is None:
         policy_version = get_active_policy_version()
 
@@ -981,7 +991,8 @@ def evaluate_signal_fast(
     # STAGE 1: HARD SAFETY GATES
     # ========================================================================
     
-    passed, reason_code, evidence = stage_1_hard_safety_gates(signal, timings, start_time)
+    with tracing.span("fast.stage_1_safety"):
+        passed, reason_code, evidence = stage_1_hard_safety_gates(signal, timings, start_time)
     
     if not passed:
         # BLOCK decision
@@ -1003,7 +1014,8 @@ def evaluate_signal_fast(
     # STAGE 2: SIGNAL SCORING
     # ========================================================================
     
-    score_total, score_breakdown = stage_2_signal_scoring(signal, runtime_state, timings, start_time)
+    with tracing.span("fast.stage_2_scoring"):
+        score_total, score_breakdown = stage_2_signal_scoring(signal, runtime_state, timings, start_time)
     score_data = {"score_total": score_total, "score_breakdown": score_breakdown}
     
     # Check score threshold
@@ -1028,9 +1040,10 @@ def evaluate_signal_fast(
     # STAGE 3: STRATEGY SELECTION
     # ========================================================================
     
-    strategy_id, position_usd, eligible = stage_3_strategy_selection(
-        signal, portfolio, runtime_state, timings, start_time
-    )
+    with tracing.span("fast.stage_3_strategy"):
+        strategy_id, position_usd, eligible = stage_3_strategy_selection(
+            signal, portfolio, runtime_state, timings, start_time
+        )
     strategy_data = {
         "strategy_id": strategy_id,
         "position_usd": position_usd,
@@ -1103,9 +1116,10 @@ def evaluate_signal_fast(
         now_iso=now_utc_iso()
     )
     
-    passed, gate_failed, evidence = stage_4_policy_engine(
-        decision_packet_for_policy, portfolio, timings, start_time
-    )
+    with tracing.span("fast.stage_4_policy"):
+        passed, gate_failed, evidence = stage_4_policy_engine(
+            decision_packet_for_policy, portfolio, timings, start_time
+        )
     policy_data = {"gate_failed": gate_failed, "evidence": evidence}
     
     if not passed:
@@ -1128,11 +1142,12 @@ def evaluate_signal_fast(
     # STAGE 5: EXECUTE
     # ========================================================================
     
-    success, position, error = stage_5_execute(
-        signal, decision_id, strategy_id, position_usd,
-        score_data, policy_data, timings, start_time,
-        policy_version=policy_version,
-    )
+    with tracing.span("fast.stage_5_execute"):
+        success, position, error = stage_5_execute(
+            signal, decision_id, strategy_id, position_usd,
+            score_data, policy_data, timings, start_time,
+            policy_version=policy_version,
+        )
     
     if not success:
         # SKIP decision (execution failed)
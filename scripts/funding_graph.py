@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Wallet Funding Graph — shared store for Sybil detection.
+Deterministic Python. No LLMs.
+
+Maps wallet → first funder (fee payer of its earliest transaction) and
+first-seen time. Edges live in the state_store DB (wallet_funding table) and
+are reused across tokens: meme holder sets overlap heavily, so re-analysing a
+known wallet costs zero RPCs. Unknown wallets are resolved with batched
+JSON-RPC calls (helius_client._rpc_batch): signature pages walked back with
+`before=` to the wallet's oldest transaction, then one getTransaction each.
+
+Wallets with no signatures, or more history than MAX_SIGNATURE_PAGES pages,
+are stored as unresolved (no funder, no first signature) and retried after
+UNRESOLVED_RETRY_S instead of being trusted forever.
+
+Used by: helius_client.detect_sybil_clusters, whale_discovery_v2.detect_sybil_cluster
+"""
+
+import sys
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import state_store
+import helius_client
+
+# getSignaturesForAddress page size (RPC maximum) and pages walked per wallet
+# before its history is declared inconclusive (hubs, bots, CEX wallets)
+SIGNATURE_PAGE = 1000
+MAX_SIGNATURE_PAGES = 5
+
+# Unresolved / inconclusive wallets are looked up again after this long
+UNRESOLVED_RETRY_S = 24 * 3600
+
+# Funders with more children than this are hubs (CEX hot wallets, faucets),
+# not Sybil parents — ignored by the cross-token wallet_cluster() lookup.
+HUB_FANOUT = 250
+
+_schema_ready: set = set()
+
+
+def _log(msg: str):
+    print(f"[FUNDING] {msg}", flush=True)
+
+
+def _ensure_schema(db_path=None):
+    key = str(db_path or state_store.DB_PATH)
+    if key not in _schema_ready:
+        state_store.ensure_tables(db_path)
+        _schema_ready.add(key)
+
+
+def _fee_payer(tx: dict) -> str | None:
+    """First account key of a jsonParsed transaction (the fee payer)."""
+    try:
+        account_keys = tx.get("transaction", {}).get("message", {}).get("accountKeys", [])
+        if not account_keys:
+            return None
+        fee_payer = account_keys[0]
+        if isinstance(fee_payer, dict):
+            fee_payer = fee_payer.get("pubkey", "")
+        return fee_payer or None
+    except (AttributeError, KeyError, IndexError, TypeError):
+        return None
+
+
+def _oldest_signatures(wallets: list[str]) -> dict:
+    """
+    Walk each wallet's signatures back to its oldest, one batched page round at
+    a time. Returns dict[wallet] = oldest signature entry, or None when the
+    wallet has no signatures or more than MAX_SIGNATURE_PAGES pages of history.
+    Wallets whose RPCs failed are omitted.
+    """
+    oldest: dict = {}
+    cursors = {w: None for w in wallets}  # wallet → `before` cursor of the next page
+    for _ in range(MAX_SIGNATURE_PAGES):
+        if not cursors:
+            break
+        paging, calls = list(cursors), []
+        for w in paging:
+            opts = {"limit": SIGNATURE_PAGE}
+            if cursors[w]:
+                opts["before"] = cursors[w]
+            calls.append(("getSignaturesForAddress", [w, opts]))
+        for wallet, page in zip(paging, helius_client._rpc_batch(calls)):
+            if page is None:
+                del cursors[wallet]  # failed: leave out, retried on the next call
+                oldest.pop(wallet, None)
+                continue
+            if page:
+                oldest[wallet] = page[-1]  # newest first: the last entry is the oldest so far
+            elif wallet not in oldest:
+                oldest[wallet] = None  # no history at all
+            if len(page) < SIGNATURE_PAGE or not (page[-1] or {}).get("signature"):
+                del cursors[wallet]  # reached the first transaction
+            else:
+                cursors[wallet] = page[-1]["signature"]
+    for wallet in cursors:
+        oldest[wallet] = None  # pages ran out before the first transaction: inconclusive
+    return oldest
+
+
+def _resolve_from_chain(wallets: list[str]) -> tuple[dict, set]:
+    """
+    Resolve funding edges for `wallets` via batched RPC.
+
+    Returns (edges, complete): edges for every wallet looked up, and the subset
+    whose resolution finished (safe to persist). Wallets whose RPCs failed are
+    left out of `complete` so the next call retries them; unresolved wallets
+    (no history / inconclusive) are persisted with funder and first_signature None.
+    """
+    edges: dict[str, dict] = {}
+    complete: set = set()
+    pending: list[str] = []
+    for wallet, earliest in _oldest_signatures(wallets).items():
+        if not earliest or not earliest.get("signature"):
+            edges[wallet] = {"funder": None, "first_seen_ts": None, "first_signature": None}
+            complete.add(wallet)
+            continue
+        edges[wallet] = {
+            "funder": None,
+            "first_seen_ts": earliest.get("blockTime"),
+            "first_signature": earliest["signature"],
+        }
+        pending.append(wallet)
+
+    tx_results = helius_client._rpc_batch([
+        ("getTransaction", [edges[w]["first_signature"],
+                            {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0}])
+        for w in pending
+    ])
+    for wallet, tx in zip(pending, tx_results):
+        if tx is None:
+            continue
+        payer = _fee_payer(tx)
+        if payer and payer != wallet:
+            edges[wallet]["funder"] = payer
+        complete.add(wallet)
+
+    return edges, complete
+
+
+def _needs_lookup(edge: dict | None, now: datetime) -> bool:
+    """Unknown, or stored unresolved longer than UNRESOLVED_RETRY_S ago."""
+    if edge is None:
+        return True
+    if edge.get("funder") or edge.get("first_signature"):
+        return False
+    try:
+        resolved_at = datetime.fromisoformat(edge.get("resolved_at") or "")
+    except ValueError:
+        return True
+    return now - resolved_at >= timedelta(seconds=UNRESOLVED_RETRY_S)
+
+
+def resolve_funding(wallets, db_path=None) -> dict:
+    """
+    Funding edges for `wallets`, resolving unknown ones on-chain.
+
+    Returns: dict[wallet] = {"funder": str|None, "first_seen_ts": int|None,
+                             "first_signature": str|None}
+    first_signature None means unresolved (no history, or too much to walk).
+    Wallets whose RPCs failed are omitted.
+    """
+    _ensure_schema(db_path)
+    wallets = list(dict.fromkeys(w for w in wallets if w))
+    if not wallets:
+        return {}
+
+    known = state_store.get_wallet_funding(wallets, db_path=db_path)
+    now = datetime.now(timezone.utc)
+    missing = [w for w in wallets if _needs_lookup(known.get(w), now)]
+    if missing:
+        edges, complete = _resolve_from_chain(missing)
+        state_store.upsert_wallet_funding(
+            {w: e for w, e in edges.items() if w in complete}, db_path=db_path
+        )
+        known.update(edges)
+        _log(f"Resolved {len(complete)}/{len(missing)} new or unresolved wallets "
+             f"({len(wallets) - len(missing)} cached)")
+
+    return {w: known[w] for w in wallets if w in known}
+
+
+def find_clusters(wallets, min_children: int = 3, db_path=None) -> list[dict]:
+    """
+    Group `wallets` by stored funder. Call resolve_funding() first.
+
+    Returns clusters with >= min_children members, in first-seen wallet order:
+      [{"parent_wallet": str, "child_count": int, "addresses": [str]}]
+    """
+    _ensure_schema(db_path)
+    wallets = list(dict.fromkeys(w for w in wallets if w))
+    funding = state_store.get_wallet_funding(wallets, db_path=db_path)
+
+    parent_to_children: dict[str, list[str]] = {}
+    for wallet in wallets:
+        funder = (funding.get(wallet) or {}).get("funder")
+        if funder:
+            parent_to_children.setdefault(funder, []).append(wallet)
+
+    return [
+        {"parent_wallet": parent, "child_count": len(children), "addresses": children}
+        for parent, children in parent_to_children.items()
+        if len(children) >= min_children
+    ]
+
+
+def wallet_cluster(wallet: str, min_children: int = 3, db_path=None) -> dict | None:
+    """
+    Cross-token lookup: the cluster `wallet` belongs to, counting every wallet
+    its funder has funded across all tokens analysed so far.
+
+    Returns {"parent_wallet", "child_count", "addresses"} or None.
+    """
+    edge = resolve_funding([wallet], db_path=db_path).get(wallet)
+    funder = (edge or {}).get("funder")
+    if not funder:
+        return None
+
+    children = state_store.get_funded_wallets([funder], db_path=db_path).get(funder, [])
+    if len(children) < min_children or len(children) > HUB_FANOUT:
+        return None
+    return {"parent_wallet": funder, "child_count": len(children), "addresses": children}
@@ -33,6 +33,7 @@ KILL_SWITCH_PATH = BASE_DIR / "config" / "kill_switch.flag"
 STATE_DIR = BASE_DIR / "state"
 LOGS_DIR = BASE_DIR / "execution-logs"
 HEARTBEAT_LOG = LOGS_DIR / "heartbeat.log"
+PRICE_MAX_AGE_S = 600  # same limit as position_monitor.PRICE_MAX_AGE_MIN
 
 # Import state_store for unified state management (Ticket 12)
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -218,6 +219,19 @@ def check_kill_switch():
         return {"status": "ERROR", "detail": f"Cannot read kill switch: {e}"}
 
 
+def _fresh_entry_price(entry):
+    """Price from a dated ws_manager / dex_price_poller entry, or 0 if older than PRICE_MAX_AGE_S."""
+    try:
+        stamp = datetime.fromisoformat(str(entry.get("timestamp")).replace("Z", "+00:00"))
+    except ValueError:
+        return 0
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    if (datetime.now(timezone.utc) - stamp).total_seconds() > PRICE_MAX_AGE_S:
+        return 0
+    return float(entry.get("price") or 0)
+
+
 def check_positions(config, portfolio, price_cache):
     """
     Check 2: Verify positions vs stop-loss/take-profit.
@@ -237,6 +251,21 @@ def check_positions(config, portfolio, price_cache):
     if not positions or not isinstance(positions, list):
         return {"status": "OK", "detail": "No open positions", "alerts": []}
 
+    # Price every uncached (or stale) Solana/Dex position in one batched DexScreener
+    # pass (Binance-only cache doesn't include token addresses).
+    uncached = [p for p in positions
+                if str(p.get("status", "")).lower() == "open" and p.get("chain") == "solana"
+                and p.get("token_address")
+                and (p["token_address"] not in price_cache
+                     or (isinstance(price_cache[p["token_address"]], dict)
+                         and _fresh_entry_price(price_cache[p["token_address"]]) <= 0))]
+    if uncached:
+        try:
+            import dex_price_poller
+            price_cache.update(dex_price_poller.poll(uncached, include_watchlist=False))
+        except Exception as e:
+            log(f"DEX batch pricing failed: {e}")
+
     for pos in positions:
         # Status can be 'open' (legacy JSON) or 'OPEN' (SQLite/SSOT)
         if str(pos.get("status", "")).lower() != "open":
@@ -259,9 +288,17 @@ def check_positions(config, portfolio, price_cache):
         cache_keys = [symbol]
         if pos.get("chain") == "binance" and isinstance(symbol, str) and symbol and not symbol.endswith("USDT"):
             cache_keys.insert(0, f"{symbol}USDT")
+        if pos.get("token_address") and pos["token_address"] != symbol:
+            cache_keys.append(pos["token_address"])  # dex_price_poller keys by mint
         for k in cache_keys:
             if k in price_cache:
-                current = price_cache[k]
+                cached = price_cache[k]
+                if isinstance(cached, dict):  # ws_manager / dex_price_poller entry
+                    cached = _fresh_entry_price(cached)
+                    if cached <= 0:
+                        current = 0  # stalled feed: try other keys, then the on-demand fetch
+                        continue
+                current = cached
                 break
 
         # If price is missing for a Solana/Dex position, try a deterministic on-demand fetch
@@ -280,7 +317,11 @@ def check_positions(config, portfolio, price_cache):
                     price_cache[pos["token_address"]] = px
                     # Best-effort persist so subsequent checks stop alerting.
                     try:
-                        save_state("price_cache.json", price_cache)
+                        import dex_price_poller
+                        dex_price_poller.merge_price_cache({pos["token_address"]: {
+                            "price": px, "source": "birdeye",
+                            "timestamp": datetime.now(timezone.utc).isoformat()}},
+                            STATE_DIR / "price_cache.json")
                     except Exception:
                         pass
             except Exception:
@@ -504,8 +545,9 @@ def check_ntp_sync():
 
 
 def check_circuit_breakers():
-    """Check circuit breaker states."""
-    cb_state = load_state("circuit_breakers.json")
+    """Check circuit breaker states (shared registry + legacy circuit_breakers.json entries)."""
+    import breaker_registry
+    cb_state = breaker_registry.all_states()
 
     tripped = []
     for component, state in cb_state.items():
@@ -14,7 +14,6 @@ import time
 import requests
 from datetime import datetime, timezone
 from pathlib import Path
-from collections import defaultdict
 
 # ---------------------------------------------------------------------------
 # Paths & Config
@@ -22,6 +21,11 @@ from collections import defaultdict
 SCRIPT_DIR = Path(__file__).resolve().parent
 BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
 CONFIG_ENV = BASE_DIR / "config" / ".env"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import breaker_registry
+import http_transport
+import rate_limiter
 
 # Load API key
 HELIUS_API_KEY = ""
@@ -33,14 +37,21 @@ if CONFIG_ENV.exists():
 RPC_URL = f"https://mainnet.helius-rpc.com/?api-key={HELIUS_API_KEY}"
 
 # Rate limiting: max 10 req/s (Helius free tier)
+# Shared by every thread and process (whale_tracker polls wallets concurrently)
 MAX_CALLS_PER_SECOND = 10
-_call_timestamps: list[float] = []
+_bucket = rate_limiter.bucket("helius", MAX_CALLS_PER_SECOND, 1)
 
-# Circuit breaker
-_consecutive_failures = 0
-_circuit_open_until = 0.0
+# Enhanced Transactions API: signatures per POST
+ENHANCED_BATCH_SIZE = 10
+
+# JSON-RPC batch requests: calls per POST (each POST costs one rate-limit slot)
+RPC_BATCH_SIZE = 20
+
+# Circuit breaker (shared across processes — breaker_registry)
 CIRCUIT_BREAKER_THRESHOLD = 3
 CIRCUIT_BREAKER_COOLDOWN = 300
+_breaker = breaker_registry.breaker("helius_rpc", trip_consecutive=CIRCUIT_BREAKER_THRESHOLD,
+                                    cooldown_s=CIRCUIT_BREAKER_COOLDOWN)
 
 _rpc_id = 0
 
@@ -53,40 +64,27 @@ def _log(msg: str):
 # Rate limiter
 # ---------------------------------------------------------------------------
 def _rate_limit():
-    global _call_timestamps
-    now = time.time()
-    _call_timestamps = [t for t in _call_timestamps if now - t < 1.0]
-    if len(_call_timestamps) >= MAX_CALLS_PER_SECOND:
-        sleep_for = 1.0 - (now - _call_timestamps[0]) + 0.05
-        if sleep_for > 0:
-            time.sleep(sleep_for)
-    _call_timestamps.append(time.time())
+    # Shared across processes; raises rate_limiter.RateLimited when this caller's
+    # priority can't wait for budget (hot path fails fast instead of stalling)
+    _bucket.limit()
 
 
 # ---------------------------------------------------------------------------
 # Circuit breaker
 # ---------------------------------------------------------------------------
 def _check_circuit():
-    global _circuit_open_until
-    if _consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD:
-        if time.time() < _circuit_open_until:
-            remaining = int(_circuit_open_until - time.time())
-            raise RuntimeError(f"Circuit breaker OPEN — {remaining}s remaining")
-        _reset_circuit()
+    remaining = _breaker.open_for_s()
+    if remaining:
+        raise RuntimeError(f"Circuit breaker OPEN — {remaining:.0f}s remaining")
 
 
 def _record_failure():
-    global _consecutive_failures, _circuit_open_until
-    _consecutive_failures += 1
-    if _consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD:
-        _circuit_open_until = time.time() + CIRCUIT_BREAKER_COOLDOWN
+    if _breaker.record_failure():
         _log(f"Circuit breaker OPENED — pausing for {CIRCUIT_BREAKER_COOLDOWN}s")
 
 
 def _reset_circuit():
-    global _consecutive_failures, _circuit_open_until
-    _consecutive_failures = 0
-    _circuit_open_until = 0.0
+    _breaker.record_success()
 
 
 # ---------------------------------------------------------------------------
@@ -95,7 +93,6 @@ def _reset_circuit():
 def _rpc(method: str, params=None) -> dict | list | None:
     global _rpc_id
     _check_circuit()
-    _rate_limit()
     _rpc_id += 1
 
     payload = {
@@ -107,7 +104,10 @@ def _rpc(method: str, params=None) -> dict | list | None:
         payload["params"] = params
 
     try:
-        resp = requests.post(RPC_URL, json=payload, timeout=30)
+        _rate_limit()
+        resp = http_transport.post(RPC_URL, json=payload, timeout=30, idempotent=True, endpoint=f"rpc:{method}")
+        if resp.status_code == 429:
+            _bucket.penalize(rate_limiter.retry_after_s(resp.headers, 1))
         resp.raise_for_status()
         data = resp.json()
 
@@ -118,12 +118,65 @@ def _rpc(method: str, params=None) -> dict | list | None:
 
         _reset_circuit()
         return data.get("result")
+    except rate_limiter.RateLimited as e:
+        _log(f"RPC skipped ({method}): {e}")
+        return None
     except requests.exceptions.RequestException as e:
         _log(f"RPC request failed ({method}): {e}")
         _record_failure()
         return None
 
 
+def _rpc_batch(calls: list[tuple[str, object]]) -> list:
+    """
+    JSON-RPC batch: sends `calls` as [(method, params), ...] in chunks of
+    RPC_BATCH_SIZE, one HTTP POST per chunk.
+
+    Returns results aligned with `calls`; None where the call errored, its
+    chunk failed or was rate limited (callers treat None as "unknown, retry later").
+    """
+    results = [None] * len(calls)
+    for start in range(0, len(calls), RPC_BATCH_SIZE):
+        _check_circuit()
+
+        payload = []
+        for idx, (method, params) in enumerate(calls[start:start + RPC_BATCH_SIZE], start):
+            entry = {"jsonrpc": "2.0", "id": idx, "method": method}
+            if params is not None:
+                entry["params"] = params
+            payload.append(entry)
+
+        try:
+            _rate_limit()
+            resp = http_transport.post(RPC_URL, json=payload, timeout=30, idempotent=True, endpoint="rpc:batch")
+            resp.raise_for_status()
+            data = resp.json()
+        except rate_limiter.RateLimited as e:
+            _log(f"RPC batch skipped ({len(calls) - start} calls): {e}")
+            break
+        except requests.exceptions.RequestException as e:
+            _log(f"RPC batch request failed ({len(payload)} calls): {e}")
+            _record_failure()
+            continue
+
+        if not isinstance(data, list):
+            _log(f"RPC batch returned non-list: {type(data)}")
+            _record_failure()
+            continue
+
+        for item in data:
+            idx = item.get("id")
+            if not isinstance(idx, int) or not (0 <= idx < len(calls)):
+                continue
+            if "error" in item:
+                _log(f"RPC error ({calls[idx][0]}): {item['error']}")
+                continue
+            results[idx] = item.get("result")
+        _reset_circuit()
+
+    return results
+
+
 # ---------------------------------------------------------------------------
 # 1. get_token_holders
 # ---------------------------------------------------------------------------
@@ -207,53 +260,21 @@ def detect_sybil_clusters(token_mint: str, top_n: int = 30) -> dict | None:
     if holders is None:
         return None
 
-    # For each holder, find their first transaction (funding source)
+    # Funding source + first-seen time per holder, from the shared funding graph.
+    # Wallets seen on earlier tokens cost no RPCs; the rest are resolved in batches.
+    import funding_graph
+    funding = funding_graph.resolve_funding([h["address"] for h in holders[:top_n]])
+
     funding_sources: dict[str, str] = {}  # holder_addr → parent_addr
     first_buy_times: dict[str, int] = {}  # holder_addr → timestamp
+    for addr, info in funding.items():
+        if info.get("first_seen_ts"):
+            first_buy_times[addr] = info["first_seen_ts"]
+        if info.get("funder"):
+            funding_sources[addr] = info["funder"]
 
-    for h in holders[:top_n]:
-        addr = h["address"]
-        # Get first few signatures for this account
-        sigs = _rpc("getSignaturesForAddress", [addr, {"limit": 5}])
-        if not sigs:
-            continue
-
-        # The last signature in the list is the earliest
-        earliest = sigs[-1] if sigs else None
-        if earliest and earliest.get("blockTime"):
-            first_buy_times[addr] = earliest["blockTime"]
-
-        # Try to get the earliest transaction to find funding source
-        if earliest and earliest.get("signature"):
-            tx = _rpc("getTransaction", [earliest["signature"], {"encoding": "jsonParsed", "maxSupportedTransactionVersion": 0}])
-            if tx:
-                # Look for the fee payer (likely the funding source)
-                try:
-                    account_keys = tx.get("transaction", {}).get("message", {}).get("accountKeys", [])
-                    if account_keys:
-                        # Fee payer is first account key
-                        fee_payer = account_keys[0]
-                        if isinstance(fee_payer, dict):
-                            fee_payer = fee_payer.get("pubkey", "")
-                        if fee_payer and fee_payer != addr:
-                            funding_sources[addr] = fee_payer
-                except (KeyError, IndexError, TypeError):
-                    pass
-
-    # Group by funding source
-    parent_to_children: dict[str, list[str]] = defaultdict(list)
-    for child, parent in funding_sources.items():
-        parent_to_children[parent].append(child)
-
-    # Sybil clusters: parent with 3+ children
-    clusters = []
-    for parent, children in parent_to_children.items():
-        if len(children) >= 3:
-            clusters.append({
-                "parent_wallet": parent,
-                "child_count": len(children),
-                "addresses": children,
-            })
+    # Sybil clusters: parent with 3+ children among these holders (graph query)
+    clusters = funding_graph.find_clusters(list(funding_sources), min_children=3)
 
     # Coordinated timing: 5+ holders bought within 30 minutes
     coordinated_buys = 0
@@ -410,16 +431,32 @@ def simulate_swap(input_mint: str, output_mint: str, amount_lamports: int) -> di
 # ---------------------------------------------------------------------------
 # 6. get_recent_transactions
 # ---------------------------------------------------------------------------
-def get_recent_transactions(address: str, limit: int = 20) -> list | None:
+def get_recent_transactions(address: str, limit: int = 20, until: str | None = None,
+                            max_enhanced: int = 10, before: str | None = None) -> list | None:
     """
     Get recent transactions for an address with full parsed data.
     Uses Helius Enhanced Transactions API to get token transfers, swap details, etc.
+
+    Args:
+        address: Wallet address to poll
+        limit: Max signatures to fetch (newest first)
+        until: Signature cursor — only transactions NEWER than this are returned.
+               Pass the newest signature seen on the previous poll to fetch deltas only.
+        before: Page cursor — start from transactions OLDER than this signature
+               (pass the oldest signature of the previous page to page backwards).
+        max_enhanced: Max signatures hydrated via the Enhanced API (default 10 to avoid rate limits)
+
+    Returns newest-first list (empty if nothing new), or None on RPC failure.
     """
     _check_circuit()
-    _rate_limit()
-    
-    # Step 1: Get signature list
-    sigs = _rpc("getSignaturesForAddress", [address, {"limit": limit}])
+
+    # Step 1: Get signature list (newest first, stops at cursor)
+    opts = {"limit": limit}
+    if until:
+        opts["until"] = until
+    if before:
+        opts["before"] = before
+    sigs = _rpc("getSignaturesForAddress", [address, opts])
     if sigs is None:
         return None
 
@@ -428,25 +465,30 @@ def get_recent_transactions(address: str, limit: int = 20) -> list | None:
     enhanced_url = f"https://api.helius.xyz/v0/transactions/?api-key={HELIUS_API_KEY}"
     
     transactions = []
-    # Batch signatures (Helius accepts array of transactions)
-    signatures = [s["signature"] for s in sigs[:min(limit, 10)]]  # Limit to 10 to avoid rate limits
+    signatures = [s["signature"] for s in sigs[:min(limit, max_enhanced)] if s.get("signature")]
     
     if not signatures:
         return []
     
     try:
-        resp = requests.post(
-            enhanced_url,
-            json={"transactions": signatures},
-            timeout=30
-        )
-        resp.raise_for_status()
-        enhanced_txs = resp.json()
-        
-        if not isinstance(enhanced_txs, list):
-            _log(f"Enhanced API returned non-list: {type(enhanced_txs)}")
-            _record_failure()
-            return None
+        # Batch signatures (Helius accepts array of transactions)
+        enhanced_txs = []
+        for i in range(0, len(signatures), ENHANCED_BATCH_SIZE):
+            _rate_limit()
+            resp = http_transport.post(
+                enhanced_url,
+                json={"transactions": signatures[i:i + ENHANCED_BATCH_SIZE]},
+                timeout=30,
+                idempotent=True,
+            )
+            resp.raise_for_status()
+            batch = resp.json()
+            
+            if not isinstance(batch, list):
+                _log(f"Enhanced API returned non-list: {type(batch)}")
+                _record_failure()
+                return None
+            enhanced_txs.extend(batch)
             
         _reset_circuit()
         
@@ -479,6 +521,9 @@ def get_recent_transactions(address: str, limit: int = 20) -> list | None:
                 "instructions": tx_data.get("instructions", []),
             })
             
+    except rate_limiter.RateLimited as e:
+        _log(f"Enhanced API skipped: {e}")
+        return None
     except requests.exceptions.RequestException as e:
         _log(f"Enhanced API request failed: {e}")
         _record_failure()
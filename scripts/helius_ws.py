@@ -11,8 +11,15 @@ Subscribes to Helius Enhanced WebSocket for real-time Solana events:
 Uses: wss://mainnet.helius-rpc.com/?api-key=<KEY>
 Fallback: Helius webhooks (HTTP) if WS unavailable.
 
-Run standalone:  python3 helius_ws.py
+Busy-market design: events are kept as compact __slots__ records, per-token
+and per-wallet rolling aggregates (swap volume, net flow, unique buyers over
+a 1h window) are updated in O(1) per event, signal dicts are only built for
+whale transfers / large swaps, and state is persisted incrementally
+(base snapshot + journal of aggregates changed since the last save).
+
+Run standalone:  python3 helius_ws.py [--record events.jsonl]
 Run test:        python3 helius_ws.py --test
+Benchmark:       python3 helius_ws.py --bench [N] [events.jsonl]
 """
 
 import asyncio
@@ -22,7 +29,8 @@ import sys
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from collections import deque
+from array import array
+from collections import OrderedDict, deque
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
@@ -34,6 +42,18 @@ RECONNECT_MIN = 3
 RECONNECT_MAX = 60
 STALE_THRESHOLD_S = 120
 MAX_EVENT_BUFFER = 500
+SEEN_SIG_MAX = MAX_EVENT_BUFFER * 2
+
+AGG_BUCKET_S = 300            # rolling aggregates: 12 × 5 min = 1h window
+AGG_WINDOW_BUCKETS = 12
+MAX_TRACKED_TOKENS = 5_000
+MAX_TRACKED_WALLETS = 20_000
+WHALE_TOKEN_AMOUNT = 1_000_000
+LARGE_SWAP_SOL = 50.0
+LAMPORTS_PER_SOL = 1_000_000_000
+
+SNAPSHOT_INTERVAL_S = 30
+SNAPSHOT_COMPACT_LINES = 120  # journal lines before it is folded into the base snapshot
 
 sys.path.insert(0, str(SCRIPT_DIR))
 import env_loader
@@ -85,74 +105,320 @@ def _load_watched_tokens() -> list[str]:
 # Event processing
 # ─────────────────────────────────────────────────────────
 
+KIND_OTHER, KIND_TRANSFER, KIND_SWAP = 0, 1, 2
+_KIND_NAMES = ("OTHER", "TRANSFER", "SWAP")
+TRANSFER_TYPES = ("TRANSFER", "TOKEN_TRANSFER")
+
+
+class Event:
+    """Compact record of one processed transaction (what the buffer keeps instead of the raw dict)."""
+    __slots__ = ("signature", "timestamp", "kind", "mint", "wallet", "counterparty",
+                 "amount", "sol", "side", "alert")
+
+    def __init__(self, signature, timestamp, kind, mint="", wallet="", counterparty="",
+                 amount=0.0, sol=0.0, side=0, alert=False):
+        self.signature = signature
+        self.timestamp = timestamp
+        self.kind = kind
+        self.mint = mint
+        self.wallet = wallet              # transfer sender / swapper
+        self.counterparty = counterparty  # transfer receiver
+        self.amount = amount              # token amount
+        self.sol = sol                    # SOL leg of a swap (0 for transfers / token→token)
+        self.side = side                  # +1 buy, -1 sell, 0 n/a
+        self.alert = alert                # whale transfer / large swap
+
+    def to_dict(self) -> dict:
+        return {"signature": self.signature, "timestamp": self.timestamp, "kind": _KIND_NAMES[self.kind],
+                "mint": self.mint, "wallet": self.wallet, "counterparty": self.counterparty,
+                "amount": self.amount, "sol": self.sol, "side": self.side, "alert": self.alert}
+
+
+class RollingAggregate:
+    """Sliding window (AGG_WINDOW_BUCKETS × AGG_BUCKET_S) of swap volume, net flow and unique buyers.
+
+    Fixed ring of per-bucket sums plus running totals: an update is O(1) amortized
+    (advancing the ring expires at most one bucket per elapsed bucket), reads are O(1).
+    Volume / flow are in SOL; net flow = buys − sells. Transfer counts are lifetime.
+    """
+    __slots__ = ("head", "volume", "flow", "trades", "volume_total", "flow_total", "trades_total",
+                 "buyers", "slot_buyers", "transfers", "whales", "last_ts")
+
+    def __init__(self, track_buyers=True):
+        n = AGG_WINDOW_BUCKETS
+        self.head = None
+        self.volume = array("d", bytes(8 * n))
+        self.flow = array("d", bytes(8 * n))
+        self.trades = array("q", bytes(8 * n))
+        self.volume_total = self.flow_total = 0.0
+        self.trades_total = 0
+        self.buyers = {} if track_buyers else None  # wallet → bucket of its latest buy in the window
+        self.slot_buyers = [None] * n if track_buyers else None  # slot → wallets whose latest buy is there
+        self.transfers = 0
+        self.whales = 0
+        self.last_ts = 0.0
+
+    def _expire(self, slot):
+        self.volume_total -= self.volume[slot]
+        self.flow_total -= self.flow[slot]
+        self.trades_total -= self.trades[slot]
+        self.volume[slot] = self.flow[slot] = 0.0
+        self.trades[slot] = 0
+        if self.trades_total == 0:  # no float drift once the window is empty
+            self.volume_total = self.flow_total = 0.0
+        if self.buyers is not None and self.slot_buyers[slot]:
+            for w in self.slot_buyers[slot]:
+                del self.buyers[w]
+            self.slot_buyers[slot] = None
+
+    def advance(self, bucket) -> bool:
+        """Move the window head to `bucket`; False if `bucket` already fell out of the window."""
+        head = self.head
+        if head is None:
+            self.head = bucket
+            return True
+        if bucket > head:
+            for b in range(head + 1, min(bucket, head + AGG_WINDOW_BUCKETS) + 1):
+                self._expire(b % AGG_WINDOW_BUCKETS)
+            self.head = bucket
+            return True
+        return bucket > head - AGG_WINDOW_BUCKETS
+
+    def add_trade(self, bucket, sol, side, wallet=None):
+        if not self.advance(bucket):
+            return
+        slot = bucket % AGG_WINDOW_BUCKETS
+        flow = sol * side
+        self.volume[slot] += sol
+        self.flow[slot] += flow
+        self.trades[slot] += 1
+        self.volume_total += sol
+        self.flow_total += flow
+        self.trades_total += 1
+        if side > 0 and wallet and self.buyers is not None:
+            prev = self.buyers.get(wallet)
+            if prev is not None:
+                if prev >= bucket:
+                    return
+                self.slot_buyers[prev % AGG_WINDOW_BUCKETS].discard(wallet)
+            self.buyers[wallet] = bucket
+            s = self.slot_buyers[slot]
+            if s is None:
+                s = self.slot_buyers[slot] = set()
+            s.add(wallet)
+
+    def snapshot(self, now=None) -> dict:
+        """Window totals as of `now` (default: the latest event seen)."""
+        if now is not None:
+            self.advance(int(now // AGG_BUCKET_S))
+        return {
+            "volume_sol": round(self.volume_total, 6),
+            "net_flow_sol": round(self.flow_total, 6),
+            "trades": self.trades_total,
+            "unique_buyers": len(self.buyers) if self.buyers is not None else None,
+            "transfers": self.transfers,
+            "whale_transfers": self.whales,
+            "last_ts": self.last_ts,
+        }
+
+    def to_dict(self) -> dict:
+        return {"head": self.head, "volume": self.volume.tolist(), "flow": self.flow.tolist(),
+                "trades": self.trades.tolist(), "buyers": self.buyers, "transfers": self.transfers,
+                "whales": self.whales, "last_ts": self.last_ts}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "RollingAggregate":
+        agg = cls(track_buyers=d.get("buyers") is not None)
+        agg.head = d.get("head")
+        for name in ("volume", "flow", "trades"):
+            values = d.get(name) or []
+            if len(values) == AGG_WINDOW_BUCKETS:
+                getattr(agg, name)[:] = array(getattr(agg, name).typecode, values)
+        agg.volume_total, agg.flow_total = sum(agg.volume), sum(agg.flow)
+        agg.trades_total = sum(agg.trades)
+        if agg.buyers is not None and agg.head is not None:
+            for w, b in d["buyers"].items():
+                if b > agg.head - AGG_WINDOW_BUCKETS:
+                    agg.buyers[w] = b
+                    slot = b % AGG_WINDOW_BUCKETS
+                    if agg.slot_buyers[slot] is None:
+                        agg.slot_buyers[slot] = set()
+                    agg.slot_buyers[slot].add(w)
+        agg.transfers, agg.whales = d.get("transfers", 0), d.get("whales", 0)
+        agg.last_ts = d.get("last_ts", 0.0)
+        return agg
+
+
+def _raw_amount(t: dict) -> float:
+    raw = t.get("rawTokenAmount") or {}
+    try:
+        return int(raw.get("tokenAmount", 0)) / 10 ** int(raw.get("decimals", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
 class HeliusEventBuffer:
-    """Circular buffer for recent events, deduped by signature."""
+    """Bounded buffer of recent events with rolling per-token / per-wallet aggregates.
+
+    Memory is bounded: `maxlen` compact Events, SEEN_SIG_MAX signatures (FIFO),
+    MAX_TRACKED_TOKENS / MAX_TRACKED_WALLETS aggregates (least recently active evicted).
+    Aggregates touched since the last snapshot are tracked in dirty_tokens / dirty_wallets.
+    """
 
     def __init__(self, maxlen=MAX_EVENT_BUFFER):
         self.events = deque(maxlen=maxlen)
         self.seen_sigs = set()
+        self._sig_order = deque()
+        self.tokens = OrderedDict()   # mint → RollingAggregate
+        self.wallets = OrderedDict()  # wallet → RollingAggregate (no buyer set)
+        self.dirty_tokens = set()
+        self.dirty_wallets = set()
         self.stats = {
             "total_received": 0,
             "transfers": 0,
             "swaps": 0,
             "other": 0,
             "whale_alerts": 0,
+            "large_swaps": 0,
+            "duplicates": 0,
         }
 
+    def _remember(self, sig):
+        self.seen_sigs.add(sig)
+        self._sig_order.append(sig)
+        if len(self._sig_order) > SEEN_SIG_MAX:
+            self.seen_sigs.discard(self._sig_order.popleft())
+
+    def _agg(self, table, dirty, key, cap, track_buyers):
+        agg = table.get(key)
+        if agg is None:
+            agg = table[key] = RollingAggregate(track_buyers)
+            if len(table) > cap:
+                evicted, _ = table.popitem(last=False)
+                dirty.discard(evicted)
+        else:
+            table.move_to_end(key)
+        dirty.add(key)
+        return agg
+
+    def token(self, mint) -> RollingAggregate:
+        return self._agg(self.tokens, self.dirty_tokens, mint, MAX_TRACKED_TOKENS, True)
+
+    def wallet(self, address) -> RollingAggregate:
+        return self._agg(self.wallets, self.dirty_wallets, address, MAX_TRACKED_WALLETS, False)
+
+    def token_stats(self, mint, now=None) -> dict | None:
+        agg = self.tokens.get(mint)
+        return agg.snapshot(now) if agg is not None else None
+
+    def wallet_stats(self, address, now=None) -> dict | None:
+        agg = self.wallets.get(address)
+        return agg.snapshot(now) if agg is not None else None
+
+    def _transfer(self, event, sig, ts) -> Event:
+        self.stats["transfers"] += 1
+        best = None
+        for tt in event.get("tokenTransfers") or ():
+            amt = tt.get("tokenAmount", 0)
+            if isinstance(amt, (int, float)) and amt > 0 and (best is None or amt > best.get("tokenAmount")):
+                best = tt
+        if best is None:
+            return Event(sig, ts, KIND_TRANSFER)
+        amt = best["tokenAmount"]
+        # Whale threshold: >$50k equivalent (we don't know USD here,
+        # but large raw amounts are flagged for downstream enrichment)
+        ev = Event(sig, ts, KIND_TRANSFER, best.get("mint", ""), best.get("fromUserAccount", ""),
+                   best.get("toUserAccount", ""), amt, alert=amt > WHALE_TOKEN_AMOUNT)
+        if ev.mint:
+            agg = self.token(ev.mint)
+            agg.transfers += 1
+            agg.whales += ev.alert
+            agg.last_ts = ts
+        for w in (ev.wallet, ev.counterparty):
+            if w:
+                wagg = self.wallet(w)
+                wagg.transfers += 1
+                wagg.whales += ev.alert
+                wagg.last_ts = ts
+        if ev.alert:
+            self.stats["whale_alerts"] += 1
+        return ev
+
+    def _swap(self, event, sig, ts) -> Event:
+        self.stats["swaps"] += 1
+        swap = (event.get("events") or {}).get("swap") or {}
+        native_in, native_out = swap.get("nativeInput") or {}, swap.get("nativeOutput") or {}
+        if native_in.get("amount"):  # SOL → token
+            side, native, legs = 1, native_in, swap.get("tokenOutputs")
+        elif native_out.get("amount"):  # token → SOL
+            side, native, legs = -1, native_out, swap.get("tokenInputs")
+        else:  # token → token: no SOL leg, counted but not aggregated
+            return Event(sig, ts, KIND_SWAP, wallet=event.get("feePayer", ""))
+        leg = legs[0] if legs else {}
+        try:
+            sol = int(native["amount"]) / LAMPORTS_PER_SOL
+        except (TypeError, ValueError):
+            sol = 0.0
+        wallet = native.get("account") or event.get("feePayer", "")
+        ev = Event(sig, ts, KIND_SWAP, leg.get("mint", ""), wallet, amount=_raw_amount(leg),
+                   sol=sol, side=side, alert=sol >= LARGE_SWAP_SOL)
+        bucket = int(ts // AGG_BUCKET_S)
+        if ev.mint:
+            agg = self.token(ev.mint)
+            agg.add_trade(bucket, sol, side, wallet)
+            agg.last_ts = ts
+        if wallet:
+            wagg = self.wallet(wallet)
+            wagg.add_trade(bucket, sol, side)
+            wagg.last_ts = ts
+        if ev.alert:
+            self.stats["large_swaps"] += 1
+        return ev
+
     def process(self, event: dict) -> dict | None:
         """Process a raw Helius enhanced transaction event.
-        Returns a normalized signal dict, or None if duplicate/irrelevant."""
+
+        Every event updates stats and the rolling aggregates; a signal dict is built
+        only for actionable events (whale transfer, large swap). Returns None for
+        duplicates and routine events."""
         sig = event.get("signature", "")
-        if sig in self.seen_sigs:
-            return None
         if sig:
-            self.seen_sigs.add(sig)
-            # Prune seen set if too large
-            if len(self.seen_sigs) > MAX_EVENT_BUFFER * 2:
-                self.seen_sigs = set(list(self.seen_sigs)[-MAX_EVENT_BUFFER:])
+            if sig in self.seen_sigs:
+                self.stats["duplicates"] += 1
+                return None
+            self._remember(sig)
 
         self.stats["total_received"] += 1
-
         tx_type = event.get("type", "UNKNOWN")
-        description = event.get("description", "")
-        timestamp = event.get("timestamp", 0)
+        ts = event.get("timestamp") or time.time()
 
-        # Classify
+        if tx_type in TRANSFER_TYPES:
+            ev = self._transfer(event, sig, ts)
+        elif tx_type == "SWAP":
+            ev = self._swap(event, sig, ts)
+        else:
+            self.stats["other"] += 1
+            ev = Event(sig, ts, KIND_OTHER)
+        self.events.append(ev)
+        return self._signal(event, ev) if ev.alert else None
+
+    def _signal(self, event: dict, ev: Event) -> dict:
         signal = {
             "source": "helius_ws",
-            "signature": sig,
-            "type": tx_type,
-            "description": description[:200],
-            "timestamp": timestamp,
+            "signature": ev.signature,
+            "type": event.get("type", "UNKNOWN"),
+            "description": (event.get("description") or "")[:200],
+            "timestamp": event.get("timestamp", 0),
             "received_at": _now().isoformat(),
+            "mint": ev.mint,
         }
-
-        if tx_type in ("TRANSFER", "TOKEN_TRANSFER"):
-            self.stats["transfers"] += 1
-            # Extract amount for whale detection
-            token_transfers = event.get("tokenTransfers", [])
-            for tt in token_transfers:
-                amt = tt.get("tokenAmount", 0)
-                if isinstance(amt, (int, float)) and amt > 0:
-                    signal["token_amount"] = amt
-                    signal["mint"] = tt.get("mint", "")
-                    signal["from"] = tt.get("fromUserAccount", "")
-                    signal["to"] = tt.get("toUserAccount", "")
-                    # Whale threshold: >$50k equivalent (we don't know USD here,
-                    # but large raw amounts are flagged for downstream enrichment)
-                    if amt > 1_000_000:
-                        signal["whale_alert"] = True
-                        self.stats["whale_alerts"] += 1
-
-        elif tx_type == "SWAP":
-            self.stats["swaps"] += 1
-            swap_info = event.get("events", {}).get("swap", {})
-            signal["swap"] = swap_info
-
+        if ev.kind == KIND_TRANSFER:
+            signal.update(token_amount=ev.amount, whale_alert=True, **{"from": ev.wallet, "to": ev.counterparty})
         else:
-            self.stats["other"] += 1
-
-        self.events.append(signal)
+            signal.update(swap=(event.get("events") or {}).get("swap", {}), large_swap=True, wallet=ev.wallet,
+                          side="BUY" if ev.side > 0 else "SELL", sol_amount=ev.sol, token_amount=ev.amount)
+        if ev.mint in self.tokens:
+            signal["token_window"] = self.tokens[ev.mint].snapshot()
         return signal
 
 
@@ -164,6 +430,8 @@ async def connect_and_listen(
     buffer: HeliusEventBuffer,
     on_signal=None,
     duration_s: int = 0,
+    snapshotter=None,
+    record_path=None,
 ):
     """Connect to Helius enhanced WebSocket and listen for events.
 
@@ -171,6 +439,8 @@ async def connect_and_listen(
         buffer: HeliusEventBuffer to store events
         on_signal: optional callback(signal_dict)
         duration_s: if >0, disconnect after this many seconds (for testing)
+        snapshotter: optional StateSnapshotter, saved incrementally while listening
+        record_path: optional JSONL file; raw events are appended for --bench replay
     """
     try:
         import websockets
@@ -240,9 +510,14 @@ async def connect_and_listen(
                     params = data.get("params", {})
                     result = params.get("result", {})
                     if isinstance(result, dict):
+                        if record_path:
+                            with open(record_path, "a") as f:
+                                f.write(json.dumps(result) + "\n")
                         signal = buffer.process(result)
                         if signal and on_signal:
                             on_signal(signal)
+                    if snapshotter:
+                        snapshotter.maybe_save()
 
                     # Duration check for tests
                     if duration_s > 0 and (time.monotonic() - start_time) > duration_s:
@@ -264,14 +539,117 @@ async def connect_and_listen(
 # State persistence
 # ─────────────────────────────────────────────────────────
 
-def save_state(buffer: HeliusEventBuffer):
-    """Save current state to disk."""
+def save_state(buffer: HeliusEventBuffer, state_dir=None):
+    """Save the small status summary (stats + last events) to disk."""
     state = {
         "stats": buffer.stats,
-        "last_events": list(buffer.events)[-10:],
+        "last_events": [e.to_dict() for e in list(buffer.events)[-10:]],
+        "tokens_tracked": len(buffer.tokens),
+        "wallets_tracked": len(buffer.wallets),
         "updated_at": _now().isoformat(),
     }
-    _save_json(STATE_DIR / "helius_ws_state.json", state)
+    _save_json(Path(state_dir or STATE_DIR) / "helius_ws_state.json", state)
+
+
+class StateSnapshotter:
+    """Incremental aggregate persistence: base snapshot + append-only journal.
+
+    save() appends one journal line holding only the aggregates touched since the
+    previous save; after SNAPSHOT_COMPACT_LINES lines the journal is folded into
+    the base (full rewrite, then truncate). Lines carry a sequence number and the
+    base records the last one it includes, so a crash between the two steps never
+    replays stale entries on restore().
+    """
+
+    def __init__(self, buffer: HeliusEventBuffer, state_dir=None,
+                 interval_s=SNAPSHOT_INTERVAL_S, compact_lines=SNAPSHOT_COMPACT_LINES):
+        self.buffer = buffer
+        self.state_dir = Path(state_dir or STATE_DIR)
+        self.base_path = self.state_dir / "helius_ws_aggregates.json"
+        self.journal_path = self.state_dir / "helius_ws_aggregates.jsonl"
+        self.interval_s = interval_s
+        self.compact_lines = compact_lines
+        self.seq = 0
+        self.journal_lines = 0
+        self._last_save = time.monotonic()
+
+    def maybe_save(self) -> bool:
+        if time.monotonic() - self._last_save < self.interval_s:
+            return False
+        self.save()
+        return True
+
+    def save(self) -> int:
+        """Persist dirty aggregates + status summary → number of aggregates written."""
+        buf = self.buffer
+        tokens = {m: buf.tokens[m].to_dict() for m in buf.dirty_tokens if m in buf.tokens}
+        wallets = {w: buf.wallets[w].to_dict() for w in buf.dirty_wallets if w in buf.wallets}
+        buf.dirty_tokens.clear()
+        buf.dirty_wallets.clear()
+        if tokens or wallets:
+            self.seq += 1
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.journal_path, "a") as f:
+                f.write(json.dumps({"seq": self.seq, "tokens": tokens, "wallets": wallets},
+                                   separators=(",", ":")) + "\n")
+            self.journal_lines += 1
+        save_state(buf, self.state_dir)
+        if self.journal_lines >= self.compact_lines:
+            self.compact()
+        self._last_save = time.monotonic()
+        return len(tokens) + len(wallets)
+
+    def compact(self):
+        buf = self.buffer
+        base = {
+            "seq": self.seq,
+            "tokens": {m: a.to_dict() for m, a in buf.tokens.items()},
+            "wallets": {w: a.to_dict() for w, a in buf.wallets.items()},
+            "updated_at": _now().isoformat(),
+        }
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.base_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(base, f, separators=(",", ":"))
+        os.replace(tmp, self.base_path)
+        with open(self.journal_path, "w"):
+            pass
+        self.journal_lines = 0
+
+    def restore(self) -> int:
+        """Rebuild the buffer's aggregates from base + journal → aggregates restored."""
+        buf = self.buffer
+        base = _load_json(self.base_path, {})
+        self.seq = base.get("seq", 0)
+        layers = [base]
+        self.journal_lines = 0
+        try:
+            with open(self.journal_path, "rb+") as f:
+                good = 0
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        entry = json.loads(line)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        break  # torn tail from a crash mid-append
+                    good += len(line)
+                    self.journal_lines += 1
+                    if entry.get("seq", 0) > self.seq:
+                        layers.append(entry)
+                        self.seq = entry["seq"]
+                f.truncate(good)  # next append starts on a clean line
+        except FileNotFoundError:
+            pass
+        for layer in layers:
+            for table, key in ((buf.tokens, "tokens"), (buf.wallets, "wallets")):
+                for k, d in (layer.get(key) or {}).items():
+                    table[k] = RollingAggregate.from_dict(d)
+                    table.move_to_end(k)
+        for table, cap in ((buf.tokens, MAX_TRACKED_TOKENS), (buf.wallets, MAX_TRACKED_WALLETS)):
+            while len(table) > cap:
+                table.popitem(last=False)
+        return len(buf.tokens) + len(buf.wallets)
 
 
 def save_signal(signal: dict):
@@ -282,18 +660,101 @@ def save_signal(signal: dict):
     _save_json(path, signal)
 
 
+# ─────────────────────────────────────────────────────────
+# Benchmark
+# ─────────────────────────────────────────────────────────
+
+def _synthetic_events(n: int, tokens=200, wallets=2_000, start_ts=1_700_000_000) -> list[dict]:
+    """Deterministic enhanced-transaction mix (~70% swaps, 25% transfers) spanning ~2h."""
+    import random
+    rng = random.Random(7)
+    mints = [f"Mint{i:040d}" for i in range(tokens)]
+    users = [f"User{i:040d}" for i in range(wallets)]
+    sol_mint = "So11111111111111111111111111111111111111112"
+    out = []
+    for i in range(n):
+        ts = start_ts + i * 7200 // max(n, 1)
+        roll = rng.random()
+        mint, user = rng.choice(mints), rng.choice(users)
+        if roll < 0.70:
+            lamports = str(int(rng.paretovariate(1.2) * 2 * LAMPORTS_PER_SOL))
+            leg = {"userAccount": user, "mint": mint,
+                   "rawTokenAmount": {"tokenAmount": str(rng.randrange(10**6, 10**12)), "decimals": 6}}
+            swap = {"nativeInput": {"account": user, "amount": lamports}, "tokenOutputs": [leg]} \
+                if rng.random() < 0.55 else {"nativeOutput": {"account": user, "amount": lamports},
+                                             "tokenInputs": [leg]}
+            out.append({"signature": f"bench{i}", "type": "SWAP", "timestamp": ts, "feePayer": user,
+                        "description": f"{user[:8]} swapped on Raydium", "source": "RAYDIUM",
+                        "tokenTransfers": [{"mint": mint, "tokenAmount": 1.0, "fromUserAccount": user}],
+                        "nativeTransfers": [{"fromUserAccount": user, "amount": int(lamports)}],
+                        "events": {"swap": swap}, "accountData": [{"account": sol_mint}]})
+        elif roll < 0.95:
+            out.append({"signature": f"bench{i}", "type": "TRANSFER", "timestamp": ts, "feePayer": user,
+                        "description": f"{user[:8]} transferred {mint[:8]}",
+                        "tokenTransfers": [{"mint": mint, "tokenAmount": rng.paretovariate(1.1) * 5_000,
+                                            "fromUserAccount": user,
+                                            "toUserAccount": rng.choice(users)}]})
+        else:
+            out.append({"signature": f"bench{i}", "type": "UNKNOWN", "timestamp": ts, "feePayer": user,
+                        "description": "program interaction"})
+    return out
+
+
+def _load_recorded(path, n: int) -> list[dict]:
+    """Events recorded with --record, cycled (signatures made unique) up to n."""
+    recorded = []
+    with open(path) as f:
+        for line in f:
+            try:
+                recorded.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    if not recorded:
+        return []
+    out = []
+    for i in range(n):
+        ev = dict(recorded[i % len(recorded)])
+        if i >= len(recorded):
+            ev["signature"] = f"{ev.get('signature', '')}#{i // len(recorded)}"
+        out.append(ev)
+    return out
+
+
+def _bench(n: int = 50_000, path=None) -> dict:
+    """Replay n events through a fresh buffer with incremental snapshots to a temp dir."""
+    import tempfile
+    events = _load_recorded(path, n) if path else _synthetic_events(n)
+    n = len(events)
+    buf = HeliusEventBuffer()
+    with tempfile.TemporaryDirectory(prefix="helius_bench_") as td:
+        snap = StateSnapshotter(buf, state_dir=td, interval_s=0.25)
+        signals = 0
+        t0 = time.perf_counter()
+        for ev in events:
+            if buf.process(ev) is not None:
+                signals += 1
+            snap.maybe_save()
+        snap.save()
+        elapsed = time.perf_counter() - t0
+        disk = sum(f.stat().st_size for f in Path(td).iterdir())
+    return {"events": n, "seconds": elapsed, "rate": n / elapsed if elapsed else 0.0, "signals": signals,
+            "tokens": len(buf.tokens), "wallets": len(buf.wallets), "snapshot_bytes": disk}
+
+
 # ─────────────────────────────────────────────────────────
 # Entry points
 # ─────────────────────────────────────────────────────────
 
-async def run_daemon(buffer: HeliusEventBuffer):
+async def run_daemon(buffer: HeliusEventBuffer, snapshotter=None, record_path=None):
     """Run as persistent daemon."""
     def on_signal(sig):
         save_signal(sig)
         if sig.get("whale_alert"):
             _log(f"🐋 WHALE ALERT: {sig.get('description', '')[:100]}")
+        elif sig.get("large_swap"):
+            _log(f"🐳 LARGE SWAP: {sig['side']} {sig['sol_amount']:.1f} SOL of {sig['mint'][:12]}")
 
-    await connect_and_listen(buffer, on_signal=on_signal)
+    await connect_and_listen(buffer, on_signal=on_signal, snapshotter=snapshotter, record_path=record_path)
 
 
 async def run_test(duration: int = 20):
@@ -341,7 +802,15 @@ async def run_test(duration: int = 20):
 
 
 if __name__ == "__main__":
-    if "--test" in sys.argv:
+    if "--bench" in sys.argv:
+        rest = sys.argv[sys.argv.index("--bench") + 1:]
+        n = int(rest[0]) if rest and rest[0].isdigit() else 50_000
+        path = next((a for a in rest if not a.isdigit()), None)
+        r = _bench(n, path)
+        print(f"{r['events']} events in {r['seconds'] * 1000:.0f} ms ({r['rate']:,.0f}/s) — "
+              f"{r['signals']} signals, {r['tokens']} tokens / {r['wallets']} wallets tracked, "
+              f"snapshots {r['snapshot_bytes'] / 1024:.0f} KB")
+    elif "--test" in sys.argv:
         dur = 20
         for a in sys.argv:
             if a.isdigit():
@@ -350,8 +819,11 @@ if __name__ == "__main__":
     else:
         _log("Starting Helius WS daemon...")
         buf = HeliusEventBuffer()
+        snap = StateSnapshotter(buf)
+        _log(f"Restored {snap.restore()} rolling aggregates")
+        record = sys.argv[sys.argv.index("--record") + 1] if "--record" in sys.argv[:-1] else None
         try:
-            asyncio.run(run_daemon(buf))
+            asyncio.run(run_daemon(buf, snap, record))
         except KeyboardInterrupt:
             _log("Shutdown requested")
-            save_state(buf)
+            snap.save()
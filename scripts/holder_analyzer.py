@@ -33,6 +33,7 @@ import env_loader
 env_loader.load_env()
 
 import helius_client
+import enrichment_cache
 
 
 def _log(msg):
@@ -87,8 +88,9 @@ def analyze_concentration(mint_address: str) -> dict:
     """
     _log(f"Analyzing {mint_address[:16]}...")
 
-    # Fetch holders via existing helius_client
-    holders = helius_client.get_token_holders(mint_address, limit=50)
+    # Fetch holders via existing helius_client (shared with other analyzers for FIELD_TTLS["holders"])
+    holders = enrichment_cache.get_or_fetch("helius", "solana", mint_address, "holders",
+                                            lambda: helius_client.get_token_holders(mint_address, limit=50))
     if holders is None:
         _log("No holder data — marking high risk")
         return {
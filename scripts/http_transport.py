@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader v3.1 — Shared HTTP Transport
+
+binance_client opened a fresh urllib connection per request and the data
+clients (dexscreener, birdeye, helius, mexc, coingecko, rugcheck), the
+notifier and sanad_pipeline's LLM calls used bare requests.get/post: every
+call paid TCP + TLS setup, which dominates latency for small JSON responses.
+
+Every client now goes through one transport:
+
+  - One pooled session per origin (scheme://host) per process, keep-alive,
+    up to POOL_MAXSIZE idle connections (enough for scan_orchestrator's
+    concurrent scanners and fan_out workers). Sessions are dropped in a
+    forked child — a pooled socket must never be shared with the parent.
+  - Optional HTTP/2: SANAD_HTTP2=1 and httpx[http2] installed → an httpx
+    client per origin behind the same interface (requests.Response out,
+    requests exceptions raised). Otherwise HTTP/1.1 keep-alive.
+  - Connection-level retries with full-jitter backoff: refused / reset /
+    DNS failures and dropped keep-alive connections. Idempotent requests
+    (GET, or idempotent=True — e.g. read-only JSON-RPC) retry on any
+    connection error; others only when the request provably never left
+    (connection could not be opened). Timeouts are never retried — the
+    caller's deadline is already spent. HTTP status codes are the caller's
+    business (429 → rate_limiter, 5xx → breaker_registry).
+  - Timing histograms per host + endpoint (opaque path segments such as
+    token addresses or the Telegram bot token become ":id"): request count,
+    errors, retries, total/max ms and BUCKETS_MS counts, flushed to
+    state_store http_request_stats every STATS_FLUSH_INTERVAL_S and at exit.
+
+Client usage:
+  resp = http_transport.get(url, params=..., headers=..., timeout=8)
+  resp = http_transport.post(RPC_URL, json=payload, timeout=30, idempotent=True,
+                             endpoint=f"rpc:{method}")
+
+CLI:
+  python3 scripts/http_transport.py [--hours 24]   # per host/endpoint latency
+"""
+
+import argparse
+import atexit
+import bisect
+import importlib.util
+import os
+import random
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import state_store
+
+DB_PATH = None  # None → state_store.DB_PATH
+
+POOL_MAXSIZE = 16
+RETRIES = 2
+BACKOFF_BASE_S = 0.2
+BACKOFF_CAP_S = 2.0
+HTTP2 = os.environ.get("SANAD_HTTP2", "0") == "1"
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000)  # + one overflow bucket
+STATS_FLUSH_INTERVAL_S = 60
+
+_OPAQUE_SEGMENT = re.compile(r"^(?:\d+|0x[0-9a-fA-F]+|[A-Za-z0-9_\-:.]{20,})$")
+
+_sessions: dict = {}
+_sessions_lock = threading.Lock()
+_http2_warned = False
+
+_totals: dict = {}   # (host, endpoint) → [requests, errors, retries, total_ms, max_ms, buckets]
+_pending: dict = {}  # same, not yet flushed
+_stats_lock = threading.Lock()
+_last_stats_flush = time.monotonic()
+_flush_warned = False
+
+
+def _log(msg: str):
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] [HTTP] {msg}", flush=True)
+
+
+def _reset_after_fork():
+    global _sessions_lock, _stats_lock
+    _sessions.clear()  # pooled sockets belong to the parent
+    _sessions_lock = threading.Lock()
+    _pending.clear()   # the parent flushes its own counters
+    _totals.clear()
+    _stats_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+# ─────────────────────────────────────────────────────────
+# Sessions
+# ─────────────────────────────────────────────────────────
+
+class _Http2Session:
+    """httpx.Client(http2=True) behind requests.Session.request: requests.Response out,
+    requests exceptions raised."""
+
+    def __init__(self):
+        import httpx
+        self._httpx = httpx
+        self._client = httpx.Client(http2=True, limits=httpx.Limits(max_keepalive_connections=POOL_MAXSIZE))
+
+    def request(self, method, url, params=None, data=None, json=None, headers=None, timeout=None, **_):
+        httpx = self._httpx
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        body = {"data": data} if isinstance(data, dict) else {"content": data}
+        try:
+            r = self._client.request(method, url, params=params, json=json, headers=headers,
+                                     timeout=timeout, **body)
+        except httpx.ConnectTimeout as e:
+            raise requests.exceptions.ConnectTimeout(str(e)) from e
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(str(e)) from e
+        except httpx.TransportError as e:
+            err = requests.exceptions.ConnectionError(str(e))
+            err.never_sent = isinstance(e, httpx.ConnectError)
+            raise err from e
+        resp = requests.Response()
+        resp.status_code = r.status_code
+        resp.headers = requests.structures.CaseInsensitiveDict(r.headers)
+        resp._content = r.content
+        resp.encoding = r.encoding
+        resp.reason = r.reason_phrase
+        resp.url = str(r.url)
+        return resp
+
+    def close(self):
+        self._client.close()
+
+
+def _new_session():
+    global _http2_warned
+    if HTTP2:
+        if importlib.util.find_spec("httpx") and importlib.util.find_spec("h2"):
+            return _Http2Session()
+        if not _http2_warned:
+            _http2_warned = True
+            _log("SANAD_HTTP2=1 but httpx[http2] is not installed — using HTTP/1.1 keep-alive")
+    s = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+    s.mount("https://", adapter)
+    s.mount("http://", adapter)
+    return s
+
+
+def session(url: str):
+    """The pooled session for `url`'s origin (created on first use)."""
+    parts = urlsplit(url)
+    origin = f"{parts.scheme}://{parts.netloc}".lower()
+    s = _sessions.get(origin)
+    if s is None:
+        with _sessions_lock:
+            s = _sessions.get(origin)
+            if s is None:
+                s = _sessions[origin] = _new_session()
+    return s
+
+
+def close_all():
+    """Close every pooled session (tests, shutdown)."""
+    with _sessions_lock:
+        for s in _sessions.values():
+            try:
+                s.close()
+            except Exception:
+                pass
+        _sessions.clear()
+
+
+# ─────────────────────────────────────────────────────────
+# Requests
+# ─────────────────────────────────────────────────────────
+
+def _never_sent(exc) -> bool:
+    """True when the connection could not be opened, so the server saw nothing."""
+    if hasattr(exc, "never_sent"):
+        return exc.never_sent
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(reason, urllib3.exceptions.NewConnectionError)
+
+
+def _retryable(exc, idempotent: bool) -> bool:
+    if isinstance(exc, requests.exceptions.Timeout):
+        return False  # caller's deadline already spent
+    if not isinstance(exc, requests.exceptions.ConnectionError):
+        return False
+    return idempotent or _never_sent(exc)
+
+
+def _backoff_s(attempt: int) -> float:
+    """Full jitter: uniform in [0, min(cap, base·2^(attempt-1))]."""
+    return random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** (attempt - 1)))
+
+
+def endpoint_of(url: str) -> tuple[str, str]:
+    """(host, endpoint) label: path only, opaque segments (addresses, ids, tokens) → ':id'."""
+    parts = urlsplit(url)
+    segments = [":id" if _OPAQUE_SEGMENT.match(seg) else seg for seg in parts.path.split("/")]
+    return (parts.hostname or "").lower(), "/".join(segments) or "/"
+
+
+def request(method: str, url: str, idempotent: bool = None, retries: int = None,
+            endpoint: str = None, **kwargs) -> "requests.Response":
+    """requests.request(method, url, **kwargs) through the pooled session for url's origin.
+
+    idempotent: allow retrying any connection error (default: by HTTP method).
+    endpoint: histogram label override (e.g. "rpc:getAsset" for JSON-RPC).
+    Raises the last requests exception once retries are exhausted.
+    """
+    method = method.upper()
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+    retries = RETRIES if retries is None else retries
+    host, path = endpoint_of(url)
+    label = endpoint or path
+    s = session(url)
+    attempt = 0
+    t0 = time.perf_counter()
+    while True:
+        try:
+            resp = s.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if attempt < retries and _retryable(e, idempotent):
+                attempt += 1
+                time.sleep(_backoff_s(attempt))
+                continue
+            _observe(host, label, (time.perf_counter() - t0) * 1000, attempt, True)
+            raise
+        _observe(host, label, (time.perf_counter() - t0) * 1000, attempt, resp.status_code >= 500)
+        return resp
+
+
+def get(url: str, **kwargs) -> "requests.Response":
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> "requests.Response":
+    return request("POST", url, **kwargs)
+
+
+# ─────────────────────────────────────────────────────────
+# Timing histograms
+# ─────────────────────────────────────────────────────────
+
+def _observe(host: str, endpoint: str, ms: float, retries: int, error: bool):
+    slot = bisect.bisect_left(BUCKETS_MS, ms)
+    with _stats_lock:
+        for table in (_totals, _pending):
+            s = table.get((host, endpoint))
+            if s is None:
+                s = table[(host, endpoint)] = [0, 0, 0, 0.0, 0.0, [0] * (len(BUCKETS_MS) + 1)]
+            s[0] += 1
+            s[1] += int(error)
+            s[2] += retries
+            s[3] += ms
+            s[4] = max(s[4], ms)
+            s[5][slot] += 1
+    if time.monotonic() - _last_stats_flush >= STATS_FLUSH_INTERVAL_S:
+        flush_stats()
+
+
+def flush_stats(db_path=None) -> int:
+    """Write pending histograms to http_request_stats. Returns (host, endpoint) rows written."""
+    global _last_stats_flush, _flush_warned
+    with _stats_lock:
+        rows = [(h, e, *s[:5], list(s[5])) for (h, e), s in _pending.items()]
+        _pending.clear()
+        _last_stats_flush = time.monotonic()
+    if not rows:
+        return 0
+    db = db_path or DB_PATH or state_store.DB_PATH
+    if not Path(db).exists():
+        return 0  # never create a database just to hold stats
+    try:
+        state_store.add_http_stats(rows, datetime.now(timezone.utc).strftime("%Y-%m-%dT%H"), db_path=db)
+    except Exception as e:
+        if not _flush_warned:
+            _flush_warned = True
+            _log(f"stats flush failed, dropping: {e}")
+        return 0
+    return len(rows)
+
+
+atexit.register(flush_stats)
+
+
+def _percentile(buckets: list, p: float, max_ms: float) -> float:
+    """Upper bound of the bucket holding the p-th percentile (max_ms for the overflow bucket)."""
+    n = sum(buckets)
+    if not n:
+        return 0.0
+    rank, seen = p / 100 * n, 0
+    for i, count in enumerate(buckets):
+        seen += count
+        if seen >= rank:
+            return round(min(BUCKETS_MS[i], max_ms), 1) if i < len(BUCKETS_MS) else round(max_ms, 1)
+    return round(max_ms, 1)
+
+
+def summarize(host: str, endpoint: str, count: int, errors: int, retries: int, total_ms: float,
+              max_ms: float, buckets: list) -> dict:
+    out = {"host": host, "endpoint": endpoint, "requests": count, "errors": errors, "retries": retries,
+           "mean_ms": round(total_ms / count, 1) if count else 0.0, "max_ms": round(max_ms, 1),
+           "buckets": list(buckets)}
+    for p in (50, 90, 99):
+        out[f"p{p}_ms"] = _percentile(buckets, p, max_ms)
+    return out
+
+
+def stats() -> list[dict]:
+    """This process's histograms since start, one summary per (host, endpoint)."""
+    with _stats_lock:
+        rows = [(h, e, *s[:5], list(s[5])) for (h, e), s in sorted(_totals.items())]
+    return [summarize(*r) for r in rows]
+
+
+def stored_stats(hours: float = 24, db_path=None) -> list[dict]:
+    """Histograms from http_request_stats over the last `hours` (every process)."""
+    since = (datetime.now(timezone.utc) - timedelta(hours=hours)).strftime("%Y-%m-%dT%H")
+    rows = state_store.get_http_stats(since, db_path=db_path or DB_PATH or state_store.DB_PATH)
+    return [summarize(r["host"], r["endpoint"], r["requests"], r["errors"], r["retries"], r["total_ms"],
+                      r["max_ms"], r["buckets"]) for r in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP request latency per host/endpoint")
+    parser.add_argument("--hours", type=float, default=24)
+    args = parser.parse_args()
+    rows = stored_stats(args.hours)
+    if not rows:
+        print(f"No HTTP stats in the last {args.hours:g}h")
+        return
+    print(f"{'host':<28} {'endpoint':<32} {'reqs':>6} {'err':>5} {'retry':>5} "
+          f"{'p50':>6} {'p90':>6} {'p99':>6} {'max':>8}")
+    for r in rows:
+        print(f"{r['host'][:28]:<28} {r['endpoint'][:32]:<32} {r['requests']:>6} {r['errors']:>5} "
+              f"{r['retries']:>5} {r['p50_ms']:>6.0f} {r['p90_ms']:>6.0f} {r['p99_ms']:>6.0f} {r['max_ms']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,506 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader v3.1 — Resident Job Supervisor
+
+One long-lived process runs the high-frequency data-plane jobs that used to
+be separate cron entries (config/crontab_sprint6.txt), so each run no longer
+pays interpreter startup + pandas/yaml/requests/client imports.
+
+  - Scheduler: in-process, aligned to wall-clock multiples of each interval
+    (same firing times as the */N cron lines it replaces).
+  - Concurrency: different jobs overlap, the same job never does (a due run
+    while the previous one is still going is recorded as "skipped").
+  - Isolation: by default every run is os.fork()ed from the warm supervisor
+    (modules already imported → no cold start). A crash, sys.exit(), leak or
+    hang only affects that run; the timeout is enforced with SIGTERM/SIGKILL
+    and CPU comes from the child's rusage. Children are forked and reaped by
+    the scheduler (main) thread, never from a worker thread, so they cannot
+    inherit a logging/sqlite/import lock held mid-operation by another thread.
+    isolation="thread" runs in-process on a ThreadPoolExecutor (soft timeout:
+    the run is abandoned, not killed).
+  - job_lease: acquire before each run, release with ok/error/timeout.
+  - Metrics: every run → state_store job_runs (wall_ms, cpu_ms, status).
+    cron_health.json is written from the same record (atomic replace), so
+    heartbeat.check_cron_health keeps working without cron_runner_v2.sh's
+    shell JSON write.
+
+Cron-compatible fallback: `job_supervisor.py --once <job>` runs a single job
+through the same lease/metrics path and exits non-zero on failure, e.g.
+  */3 * * * * cd $SANAD_HOME && python3 scripts/job_supervisor.py --once price_snapshot
+
+Usage:
+  python3 scripts/job_supervisor.py                 # resident mode
+  python3 scripts/job_supervisor.py --once heartbeat
+  python3 scripts/job_supervisor.py --status        # per-job metrics (24h)
+"""
+
+import argparse
+import importlib
+import json
+import math
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
+STATE_DIR = BASE_DIR / "state"
+LOGS_DIR = BASE_DIR / "logs"
+CRON_HEALTH_PATH = STATE_DIR / "cron_health.json"
+
+sys.path.insert(0, str(SCRIPT_DIR))
+import state_store
+
+try:
+    from job_lease import acquire, release
+    HAS_LEASE = True
+except ImportError:
+    HAS_LEASE = False
+
+HAS_FORK = hasattr(os, "fork")
+
+LEASE_GRACE_S = 120
+KILL_GRACE_S = 5
+MAX_WORKERS = 4
+REAP_POLL_S = 0.05  # scheduler wake-up while forked runs are in flight
+
+
+# Replaces the */3 … */15 entries in config/crontab_sprint6.txt
+JOBS = [
+    {"name": "price_snapshot", "target": "price_snapshot:run_snapshot",
+     "interval_s": 180, "timeout_s": 120, "log": "price_snapshot.log"},
+    {"name": "dex_price_poller", "target": "dex_price_poller:run",
+     "interval_s": 60, "timeout_s": 45, "log": "dex_price_poller.log"},
+    {"name": "signal_router", "target": "signal_router:run_router",
+     "interval_s": 300, "timeout_s": 600, "log": "signal_router.log", "priority": "hot"},
+    {"name": "heartbeat", "target": "heartbeat:run_heartbeat",
+     "interval_s": 600, "timeout_s": 300, "log": "heartbeat.log"},
+    {"name": "quality_circuit_breaker", "target": "quality_circuit_breaker:main",
+     "interval_s": 600, "timeout_s": 120, "log": "quality_circuit_breaker_cron.log"},
+    {"name": "listing_index", "target": "listing_index:run",
+     "interval_s": 1800, "timeout_s": 120, "log": "listing_index.log"},
+    {"name": "regime_classifier", "target": "regime_classifier:run",
+     "interval_s": 3600, "timeout_s": 300, "log": "regime_classifier.log"},
+    {"name": "onchain_analytics", "target": "onchain_analytics:run",
+     "interval_s": 900, "timeout_s": 600, "log": "onchain.log", "priority": "background"},
+    {"name": "social_sentiment", "target": "social_sentiment:run",
+     "interval_s": 900, "timeout_s": 600, "log": "sentiment.log", "priority": "background"},
+    {"name": "scan_sweep", "target": "scan_orchestrator:run",
+     "interval_s": 300, "timeout_s": 270, "log": "scan_sweep.log", "priority": "background"},
+    {"name": "supabase_shipper", "target": "supabase_client:run_shipper",
+     "interval_s": 30, "timeout_s": 25, "log": "supabase_shipper.log", "priority": "background"},
+]
+
+
+def _log(msg: str):
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] [SUPERVISOR] {msg}", flush=True)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _resolve(target: str):
+    """'module:function' → callable (module imported once, in this process)."""
+    module_name, func_name = target.split(":", 1)
+    return getattr(importlib.import_module(module_name), func_name)
+
+
+def _outcome(fn, priority: str = None) -> tuple[str, str | None]:
+    """Run a job function with cron exit-code semantics → (status, detail).
+
+    priority: rate_limiter class for the job's API calls (JOBS "priority").
+    """
+    try:
+        if priority:
+            import rate_limiter
+            with rate_limiter.priority(priority):
+                result = fn()
+        else:
+            result = fn()
+    except SystemExit as e:
+        if e.code in (0, None):
+            return "ok", None
+        return "error", f"exit {e.code}"
+    except Exception as e:
+        return "error", f"{type(e).__name__}: {e}"
+    if result is False:  # price_snapshot: exit 1 when no prices fetched
+        return "error", "returned False"
+    return "ok", None
+
+
+# ---------------------------------------------------------------------------
+# Health output
+# ---------------------------------------------------------------------------
+_health_lock = threading.Lock()
+
+
+def update_cron_health(name: str, entry: dict):
+    """Set cron_health.json[name] = entry (read-merge-replace under one lock, so
+    jobs sharing this process — e.g. scan_orchestrator's scanners — never lose entries)."""
+    with _health_lock:
+        health = {}
+        try:
+            with open(CRON_HEALTH_PATH) as f:
+                health = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        health[name] = entry
+        CRON_HEALTH_PATH.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CRON_HEALTH_PATH.with_suffix(f".tmp.{os.getpid()}.{threading.get_ident()}")
+        tmp.write_text(json.dumps(health, indent=2))
+        os.replace(tmp, CRON_HEALTH_PATH)
+
+
+def _write_cron_health(name: str, run: dict):
+    """Merge one run into cron_health.json (same shape heartbeat reads)."""
+    update_cron_health(name, {
+        "last_run": run["finished_at"],
+        "status": run["status"],
+        "wall_ms": run["wall_ms"],
+        "cpu_ms": run["cpu_ms"],
+        "runner": run["runner"],
+    })
+
+
+def _record(name: str, run: dict, db_path=None):
+    try:
+        state_store.record_job_run(name, run["started_at"], run["finished_at"], run["status"],
+                                   run["wall_ms"], run["cpu_ms"], runner=run["runner"],
+                                   detail=run.get("detail"), db_path=db_path)
+    except Exception as e:
+        _log(f"{name}: failed to record run metrics: {e}")
+    if run["status"] != "skipped":
+        try:
+            _write_cron_health(name, run)
+        except Exception as e:
+            _log(f"{name}: failed to write cron_health.json: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Executors
+# ---------------------------------------------------------------------------
+def _child_main(job: dict, fn, write_fd: int):
+    """Forked child: run fn with output in the job's log, report over the pipe, _exit."""
+    code = 1
+    try:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        if job.get("log"):
+            LOGS_DIR.mkdir(parents=True, exist_ok=True)
+            log = open(LOGS_DIR / job["log"], "a", buffering=1)
+            # fds for subprocesses / C code; sys.std* too, which may not be fd 1/2 (e.g. under pytest)
+            os.dup2(log.fileno(), 1)
+            os.dup2(log.fileno(), 2)
+            sys.stdout = sys.stderr = log
+        from sampling_profiler import profile  # opt-in: SANAD_PROFILE=1
+        with profile(job["name"]):
+            status, detail = _outcome(fn, job.get("priority"))
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.write(write_fd, json.dumps({"status": status, "detail": detail}).encode()[:4000])
+        code = 0 if status == "ok" else 1
+    finally:
+        os._exit(code)
+
+
+def _spawn(job: dict, fn) -> dict:
+    """Fork a run of fn → child handle for _poll_child. Call from the scheduler (main) thread only."""
+    sys.stdout.flush()  # don't duplicate buffered supervisor output into the child
+    sys.stderr.flush()
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        _child_main(job, fn, write_fd)
+    os.close(write_fd)
+    return {"pid": pid, "read_fd": read_fd, "job": job, "timeout_s": job["timeout_s"],
+            "deadline": time.monotonic() + job["timeout_s"], "timed_out": False, "killed_at": None}
+
+
+def _poll_child(child: dict) -> tuple[str, str | None, float] | None:
+    """Non-blocking: enforce the child's timeout; (status, detail, cpu_s) once it has exited."""
+    wpid, wstatus, rusage = os.wait4(child["pid"], os.WNOHANG)
+    if not wpid:
+        now = time.monotonic()
+        if not child["timed_out"] and now >= child["deadline"]:
+            child["timed_out"] = True
+            child["killed_at"] = now
+            os.kill(child["pid"], signal.SIGTERM)
+        elif child["timed_out"] and now - child["killed_at"] >= KILL_GRACE_S:
+            os.kill(child["pid"], signal.SIGKILL)
+            child["killed_at"] = float("inf")
+        return None
+
+    with os.fdopen(child["read_fd"], "rb") as pipe:
+        payload = pipe.read()
+    cpu_s = rusage.ru_utime + rusage.ru_stime
+
+    if child["timed_out"]:
+        return "timeout", f"killed after {child['timeout_s']}s", cpu_s
+    try:
+        result = json.loads(payload)
+        return result["status"], result.get("detail"), cpu_s
+    except (ValueError, KeyError):
+        if os.WIFSIGNALED(wstatus):
+            return "error", f"signal {os.WTERMSIG(wstatus)}", cpu_s
+        return "error", f"exit {os.waitstatus_to_exitcode(wstatus)}", cpu_s
+
+
+def _run_forked(job: dict, fn) -> tuple[str, str | None, float]:
+    """Run fn in a forked child with a hard timeout → (status, detail, cpu_s). Blocks."""
+    child = _spawn(job, fn)
+    poll_s = 0.005
+    while True:
+        outcome = _poll_child(child)
+        if outcome is not None:
+            return outcome
+        time.sleep(poll_s)
+        poll_s = min(poll_s * 2, 0.2)
+
+
+def _run_threaded(job: dict, fn, on_late_finish) -> tuple[str, str | None, float]:
+    """Run fn in-process with a soft timeout → (status, detail, cpu_s)."""
+    box = {}
+
+    def target():
+        t0 = time.thread_time()
+        box["outcome"] = _outcome(fn, job.get("priority"))
+        box["cpu_s"] = time.thread_time() - t0
+        if box.get("abandoned"):
+            on_late_finish()
+
+    thread = threading.Thread(target=target, name=f"job-{job['name']}", daemon=True)
+    thread.start()
+    thread.join(job["timeout_s"])
+    if thread.is_alive():
+        box["abandoned"] = True
+        if "outcome" not in box:
+            return "timeout", f"still running after {job['timeout_s']}s (thread cannot be killed)", 0.0
+    status, detail = box["outcome"]
+    return status, detail, box.get("cpu_s", 0.0)
+
+
+# ---------------------------------------------------------------------------
+# Supervisor
+# ---------------------------------------------------------------------------
+class JobSupervisor:
+    """In-process scheduler + worker pool for periodic jobs."""
+
+    def __init__(self, jobs=None, max_workers: int = MAX_WORKERS, isolation: str = "fork",
+                 db_path=None):
+        if isolation == "fork" and not HAS_FORK:
+            isolation = "thread"
+        self.jobs = {j["name"]: dict(j) for j in (jobs if jobs is not None else JOBS)}
+        self.isolation = isolation
+        self.db_path = db_path
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jobsup")
+        self._lock = threading.Lock()
+        self._running: set = set()
+        self._funcs: dict = {}
+        self._next_due: dict = {}
+        self._children: dict = {}  # pid → (name, ctx, child) for forked runs in flight
+        self._stop = threading.Event()
+
+    # ── setup ──
+
+    def preload(self):
+        """Import every job module now, so forked runs start warm."""
+        for name, job in self.jobs.items():
+            try:
+                self._funcs[name] = _resolve(job["target"])
+            except Exception as e:
+                _log(f"{name}: preload failed ({type(e).__name__}: {e}) — will retry per run")
+
+    @staticmethod
+    def _aligned_next(interval_s: float, now: float) -> float:
+        return math.floor(now / interval_s) * interval_s + interval_s
+
+    def schedule(self, now: float = None):
+        now = time.time() if now is None else now
+        for name, job in self.jobs.items():
+            self._next_due[name] = self._aligned_next(job["interval_s"], now)
+
+    # ── one run ──
+
+    def run_job(self, name: str, runner: str = "supervisor") -> dict:
+        """Execute one run of `name` (lease, timeout, metrics). Returns the run record. Blocks."""
+        ctx = self._begin(name, runner)
+        if "error" in ctx:
+            return self._end(name, ctx, "error", ctx["error"], 0.0)
+        if self.isolation == "fork":
+            return self._end(name, ctx, *_run_forked(ctx["job"], ctx["fn"]))
+        status, detail, cpu_s = _run_threaded(ctx["job"], ctx["fn"], lambda: self._finish(name))
+        return self._end(name, ctx, status, detail, cpu_s, late=status == "timeout")
+
+    def _begin(self, name: str, runner: str) -> dict:
+        job = self.jobs[name]
+        ctx = {"job": job, "runner": runner, "started_at": _now_iso(), "wall0": time.monotonic()}
+        if HAS_LEASE:
+            acquire(name, ttl_seconds=int(job["timeout_s"]) + LEASE_GRACE_S)
+        try:
+            ctx["fn"] = self._funcs.get(name) or _resolve(job["target"])
+            self._funcs[name] = ctx["fn"]
+        except Exception as e:
+            ctx["error"] = f"import failed: {type(e).__name__}: {e}"
+        return ctx
+
+    def _end(self, name: str, ctx: dict, status: str, detail, cpu_s: float, late: bool = False) -> dict:
+        run = {
+            "started_at": ctx["started_at"],
+            "finished_at": _now_iso(),
+            "status": status,
+            "detail": detail,
+            "wall_ms": round((time.monotonic() - ctx["wall0"]) * 1000, 1),
+            "cpu_ms": round(cpu_s * 1000, 1),
+            "runner": ctx["runner"],
+        }
+        if HAS_LEASE:
+            release(name, status, detail)
+        _record(name, run, self.db_path)
+        if status != "ok":
+            _log(f"{name}: {status} — {detail} ({run['wall_ms']:.0f}ms)")
+        if not late:
+            self._finish(name)
+        return run
+
+    def _finish(self, name: str):
+        with self._lock:
+            self._running.discard(name)
+
+    # ── scheduling ──
+
+    def submit(self, name: str):
+        """Start a run unless the previous run of the same job is still going.
+
+        isolation="fork": the child is forked right here, from the scheduler thread
+        (never from a pool thread, whose siblings may hold logging/sqlite/import locks
+        at fork time); reap() collects it. Returns the pid.
+        isolation="thread": queued on the worker pool. Returns the future.
+        """
+        with self._lock:
+            if name in self._running:
+                busy = True
+            else:
+                busy = False
+                self._running.add(name)
+        if busy:
+            ts = _now_iso()
+            _record(name, {"started_at": ts, "finished_at": ts, "status": "skipped",
+                           "detail": "previous run still active", "wall_ms": 0.0,
+                           "cpu_ms": 0.0, "runner": "supervisor"}, self.db_path)
+            return None
+        if self.isolation != "fork":
+            return self.pool.submit(self._safe_run, name)
+        try:
+            ctx = self._begin(name, "supervisor")
+            if "error" in ctx:
+                self._end(name, ctx, "error", ctx["error"], 0.0)
+                return None
+            child = _spawn(ctx["job"], ctx["fn"])
+        except Exception as e:
+            _log(f"{name}: supervisor error: {e}")
+            self._finish(name)
+            return None
+        self._children[child["pid"]] = (name, ctx, child)
+        return child["pid"]
+
+    def reap(self) -> int:
+        """Collect finished forked runs (and kill overdue ones); returns how many are still running."""
+        for pid, (name, ctx, child) in list(self._children.items()):
+            try:
+                outcome = _poll_child(child)
+                if outcome is not None:
+                    del self._children[pid]
+                    self._end(name, ctx, *outcome)
+            except Exception as e:
+                _log(f"{name}: supervisor error: {e}")
+                self._children.pop(pid, None)
+                self._finish(name)
+        return len(self._children)
+
+    def _safe_run(self, name: str):
+        try:
+            return self.run_job(name)
+        except Exception as e:  # never let one job take down a pool worker
+            _log(f"{name}: supervisor error: {e}")
+            self._finish(name)
+
+    def tick(self, now: float = None) -> list:
+        """Start every job due at `now`; returns the names started."""
+        now = time.time() if now is None else now
+        if not self._next_due:
+            self.schedule(now)
+        fired = []
+        for name, due in self._next_due.items():
+            if now >= due:
+                interval = self.jobs[name]["interval_s"]
+                self._next_due[name] = self._aligned_next(interval, now)
+                if self.submit(name) is not None:
+                    fired.append(name)
+        return fired
+
+    def serve(self):
+        """Resident loop until stop() / SIGTERM."""
+        self.preload()
+        self.schedule()
+        _log(f"resident: {len(self.jobs)} jobs, isolation={self.isolation}")
+        while not self._stop.is_set():
+            self.tick()
+            wait = min(self._next_due.values()) - time.time()
+            if self.reap():
+                wait = min(wait, REAP_POLL_S)
+            self._stop.wait(max(0.0, min(wait, 60.0)))
+        while self.reap():  # let forked runs finish (their timeouts still apply)
+            time.sleep(REAP_POLL_S)
+        self.pool.shutdown(wait=True)
+        _log("stopped")
+
+    def stop(self, *_):
+        self._stop.set()
+
+
+def print_status(db_path=None):
+    stats = state_store.get_job_stats(db_path=db_path)
+    print(f"{'job':<26} {'status':<8} {'runs':>5} {'fail':>5} {'skip':>5} "
+          f"{'avg_ms':>9} {'max_ms':>9} {'cpu_ms':>9}  last_run")
+    for name in sorted(stats):
+        s = stats[name]
+        print(f"{name:<26} {str(s['status']):<8} {s['runs']:>5} {s['failures']:>5} {s['skipped']:>5} "
+              f"{s['avg_wall_ms']:>9.0f} {s['max_wall_ms']:>9.0f} {s['avg_cpu_ms']:>9.0f}  {s['last_run']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident job supervisor")
+    parser.add_argument("--once", metavar="JOB", help="Run one job and exit (cron-compatible fallback)")
+    parser.add_argument("--status", action="store_true", help="Print per-job run metrics (last 24h)")
+    parser.add_argument("--isolation", choices=["fork", "thread"], default="fork")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    if args.status:
+        print_status()
+        return 0
+
+    sup = JobSupervisor(max_workers=args.workers, isolation=args.isolation)
+    if args.once:
+        if args.once not in sup.jobs:
+            _log(f"unknown job: {args.once} (known: {', '.join(sup.jobs)})")
+            return 2
+        run = sup.run_job(args.once, runner="cron")
+        return 0 if run["status"] == "ok" else 1
+
+    signal.signal(signal.SIGTERM, sup.stop)
+    signal.signal(signal.SIGINT, sup.stop)
+    sup.serve()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Lazy imports for heavy / optional dependencies.
+
+Cron entry points import requests, pandas, binance_client, notifier, … at
+module load even when the run exits early (kill switch, daily budget hit,
+nothing to do). lazy("requests") returns a module placeholder that performs
+the real import on first attribute access, so the cost is only paid by runs
+that actually use it.
+
+    requests = lazy("requests")          # required dependency, deferred
+    notifier = optional("notifier")      # None if not installed
+    HAS_NOTIFIER = notifier is not None
+
+Rules:
+  - Only module objects (import x / import x.y as z). `from x import name`
+    binds eagerly by definition — use `x = lazy("x")` and `x.name` instead.
+  - Attribute access at import time (annotations, default args, class
+    bodies) triggers the load; quote such annotations.
+  - A module already in sys.modules is returned as-is (nothing to save).
+  - optional() only checks the module can be found (importlib find_spec).
+    An ImportError raised inside the module surfaces at first use.
+
+Verified by smoke_imports.py --importtime (per-entry-point budget + list of
+modules that must stay lazy).
+"""
+
+import importlib
+import importlib.util
+import sys
+import threading
+import types
+
+_import_lock = threading.RLock()
+
+
+class LazyModule(types.ModuleType):
+    """Placeholder that imports `name` on first attribute access."""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_target"]
+        if module is None:
+            with _import_lock:
+                module = self.__dict__["_lazy_target"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_target"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        # monkeypatching (tests) must reach the real module
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr):
+        delattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_target"] is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy(name: str):
+    """Module `name`, imported on first use."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def optional(name: str):
+    """Like lazy(), but None when the module is not installed."""
+    if name in sys.modules:
+        return sys.modules[name]
+    try:
+        if importlib.util.find_spec(name) is None:
+            return None
+    except (ImportError, ValueError):  # missing parent package / bad name
+        return None
+    return LazyModule(name)
+
+
+def is_loaded(module) -> bool:
+    """True if `module` is a real module or a LazyModule that has been imported."""
+    if isinstance(module, LazyModule):
+        return module.__dict__["_lazy_target"] is not None
+    return module is not None
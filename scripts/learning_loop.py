@@ -12,9 +12,18 @@ Atomic SQL increments prevent lost-update races.
 Canonical source keys via signal_normalizer.canonical_source().
 Enrichers (solscan, rugcheck, helius) skipped via signal_normalizer.is_enricher().
 
+Batch mode (default for run()): up to BATCH_SIZE positions are claimed
+and completed in ONE BEGIN IMMEDIATE transaction. Bandit/UCB increments are
+summed per (strategy, regime) / source and applied with one upsert per key.
+Exactly-once holds because claim and DONE commit together; a position that
+cannot be scored is marked FAILED inside the same transaction without
+affecting the rest of the batch.
+
 Usage:
-  python3 scripts/learning_loop.py          # scan + process all PENDING
-  python3 scripts/learning_loop.py --once   # single pass (for cron/lifecycle)
+  python3 scripts/learning_loop.py                   # scan + process all PENDING (batched)
+  python3 scripts/learning_loop.py --once            # single pass (for cron/lifecycle)
+  python3 scripts/learning_loop.py --no-batch        # one transaction per position
+  python3 scripts/learning_loop.py --batch-size 500
 """
 
 import json
@@ -27,7 +36,7 @@ from pathlib import Path
 SCRIPT_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from state_store import get_connection, init_db, DB_PATH
+from state_store import get_connection, init_db, bump_bandit_version, DB_PATH
 
 # Import canonical source + enricher guard from signal_normalizer
 from signal_normalizer import canonical_source, is_enricher
@@ -37,6 +46,32 @@ LOGS_DIR = BASE_DIR / "logs"
 LOGS_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = LOGS_DIR / "learning_loop.log"
 
+BATCH_SIZE = 200      # positions per write transaction in run()
+_SQL_IN_CHUNK = 500   # Stay well under SQLITE_MAX_VARIABLE_NUMBER
+
+_POSITION_COLUMNS = """position_id, strategy_id, regime_tag, source_primary,
+                   pnl_usd, pnl_pct, token_address,
+                   reward_bin, reward_real, fees_usd_total, async_analysis_json"""
+
+_BANDIT_UPSERT = """
+    INSERT INTO bandit_strategy_stats(strategy_id, regime_tag, alpha, beta, n, last_updated)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(strategy_id, regime_tag) DO UPDATE SET
+        alpha = bandit_strategy_stats.alpha + ?,
+        beta = bandit_strategy_stats.beta + ?,
+        n = bandit_strategy_stats.n + ?,
+        last_updated = excluded.last_updated
+"""
+
+_SOURCE_UPSERT = """
+    INSERT INTO source_ucb_stats(source_id, n, reward_sum, last_updated)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(source_id) DO UPDATE SET
+        n = source_ucb_stats.n + ?,
+        reward_sum = source_ucb_stats.reward_sum + ?,
+        last_updated = excluded.last_updated
+"""
+
 
 def _log(msg: str):
     ts = datetime.now(timezone.utc).isoformat()
@@ -49,6 +84,76 @@ def _log(msg: str):
         pass
 
 
+def _learning_outcome(pos: dict) -> dict:
+    """Win/loss, stat keys and increments for one claimed position (pnl_pct not NULL).
+
+    Shared by process_closed_position and process_closed_batch so both paths
+    score a position identically.
+    """
+    position_id = pos["position_id"]
+
+    # V4: Use stored reward_bin (fallback to pnl_pct > 0 for legacy positions)
+    # V5 FIX: Check Judge REJECT override (catastrophic trades treated as hard loss)
+    judge_override = False
+    if pos.get("reward_bin") is not None:
+        is_win = bool(pos["reward_bin"])
+    else:
+        # Check async_analysis_json for Judge REJECT high confidence
+        async_json_str = pos.get("async_analysis_json")
+
+        if async_json_str:
+            try:
+                async_json = json.loads(async_json_str)
+                judge_parsed = async_json.get("judge", {}).get("parsed", {})
+                verdict = judge_parsed.get("verdict")
+                confidence = judge_parsed.get("confidence", 0)
+
+                # If Judge REJECT ≥85% confidence, treat as HARD LOSS
+                if verdict == "REJECT" and confidence >= 85:
+                    is_win = False
+                    judge_override = True
+                    _log(f"Position {position_id}: Judge REJECT override (confidence={confidence}%), forcing LOSS")
+                else:
+                    is_win = pos["pnl_pct"] > 0
+            except Exception:
+                is_win = pos["pnl_pct"] > 0
+        else:
+            is_win = pos["pnl_pct"] > 0
+
+    strategy_id = pos["strategy_id"]
+    regime_tag = pos["regime_tag"] or "unknown"
+    raw_source = pos["source_primary"] or "unknown"
+
+    # Canonicalize source
+    try:
+        source_info = canonical_source(raw_source)
+        source_id = source_info["source_key"]
+    except Exception:
+        source_id = raw_source
+
+    # V5 FIX: Apply strong negative penalty for Judge REJECT
+    if judge_override:
+        # Treat Judge REJECT as 3x loss penalty (beta += 3.0 instead of 1.0)
+        # and reward = -2.0 for the source (strong negative signal)
+        win_inc, loss_inc, reward = 0.0, 3.0, -2.0
+        _log(f"Bandit/Source: Applying 3x loss penalty (beta += 3.0) and -2.0 reward for Judge REJECT")
+    else:
+        win_inc = 1.0 if is_win else 0.0
+        loss_inc = 0.0 if is_win else 1.0
+        reward = 1.0 if is_win else 0.0
+
+    return {
+        "is_win": is_win,
+        "judge_override": judge_override,
+        "strategy_id": strategy_id,
+        "regime_tag": regime_tag,
+        "source_id": source_id,
+        "win_inc": win_inc,
+        "loss_inc": loss_inc,
+        "reward": None if is_enricher(source_id) else reward,  # enrichers skip UCB1
+    }
+
+
 def process_closed_position(position_id: str, db_path=None) -> dict:
     """
     Process a single CLOSED position in ONE atomic transaction.
@@ -60,7 +165,7 @@ def process_closed_position(position_id: str, db_path=None) -> dict:
     1. Atomic claim: UPDATE learning_status PENDING→RUNNING (rowcount==1 or skip)
     2. Atomic increment bandit_strategy_stats
     3. Atomic increment source_ucb_stats (skip enrichers)
-    4. Mark learning_status=DONE
+    4. Mark learning_status=DONE, bump meta bandit_stats_version
     5. Commit once
 
     Any exception → rollback → mark FAILED with error text.
@@ -91,10 +196,8 @@ def process_closed_position(position_id: str, db_path=None) -> dict:
             return {"position_id": position_id, "skipped": True}
 
         # Read position data (within same transaction, guaranteed consistent)
-        row = conn.execute("""
-            SELECT position_id, strategy_id, regime_tag, source_primary,
-                   pnl_usd, pnl_pct, token_address,
-                   reward_bin, reward_real, fees_usd_total
+        row = conn.execute(f"""
+            SELECT {_POSITION_COLUMNS}
             FROM positions WHERE position_id = ?
         """, (position_id,)).fetchone()
 
@@ -109,76 +212,23 @@ def process_closed_position(position_id: str, db_path=None) -> dict:
             conn.commit()
             raise ValueError(f"Position {position_id} has no pnl_pct")
 
-        # V4: Use stored reward_bin (fallback to pnl_pct > 0 for legacy positions)
-        # V5 FIX: Check Judge REJECT override (catastrophic trades treated as hard loss)
-        judge_override = False
-        if pos.get("reward_bin") is not None:
-            is_win = bool(pos["reward_bin"])
-        else:
-            # Check async_analysis_json for Judge REJECT high confidence
-            async_json_str = conn.execute(
-                "SELECT async_analysis_json FROM positions WHERE position_id = ?",
-                (position_id,)
-            ).fetchone()[0]
-            
-            if async_json_str:
-                try:
-                    async_json = json.loads(async_json_str)
-                    judge_parsed = async_json.get("judge", {}).get("parsed", {})
-                    verdict = judge_parsed.get("verdict")
-                    confidence = judge_parsed.get("confidence", 0)
-                    
-                    # If Judge REJECT ≥85% confidence, treat as HARD LOSS
-                    if verdict == "REJECT" and confidence >= 85:
-                        is_win = False
-                        judge_override = True
-                        _log(f"Position {position_id}: Judge REJECT override (confidence={confidence}%), forcing LOSS")
-                    else:
-                        is_win = pos["pnl_pct"] > 0
-                except Exception:
-                    is_win = pos["pnl_pct"] > 0
-            else:
-                is_win = pos["pnl_pct"] > 0
-        
-        strategy_id = pos["strategy_id"]
-        regime_tag = pos["regime_tag"] or "unknown"
-        raw_source = pos["source_primary"] or "unknown"
-
-        # Canonicalize source
-        try:
-            source_info = canonical_source(raw_source)
-            source_id = source_info["source_key"]
-        except Exception:
-            source_id = raw_source
+        outcome = _learning_outcome(pos)
+        is_win = outcome["is_win"]
+        strategy_id = outcome["strategy_id"]
+        regime_tag = outcome["regime_tag"]
+        source_id = outcome["source_id"]
 
         _log(f"Processing {position_id}: {pos['token_address']} "
              f"{'WIN' if is_win else 'LOSS'} ({pos['pnl_pct']:+.2%}) "
              f"strategy={strategy_id} source={source_id}")
 
         # Step 2: Atomic increment bandit_strategy_stats
-        # V5 FIX: Apply strong negative penalty for Judge REJECT
-        if judge_override:
-            # Treat Judge REJECT as 3x loss penalty (beta += 3.0 instead of 1.0)
-            win_inc = 0.0
-            loss_inc = 3.0
-            _log(f"Bandit: Applying 3x loss penalty for Judge REJECT (beta += 3.0)")
-        else:
-            win_inc = 1.0 if is_win else 0.0
-            loss_inc = 0.0 if is_win else 1.0
-
-        conn.execute("""
-            INSERT INTO bandit_strategy_stats(strategy_id, regime_tag, alpha, beta, n, last_updated)
-            VALUES (?, ?, ?, ?, 1, ?)
-            ON CONFLICT(strategy_id, regime_tag) DO UPDATE SET
-                alpha = bandit_strategy_stats.alpha + ?,
-                beta = bandit_strategy_stats.beta + ?,
-                n = bandit_strategy_stats.n + 1,
-                last_updated = excluded.last_updated
-        """, (
+        win_inc, loss_inc = outcome["win_inc"], outcome["loss_inc"]
+        conn.execute(_BANDIT_UPSERT, (
             strategy_id, regime_tag,
-            1.0 + win_inc, 1.0 + loss_inc,
+            1.0 + win_inc, 1.0 + loss_inc, 1,
             now_iso,
-            win_inc, loss_inc
+            win_inc, loss_inc, 1
         ))
 
         bandit_row = dict(conn.execute("""
@@ -192,25 +242,12 @@ def process_closed_position(position_id: str, db_path=None) -> dict:
              f"n={bandit_row['n']} E[v]={expected:.3f}")
 
         # Step 3: Atomic increment source_ucb_stats (skip enrichers)
-        # V5 FIX: Apply strong negative penalty for Judge REJECT
         source_result = {}
-        if is_enricher(source_id):
+        if outcome["reward"] is None:
             _log(f"Source: {source_id} is enricher, skipping UCB1")
         else:
-            if judge_override:
-                # Treat Judge REJECT as reward = -2.0 (strong negative signal)
-                reward = -2.0
-                _log(f"Source: Applying -2.0 reward penalty for Judge REJECT")
-            else:
-                reward = 1.0 if is_win else 0.0
-            conn.execute("""
-                INSERT INTO source_ucb_stats(source_id, n, reward_sum, last_updated)
-                VALUES (?, 1, ?, ?)
-                ON CONFLICT(source_id) DO UPDATE SET
-                    n = source_ucb_stats.n + 1,
-                    reward_sum = source_ucb_stats.reward_sum + ?,
-                    last_updated = excluded.last_updated
-            """, (source_id, reward, now_iso, reward))
+            reward = outcome["reward"]
+            conn.execute(_SOURCE_UPSERT, (source_id, 1, reward, now_iso, 1, reward))
 
             source_row = dict(conn.execute("""
                 SELECT n, reward_sum FROM source_ucb_stats WHERE source_id = ?
@@ -235,6 +272,8 @@ def process_closed_position(position_id: str, db_path=None) -> dict:
                 learning_error = NULL
             WHERE position_id = ? AND learning_status = 'RUNNING'
         """, (now_iso, position_id))
+        # Invalidates in-memory bandit stat caches (bandit_stats.py) atomically with the update
+        bump_bandit_version(conn)
 
         # Step 5: Single commit
         conn.commit()
@@ -275,6 +314,166 @@ def process_closed_position(position_id: str, db_path=None) -> dict:
         conn.close()
 
 
+def process_closed_batch(position_ids, db_path=None) -> list:
+    """
+    Process many CLOSED positions in ONE atomic transaction.
+
+    Steps (all in one BEGIN IMMEDIATE transaction):
+    1. Claim: read the ids still CLOSED + PENDING (write lock held, so no
+       other claimer can take them before we commit)
+    2. Score each position; a position that cannot be scored is marked
+       FAILED with its error and left out of the aggregates
+    3. One bandit_strategy_stats upsert per (strategy, regime) and one
+       source_ucb_stats upsert per source, with summed increments
+    4. Mark claimed positions DONE, bump meta bandit_stats_version once
+    5. Commit once
+
+    RUNNING is never visible: claim and DONE commit together. Any exception
+    outside per-position scoring rolls back the whole batch (positions stay
+    PENDING) and propagates.
+
+    Returns: per-position results (same shape as process_closed_position,
+    with the bandit/source totals as of the end of the batch).
+    """
+    db_path = db_path or DB_PATH
+    now_iso = datetime.now(timezone.utc).isoformat()
+    ids = list(dict.fromkeys(position_ids))
+    if not ids:
+        return []
+
+    conn = sqlite3.connect(db_path, timeout=5.0)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA busy_timeout=5000")
+
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+
+        # Step 1: Claim
+        rows = []
+        for i in range(0, len(ids), _SQL_IN_CHUNK):
+            chunk = ids[i:i + _SQL_IN_CHUNK]
+            rows.extend(conn.execute(f"""
+                SELECT {_POSITION_COLUMNS}
+                FROM positions
+                WHERE position_id IN ({",".join("?" * len(chunk))})
+                  AND status = 'CLOSED'
+                  AND learning_status = 'PENDING'
+            """, chunk).fetchall())
+
+        # Step 2: Score + aggregate
+        bandit_deltas = {}  # (strategy_id, regime_tag) → [win_inc, loss_inc, n]
+        source_deltas = {}  # source_id → [n, reward]
+        scored = []
+        failed = []
+        for row in rows:
+            pos = dict(row)
+            try:
+                if pos["pnl_pct"] is None:
+                    raise ValueError("pnl_pct is NULL")
+                outcome = _learning_outcome(pos)
+            except Exception as e:
+                failed.append((str(e)[:500], now_iso, pos["position_id"]))
+                continue
+            scored.append((pos, outcome))
+
+            d = bandit_deltas.setdefault((outcome["strategy_id"], outcome["regime_tag"]), [0.0, 0.0, 0])
+            d[0] += outcome["win_inc"]
+            d[1] += outcome["loss_inc"]
+            d[2] += 1
+            if outcome["reward"] is not None:
+                d = source_deltas.setdefault(outcome["source_id"], [0, 0.0])
+                d[0] += 1
+                d[1] += outcome["reward"]
+
+        # Step 3: One upsert per key
+        conn.executemany(_BANDIT_UPSERT, [
+            (strategy_id, regime_tag, 1.0 + win, 1.0 + loss, n, now_iso, win, loss, n)
+            for (strategy_id, regime_tag), (win, loss, n) in bandit_deltas.items()
+        ])
+        conn.executemany(_SOURCE_UPSERT, [
+            (source_id, n, reward, now_iso, n, reward)
+            for source_id, (n, reward) in source_deltas.items()
+        ])
+
+        # Step 4: Mark DONE / FAILED
+        conn.executemany("""
+            UPDATE positions
+            SET learning_status = 'DONE',
+                learning_updated_at = ?,
+                learning_error = NULL
+            WHERE position_id = ? AND learning_status = 'PENDING'
+        """, [(now_iso, pos["position_id"]) for pos, _ in scored])
+        conn.executemany("""
+            UPDATE positions
+            SET learning_status = 'FAILED',
+                learning_error = ?,
+                learning_updated_at = ?
+            WHERE position_id = ? AND learning_status = 'PENDING'
+        """, failed)
+        if bandit_deltas:
+            bump_bandit_version(conn)
+
+        bandit_rows = {
+            key: dict(conn.execute("""
+                SELECT alpha, beta, n FROM bandit_strategy_stats
+                WHERE strategy_id = ? AND regime_tag = ?
+            """, key).fetchone())
+            for key in bandit_deltas
+        }
+        source_rows = {
+            source_id: dict(conn.execute("""
+                SELECT n, reward_sum FROM source_ucb_stats WHERE source_id = ?
+            """, (source_id,)).fetchone())
+            for source_id in source_deltas
+        }
+
+        # Step 5: Single commit
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    for error, _, position_id in failed:
+        _log(f"Position {position_id} → FAILED ({error})")
+    for (strategy_id, regime_tag), (win, loss, n) in bandit_deltas.items():
+        b = bandit_rows[(strategy_id, regime_tag)]
+        _log(f"Bandit: {strategy_id}/{regime_tag} +{n} (alpha+{win:.0f} beta+{loss:.0f}) → "
+             f"Alpha={b['alpha']:.0f} Beta={b['beta']:.0f} n={b['n']}")
+    _log(f"Batch: {len(scored)} DONE, {len(failed)} FAILED, "
+         f"{len(ids) - len(rows)} skipped (not CLOSED/PENDING) — "
+         f"{len(bandit_deltas)} bandit keys, {len(source_deltas)} sources")
+
+    results = []
+    for pos, outcome in scored:
+        b = bandit_rows[(outcome["strategy_id"], outcome["regime_tag"])]
+        source_result = {}
+        if outcome["reward"] is not None:
+            src = source_rows[outcome["source_id"]]
+            source_result = {
+                "source_id": outcome["source_id"],
+                "n": src["n"],
+                "reward_sum": src["reward_sum"],
+                "win_rate": src["reward_sum"] / src["n"] if src["n"] > 0 else 0.0,
+            }
+        results.append({
+            "position_id": pos["position_id"],
+            "is_win": outcome["is_win"],
+            "pnl_pct": pos["pnl_pct"],
+            "bandit": {
+                "strategy_id": outcome["strategy_id"],
+                "regime_tag": outcome["regime_tag"],
+                "alpha": b["alpha"],
+                "beta": b["beta"],
+                "n": b["n"],
+                "expected_value": b["alpha"] / (b["alpha"] + b["beta"]),
+            },
+            "source": source_result,
+        })
+    return results
+
+
 def scan_unprocessed_closures(db_path=None) -> list:
     """Find CLOSED positions with learning_status='PENDING'."""
     db_path = db_path or DB_PATH
@@ -290,8 +489,25 @@ def scan_unprocessed_closures(db_path=None) -> list:
         return [dict(r) for r in rows]
 
 
-def run(db_path=None):
-    """Main entry: scan for unprocessed closures and process them."""
+def _process_each(position_ids, db_path) -> list:
+    results = []
+    for position_id in position_ids:
+        try:
+            result = process_closed_position(position_id, db_path)
+            if not result.get("skipped"):
+                results.append(result)
+        except Exception as e:
+            _log(f"Error processing {position_id}: {e}")
+    return results
+
+
+def run(db_path=None, batch_size: int = BATCH_SIZE):
+    """Main entry: scan for unprocessed closures and process them.
+
+    batch_size > 1: process_closed_batch per chunk; a chunk whose transaction
+    fails is retried position by position. batch_size <= 1: one transaction
+    per position.
+    """
     db_path = db_path or DB_PATH
     # Ensure schema + backfill before scanning
     init_db(db_path)
@@ -305,21 +521,31 @@ def run(db_path=None):
 
     _log(f"Found {len(unprocessed)} unprocessed closure(s)")
     results = []
-    for pos in unprocessed:
-        try:
-            result = process_closed_position(pos["position_id"], db_path)
-            if not result.get("skipped"):
-                results.append(result)
-        except Exception as e:
-            _log(f"Error processing {pos['position_id']}: {e}")
+    if batch_size and batch_size > 1:
+        ids = [pos["position_id"] for pos in unprocessed]
+        for i in range(0, len(ids), batch_size):
+            chunk = ids[i:i + batch_size]
+            try:
+                results.extend(process_closed_batch(chunk, db_path))
+                continue
+            except Exception as e:
+                _log(f"Batch of {len(chunk)} failed ({e}) — retrying per position")
+            results.extend(_process_each(chunk, db_path))
+    else:
+        results = _process_each([pos["position_id"] for pos in unprocessed], db_path)
 
     _log(f"Learning Loop END — processed {len(results)}/{len(unprocessed)} positions")
     return results
 
 
 if __name__ == "__main__":
+    _batch_size = BATCH_SIZE
+    if "--no-batch" in sys.argv:
+        _batch_size = 1
+    elif "--batch-size" in sys.argv:
+        _batch_size = int(sys.argv[sys.argv.index("--batch-size") + 1])
     try:
-        run()
+        run(batch_size=_batch_size)
     except KeyboardInterrupt:
         _log("Interrupted")
     except Exception as e:
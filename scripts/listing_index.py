@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader v3.1 — CEX Listing Index
+
+exchange_router.route checked known_binance_symbols.json and, on a miss, made
+a live Binance price call and then a live MEXC price call — two blocking HTTP
+round trips per unlisted meme token, every cycle. venue_detector guessed the
+CEX from the token profile and the OMS sent quantities no exchange filter had
+seen.
+
+The index is one bulk exchangeInfo request per exchange, refreshed on a
+schedule and shared by every caller:
+
+  - state/listing_index.json: USDT spot pairs that are trading on Binance and
+    MEXC, with per-symbol filters (tick_size, step_size, min_qty,
+    min_notional). Written under flock + atomic replace; other processes
+    pick up a new file within RELOAD_CHECK_S.
+  - venue(symbol) is a dict lookup. While every exchange's snapshot is
+    younger than MAX_INDEX_AGE_S a miss is authoritative ("not listed").
+  - Without a fresh index callers may still check live; is_unlisted() then
+    remembers a miss for NEGATIVE_TTL_S, the binance_new_listings cadence.
+    binance_new_listings feeds each exchangeInfo it fetches through ingest(),
+    which also drops every negative entry, so a new listing routes at once.
+  - conform() rounds quantity / price to the symbol's step / tick and rejects
+    orders below min_qty / min_notional (paper_execution and the OMS).
+
+Usage:
+  listing_index.venue("PEPEUSDT")                 # "binance" / "mexc" / None
+  listing_index.filters("PEPEUSDT", "binance")    # {"step_size", ...} / None
+  qty, price, error = listing_index.conform("PEPEUSDT", "binance", qty, price)
+
+CLI:
+  python3 scripts/listing_index.py [--refresh] [SYMBOL ...]
+"""
+
+import argparse
+import fcntl
+import json
+import math
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
+STATE_DIR = BASE_DIR / "state"
+INDEX_PATH = STATE_DIR / "listing_index.json"
+KNOWN_SYMBOLS_PATH = STATE_DIR / "known_binance_symbols.json"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+VENUE_PREFERENCE = ("binance", "mexc")  # lower fees, deeper books first
+QUOTE_ASSET = "USDT"
+MAX_INDEX_AGE_S = 6 * 3600  # older snapshots are not trusted to say "not listed"
+NEGATIVE_TTL_S = 300        # binance_new_listings runs every signal_router cycle
+RELOAD_CHECK_S = 30.0       # how often to stat the index file for a newer refresh
+
+_lock = threading.Lock()
+_filters: dict = {}      # exchange → {symbol: filters}
+_updated_at: dict = {}   # exchange → epoch of its exchangeInfo snapshot
+_venues: dict = {}       # symbol → tuple of exchanges, VENUE_PREFERENCE order
+_negative: dict = {}     # symbol → monotonic expiry
+_loaded_mtime = None
+_last_check = None
+_counts = {"hits": 0, "misses": 0, "negative_hits": 0}
+
+
+def _log(msg: str):
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] [LISTINGS] {msg}", flush=True)
+
+
+def normalize(symbol: str) -> str:
+    """'pepe', 'PEPE/USDT', 'PEPE-USDT' → 'PEPEUSDT'."""
+    symbol = symbol.upper().replace("/", "").replace("-", "").replace("_", "")
+    return symbol if symbol.endswith(QUOTE_ASSET) else f"{symbol}{QUOTE_ASSET}"
+
+
+# ─────────────────────────────────────────────────────────
+# exchangeInfo parsing
+# ─────────────────────────────────────────────────────────
+
+def _num(value) -> float | None:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def _is_trading(s: dict) -> bool:
+    # Binance: "TRADING"; MEXC: "1" (older) / "ENABLED"
+    return (str(s.get("status", "")).upper() in ("TRADING", "1", "ENABLED")
+            and s.get("isSpotTradingAllowed", False))
+
+
+def _symbol_filters(s: dict) -> dict:
+    by_type = {f.get("filterType"): f for f in s.get("filters") or []}
+    lot = by_type.get("LOT_SIZE", {})
+    price = by_type.get("PRICE_FILTER", {})
+    notional = by_type.get("NOTIONAL") or by_type.get("MIN_NOTIONAL") or {}
+    tick = _num(price.get("tickSize"))
+    if tick is None and s.get("quotePrecision") is not None:
+        tick = 10.0 ** -int(s["quotePrecision"])  # MEXC carries no PRICE_FILTER
+    return {
+        "base": s.get("baseAsset"),
+        "tick_size": tick,
+        "step_size": _num(lot.get("stepSize")) or _num(s.get("baseSizePrecision")),
+        "min_qty": _num(lot.get("minQty")),
+        "min_notional": _num(notional.get("minNotional")) or _num(s.get("quoteAmountPrecision")),
+    }
+
+
+def parse_exchange_info(data: dict) -> dict:
+    """{symbol: filters} for every trading USDT spot pair in an exchangeInfo response."""
+    return {
+        s["symbol"]: _symbol_filters(s)
+        for s in (data or {}).get("symbols", [])
+        if s.get("quoteAsset") == QUOTE_ASSET and _is_trading(s)
+    }
+
+
+# ─────────────────────────────────────────────────────────
+# In-process index
+# ─────────────────────────────────────────────────────────
+
+def _install(filters: dict, updated_at: dict, mtime=None):
+    """Swap in a new snapshot (caller holds _lock). New data voids every negative entry."""
+    global _filters, _updated_at, _venues, _loaded_mtime
+    venues: dict = {}
+    for exchange in VENUE_PREFERENCE:
+        for symbol in filters.get(exchange, {}):
+            venues[symbol] = venues.get(symbol, ()) + (exchange,)
+    _filters, _updated_at, _venues, _loaded_mtime = filters, updated_at, venues, mtime
+    _negative.clear()
+
+
+def _read_file() -> tuple[dict, dict]:
+    try:
+        data = json.loads(INDEX_PATH.read_text())
+        return ({ex: data.get(ex) or {} for ex in VENUE_PREFERENCE},
+                {ex: float(ts) for ex, ts in (data.get("updated_at") or {}).items()})
+    except (OSError, json.JSONDecodeError, TypeError, ValueError):
+        pass
+    # No index yet: seed Binance from the listing detector's symbol list (no filters)
+    try:
+        known = json.loads(KNOWN_SYMBOLS_PATH.read_text())
+        checked = datetime.fromisoformat(known["last_checked"]).timestamp()
+        return {"binance": {s: {} for s in known.get("symbols", [])}}, {"binance": checked}
+    except (OSError, json.JSONDecodeError, KeyError, TypeError, ValueError):
+        return {}, {}
+
+
+def _ensure_loaded():
+    global _last_check
+    now = time.monotonic()
+    with _lock:
+        if _last_check is not None and now - _last_check < RELOAD_CHECK_S:
+            return
+        _last_check = now
+        try:
+            mtime = INDEX_PATH.stat().st_mtime
+        except OSError:
+            mtime = None
+        if mtime is not None and mtime == _loaded_mtime:
+            return
+        if mtime is None and _updated_at:
+            return  # nothing on disk; keep what ingest()/mark_listed() built
+        filters, updated_at = _read_file()
+        _install(filters, updated_at, mtime)
+
+
+def reload():
+    """Drop the in-process snapshot; the next lookup re-reads the index file."""
+    global _last_check, _loaded_mtime
+    with _lock:
+        _last_check = _loaded_mtime = None
+        _install({}, {})
+
+
+def venues(symbol: str) -> tuple:
+    """Exchanges listing symbol, preferred first."""
+    _ensure_loaded()
+    return _venues.get(normalize(symbol), ())
+
+
+def venue(symbol: str) -> str | None:
+    """Preferred CEX for symbol, or None if the index does not list it."""
+    listed = venues(symbol)
+    _counts["hits" if listed else "misses"] += 1
+    return listed[0] if listed else None
+
+
+def filters(symbol: str, exchange: str) -> dict | None:
+    """Trading filters for symbol on exchange, or None if unknown."""
+    _ensure_loaded()
+    return _filters.get((exchange or "").lower(), {}).get(normalize(symbol)) or None
+
+
+def is_fresh() -> bool:
+    """True when every exchange's snapshot is younger than MAX_INDEX_AGE_S."""
+    _ensure_loaded()
+    now = time.time()
+    return all(now - _updated_at.get(ex, 0) <= MAX_INDEX_AGE_S for ex in VENUE_PREFERENCE)
+
+
+def is_unlisted(symbol: str) -> bool:
+    """True when symbol is known not to trade on any CEX: a fresh index miss or a negative entry."""
+    symbol = normalize(symbol)
+    if venues(symbol):
+        return False
+    if is_fresh():
+        return True
+    with _lock:
+        expiry = _negative.get(symbol)
+        if expiry is None:
+            return False
+        if time.monotonic() >= expiry:
+            del _negative[symbol]
+            return False
+        _counts["negative_hits"] += 1
+        return True
+
+
+def mark_unlisted(symbol: str, ttl_s: float = None):
+    """Remember a live "not listed" answer for ttl_s (default NEGATIVE_TTL_S)."""
+    with _lock:
+        _negative[normalize(symbol)] = time.monotonic() + (NEGATIVE_TTL_S if ttl_s is None else ttl_s)
+
+
+def mark_listed(symbol: str, exchange: str):
+    """Record a live "listed" answer until the next snapshot (filters unknown)."""
+    symbol, exchange = normalize(symbol), exchange.lower()
+    _ensure_loaded()
+    with _lock:
+        _negative.pop(symbol, None)
+        _filters.setdefault(exchange, {}).setdefault(symbol, {})
+        listed = set(_venues.get(symbol, ())) | {exchange}
+        _venues[symbol] = tuple(ex for ex in VENUE_PREFERENCE if ex in listed)
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_counts, "symbols": len(_venues), "negative": len(_negative),
+                "updated_at": dict(_updated_at)}
+
+
+# ─────────────────────────────────────────────────────────
+# Order filters
+# ─────────────────────────────────────────────────────────
+
+def _decimals(step: float) -> int:
+    return max(0, -Decimal(repr(step)).normalize().as_tuple().exponent)
+
+
+def _round_down(value: float, step: float) -> float:
+    return round(math.floor(value / step + 1e-9) * step, _decimals(step))
+
+
+def conform(symbol: str, exchange: str, quantity: float, price: float = None) -> tuple:
+    """(quantity, price, error) after applying the symbol's exchange filters.
+
+    quantity is rounded down to step_size and price to tick_size; error is set
+    when the rounded order is below min_qty or min_notional. Unknown symbols
+    pass through unchanged.
+    """
+    rules = filters(symbol, exchange)
+    if not rules:
+        return quantity, price, None
+    step, tick = rules.get("step_size"), rules.get("tick_size")
+    if step:
+        quantity = _round_down(quantity, step)
+    if tick and price:
+        price = round(round(price / tick) * tick, _decimals(tick))
+    if quantity <= 0 or (rules.get("min_qty") and quantity < rules["min_qty"]):
+        return quantity, price, f"quantity {quantity} below {exchange} min_qty {rules.get('min_qty') or step}"
+    if price and rules.get("min_notional") and quantity * price < rules["min_notional"]:
+        return quantity, price, (f"notional ${quantity * price:,.4f} below {exchange} "
+                                 f"min_notional ${rules['min_notional']:,.2f}")
+    return quantity, price, None
+
+
+# ─────────────────────────────────────────────────────────
+# Refresh
+# ─────────────────────────────────────────────────────────
+
+def _write(sections: dict):
+    """Merge {exchange: {symbol: filters}} into the index file and install it here."""
+    INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    now = time.time()
+    with open(INDEX_PATH.with_suffix(".lock"), "w") as lockfile:
+        fcntl.flock(lockfile, fcntl.LOCK_EX)
+        try:
+            try:
+                data = json.loads(INDEX_PATH.read_text())
+            except (OSError, json.JSONDecodeError):
+                data = {}
+            data.setdefault("updated_at", {})
+            for exchange, symbols in sections.items():
+                data[exchange] = symbols
+                data["updated_at"][exchange] = now
+            tmp = INDEX_PATH.with_suffix(f".tmp.{os.getpid()}")
+            tmp.write_text(json.dumps(data, separators=(",", ":")))
+            os.replace(tmp, INDEX_PATH)
+        finally:
+            fcntl.flock(lockfile, fcntl.LOCK_UN)
+    with _lock:
+        _install({ex: data.get(ex) or {} for ex in VENUE_PREFERENCE},
+                 {ex: float(ts) for ex, ts in data["updated_at"].items()},
+                 INDEX_PATH.stat().st_mtime)
+
+
+def ingest(exchange: str, exchange_info: dict) -> int:
+    """Store an exchangeInfo response someone already fetched. Returns symbols indexed."""
+    symbols = parse_exchange_info(exchange_info)
+    if not symbols:
+        _log(f"{exchange}: exchangeInfo had no trading {QUOTE_ASSET} pairs — index unchanged")
+        return 0
+    _write({exchange.lower(): symbols})
+    return len(symbols)
+
+
+def _fetch(exchange: str) -> dict | None:
+    if exchange == "binance":
+        import binance_client
+        return binance_client.get_exchange_info()
+    import mexc_client
+    return mexc_client.get_exchange_info()
+
+
+def refresh(exchanges=VENUE_PREFERENCE) -> dict:
+    """One bulk exchangeInfo request per exchange. Returns {exchange: symbols indexed}."""
+    sections = {}
+    for exchange in exchanges:
+        t0 = time.monotonic()
+        try:
+            symbols = parse_exchange_info(_fetch(exchange))
+        except Exception as e:
+            _log(f"{exchange}: exchangeInfo failed: {e}")
+            continue
+        if not symbols:
+            _log(f"{exchange}: no exchangeInfo — keeping previous snapshot")
+            continue
+        sections[exchange] = symbols
+        _log(f"{exchange}: {len(symbols)} {QUOTE_ASSET} pairs in {time.monotonic() - t0:.1f}s")
+    if sections:
+        _write(sections)
+    return {exchange: len(symbols) for exchange, symbols in sections.items()}
+
+
+def run():
+    """job_supervisor entry point."""
+    refresh()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CEX listing index")
+    parser.add_argument("symbols", nargs="*")
+    parser.add_argument("--refresh", action="store_true", help="fetch exchangeInfo before the lookup")
+    args = parser.parse_args()
+    if args.refresh:
+        refresh()
+    for sym in args.symbols:
+        listed = venues(sym)
+        print(f"  {normalize(sym)}: {', '.join(listed) or 'not listed'}")
+        for exchange in listed:
+            print(f"    {exchange}: {filters(sym, exchange)}")
+    if not args.symbols:
+        _ensure_loaded()
+        print(json.dumps(stats(), indent=2))
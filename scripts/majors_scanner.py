@@ -6,18 +6,22 @@ Pure Python, deterministic, NO LLMs.
 import json
 import sys
 import os
-import requests
 from pathlib import Path
 from datetime import datetime, timezone
-import pandas as pd
-import numpy as np
-from ta.volatility import BollingerBands, AverageTrueRange
-from ta.trend import EMAIndicator, MACD
-from ta.momentum import RSIIndicator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import lazy_imports
+
+# pandas + ta cost ~0.5s to import; only a run that fetches candles needs them
+requests = lazy_imports.lazy("requests")
+pd = lazy_imports.lazy("pandas")
+np = lazy_imports.lazy("numpy")
+ta_volatility = lazy_imports.lazy("ta.volatility")
+ta_trend = lazy_imports.lazy("ta.trend")
+ta_momentum = lazy_imports.lazy("ta.momentum")
 
 BASE_DIR = Path(os.environ.get("SANAD_HOME", Path(__file__).resolve().parents[1]))
 SIGNAL_DIR = BASE_DIR / "signals" / "majors"
-CRON_HEALTH = BASE_DIR / "state" / "cron_health.json"
 LOG_FILE = BASE_DIR / "execution-logs" / "majors_scanner.log"
 
 SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
@@ -34,21 +38,13 @@ def _log(msg: str):
 
 def _update_cron_health(status: str = "ok"):
     """Update cron health timestamp."""
-    health = {}
-    if CRON_HEALTH.exists():
-        with open(CRON_HEALTH) as f:
-            health = json.load(f)
-    
-    health["majors_scanner"] = {
+    from job_supervisor import update_cron_health
+    update_cron_health("majors_scanner", {
         "last_run": datetime.now(timezone.utc).isoformat(),
         "status": status
-    }
-    
-    CRON_HEALTH.parent.mkdir(parents=True, exist_ok=True)
-    with open(CRON_HEALTH, "w") as f:
-        json.dump(health, f, indent=2)
+    })
 
-def fetch_candles(symbol: str, interval: str = "1h", limit: int = 100) -> pd.DataFrame | None:
+def fetch_candles(symbol: str, interval: str = "1h", limit: int = 100) -> "pd.DataFrame | None":
     """
     Fetch candlestick data from Binance public API.
     No API key required for klines.
@@ -85,34 +81,34 @@ def fetch_candles(symbol: str, interval: str = "1h", limit: int = 100) -> pd.Dat
         _log(f"ERROR fetching candles for {symbol}: {e}")
         return None
 
-def calculate_indicators(df: pd.DataFrame) -> dict:
+def calculate_indicators(df: "pd.DataFrame") -> dict:
     """
     Calculate technical indicators using ta library.
     Returns dict of current indicator values.
     """
     try:
         # Bollinger Bands
-        bb = BollingerBands(close=df["close"], window=20, window_dev=2.0)
+        bb = ta_volatility.BollingerBands(close=df["close"], window=20, window_dev=2.0)
         bb_upper = bb.bollinger_hband().iloc[-1]
         bb_mid = bb.bollinger_mavg().iloc[-1]
         bb_lower = bb.bollinger_lband().iloc[-1]
         
         # RSI
-        rsi = RSIIndicator(close=df["close"], window=14)
+        rsi = ta_momentum.RSIIndicator(close=df["close"], window=14)
         rsi_value = rsi.rsi().iloc[-1]
         
         # EMA
-        ema20 = EMAIndicator(close=df["close"], window=20).ema_indicator().iloc[-1]
-        ema50 = EMAIndicator(close=df["close"], window=50).ema_indicator().iloc[-1]
+        ema20 = ta_trend.EMAIndicator(close=df["close"], window=20).ema_indicator().iloc[-1]
+        ema50 = ta_trend.EMAIndicator(close=df["close"], window=50).ema_indicator().iloc[-1]
         
         # MACD
-        macd_ind = MACD(close=df["close"], window_slow=26, window_fast=12, window_sign=9)
+        macd_ind = ta_trend.MACD(close=df["close"], window_slow=26, window_fast=12, window_sign=9)
         macd_line = macd_ind.macd().iloc[-1]
         macd_signal = macd_ind.macd_signal().iloc[-1]
         macd_hist = macd_ind.macd_diff().iloc[-1]
         
         # ATR
-        atr = AverageTrueRange(high=df["high"], low=df["low"], close=df["close"], window=14)
+        atr = ta_volatility.AverageTrueRange(high=df["high"], low=df["low"], close=df["close"], window=14)
         atr_value = atr.average_true_range().iloc[-1]
         
         # Current price and volume
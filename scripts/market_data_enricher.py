@@ -15,7 +15,6 @@ Used by signal_router.py BEFORE tradeability scoring.
 import sys
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
-import time
 
 SCRIPT_DIR = Path(__file__).resolve().parent
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -28,21 +27,8 @@ except ImportError:
     get_ticker_24h = None
     binance_request = None
 
-# In-memory cache (TTL 60s to limit Binance API calls)
-_BINANCE_CACHE = {}
-_CACHE_TTL = 60  # seconds
-
-def _get_cached_binance_data(symbol: str):
-    """Get cached Binance data if fresh (<60s old)."""
-    if symbol in _BINANCE_CACHE:
-        data, timestamp = _BINANCE_CACHE[symbol]
-        if time.time() - timestamp < _CACHE_TTL:
-            return data
-    return None
-
-def _cache_binance_data(symbol: str, data: dict):
-    """Cache Binance data with timestamp."""
-    _BINANCE_CACHE[symbol] = (data, time.time())
+# Shared enrichment cache (Binance tickers: FIELD_TTLS["ticker"]; Birdeye overview cached in birdeye_client)
+import enrichment_cache
 
 BINANCE_MAJORS = {
     "BTC", "ETH", "BNB", "SOL", "XRP", "ADA", "DOGE", "DOT", "MATIC", "AVAX",
@@ -87,17 +73,12 @@ def _enrich_binance_major(signal: dict) -> dict:
     token = signal.get("token", "").upper()
     symbol = token + "USDT"  # Standard quote currency
     
-    # Check cache first (avoid redundant API calls)
-    cached = _get_cached_binance_data(symbol)
-    if cached:
-        ticker = cached
-    else:
-        try:
-            ticker = get_ticker_24h(symbol)
-            if ticker:
-                _cache_binance_data(symbol, ticker)
-        except Exception:
-            return signal  # API call failed, return unchanged
+    # Shared cache first (avoid redundant API calls across router/scanners)
+    try:
+        ticker = enrichment_cache.get_or_fetch("binance", "binance", symbol, "ticker",
+                                               lambda: get_ticker_24h(symbol))
+    except Exception:
+        return signal  # API call failed, return unchanged
     
     try:
         if ticker:
@@ -27,7 +27,6 @@ import hmac
 import hashlib
 from datetime import datetime, timezone
 from pathlib import Path
-from collections import deque
 
 # ---------------------------------------------------------------------------
 # Paths & Config
@@ -37,6 +36,9 @@ BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
 CONFIG_ENV = BASE_DIR / "config" / ".env"
 STATE_DIR = BASE_DIR / "state"
 
+sys.path.insert(0, str(SCRIPT_DIR))
+import breaker_registry
+
 MEXC_BASE_URL = "https://api.mexc.com"
 MEXC_API_KEY = ""
 MEXC_API_SECRET = ""
@@ -51,6 +53,7 @@ if CONFIG_ENV.exists():
 
 # Lazy import to avoid top-level failure in test envs
 import requests
+import http_transport
 
 
 def _log(msg: str):
@@ -64,61 +67,38 @@ class ErrorTracker:
     """
     Tracks errors for circuit breaker logic.
     Trip: 3 consecutive failures → 5 min cooldown.
+    Breaker state is the shared breaker_registry entry (every process sees the trip).
     """
 
     def __init__(self, component="mexc_api", window_sec=60, trip_threshold=3):
         self.component = component
         self.window_sec = window_sec
         self.trip_threshold = trip_threshold
-        self.errors = deque()
+        self.breaker = breaker_registry.breaker(component, trip_consecutive=trip_threshold,
+                                                window_s=window_sec, cooldown_s=300)  # 5 minutes
         self.total_requests = 0
         self.total_errors = 0
-        self._tripped = False
-        self._cooldown_until = None
-        self._consecutive_failures = 0
 
     def record_success(self):
         self.total_requests += 1
-        self._consecutive_failures = 0
 
     def record_error(self, error_msg=""):
-        now = time.time()
         self.total_requests += 1
         self.total_errors += 1
-        self._consecutive_failures += 1
-        self.errors.append(now)
-
-        # Clean old errors outside window
-        cutoff = now - self.window_sec
-        while self.errors and self.errors[0] < cutoff:
-            self.errors.popleft()
-
-        if self._consecutive_failures >= self.trip_threshold:
-            self._tripped = True
-            self._cooldown_until = now + 300  # 5 minutes
+        if self.breaker.record_failure(error_msg):
             _log(f"⚠️ Circuit breaker TRIPPED ({self.component}): "
-                 f"{self._consecutive_failures} consecutive failures → 5min cooldown")
+                 f"{self.trip_threshold} consecutive failures → 5min cooldown")
 
     def is_tripped(self):
-        if not self._tripped:
-            return False
-        if time.time() >= self._cooldown_until:
-            self._tripped = False
-            self._consecutive_failures = 0
-            _log(f"Circuit breaker RESET ({self.component})")
-            return False
-        return True
+        # After the cooldown the breaker is half-open: the next request is the probe
+        return not self.breaker.allow()
 
     def time_remaining(self):
-        if not self._tripped or not self._cooldown_until:
-            return 0
-        return max(0, int(self._cooldown_until - time.time()))
+        return int(self.breaker.open_for_s())
     
     def reset_after_success(self):
         """Explicitly reset breaker after successful request (handles post-cooldown close)."""
-        if self._tripped:
-            self._tripped = False
-            self._consecutive_failures = 0
+        if self.breaker.record_success():
             _log(f"Circuit breaker CLOSED after successful request ({self.component})")
 
 
@@ -184,11 +164,11 @@ def _request(method: str, endpoint: str, params=None, signed=False, timeout=10):
 
     try:
         if method == "GET":
-            resp = requests.get(url, params=params, headers=headers, timeout=timeout)
+            resp = http_transport.get(url, params=params, headers=headers, timeout=timeout)
         elif method == "POST":
-            resp = requests.post(url, params=params, headers=headers, timeout=timeout)
+            resp = http_transport.post(url, params=params, headers=headers, timeout=timeout)
         elif method == "DELETE":
-            resp = requests.delete(url, params=params, headers=headers, timeout=timeout)
+            resp = http_transport.request("DELETE", url, params=params, headers=headers, timeout=timeout)
         else:
             _log(f"Unsupported method: {method}")
             return None
@@ -498,6 +478,15 @@ def get_order_status(symbol: str, order_id: str) -> dict | None:
     }, signed=True)
 
 
+# ---------------------------------------------------------------------------
+# 9. get_exchange_info
+# ---------------------------------------------------------------------------
+def get_exchange_info(symbol: str = None) -> dict | None:
+    """Get trading rules and symbol info (all symbols when symbol is None)."""
+    params = {"symbol": symbol.upper()} if symbol else {}
+    return _request("GET", "/api/v3/exchangeInfo", params, timeout=20)
+
+
 # ---------------------------------------------------------------------------
 # Health check
 # ---------------------------------------------------------------------------
@@ -24,7 +24,6 @@ Covers:
 import json
 import os
 import sys
-import requests
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -34,6 +33,7 @@ STATE_DIR = BASE_DIR / "state"
 NOTIFIER_STATE = STATE_DIR / "notifier_state.json"
 
 sys.path.insert(0, str(SCRIPT_DIR))
+import http_transport
 
 
 def _log(msg):
@@ -157,7 +157,7 @@ def _send_telegram(message: str, parse_mode: str = None) -> bool:
         if parse_mode:
             payload["parse_mode"] = parse_mode
 
-        resp = requests.post(url, json=payload, timeout=10)
+        resp = http_transport.post(url, json=payload, timeout=10)
 
         if resp.status_code == 200:
             _log(f"Telegram sent ({len(message)} chars)")
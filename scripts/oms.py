@@ -14,6 +14,14 @@ Handles the full order lifecycle:
 4.2.7 — Partial fill handling
 4.2.8 — Order timeout/retry with backoff
 
+Quantities and limit prices are rounded to the symbol's lot step / tick size
+from listing_index; orders below min qty / notional fail before submission.
+
+Persistence: state_store OMS journal — oms_order_events (append-only
+transition rows), oms_orders (current snapshot, indexed by client_order_id,
+symbol/side/state) and oms_intents. Replaces the oms_orders.json /
+oms_intents.json rewrites (imported once by state_store.init_db).
+
 Used by: sanad_pipeline Stage 7 (execution), position_monitor (exits)
 """
 
@@ -29,11 +37,15 @@ from pathlib import Path
 SCRIPT_DIR = Path(__file__).resolve().parent
 BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
 STATE_DIR = BASE_DIR / "state"
-ORDERS_PATH = STATE_DIR / "oms_orders.json"
-INTENTS_PATH = STATE_DIR / "oms_intents.json"
 LOGS_DIR = BASE_DIR / "execution-logs"
 
 sys.path.insert(0, str(SCRIPT_DIR))
+import listing_index
+import state_store
+
+DB_PATH = None  # None → state_store.DB_PATH
+
+_schema_ready: set = set()
 
 
 def _log(msg):
@@ -45,20 +57,16 @@ def _now():
     return datetime.now(timezone.utc)
 
 
-def _load_json(path, default=None):
-    try:
-        with open(path, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return default if default is not None else {}
+def _ensure_schema():
+    key = str(DB_PATH or state_store.DB_PATH)
+    if key not in _schema_ready:
+        state_store.ensure_tables(DB_PATH)
+        _schema_ready.add(key)
 
 
-def _save_json(path, data):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(".tmp")
-    with open(tmp, "w") as f:
-        json.dump(data, f, indent=2, default=str)
-    os.replace(tmp, path)
+def _save_order(order: dict, sent_exchange_order_id: str = None):
+    """Journal the order's new transitions and update its snapshot (one transaction)."""
+    state_store.oms_save_order(order, sent_exchange_order_id=sent_exchange_order_id, db_path=DB_PATH)
 
 
 # ─────────────────────────────────────────────────────────
@@ -91,6 +99,8 @@ VALID_TRANSITIONS = {
 }
 
 TERMINAL_STATES = {OrderState.FILLED, OrderState.CANCELED, OrderState.REJECTED, OrderState.EXPIRED, OrderState.FAILED}
+_TERMINAL_VALUES = [s.value for s in TERMINAL_STATES]
+_ACTIVE_VALUES = [s.value for s in OrderState if s not in TERMINAL_STATES]  # IN (...) uses the state index
 
 
 def _transition_valid(current: str, target: str) -> bool:
@@ -120,26 +130,22 @@ def generate_client_order_id(correlation_id: str, strategy: str, side: str, symb
 # 4.2.3 — Duplicate Prevention
 # ─────────────────────────────────────────────────────────
 
-def _check_duplicate(client_order_id: str, orders: dict) -> bool:
-    """Check if an order with this client_order_id already exists and is active."""
-    if client_order_id in orders:
-        existing = orders[client_order_id]
+def _check_duplicate(client_order_id: str) -> dict | None:
+    """Return the existing order with this client_order_id if it is still active."""
+    existing = state_store.oms_get_order(client_order_id, db_path=DB_PATH)
+    if existing:
         state = existing.get("state", "")
-        if state not in [s.value for s in TERMINAL_STATES]:
+        if state not in _TERMINAL_VALUES:
             _log(f"DUPLICATE blocked: {client_order_id} already in state {state}")
-            return True
-    return False
+            return existing
+    return None
 
 
-def _check_conflicting_orders(symbol: str, side: str, orders: dict) -> list:
+def _check_conflicting_orders(symbol: str, side: str) -> list:
     """Find any active orders for same symbol+side."""
-    conflicts = []
-    for oid, order in orders.items():
-        if (order.get("symbol") == symbol
-                and order.get("side") == side
-                and order.get("state") not in [s.value for s in TERMINAL_STATES]):
-            conflicts.append(oid)
-    return conflicts
+    active = state_store.oms_get_orders(symbol=symbol.upper(), side=side.upper(),
+                                        states=_ACTIVE_VALUES, db_path=DB_PATH)
+    return [o["client_order_id"] for o in active]
 
 
 # ─────────────────────────────────────────────────────────
@@ -149,10 +155,10 @@ def _check_conflicting_orders(symbol: str, side: str, orders: dict) -> list:
 def _record_intent(order: dict):
     """Persist order intent BEFORE sending to exchange.
 
-    This prevents fire-and-forget scenarios.
+    This prevents fire-and-forget scenarios. The intent and the NEW order
+    are written in one transaction, so neither exists without the other.
     """
-    intents = _load_json(INTENTS_PATH, {"intents": []})
-    intents["intents"].append({
+    intent = {
         "client_order_id": order["client_order_id"],
         "symbol": order["symbol"],
         "side": order["side"],
@@ -161,22 +167,8 @@ def _record_intent(order: dict):
         "strategy": order.get("strategy", "unknown"),
         "recorded_at": _now().isoformat(),
         "exchange_sent": False,
-    })
-    # Keep last 200 intents
-    intents["intents"] = intents["intents"][-200:]
-    _save_json(INTENTS_PATH, intents)
-
-
-def _mark_intent_sent(client_order_id: str, exchange_order_id: str = None):
-    """Mark intent as sent to exchange."""
-    intents = _load_json(INTENTS_PATH, {"intents": []})
-    for intent in intents["intents"]:
-        if intent["client_order_id"] == client_order_id:
-            intent["exchange_sent"] = True
-            intent["exchange_order_id"] = exchange_order_id
-            intent["sent_at"] = _now().isoformat()
-            break
-    _save_json(INTENTS_PATH, intents)
+    }
+    state_store.oms_create_order(order, intent, db_path=DB_PATH)
 
 
 # ─────────────────────────────────────────────────────────
@@ -203,7 +195,7 @@ def place_order(
     4.2.8 — Retry with backoff
     """
     now = _now()
-    orders = _load_json(ORDERS_PATH, {})
+    _ensure_schema()
 
     # Generate idempotent order ID (4.2.2)
     if not correlation_id:
@@ -211,11 +203,12 @@ def place_order(
     client_order_id = generate_client_order_id(correlation_id, strategy, side, symbol)
 
     # Check duplicates (4.2.3)
-    if _check_duplicate(client_order_id, orders):
-        return orders[client_order_id]
+    existing = _check_duplicate(client_order_id)
+    if existing:
+        return existing
 
     # Check conflicts
-    conflicts = _check_conflicting_orders(symbol, side, orders)
+    conflicts = _check_conflicting_orders(symbol, side)
     if conflicts:
         _log(f"WARNING: {len(conflicts)} active {side} orders for {symbol}: {conflicts}")
 
@@ -233,6 +226,11 @@ def place_order(
         order_type = "MARKET"
         time_in_force = "GTC"
 
+    # Exchange filters: lot step, tick size, min qty / notional (listing index)
+    filter_error = None
+    if exchange in listing_index.VENUE_PREFERENCE:
+        quantity, price, filter_error = listing_index.conform(symbol, exchange, quantity, price)
+
     # Create order record (4.2.1 — NEW state)
     order = {
         "client_order_id": client_order_id,
@@ -261,19 +259,25 @@ def place_order(
         "events": [{"state": "NEW", "at": now.isoformat()}],
     }
 
-    # Persist intent BEFORE sending (4.2.4)
+    # Persist intent + NEW order BEFORE sending (4.2.4)
     _record_intent(order)
-    orders[client_order_id] = order
-    _save_json(ORDERS_PATH, orders)
 
     _log(f"NEW: {side} {quantity} {symbol} @ {price or 'MARKET'} [{strategy}] id={client_order_id[:12]}...")
 
+    # Never reaches the exchange: it would reject the order anyway
+    if filter_error:
+        _update_state(order, OrderState.FAILED)
+        order["error"] = f"Exchange filter: {filter_error}"
+        _save_order(order)
+        _log(f"FAILED: {order['symbol']} — {order['error']}")
+        return order
+
     # Submit to exchange (4.2.8 — retry with backoff)
-    result = _submit_with_retry(order, orders, max_retries)
+    result = _submit_with_retry(order, max_retries)
     return result
 
 
-def _submit_with_retry(order: dict, orders: dict, max_retries: int) -> dict:
+def _submit_with_retry(order: dict, max_retries: int) -> dict:
     """Submit order to exchange with exponential backoff retry."""
     client_order_id = order["client_order_id"]
 
@@ -283,8 +287,7 @@ def _submit_with_retry(order: dict, orders: dict, max_retries: int) -> dict:
             _update_state(order, OrderState.SUBMITTED)
             order["submitted_at"] = _now().isoformat()
             order["retries"] = attempt
-            orders[client_order_id] = order
-            _save_json(ORDERS_PATH, orders)
+            _save_order(order)
 
             if order["paper_mode"]:
                 result = _execute_paper(order)
@@ -294,7 +297,6 @@ def _submit_with_retry(order: dict, orders: dict, max_retries: int) -> dict:
             if result.get("success"):
                 exchange_id = result.get("exchange_order_id", "paper_" + client_order_id[:8])
                 order["exchange_order_id"] = exchange_id
-                _mark_intent_sent(client_order_id, exchange_id)
 
                 # Check if immediately filled
                 status = result.get("status", "NEW")
@@ -307,8 +309,7 @@ def _submit_with_retry(order: dict, orders: dict, max_retries: int) -> dict:
                 else:
                     _update_state(order, OrderState.ACKNOWLEDGED)
 
-                orders[client_order_id] = order
-                _save_json(ORDERS_PATH, orders)
+                _save_order(order, sent_exchange_order_id=exchange_id)  # + intent marked sent
                 _log(f"ACK: {order['side']} {order['symbol']} → {order['state']} (exchange_id={exchange_id})")
                 return order
 
@@ -322,8 +323,7 @@ def _submit_with_retry(order: dict, orders: dict, max_retries: int) -> dict:
                 else:
                     _update_state(order, OrderState.REJECTED)
                     order["error"] = error
-                    orders[client_order_id] = order
-                    _save_json(ORDERS_PATH, orders)
+                    _save_order(order)
                     _log(f"REJECTED: {order['symbol']} — {error}")
                     return order
 
@@ -335,8 +335,7 @@ def _submit_with_retry(order: dict, orders: dict, max_retries: int) -> dict:
             else:
                 _update_state(order, OrderState.FAILED)
                 order["error"] = str(e)
-                orders[client_order_id] = order
-                _save_json(ORDERS_PATH, orders)
+                _save_order(order)
                 _log(f"FAILED: {order['symbol']} after {max_retries} attempts — {e}")
                 return order
 
@@ -514,29 +513,34 @@ def _execute_live(order: dict) -> dict:
 # ─────────────────────────────────────────────────────────
 
 def get_order(client_order_id: str) -> dict | None:
-    orders = _load_json(ORDERS_PATH, {})
-    return orders.get(client_order_id)
+    _ensure_schema()
+    return state_store.oms_get_order(client_order_id, db_path=DB_PATH)
 
 
 def get_active_orders() -> list:
-    orders = _load_json(ORDERS_PATH, {})
-    return [o for o in orders.values() if o.get("state") not in [s.value for s in TERMINAL_STATES]]
+    _ensure_schema()
+    return state_store.oms_get_orders(states=_ACTIVE_VALUES, db_path=DB_PATH)
+
+
+def get_orders_by_state(states=None) -> list:
+    """All orders (optionally only those in `states`), oldest first."""
+    _ensure_schema()
+    return state_store.oms_get_orders(states=states, db_path=DB_PATH)
 
 
 def get_orders_by_symbol(symbol: str) -> list:
-    orders = _load_json(ORDERS_PATH, {})
-    return [o for o in orders.values() if o.get("symbol") == symbol.upper()]
+    _ensure_schema()
+    return state_store.oms_get_orders(symbol=symbol.upper(), db_path=DB_PATH)
 
 
 def cancel_order(client_order_id: str) -> dict | None:
     """Cancel an order."""
-    orders = _load_json(ORDERS_PATH, {})
-    order = orders.get(client_order_id)
+    order = get_order(client_order_id)
     if not order:
         _log(f"Cancel: order {client_order_id} not found")
         return None
 
-    if order["state"] in [s.value for s in TERMINAL_STATES]:
+    if order["state"] in _TERMINAL_VALUES:
         _log(f"Cancel: order already in terminal state {order['state']}")
         return order
 
@@ -553,17 +557,16 @@ def cancel_order(client_order_id: str) -> dict | None:
             _log(f"Cancel exchange error: {e}")
 
     _update_state(order, OrderState.CANCELED)
-    orders[client_order_id] = order
-    _save_json(ORDERS_PATH, orders)
+    _save_order(order)
     _log(f"CANCELED: {order['symbol']} {order['side']} id={client_order_id[:12]}...")
     return order
 
 
 def cancel_all(symbol: str = None) -> int:
     """Cancel all active orders, optionally filtered by symbol."""
-    active = get_active_orders()
-    if symbol:
-        active = [o for o in active if o.get("symbol") == symbol.upper()]
+    _ensure_schema()
+    active = state_store.oms_get_orders(symbol=symbol.upper() if symbol else None,
+                                        states=_ACTIVE_VALUES, db_path=DB_PATH)
     count = 0
     for order in active:
         result = cancel_order(order["client_order_id"])
@@ -575,14 +578,11 @@ def cancel_all(symbol: str = None) -> int:
 
 def status() -> dict:
     """OMS status summary."""
-    orders = _load_json(ORDERS_PATH, {})
-    state_counts = {}
-    for o in orders.values():
-        s = o.get("state", "UNKNOWN")
-        state_counts[s] = state_counts.get(s, 0) + 1
+    _ensure_schema()
+    state_counts = state_store.oms_state_counts(db_path=DB_PATH)
     return {
-        "total_orders": len(orders),
-        "active": len([o for o in orders.values() if o.get("state") not in [s.value for s in TERMINAL_STATES]]),
+        "total_orders": sum(state_counts.values()),
+        "active": sum(n for s, n in state_counts.items() if s not in _TERMINAL_VALUES),
         "by_state": state_counts,
         "updated_at": _now().isoformat(),
     }
@@ -9,15 +9,20 @@ Key principles:
 1. Never block on exchange API failures
 2. Use prices from decision packet (already validated in earlier stages)
 3. Support both CEX and DEX tokens
-4. Deterministic fills with realistic slippage simulation
+4. Deterministic fills from real depth (fill_engine: Binance book walk,
+   constant-product pool math); random slippage only without book/pool data
+5. CEX quantities follow the exchange's lot step / min notional (listing_index)
 """
 
 import json
+import os
 import time
 import random
 from datetime import datetime, timezone
 from pathlib import Path
 
+BASE_DIR = Path(os.environ.get("SANAD_HOME", str(Path(__file__).resolve().parent.parent)))
+
 def execute_paper_trade(
     token: str,
     symbol: str,
@@ -52,8 +57,30 @@ def execute_paper_trade(
             "detail": f"price={decision_price}"
         }
     
-    # Simulate realistic slippage based on venue and liquidity
-    if venue == "DEX":
+    # Exchange filters (step size, min qty / notional) from the shared listing index
+    if venue != "DEX":
+        quantity, rule_error = _conform_to_filters(symbol, exchange, quantity, decision_price)
+        if rule_error:
+            return {
+                "success": False,
+                "error": "Rejected by exchange filters",
+                "detail": rule_error,
+            }
+
+    # Fill against real depth: Binance order book or constant-product pool
+    fill = _depth_fill(symbol, side, quantity, decision_price, venue, exchange, liquidity_usd)
+    if fill is not None and fill["fill_pct"] <= 0:
+        return {
+            "success": False,
+            "error": "No fill",
+            "detail": f"{fill['model']} fill simulation: size ${quantity * decision_price:,.0f} not fillable",
+        }
+
+    if fill is not None:
+        quantity = fill["filled_qty"]
+        slippage_pct = fill["slippage_bps"] / 10000
+    # No book / pool data: simulate slippage based on venue and liquidity
+    elif venue == "DEX":
         # DEX: higher slippage, depends on liquidity
         if liquidity_usd and liquidity_usd > 0:
             # Trade size as % of liquidity
@@ -68,13 +95,15 @@ def execute_paper_trade(
         slippage_pct = random.uniform(0.0001, 0.001)  # 0.01%-0.1%
     
     # Apply slippage
-    if side.upper() == "BUY":
+    if fill is not None:
+        fill_price = fill["vwap"]
+    elif side.upper() == "BUY":
         fill_price = decision_price * (1 + slippage_pct)
     else:
         fill_price = decision_price * (1 - slippage_pct)
     
-    # Simulate trading fee (0.1% standard)
-    fee_rate = 0.001
+    # Simulate trading fee (0.1% standard); AMM LP fee is already in the swap price
+    fee_rate = 0.0 if fill is not None and fill["model"] == "amm" else 0.001
     fee_usd = fill_price * quantity * fee_rate
     
     # Generate order result
@@ -90,17 +119,19 @@ def execute_paper_trade(
         "price": fill_price,
         "fee_usd": fee_usd,
         "fee_rate": fee_rate,
-        "status": "FILLED",
+        "status": "PARTIALLY_FILLED" if fill is not None and fill["partial"] else "FILLED",
         "venue": venue,
         "exchange": exchange,
         "decision_price": decision_price,
         "slippage_pct": slippage_pct * 100,
+        "fill_model": fill["model"] if fill is not None else "random",
+        "fill_pct": fill["fill_pct"] if fill is not None else 1.0,
         "executed_at": datetime.now(timezone.utc).isoformat(),
     }
     
     # Log to paper fills file
     try:
-        log_dir = Path(__file__).resolve().parent.parent / "execution-logs"
+        log_dir = BASE_DIR / "execution-logs"
         log_dir.mkdir(parents=True, exist_ok=True)
         log_file = log_dir / "paper_fills.jsonl"
         
@@ -113,6 +144,38 @@ def execute_paper_trade(
     return order_result
 
 
+def _conform_to_filters(symbol, exchange, quantity, decision_price):
+    """(quantity rounded to the lot step, error) — unchanged when the pair is not indexed."""
+    try:
+        import listing_index
+        quantity, _, error = listing_index.conform(symbol, exchange or "binance", quantity, decision_price)
+        return quantity, error
+    except Exception as e:
+        print(f"[PAPER] Listing index unavailable ({e}) — skipping exchange filters")
+        return quantity, None
+
+
+def _depth_fill(symbol, side, quantity, decision_price, venue, exchange, liquidity_usd):
+    """fill_engine quote for this order, or None when there is no book / pool to fill against."""
+    try:
+        import fill_engine
+        size_usd = quantity * decision_price
+        if venue == "DEX":
+            if not liquidity_usd or liquidity_usd <= 0:
+                return None
+            return fill_engine.quote_amm(liquidity_usd, decision_price, side, size_usd, exchange=exchange)
+        if (exchange or "binance").lower() != "binance":
+            return None
+        import depth_cache
+        book = depth_cache.get_book(symbol, need_usd=size_usd)
+        if not book:
+            return None
+        return fill_engine.quote_book(book, side, size_usd, reference=decision_price)
+    except Exception as e:
+        print(f"[PAPER] Depth fill simulation unavailable ({e}) — using slippage model")
+        return None
+
+
 def get_execution_parameters(decision_record: dict) -> dict:
     """
     Extract execution parameters from decision record.
@@ -9,6 +9,10 @@ This module simulates fill probability based on:
 - Time in force
 - Market volatility
 - Order book depth
+
+When the order book is known (book=DepthBook), the fill is not rolled: it
+comes from fill_engine walking that book, so fill_pct and price impact
+follow the actual depth.
 """
 
 import json
@@ -24,9 +28,9 @@ STATE_DIR = BASE_DIR / "state"
 
 
 def simulate_fill(order_size_usd: float, liquidity_usd: float = 0,
-                  volatility: str = "NORMAL", order_type: str = "LIMIT") -> dict:
+                  volatility: str = "NORMAL", order_type: str = "LIMIT", book=None) -> dict:
     """
-    Simulate fill for a paper trade order.
+    Simulate fill for a paper trade order (deterministic from `book` if given).
 
     Returns:
         {
@@ -37,6 +41,9 @@ def simulate_fill(order_size_usd: float, liquidity_usd: float = 0,
             "reason": str,
         }
     """
+    if book is not None:
+        return _book_fill(order_size_usd, book, volatility)
+
     # Base fill probability by order type
     if order_type == "MARKET":
         base_fill = 1.0  # Markets always fill (with slippage)
@@ -106,6 +113,25 @@ def simulate_fill(order_size_usd: float, liquidity_usd: float = 0,
     }
 
 
+def _book_fill(order_size_usd: float, book, volatility: str) -> dict:
+    """Market-order fill from fill_engine against a depth_cache.DepthBook."""
+    from fill_engine import quote_book
+
+    q = quote_book(book, "BUY", order_size_usd)
+    fill_pct = q["fill_pct"]
+    return {
+        "fill_pct": round(fill_pct, 4),
+        "filled_qty_pct": round(fill_pct * 100, 1),
+        "fill_price_impact_bps": round(q["slippage_bps"], 1) if fill_pct > 0 else 0,
+        "partial": 0 < fill_pct < 1,
+        "reason": "full_fill" if fill_pct >= 1 else ("partial_fill" if fill_pct > 0 else "no_fill"),
+        "order_size_usd": order_size_usd,
+        "liquidity_usd": book.depth_usd("BUY"),
+        "volatility": volatility,
+        "model": "book",
+    }
+
+
 if __name__ == "__main__":
     print("=== Partial Fill Simulation Test ===\n")
 
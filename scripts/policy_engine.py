@@ -43,13 +43,14 @@ try:
     HAS_STATE_STORE = True
 except ImportError:
     HAS_STATE_STORE = False
+import breaker_registry
 
 
 def load_config():
     """Load thresholds.yaml. BLOCK if missing or corrupt."""
     try:
         with open(CONFIG_PATH, "r") as f:
-            config = yaml.safe_load(f)
+            config = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))  # libyaml when available
         if not isinstance(config, dict):
             return None, "thresholds.yaml parsed but is not a dict"
         return config, None
@@ -812,8 +813,7 @@ def evaluate_gates(decision_packet, gate_range=None, state_override=None):
     exchange_health, _ = load_json_state("exchange_health.json", required=False)
     state["exchange_health"] = exchange_health
 
-    circuit_breakers, _ = load_json_state("circuit_breakers.json", required=False)
-    state["circuit_breakers"] = circuit_breakers
+    state["circuit_breakers"] = breaker_registry.all_states()
 
     trade_history, _ = load_json_state("trade_history.json", required=False)
     state["trade_history"] = trade_history if isinstance(trade_history, list) else trade_history.get("trades", [])
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader V4 — Counterfactual Policy Simulator
+
+Re-decides stored `decisions` rows under a policy config and simulates the
+resulting trades on recorded price history, so a candidate in policy_configs
+can be walk-forward evaluated before it has traded live.
+
+Re-decision (per signal, earliest decision row wins):
+  - STAGE_1_SAFETY blocks stay blocked (safety gates are not policy)
+  - STAGE_3 / STAGE_4 / failed STAGE_5 rows keep their original outcome
+  - everything else is re-scored from score_breakdown_json (optional
+    score_weights) against the config's min_score, then source/chain filters
+
+Price path per token (no new data collection):
+  - signal price in every stored decision_packet_json
+  - fills (expected price, falling back to exec price)
+  - state/price_history.json snapshots (Binance symbols, keyed by base asset)
+
+Exits: stop loss / take profit on the first tick that crosses, else time exit
+at the last tick inside max_hold_hours. Paper fee/slippage as in stage 5.
+
+Policy config keys (all optional, defaults from thresholds.yaml):
+  min_score, score_weights, stop_loss_pct, take_profit_pct, max_hold_hours,
+  fee_bps, slippage_bps, position_usd, blocked_sources, allowed_chains
+
+Used by: eval_walkforward.py --simulate
+"""
+import os
+import sys
+import json
+import bisect
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+from concurrent.futures import ProcessPoolExecutor
+
+BASE_DIR = Path(os.environ.get("SANAD_HOME", str(Path(__file__).resolve().parent.parent)))
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+
+import state_store
+
+STATE_DIR = BASE_DIR / "state"
+CONFIG_DIR = BASE_DIR / "config"
+
+DEFAULT_MIN_SCORE = 40  # fast_decision_engine runtime_state default
+DEFAULT_POSITION_USD = 100.0
+
+# Outcomes that never become trades whatever the policy
+_FIXED_STAGES = ("STAGE_1_SAFETY", "STAGE_3_STRATEGY", "STAGE_4_POLICY")
+
+
+def _log(msg):
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
+    print(f"[SIM] {ts} {msg}", flush=True)
+
+
+def _parse_iso(s):
+    return datetime.fromisoformat(s.replace("Z", "+00:00"))
+
+
+def _epoch(s):
+    try:
+        dt = _parse_iso(s)
+    except (AttributeError, TypeError, ValueError):
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
+def _positive(x):
+    try:
+        x = float(x)
+    except (TypeError, ValueError):
+        return None
+    return x if x > 0 else None
+
+
+# ─────────────────────────────────────────────────────────
+# Config
+# ─────────────────────────────────────────────────────────
+
+def _threshold_defaults() -> dict:
+    try:
+        import yaml
+        path = CONFIG_DIR / "thresholds.yaml"
+        thresholds = yaml.safe_load(path.read_text()) if path.exists() else {}
+    except Exception:
+        thresholds = {}
+    risk = (thresholds or {}).get("risk", {}) or {}
+    costs = (thresholds or {}).get("execution_costs", {}) or {}
+    return {
+        "min_score": DEFAULT_MIN_SCORE,
+        "score_weights": None,
+        "stop_loss_pct": float(risk.get("stop_loss_default_pct", 0.15)),
+        "take_profit_pct": float(risk.get("take_profit_default_pct", 0.30)),
+        "max_hold_hours": float(risk.get("paper_max_hold_hours", 8)),
+        "fee_bps": float(costs.get("paper_fee_bps", 10)),
+        "slippage_bps": float(costs.get("paper_slippage_bps", 5)),
+        "position_usd": None,  # None → size recorded on the decision
+        "blocked_sources": [],
+        "allowed_chains": None,
+    }
+
+
+def load_sim_config(policy_version: str, db_path=None) -> dict:
+    """policy_configs row merged over thresholds.yaml defaults. KeyError if missing."""
+    cfg = _threshold_defaults()
+    stored = state_store.get_policy_config(policy_version, db_path=db_path)
+    cfg.update({k: v for k, v in stored.items() if k in cfg and v is not None})
+    return cfg
+
+
+# ─────────────────────────────────────────────────────────
+# Loading
+# ─────────────────────────────────────────────────────────
+
+def _compact_decision(row) -> dict | None:
+    try:
+        packet = json.loads(row["decision_packet_json"] or "{}")
+    except (TypeError, ValueError):
+        packet = {}
+    try:
+        breakdown = json.loads(row["score_breakdown_json"] or "null")
+    except (TypeError, ValueError):
+        breakdown = None
+    signal = packet.get("signal") or {}
+    ts = _epoch(row["created_at"])
+    if ts is None:
+        return None
+    return {
+        "decision_id": row["decision_id"],
+        "signal_id": row["signal_id"],
+        "ts": ts,
+        "stage": row["stage"],
+        "result": row["result"],
+        "reason_code": row["reason_code"],
+        "token_address": row["token_address"],
+        "symbol": str(signal.get("token") or signal.get("symbol") or "").upper(),
+        "chain": row["chain"],
+        "source": row["source_primary"] or "",
+        "score_total": row["score_total"],
+        "score_breakdown": breakdown if isinstance(breakdown, dict) else None,
+        "position_usd": row["position_usd"],
+        "price": _positive(signal.get("price")),
+    }
+
+
+def load_decisions(conn, start_ts: str, end_ts: str) -> list:
+    """Compact decision dicts in [start_ts, end_ts), oldest first, all policy versions."""
+    rows = conn.execute("""
+        SELECT decision_id, signal_id, created_at, result, stage, reason_code,
+               token_address, chain, source_primary, score_total,
+               score_breakdown_json, position_usd, decision_packet_json
+        FROM decisions
+        WHERE created_at >= ? AND created_at < ?
+        ORDER BY created_at ASC
+    """, (start_ts, end_ts)).fetchall()
+    out = []
+    for r in rows:
+        d = _compact_decision(r)
+        if d is not None:
+            out.append(d)
+    return out
+
+
+def _dedupe_signals(decisions: list) -> list:
+    """One row per signal_id: the earliest decision (what the signal looked like first)."""
+    seen = set()
+    out = []
+    for d in decisions:
+        if d["signal_id"] in seen:
+            continue
+        seen.add(d["signal_id"])
+        out.append(d)
+    return out
+
+
+def load_price_ticks(conn, decisions: list, start_ts: str, end_ts: str) -> dict:
+    """token key → sorted [(epoch, price)] from decisions, fills and price_history.json."""
+    ticks: dict[str, list] = {}
+
+    def add(key, ts, price):
+        if key and ts is not None and price:
+            ticks.setdefault(key, []).append((ts, price))
+
+    for d in decisions:
+        add(d["token_address"], d["ts"], d["price"])
+
+    rows = conn.execute("""
+        SELECT COALESCE(f.token_address, p.token_address) AS token_address,
+               f.created_at, f.expected_price, f.exec_price
+        FROM fills f LEFT JOIN positions p ON p.position_id = f.position_id
+        WHERE f.created_at >= ? AND f.created_at < ?
+    """, (start_ts, end_ts)).fetchall()
+    for r in rows:
+        add(r["token_address"], _epoch(r["created_at"]),
+            _positive(r["expected_price"]) or _positive(r["exec_price"]))
+
+    try:
+        history = json.loads((STATE_DIR / "price_history.json").read_text())
+    except (OSError, ValueError):
+        history = {}
+    lo, hi = _epoch(start_ts), _epoch(end_ts)
+    for symbol, entries in (history or {}).items():
+        base = symbol.upper()
+        base = base[:-4] if base.endswith("USDT") else base
+        for e in entries or []:
+            ts = _epoch(e.get("timestamp"))
+            if ts is not None and lo <= ts < hi:
+                add(base, ts, _positive(e.get("price")))
+
+    for series in ticks.values():
+        series.sort()
+    return ticks
+
+
+# ─────────────────────────────────────────────────────────
+# Re-decision + trade simulation (pure, picklable inputs)
+# ─────────────────────────────────────────────────────────
+
+def rescore(decision: dict, cfg: dict):
+    """Score under cfg["score_weights"] (component → multiplier), else the stored total."""
+    weights = cfg.get("score_weights")
+    breakdown = decision.get("score_breakdown")
+    if not weights or not breakdown:
+        return decision.get("score_total")
+    total = 0.0
+    for name, comp in breakdown.items():
+        if name == "total":
+            continue
+        points = comp.get("points") if isinstance(comp, dict) else comp
+        if isinstance(points, (int, float)):
+            total += float(points) * float(weights.get(name, 1.0))
+    return total
+
+
+def redecide(decision: dict, cfg: dict) -> str | None:
+    """None if the policy would trade this signal, else a SKIP/BLOCK reason code."""
+    stage = decision["stage"]
+    if stage in _FIXED_STAGES:
+        return decision["reason_code"]
+    if stage == "STAGE_5_EXECUTE" and decision["result"] != "EXECUTE":
+        return decision["reason_code"]
+
+    score = rescore(decision, cfg)
+    if score is None or score < cfg["min_score"]:
+        return "SKIP_SCORE_LOW"
+    source = decision["source"].lower()
+    if any(b.lower() in source for b in cfg.get("blocked_sources") or []):
+        return "SKIP_SOURCE_BLOCKED"
+    allowed = cfg.get("allowed_chains")
+    if allowed and (decision["chain"] or "").lower() not in {c.lower() for c in allowed}:
+        return "SKIP_CHAIN_NOT_ALLOWED"
+    return None
+
+
+def _series_for(decision: dict, ticks: dict) -> list:
+    return ticks.get(decision["token_address"]) or ticks.get(decision["symbol"]) or []
+
+
+def simulate_trade(decision: dict, cfg: dict, ticks: dict) -> dict | None:
+    """
+    Paper trade for a taken decision. Returns a positions-shaped dict for
+    eval_walkforward.compute_metrics, or None when the price path can't close it.
+    """
+    series = _series_for(decision, ticks)
+    entry_ts = decision["ts"]
+    i = bisect.bisect_left(series, (entry_ts, 0.0))
+    mid = decision["price"]
+    if mid is None:
+        if i >= len(series):
+            return None
+        mid = series[i][1]
+        i += 1
+    else:
+        # The decision's own tick is the entry, not an exit candidate
+        i = bisect.bisect_right(series, (entry_ts, float("inf")))
+
+    deadline = entry_ts + cfg["max_hold_hours"] * 3600
+    sl, tp = cfg["stop_loss_pct"], cfg["take_profit_pct"]
+    exit_ts = exit_mid = close_reason = None
+    for ts, price in series[i:]:
+        if ts > deadline:
+            close_reason = "TIME_EXIT"
+            break
+        exit_ts, exit_mid = ts, price
+        ret = price / mid - 1
+        if ret <= -sl:
+            close_reason = "STOP_LOSS"
+            break
+        if ret >= tp:
+            close_reason = "TAKE_PROFIT"
+            break
+    if exit_ts is None:
+        return None
+    if close_reason is None:
+        close_reason = "DATA_END"  # path ended inside the hold window
+
+    slip = cfg["slippage_bps"]
+    fee_bps = cfg["fee_bps"]
+    size_usd = float(cfg.get("position_usd") or decision.get("position_usd") or DEFAULT_POSITION_USD)
+    entry_exec = mid * (1 + slip / 10000.0)
+    exit_exec = exit_mid * (1 - slip / 10000.0)
+    qty = size_usd / entry_exec
+    exit_notional = qty * exit_exec
+    pnl_gross_usd = exit_notional - size_usd
+    fees_usd_total = (size_usd + exit_notional) * fee_bps / 10000.0
+    pnl_usd = pnl_gross_usd - fees_usd_total
+    pnl_pct = pnl_usd / size_usd
+    reward_bin, reward_real, _ = state_store.compute_reward(pnl_usd, pnl_pct, "v1")
+
+    return {
+        "position_id": f"sim_{decision['decision_id']}",
+        "decision_id": decision["decision_id"],
+        "token_address": decision["token_address"],
+        "created_at": _iso(entry_ts),
+        "closed_at": _iso(exit_ts),
+        "close_reason": close_reason,
+        "size_usd": size_usd,
+        "entry_price": entry_exec,
+        "close_price": exit_exec,
+        "pnl_usd": pnl_usd,
+        "pnl_pct": pnl_pct,
+        "pnl_gross_usd": pnl_gross_usd,
+        "pnl_gross_pct": pnl_gross_usd / size_usd,
+        "fees_usd_total": fees_usd_total,
+        "entry_slippage_bps": slip,
+        "exit_slippage_bps": slip,
+        "reward_bin": reward_bin,
+        "reward_real": reward_real,
+    }
+
+
+def simulate_policy(decisions: list, cfg: dict, ticks: dict) -> list:
+    """Trades the policy would have made on `decisions`, ordered by closed_at."""
+    trades = []
+    for d in decisions:
+        if redecide(d, cfg) is not None:
+            continue
+        trade = simulate_trade(d, cfg, ticks)
+        if trade is not None:
+            trades.append(trade)
+    trades.sort(key=lambda t: t["closed_at"])
+    return trades
+
+
+def _simulate_fold(payload):
+    """Process-pool worker: (decisions, ticks, baseline_cfg, candidate_cfg) → trade lists."""
+    decisions, ticks, baseline_cfg, candidate_cfg = payload
+    return simulate_policy(decisions, baseline_cfg, ticks), simulate_policy(decisions, candidate_cfg, ticks)
+
+
+# ─────────────────────────────────────────────────────────
+# Fold driver
+# ─────────────────────────────────────────────────────────
+
+def simulate_folds(folds: list, candidate: str, baseline: str, db_path=None, workers: int = None) -> list:
+    """
+    Counterfactual trades per fold test window for both policies.
+
+    Signals are attributed to the fold their first decision falls in; exits may
+    use ticks past the window end (up to max_hold_hours).
+    Returns [(baseline_trades, candidate_trades)] aligned with `folds`.
+    """
+    if not folds:
+        return []
+    db_path = db_path or state_store.DB_PATH
+    baseline_cfg = load_sim_config(baseline, db_path=db_path)
+    candidate_cfg = load_sim_config(candidate, db_path=db_path)
+
+    start_ts = min(f["test_start"] for f in folds)
+    end_ts = max(f["test_end"] for f in folds)
+    max_hold = max(baseline_cfg["max_hold_hours"], candidate_cfg["max_hold_hours"])
+    tick_end = (_parse_iso(end_ts) + timedelta(hours=max_hold)).isoformat()
+
+    with state_store.get_connection(db_path) as conn:
+        all_decisions = load_decisions(conn, start_ts, tick_end)
+        ticks = load_price_ticks(conn, all_decisions, start_ts, tick_end)
+    signals = _dedupe_signals(all_decisions)
+    _log(f"{len(signals)} signals ({len(all_decisions)} decisions), "
+         f"{sum(len(s) for s in ticks.values())} ticks across {len(ticks)} tokens")
+
+    payloads = []
+    for fold in folds:
+        lo, hi = _epoch(fold["test_start"]), _epoch(fold["test_end"])
+        fold_decisions = [d for d in signals if lo <= d["ts"] < hi]
+        keys = {d["token_address"] for d in fold_decisions} | {d["symbol"] for d in fold_decisions}
+        fold_ticks = {k: ticks[k] for k in keys if k in ticks}
+        payloads.append((fold_decisions, fold_ticks, baseline_cfg, candidate_cfg))
+
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    workers = max(1, min(workers, len(payloads)))
+    if workers == 1:
+        return [_simulate_fold(p) for p in payloads]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_simulate_fold, payloads))
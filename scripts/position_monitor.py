@@ -14,7 +14,8 @@ Exit conditions (checked in order):
   F. Flash Crash Override — price dropped >10% in 15min → close ALL meme positions
 
 Fail-safes:
-  - If price_cache.json is empty or stale (>10min), do NOT close. Log warning and exit.
+  - If price_cache.json is empty, do NOT close. Log warning and exit.
+  - If a position's price is stale (>10min), do NOT close that position. Log warning and skip it.
   - If positions.json is unreadable, log error and exit.
   - State writes are atomic (write .tmp then rename).
 """
@@ -79,6 +80,32 @@ def save_json_atomic(path, data):
             pass
         return False
 
+def _cached_price(price_cache, key, price_history=None):
+    """Price for key from price_cache.json — bare float or {"price", ...} entry.
+
+    None if absent or older than PRICE_MAX_AGE_MIN. Entries carry their own timestamp;
+    bare floats (Binance snapshot) are dated by that symbol's last price_history.json point.
+    The file as a whole is rewritten every minute by other feeds, so its mtime says nothing.
+    """
+    value = price_cache.get(key)
+    if isinstance(value, dict):
+        stamp, value = value.get("timestamp"), value.get("price")
+    else:
+        points = (price_history or {}).get(key) or [{}]
+        stamp = points[-1].get("timestamp") if isinstance(points[-1], dict) else None
+    if not value or not stamp:
+        return None
+    try:
+        stamp = datetime.fromisoformat(str(stamp).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if stamp.tzinfo is None:
+        stamp = stamp.replace(tzinfo=timezone.utc)
+    if (now_utc() - stamp).total_seconds() > PRICE_MAX_AGE_MIN * 60:
+        return None
+    return value
+
+
 def parse_dt(iso_str):
     """Parse ISO datetime string."""
     return datetime.fromisoformat(iso_str)
@@ -132,6 +159,7 @@ except Exception:
 MAX_HOLD_HOURS = _default_max_hold  # Paper: 12h, Live: 24h (Al-Muhasbi approved)
 FLASH_CRASH_PCT = 0.10           # 10% drop in 15 minutes
 FLASH_CRASH_WINDOW_MIN = 15      # 15-minute window
+PRICE_MAX_AGE_MIN = 10           # older cached prices never trigger exits
 
 
 def _get_strategy_config(position):
@@ -438,8 +466,12 @@ def check_flash_crash(price_history):
 # CLOSE POSITION
 # ─────────────────────────────────────────────
 
-def close_position(position, current_price, reason, detail=""):
-    """Close a position and update all state."""
+def close_position(position, current_price, reason, detail="", deferred_learning=None):
+    """Close a position and update all state.
+
+    deferred_learning: list to append the SQLite position_id to instead of
+    running the learning loop inline (burst closes are learned in one batch).
+    """
     # IDEMPOTENCY GUARD: Skip if already closed
     if position.get("status") == "CLOSED" or position.get("closed_at"):
         print(f"  [SKIP] Position {position.get('position_id', position.get('symbol'))} already closed")
@@ -571,7 +603,7 @@ def close_position(position, current_price, reason, detail=""):
             "strategy": position.get("strategy_name") or position.get("strategy_id") or "unknown",
             "sanad_score": position.get("sanad_score"),
         }, correlation_id=position.get("id"))
-        print(f"    Supabase: TRADE_CLOSED logged")
+        print(f"    Supabase: TRADE_CLOSED queued")
     except Exception as e:
         print(f"    WARNING: Supabase log failed: {e}")
 
@@ -724,10 +756,13 @@ def close_position(position, current_price, reason, detail=""):
                 "pnl_pct": pnl_pct,
             })
         print(f"    SQLite: position {position_id[:8]}... CLOSED (learning_status=PENDING)")
-        # Immediately attempt learning
-        import learning_loop
-        learning_loop.process_closed_position(position_id)
-        print(f"    Learning Loop: stats updated (DONE)")
+        if deferred_learning is not None:
+            deferred_learning.append(position_id)
+        else:
+            # Immediately attempt learning
+            import learning_loop
+            learning_loop.process_closed_position(position_id)
+            print(f"    Learning Loop: stats updated (DONE)")
     except Exception as e:
         # Non-blocking: cron fallback will process PENDING positions
         print(f"    SQLite/Learning: deferred to cron ({e})")
@@ -931,15 +966,7 @@ def run_monitor():
         print("[POSITION MONITOR] FATAL: Cannot read price_cache.json — aborting")
         return
 
-    # Check price cache freshness
-    cache_path = STATE_DIR / "price_cache.json"
-    cache_mtime = datetime.fromtimestamp(cache_path.stat().st_mtime, tz=timezone.utc)
-    cache_age_min = (now_utc() - cache_mtime).total_seconds() / 60
-    if cache_age_min > 10:
-        print(f"[POSITION MONITOR] WARNING: price_cache.json is {cache_age_min:.0f}min old (>10min) — "
-              f"skipping all exits for safety")
-        return
-
+    # Freshness is checked per price in _cached_price (stale → that position is skipped)
     price_history = load_json(STATE_DIR / "price_history.json") or {}
     trailing_stops = load_trailing_stops()
 
@@ -998,42 +1025,55 @@ def run_monitor():
 
     # ── Check each position ──
     closed_pnls = []
+    flash_learning = []  # flash-crash closes → one learning_loop batch below
 
     # Update DEX prices for non-Binance positions (P0-2 fix)
+    # DexScreener prices them in bulk (30 addresses per request); Birdeye only for what it doesn't list.
     dex_positions = [p for p in open_positions if p.get("exchange") not in ("binance", "mexc")]
     if dex_positions:
         print(f"[POSITION MONITOR] Fetching {len(dex_positions)} DEX prices...")
+        import sys
+        sys.path.insert(0, str(STATE_DIR.parent / "scripts"))
+        try:
+            import dex_price_poller
+            dex_prices = dex_price_poller.poll(dex_positions, include_watchlist=False)
+        except Exception as e:
+            print(f"[POSITION MONITOR] Batched DEX prices failed: {e}")
+            dex_prices = {}
+
         try:
-            import sys
-            sys.path.insert(0, str(STATE_DIR.parent / "scripts"))
             from birdeye_client import get_token_overview
-            
-            for pos in dex_positions:
-                token = pos.get("token")
-                token_address = pos.get("token_address")
-                
-                if not token_address:
-                    print(f"  [DEX] {token}: SKIPPED (no token_address in position)")
-                    continue
-                
+        except ImportError as e:
+            print(f"[POSITION MONITOR] Birdeye client not available: {e}")
+            get_token_overview = None
+
+        for pos in dex_positions:
+            token = pos.get("token")
+            token_address = pos.get("token_address")
+
+            if not token_address:
+                print(f"  [DEX] {token}: SKIPPED (no token_address in position)")
+                continue
+
+            dex_price = (dex_prices.get(token_address) or {}).get("price")
+            if not dex_price and get_token_overview is not None:
                 try:
                     overview = get_token_overview(token_address)
                     if overview and overview.get("price"):
                         dex_price = float(overview["price"])
-                        # Store under the most reliable key(s).
-                        # v3.1 positions often have no symbol; token_address is always present.
-                        symbol_key = pos.get("symbol") or pos.get("token_address") or token
-                        if symbol_key:
-                            price_cache[symbol_key] = dex_price
-                        # Also store under token_address explicitly (prevents cache-miss during lookup)
-                        if pos.get("token_address"):
-                            price_cache[pos["token_address"]] = dex_price
-                        print(f"  [DEX] {token}: ${dex_price}")
                 except Exception as e:
                     print(f"  [DEX] Price fetch failed for {token}: {e}")
-        except ImportError as e:
-            print(f"[POSITION MONITOR] Birdeye client not available: {e}")
-    
+            if dex_price:
+                # Store under the most reliable key(s).
+                # v3.1 positions often have no symbol; token_address is always present.
+                symbol_key = pos.get("symbol") or token_address or token
+                fresh = {"price": dex_price, "source": "dex", "timestamp": now_utc().isoformat()}
+                if symbol_key:
+                    price_cache[symbol_key] = fresh
+                # Also store under token_address explicitly (prevents cache-miss during lookup)
+                price_cache[token_address] = fresh
+                print(f"  [DEX] {token}: ${dex_price}")
+
     for position in open_positions:
         # Handle both legacy (symbol/token) and v3.1 (token_address) formats
         symbol = position.get("symbol") or position.get("token_address", "UNKNOWN")
@@ -1041,15 +1081,17 @@ def run_monitor():
         entry = position["entry_price"]
 
         # Price lookup: try symbol directly, then SYMBOL+USDT for CEX positions
-        current_price = price_cache.get(symbol)
+        # (values are bare floats or {"price", "source", ...} entries from ws_manager / dex_price_poller)
+        current_price = _cached_price(price_cache, symbol, price_history)
         if current_price is None and position.get("exchange") in ("binance", "mexc"):
-            current_price = price_cache.get(symbol + "USDT")
+            current_price = _cached_price(price_cache, symbol + "USDT", price_history)
         if current_price is None:
             # Also try token name + USDT (e.g. BTC → BTCUSDT)
-            current_price = price_cache.get(token + "USDT") if token != symbol else None
+            current_price = _cached_price(price_cache, token + "USDT", price_history) if token != symbol else None
 
         if current_price is None:
-            print(f"  [{token}] WARNING: No price in cache for {symbol} — skipping")
+            print(f"  [{token}] WARNING: No fresh price (<{PRICE_MAX_AGE_MIN}min) in cache for {symbol} — "
+                  f"skipping exits for safety")
             continue
 
         # Update current price in position
@@ -1069,7 +1111,8 @@ def run_monitor():
         # ── Exit Condition F: Flash Crash Override ──
         if flash_close_all_meme and position.get("strategy_name", "") in ("meme-momentum", "early-launch"):
             pnl = close_position(position, current_price, "FLASH_CRASH",
-                                 f"Flash crash detected — closing all meme positions")
+                                 f"Flash crash detected — closing all meme positions",
+                                 deferred_learning=flash_learning)
             closed_pnls.append(pnl)
             continue
 
@@ -1153,6 +1196,15 @@ def run_monitor():
             closed_pnls.append(pnl)
             continue
 
+    if flash_learning:
+        try:
+            import learning_loop
+            learned = learning_loop.process_closed_batch(flash_learning)
+            print(f"  Learning Loop: {len(learned)}/{len(flash_learning)} flash-crash closes learned in one batch")
+        except Exception as e:
+            # Non-blocking: cron fallback will process PENDING positions
+            print(f"  Learning Loop: flash-crash batch deferred to cron ({e})")
+
     # ── Save state ──
     # NOTE: Positions are auto-synced to JSON by state_store.sync_json_cache()
     # Only save if state_store not available (backward compat)
@@ -1170,4 +1222,6 @@ def run_monitor():
 
 
 if __name__ == "__main__":
-    run_monitor()
+    from sampling_profiler import profile as _profile  # opt-in: SANAD_PROFILE=1
+    with _profile("position_monitor"):
+        run_monitor()
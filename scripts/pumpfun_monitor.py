@@ -4,21 +4,31 @@ Pump.fun Monitor — Sprint 3.8.1
 Uses PumpPortal WebSocket for real-time new token detection.
 
 Connects to wss://pumpportal.fun/api/data
-Subscribes to: subscribeNewToken, subscribeMigration
+Subscribes to: subscribeNewToken, subscribeMigration, and subscribeTokenTrade
+for each new (non-bot) token during its early window.
 
 Signal generation:
-- New token created → log + filter
-- Token migrates (graduates bonding curve to Raydium) → HIGH priority signal
-- Filters: skip obvious bots, require minimum social signals
+- New token created → in-memory lifecycle + filter
+- Early trades → buys/sells, unique buyers, creator dumps, bonding-curve progress
+- Token migrates (graduates bonding curve to Raydium) → HIGH priority signal,
+  handed straight to signal_router through the state_store router inbox
+- Filters: skip obvious bots (name patterns) plus rolling creator-reputation
+  tables (serial launchers, early dumpers, symbol spam)
+
+No I/O per message: lifecycles, creator reputation and counters live in
+memory; state and a compact lifecycle snapshot are written every
+SNAPSHOT_INTERVAL_S and restored on start.
 
 Runs as persistent daemon (not cron). Start with: python3 pumpfun_monitor.py &
 Or for a single snapshot scan: python3 pumpfun_monitor.py --snapshot
+Benchmark (replayed launch/trade stream): python3 pumpfun_monitor.py --bench [N]
 """
 import asyncio
 import json
 import os
 import sys
 import time
+from collections import OrderedDict, deque
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
@@ -26,12 +36,41 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
 SIGNALS_DIR = BASE_DIR / "signals" / "pumpfun"
 STATE_PATH = BASE_DIR / "state" / "pumpfun_monitor_state.json"
+SNAPSHOT_PATH = BASE_DIR / "state" / "pumpfun_lifecycle.json"
 LOGS_DIR = BASE_DIR / "execution-logs"
 
+sys.path.insert(0, str(SCRIPT_DIR))
+
 WS_URI = "wss://pumpportal.fun/api/data"
 RECONNECT_DELAY = 5
 MAX_RECONNECT_DELAY = 60
-MAX_TOKENS_PER_HOUR = 50  # Don't flood signals
+SNAPSHOT_INTERVAL_S = 60
+
+# Lifecycle tracking
+EARLY_WINDOW_S = 300              # trades subscribed / scored for the first 5 min
+LIFECYCLE_TTL_S = 6 * 3600        # idle lifecycles expire (creator outcome: abandoned)
+MAX_TRACKED_MINTS = 20_000
+MAX_EARLY_BUYERS = 1_000
+MAX_TRADE_SUBSCRIPTIONS = 500     # concurrent subscribeTokenTrade keys
+SUB_BATCH = 50
+SUB_FLUSH_S = 1.0
+
+# Bonding curve: 1.073B virtual tokens at launch, 793.1M sold → graduation
+CURVE_START_TOKENS = 1_073_000_000
+CURVE_SELLABLE_TOKENS = 793_100_000
+
+# Creator reputation (rolling)
+CREATOR_WINDOW_S = 24 * 3600
+MAX_TRACKED_CREATORS = 50_000
+CREATOR_HISTORY = 64              # per-outcome timestamps kept per creator
+SERIAL_LAUNCHES = 5               # launches per window with no migration → bot
+DUMP_LIMIT = 2                    # early creator sells per window → bot
+SYMBOL_WINDOW_S = 600
+SYMBOL_SPAM = 3                   # same symbol launched this often per window → bot
+MAX_TRACKED_SYMBOLS = 20_000
+
+MIGRATION_SCORE = 65              # Moderate — needs Sanad verification
+FLAGGED_CREATOR_SCORE = 50
 
 
 def _log(msg):
@@ -58,118 +97,403 @@ def _load_json(path, default=None):
         return default
 
 
-def _save_json(path, data):
+def _save_json(path, data, indent=2):
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp = path.with_suffix(".tmp")
     with open(tmp, "w") as f:
-        json.dump(data, f, indent=2, default=str)
+        json.dump(data, f, indent=indent, default=str, separators=None if indent else (",", ":"))
     os.replace(tmp, path)
 
 
-class PumpFunMonitor:
-    def __init__(self):
-        self.state = _load_json(STATE_PATH, {
-            "started_at": None,
-            "total_tokens_seen": 0,
-            "total_migrations": 0,
-            "total_signals": 0,
-            "tokens_this_hour": 0,
-            "hour_start": None,
-            "last_event": None,
-        })
-        self.reconnect_delay = RECONNECT_DELAY
-        self.running = True
+def _num(v) -> float:
+    try:
+        return float(v or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+BOT_PATTERNS = (
+    "test", "aaa", "bbb", "xxx", "zzz", "asdf",
+    "rugpull", "scam", "honeypot", "drainer",
+)
+
+
+def _name_bot_reason(data: dict) -> str | None:
+    """Token-in-isolation checks: obvious bot names / symbols."""
+    name = (data.get("name") or "").lower()
+    symbol = (data.get("symbol") or "").lower()
+    for p in BOT_PATTERNS:
+        if p in name or p in symbol:
+            return f"pattern:{p}"
+    # Single character symbols
+    if len(symbol) <= 1:
+        return "short_symbol"
+    return None
+
+
+# ─────────────────────────────────────────────────────────
+# Lifecycle tracking
+# ─────────────────────────────────────────────────────────
+
+class TokenLifecycle:
+    """One mint from creation through early trades and bonding curve to migration."""
+    __slots__ = ("mint", "symbol", "name", "creator", "created_at", "initial_buy_sol", "early_buys",
+                 "early_sells", "early_buy_sol", "early_sell_sol", "unique_buyers", "buyers", "trades",
+                 "creator_sold_sol", "progress", "peak_progress", "mcap_sol", "last_activity",
+                 "migrated_at", "pool", "bot_reason")
+    FIELDS = tuple(f for f in __slots__ if f != "buyers")  # snapshot row layout (buyer set not persisted)
+
+    def __init__(self, mint, symbol="", name="", creator="", created_at=None, initial_buy_sol=0.0):
+        self.mint = mint
+        self.symbol = symbol
+        self.name = name
+        self.creator = creator
+        self.created_at = created_at      # None: first seen after creation (monitor restart)
+        self.initial_buy_sol = initial_buy_sol
+        self.early_buys = self.early_sells = 0
+        self.early_buy_sol = self.early_sell_sol = 0.0
+        self.unique_buyers = 0
+        self.buyers = set() if created_at is not None else None  # dropped once the early window closes
+        self.trades = 0
+        self.creator_sold_sol = 0.0
+        self.progress = self.peak_progress = 0.0
+        self.mcap_sol = 0.0
+        self.last_activity = created_at or 0.0
+        self.migrated_at = None
+        self.pool = ""
+        self.bot_reason = None
+
+    def stage(self) -> str:
+        if self.migrated_at is not None:
+            return "migrated"
+        return "bonding" if self.trades else "created"
+
+    def summary(self, now: float) -> dict:
+        return {
+            "stage": self.stage(),
+            "age_s": round(now - self.created_at) if self.created_at is not None else None,
+            "initial_buy_sol": self.initial_buy_sol,
+            "early_buys": self.early_buys,
+            "early_sells": self.early_sells,
+            "early_buy_sol": round(self.early_buy_sol, 4),
+            "early_sell_sol": round(self.early_sell_sol, 4),
+            "early_unique_buyers": self.unique_buyers,
+            "trades": self.trades,
+            "creator_sold_sol": round(self.creator_sold_sol, 4),
+            "curve_progress": round(self.progress, 4),
+            "peak_curve_progress": round(self.peak_progress, 4),
+            "market_cap_sol": round(self.mcap_sol, 2),
+        }
 
-    def _reset_hourly_counter(self):
-        now = _now()
-        hour_start = self.state.get("hour_start")
-        if hour_start:
-            try:
-                start_dt = datetime.fromisoformat(hour_start)
-                if (now - start_dt).total_seconds() >= 3600:
-                    self.state["tokens_this_hour"] = 0
-                    self.state["hour_start"] = now.isoformat()
-            except (ValueError, TypeError):
-                self.state["hour_start"] = now.isoformat()
-                self.state["tokens_this_hour"] = 0
-        else:
-            self.state["hour_start"] = now.isoformat()
+    def to_row(self) -> list:
+        return [getattr(self, f) for f in self.FIELDS]
 
-    def _is_likely_bot(self, data: dict) -> bool:
-        """Basic bot detection — skip obvious bot-created tokens."""
-        name = (data.get("name") or "").lower()
-        symbol = (data.get("symbol") or "").lower()
-
-        # Common bot patterns
-        bot_patterns = [
-            "test", "aaa", "bbb", "xxx", "zzz", "asdf",
-            "rugpull", "scam", "honeypot", "drainer",
-        ]
-        for p in bot_patterns:
-            if p in name or p in symbol:
-                return True
-
-        # Single character symbols
-        if len(symbol) <= 1:
-            return True
+    @classmethod
+    def from_row(cls, row, now) -> "TokenLifecycle":
+        lc = cls(row[0])
+        for f, v in zip(cls.FIELDS, row):
+            setattr(lc, f, v)
+        if lc.created_at is not None and now - lc.created_at <= EARLY_WINDOW_S:
+            lc.buyers = set()  # identities are not persisted; counting resumes from unique_buyers
+        return lc
 
-        return False
 
-    def _process_new_token(self, data: dict):
-        """Process a new token creation event."""
-        self._reset_hourly_counter()
+class CreatorStats:
+    """Rolling (CREATOR_WINDOW_S) launch outcomes for one creator wallet."""
+    __slots__ = ("launches", "dumps", "migrations", "abandoned", "last_seen")
 
+    def __init__(self):
+        self.launches = deque(maxlen=CREATOR_HISTORY)
+        self.dumps = deque(maxlen=CREATOR_HISTORY)
+        self.migrations = deque(maxlen=CREATOR_HISTORY)
+        self.abandoned = deque(maxlen=CREATOR_HISTORY)
+        self.last_seen = 0.0
+
+    def _prune(self, now):
+        cutoff = now - CREATOR_WINDOW_S
+        for d in (self.launches, self.dumps, self.migrations, self.abandoned):
+            while d and d[0] < cutoff:
+                d.popleft()
+
+    def reputation(self, now) -> dict:
+        self._prune(now)
+        return {"launches": len(self.launches), "dumps": len(self.dumps),
+                "migrations": len(self.migrations), "abandoned": len(self.abandoned)}
+
+    def bot_reason(self, now) -> str | None:
+        self._prune(now)
+        if len(self.dumps) >= DUMP_LIMIT:
+            return "creator_dumps"
+        if len(self.launches) >= SERIAL_LAUNCHES and not self.migrations:
+            return "serial_launcher"
+        return None
+
+    def to_row(self) -> list:
+        return [list(self.launches), list(self.dumps), list(self.migrations), list(self.abandoned), self.last_seen]
+
+    @classmethod
+    def from_row(cls, row) -> "CreatorStats":
+        cs = cls()
+        for d, values in zip((cs.launches, cs.dumps, cs.migrations, cs.abandoned), row[:4]):
+            d.extend(values)
+        cs.last_seen = row[4]
+        return cs
+
+
+class LifecycleTracker:
+    """In-memory lifecycles per mint plus rolling creator / symbol reputation tables.
+
+    Every update is O(1) amortized. Memory is bounded: lifecycles are ordered by
+    last activity and expire after LIFECYCLE_TTL_S (or beyond MAX_TRACKED_MINTS),
+    creators / symbols are LRU-capped, per-creator history is a bounded deque.
+    """
+
+    def __init__(self):
+        self.mints = OrderedDict()     # mint → TokenLifecycle, least recently active first
+        self.creators = OrderedDict()  # creator → CreatorStats
+        self.symbols = OrderedDict()   # symbol → deque of launch times
+
+    def _creator(self, creator, now) -> CreatorStats:
+        cs = self.creators.get(creator)
+        if cs is None:
+            cs = self.creators[creator] = CreatorStats()
+            if len(self.creators) > MAX_TRACKED_CREATORS:
+                self.creators.popitem(last=False)
+        else:
+            self.creators.move_to_end(creator)
+        cs.last_seen = now
+        return cs
+
+    def _symbol_launch(self, symbol, now) -> int:
+        launches = self.symbols.get(symbol)
+        if launches is None:
+            launches = self.symbols[symbol] = deque(maxlen=SYMBOL_SPAM * 4)
+            if len(self.symbols) > MAX_TRACKED_SYMBOLS:
+                self.symbols.popitem(last=False)
+        else:
+            self.symbols.move_to_end(symbol)
+        launches.append(now)
+        while launches[0] < now - SYMBOL_WINDOW_S:
+            launches.popleft()
+        return len(launches)
+
+    def _track(self, lc: TokenLifecycle):
+        self.mints[lc.mint] = lc
+        self.mints.move_to_end(lc.mint)
+        if len(self.mints) > MAX_TRACKED_MINTS:
+            self._retire(self.mints.popitem(last=False)[1])
+
+    def _retire(self, lc: TokenLifecycle):
+        if lc.migrated_at is None and lc.creator and lc.creator in self.creators:
+            self.creators[lc.creator].abandoned.append(lc.last_activity)
+
+    def creator_reputation(self, creator, now) -> dict | None:
+        cs = self.creators.get(creator)
+        return cs.reputation(now) if cs is not None else None
+
+    def on_create(self, data: dict, now: float) -> TokenLifecycle:
         mint = data.get("mint", "")
-        name = data.get("name", "unknown")
+        creator = data.get("traderPublicKey", "")
         symbol = data.get("symbol", "???")
-        uri = data.get("uri", "")
+        lc = TokenLifecycle(mint, symbol, data.get("name", "unknown"), creator, now,
+                            _num(data.get("solAmount")))
+        self._update_curve(lc, data)
+        reason = _name_bot_reason(data)
+        if creator:
+            cs = self._creator(creator, now)
+            cs.launches.append(now)
+            reason = reason or cs.bot_reason(now)
+        if self._symbol_launch(symbol.lower(), now) >= SYMBOL_SPAM:
+            reason = reason or "symbol_spam"
+        lc.bot_reason = reason
+        self._track(lc)
+        return lc
+
+    @staticmethod
+    def _update_curve(lc, data):
+        v_tokens = data.get("vTokensInBondingCurve")
+        if v_tokens is not None:
+            progress = (CURVE_START_TOKENS - _num(v_tokens)) / CURVE_SELLABLE_TOKENS
+            lc.progress = min(max(progress, 0.0), 1.0)
+            if lc.progress > lc.peak_progress:
+                lc.peak_progress = lc.progress
+        mcap = data.get("marketCapSol")
+        if mcap is not None:
+            lc.mcap_sol = _num(mcap)
+
+    def on_trade(self, data: dict, now: float) -> TokenLifecycle | None:
+        lc = self.mints.get(data.get("mint", ""))
+        if lc is None:
+            return None
+        self.mints.move_to_end(lc.mint)
+        lc.trades += 1
+        lc.last_activity = now
+        self._update_curve(lc, data)
+        sol = _num(data.get("solAmount"))
+        trader = data.get("traderPublicKey", "")
+        buy = data.get("txType") == "buy"
+        if lc.created_at is None or now - lc.created_at > EARLY_WINDOW_S:
+            lc.buyers = None
+            return lc
+        if buy:
+            lc.early_buys += 1
+            lc.early_buy_sol += sol
+            if lc.buyers is not None and trader and trader not in lc.buyers and len(lc.buyers) < MAX_EARLY_BUYERS:
+                lc.buyers.add(trader)
+                lc.unique_buyers += 1
+        else:
+            lc.early_sells += 1
+            lc.early_sell_sol += sol
+            if trader and trader == lc.creator:
+                if not lc.creator_sold_sol:
+                    self._creator(lc.creator, now).dumps.append(now)
+                lc.creator_sold_sol += sol
+        return lc
+
+    def on_migration(self, data: dict, now: float) -> TokenLifecycle:
+        mint = data.get("mint", "")
+        lc = self.mints.get(mint)
+        if lc is None:  # created before this monitor started
+            lc = TokenLifecycle(mint, data.get("symbol", "???"), data.get("name", data.get("symbol", "unknown")))
+            self._track(lc)
+        else:
+            self.mints.move_to_end(mint)
+        if lc.migrated_at is None and lc.creator:
+            self._creator(lc.creator, now).migrations.append(now)
+        lc.migrated_at = now
+        lc.last_activity = now
+        lc.pool = data.get("pool", "") or lc.pool
+        lc.progress = lc.peak_progress = 1.0
+        lc.buyers = None
+        return lc
+
+    def expire(self, now: float) -> int:
+        """Drop lifecycles idle for LIFECYCLE_TTL_S (front of the activity order)."""
+        n = 0
+        cutoff = now - LIFECYCLE_TTL_S
+        while self.mints:
+            lc = next(iter(self.mints.values()))
+            if lc.last_activity >= cutoff:
+                break
+            self.mints.popitem(last=False)
+            self._retire(lc)
+            n += 1
+        return n
+
+    def snapshot(self) -> dict:
+        """Compact form: fixed field order, one row per mint / creator."""
+        return {
+            "v": 1,
+            "fields": list(TokenLifecycle.FIELDS),
+            "mints": [lc.to_row() for lc in self.mints.values()],
+            "creators": {c: cs.to_row() for c, cs in self.creators.items()},
+            "symbols": {s: list(d) for s, d in self.symbols.items()},
+        }
 
-        self.state["total_tokens_seen"] = self.state.get("total_tokens_seen", 0) + 1
+    def restore(self, snap: dict, now: float) -> int:
+        if not snap or snap.get("v") != 1 or snap.get("fields") != list(TokenLifecycle.FIELDS):
+            return 0
+        for row in snap.get("mints", []):
+            lc = TokenLifecycle.from_row(row, now)
+            self.mints[lc.mint] = lc
+        for c, row in snap.get("creators", {}).items():
+            self.creators[c] = CreatorStats.from_row(row)
+        for sym, times in snap.get("symbols", {}).items():
+            self.symbols[sym] = deque(times, maxlen=SYMBOL_SPAM * 4)
+        self.expire(now)
+        return len(self.mints)
 
-        # Bot filter
-        if self._is_likely_bot(data):
-            return
 
-        # Rate limit signals
-        if self.state.get("tokens_this_hour", 0) >= MAX_TOKENS_PER_HOUR:
-            return
+# ─────────────────────────────────────────────────────────
+# Monitor
+# ─────────────────────────────────────────────────────────
 
-        self.state["tokens_this_hour"] = self.state.get("tokens_this_hour", 0) + 1
-        self.state["last_event"] = _now().isoformat()
+class PumpFunMonitor:
+    def __init__(self, state_path=None, snapshot_path=None, db_path=None):
+        self.state_path = Path(state_path or STATE_PATH)
+        self.snapshot_path = Path(snapshot_path or SNAPSHOT_PATH)
+        self.db_path = db_path
+        self.state = _load_json(self.state_path, None) or {}
+        for k in ("total_tokens_seen", "total_migrations", "total_signals", "total_trades", "bots_filtered"):
+            self.state.setdefault(k, 0)
+        self.state.setdefault("started_at", None)
+        self.state.setdefault("last_event", None)
+        self.tracker = LifecycleTracker()
+        restored = self.tracker.restore(_load_json(self.snapshot_path, {}), time.time())
+        if restored:
+            _log(f"Restored {restored} lifecycles, {len(self.tracker.creators)} creators")
+        self.subscribed = set()
+        self._pending_subs = []
+        self._pending_unsubs = []
+        self._unsub_due = deque()  # (deadline, mint), deadlines ascending
+        self._last_flush = time.monotonic()
+        self._last_snapshot = time.monotonic()
+        self._last_event_ts = None
+        self.reconnect_delay = RECONNECT_DELAY
+        self.running = True
 
-        # Log but don't signal yet — new tokens are too risky without more data
-        # They go to a "watched" list for bonding curve monitoring
-        _log(f"  NEW: {symbol} ({name}) mint={mint[:12]}...")
+    def _is_likely_bot(self, data: dict) -> bool:
+        """Bot detection: name patterns plus rolling creator / symbol reputation."""
+        if _name_bot_reason(data):
+            return True
+        creator = data.get("traderPublicKey", "")
+        cs = self.tracker.creators.get(creator) if creator else None
+        return bool(cs and cs.bot_reason(time.time()))
 
-        # Save to watched tokens for potential follow-up
-        watched_path = BASE_DIR / "state" / "pumpfun_watched.jsonl"
+    def handle_message(self, message, now: float | None = None):
+        """Route one PumpPortal message; in-memory only."""
         try:
-            with open(watched_path, "a") as f:
-                f.write(json.dumps({
-                    "mint": mint,
-                    "name": name,
-                    "symbol": symbol,
-                    "uri": uri,
-                    "seen_at": _now().isoformat(),
-                    "creator": data.get("traderPublicKey", ""),
-                    "initial_buy_sol": data.get("initialBuy", 0),
-                    "market_cap_sol": data.get("marketCapSol", 0),
-                }, default=str) + "\n")
-        except Exception as e:
-            _log(f"  Error logging watched token: {e}")
-
-    def _process_migration(self, data: dict):
+            data = json.loads(message) if isinstance(message, (str, bytes)) else message
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        now = time.time() if now is None else now
+        tx_type = data.get("txType", "")
+        if tx_type == "create":
+            return self._process_new_token(data, now)
+        if tx_type in ("buy", "sell"):
+            return self._process_trade(data, now)
+        if tx_type in ("migration", "migrate") or "migration" in str(data.get("method", "")):
+            return self._process_migration(data, now)
+        return None
+
+    def _process_new_token(self, data: dict, now: float | None = None):
+        """Process a new token creation event."""
+        now = time.time() if now is None else now
+        self.state["total_tokens_seen"] += 1
+        lc = self.tracker.on_create(data, now)
+        if lc.bot_reason:
+            self.state["bots_filtered"] += 1
+            return lc
+        self._last_event_ts = now
+        # New tokens are too risky to signal; follow their early trades instead
+        if lc.mint and len(self.subscribed) + len(self._pending_subs) < MAX_TRADE_SUBSCRIPTIONS:
+            self._pending_subs.append(lc.mint)
+            self._unsub_due.append((now + EARLY_WINDOW_S, lc.mint))
+        return lc
+
+    def _process_trade(self, data: dict, now: float | None = None):
+        self.state["total_trades"] += 1
+        return self.tracker.on_trade(data, time.time() if now is None else now)
+
+    def _process_migration(self, data: dict, now: float | None = None) -> dict:
         """Process a token migration (bonding curve graduation) event."""
-        mint = data.get("mint", "")
-        name = data.get("name", data.get("symbol", "unknown"))
-        symbol = data.get("symbol", "???")
-        pool = data.get("pool", "")
-
-        self.state["total_migrations"] = self.state.get("total_migrations", 0) + 1
+        now = time.time() if now is None else now
+        lc = self.tracker.on_migration(data, now)
+        mint = lc.mint
+        symbol = data.get("symbol") or lc.symbol or "???"
+        name = data.get("name") or lc.name or symbol
+        pool = lc.pool
+
+        self.state["total_migrations"] += 1
+        self._last_event_ts = now
         _log(f"  MIGRATION: {symbol} ({name}) graduated to {pool or 'Raydium'}!")
 
         # THIS is a signal — token survived bonding curve, now has real liquidity
-        now = _now()
+        creator_rep = self.tracker.creator_reputation(lc.creator, now) if lc.creator else None
+        flagged = lc.bot_reason or (self.tracker.creators[lc.creator].bot_reason(now)
+                                    if lc.creator in self.tracker.creators else None)
         signal = {
             "token": symbol,
             "mint": mint,
@@ -180,25 +504,90 @@ class PumpFunMonitor:
                 f"This means sufficient buying pressure pushed it through the full curve. "
                 f"Now tradeable on {pool or 'Raydium'} DEX with real liquidity pool."
             ),
-            "signal_score": 65,  # Moderate — needs Sanad verification
+            "signal_score": FLAGGED_CREATOR_SCORE if flagged else MIGRATION_SCORE,
             "signal_type": "early_launch",
             "chain": "solana",
-            "timestamp": now.isoformat(),
+            "timestamp": datetime.fromtimestamp(now, timezone.utc).isoformat(),
             "raw_data": {
                 "mint": mint,
                 "pool": pool,
+                "creator": lc.creator,
+                "creator_reputation": creator_rep,
+                "creator_flag": flagged,
+                "lifecycle": lc.summary(now),
             },
         }
+        self._hand_off(signal)
+        return signal
 
-        SIGNALS_DIR.mkdir(parents=True, exist_ok=True)
-        filename = f"{now.strftime('%Y%m%d_%H%M%S')}_{symbol}_migration.json"
-        _save_json(SIGNALS_DIR / filename, signal)
-
-        self.state["total_signals"] = self.state.get("total_signals", 0) + 1
-        _log(f"  SIGNAL EMITTED: {symbol} migration")
+    def _hand_off(self, signal: dict):
+        """Give the migration to signal_router via the state_store inbox (signal file if the DB is unavailable)."""
+        try:
+            import state_store
+            state_store.add_router_signal("pumpfun", signal, db_path=self.db_path)
+        except Exception as e:
+            _log(f"  Router inbox unavailable ({e}) — writing signal file")
+            SIGNALS_DIR.mkdir(parents=True, exist_ok=True)
+            filename = f"{_now().strftime('%Y%m%d_%H%M%S')}_{signal['token']}_migration.json"
+            _save_json(SIGNALS_DIR / filename, signal)
+        self.state["total_signals"] += 1
+        _log(f"  SIGNAL EMITTED: {signal['token']} migration")
+
+    def subscription_commands(self, now: float | None = None, force: bool = False) -> list[dict]:
+        """Batched subscribeTokenTrade / unsubscribeTokenTrade messages due now."""
+        now = time.time() if now is None else now
+        while self._unsub_due and self._unsub_due[0][0] <= now:
+            mint = self._unsub_due.popleft()[1]
+            if mint in self.subscribed:
+                self.subscribed.discard(mint)
+                self._pending_unsubs.append(mint)
+            elif mint in self._pending_subs:
+                self._pending_subs.remove(mint)
+        mono = time.monotonic()
+        due = force or mono - self._last_flush >= SUB_FLUSH_S
+        cmds = []
+        if self._pending_unsubs and (due or len(self._pending_unsubs) >= SUB_BATCH):
+            cmds.append({"method": "unsubscribeTokenTrade", "keys": self._pending_unsubs})
+            self._pending_unsubs = []
+        if self._pending_subs and (due or len(self._pending_subs) >= SUB_BATCH):
+            cmds.append({"method": "subscribeTokenTrade", "keys": self._pending_subs})
+            self.subscribed.update(self._pending_subs)
+            self._pending_subs = []
+        if cmds or due:
+            self._last_flush = mono
+        return cmds
+
+    def maybe_snapshot(self, interval_s: float = SNAPSHOT_INTERVAL_S) -> bool:
+        if time.monotonic() - self._last_snapshot < interval_s:
+            return False
+        self._save_state()
+        return True
 
     def _save_state(self):
-        _save_json(STATE_PATH, self.state)
+        now = time.time()
+        expired = self.tracker.expire(now)
+        if self._last_event_ts is not None:
+            self.state["last_event"] = datetime.fromtimestamp(self._last_event_ts, timezone.utc).isoformat()
+        self.state["tracked_mints"] = len(self.tracker.mints)
+        self.state["tracked_creators"] = len(self.tracker.creators)
+        self.state["trade_subscriptions"] = len(self.subscribed)
+        _save_json(self.state_path, self.state)
+        _save_json(self.snapshot_path, self.tracker.snapshot(), indent=None)
+        self._last_snapshot = time.monotonic()
+        _log(f"  Checkpoint: {self.state['total_tokens_seen']} tokens seen, "
+             f"{self.state['bots_filtered']} bots, {self.state['total_migrations']} migrations, "
+             f"{len(self.tracker.mints)} tracked ({expired} expired)")
+
+    async def _resubscribe(self, ws):
+        await ws.send(json.dumps({"method": "subscribeNewToken"}))
+        await ws.send(json.dumps({"method": "subscribeMigration"}))
+        keys = sorted(self.subscribed)
+        for i in range(0, len(keys), SUB_BATCH):
+            await ws.send(json.dumps({"method": "subscribeTokenTrade", "keys": keys[i:i + SUB_BATCH]}))
+
+    async def _flush_subscriptions(self, ws, force=False):
+        for cmd in self.subscription_commands(force=force):
+            await ws.send(json.dumps(cmd))
 
     async def connect_and_listen(self):
         """Main WebSocket loop with auto-reconnect."""
@@ -209,14 +598,9 @@ class PumpFunMonitor:
                 _log(f"Connecting to {WS_URI}...")
                 async with websockets.connect(WS_URI, ping_interval=30, ping_timeout=10) as ws:
                     _log("Connected! Subscribing...")
-
-                    # Subscribe to new tokens
-                    await ws.send(json.dumps({"method": "subscribeNewToken"}))
-                    _log("  Subscribed: subscribeNewToken")
-
-                    # Subscribe to migrations
-                    await ws.send(json.dumps({"method": "subscribeMigration"}))
-                    _log("  Subscribed: subscribeMigration")
+                    await self._resubscribe(ws)
+                    _log(f"  Subscribed: subscribeNewToken, subscribeMigration, "
+                         f"{len(self.subscribed)} token trade streams")
 
                     self.reconnect_delay = RECONNECT_DELAY  # Reset on successful connect
 
@@ -227,25 +611,11 @@ class PumpFunMonitor:
 
                     async for message in ws:
                         try:
-                            data = json.loads(message)
-                            tx_type = data.get("txType", "")
-
-                            if tx_type == "create":
-                                self._process_new_token(data)
-                            elif tx_type == "migration" or "migration" in str(data.get("method", "")):
-                                self._process_migration(data)
-                            # Trades on subscribed tokens would go here
-
-                            # Periodic state save
-                            total = self.state.get("total_tokens_seen", 0)
-                            if total % 100 == 0 and total > 0:
-                                self._save_state()
-                                _log(f"  Checkpoint: {total} tokens seen, {self.state.get('total_migrations', 0)} migrations, {self.state.get('total_signals', 0)} signals")
-
-                        except json.JSONDecodeError:
-                            pass
+                            self.handle_message(message)
                         except Exception as e:
                             _log(f"  Error processing message: {e}")
+                        await self._flush_subscriptions(ws)
+                        self.maybe_snapshot()
 
             except Exception as e:
                 _log(f"WebSocket error: {e}")
@@ -261,38 +631,30 @@ class PumpFunMonitor:
         _log(f"Snapshot mode: listening for {duration_s}s...")
         try:
             async with websockets.connect(WS_URI, ping_interval=30, ping_timeout=10) as ws:
-                await ws.send(json.dumps({"method": "subscribeNewToken"}))
-                await ws.send(json.dumps({"method": "subscribeMigration"}))
+                await self._resubscribe(ws)
                 _log("Subscribed. Listening...")
 
                 start = time.time()
-                count = 0
-                migrations = 0
+                seen0, migrations0 = self.state["total_tokens_seen"], self.state["total_migrations"]
+                bots0, trades0 = self.state["bots_filtered"], self.state["total_trades"]
 
                 while time.time() - start < duration_s:
                     try:
                         message = await asyncio.wait_for(ws.recv(), timeout=5)
-                        data = json.loads(message)
-                        tx_type = data.get("txType", "")
-
-                        if tx_type == "create":
-                            count += 1
-                            name = data.get("name", "?")
-                            symbol = data.get("symbol", "?")
-                            mint = data.get("mint", "?")[:12]
-                            mcap = data.get("marketCapSol", 0)
-                            if not self._is_likely_bot(data):
-                                _log(f"  NEW: {symbol} ({name}) mcap={mcap:.1f}SOL mint={mint}...")
-                        elif tx_type == "migration":
-                            migrations += 1
-                            self._process_migration(data)
+                        lc = self.handle_message(message)
+                        if isinstance(lc, TokenLifecycle) and lc.trades == 0 and not lc.bot_reason:
+                            _log(f"  NEW: {lc.symbol} ({lc.name}) mcap={lc.mcap_sol:.1f}SOL mint={lc.mint[:12]}...")
+                        await self._flush_subscriptions(ws)
                     except asyncio.TimeoutError:
                         continue
                     except Exception as e:
                         _log(f"  Error: {e}")
 
                 elapsed = time.time() - start
-                _log(f"Snapshot done: {count} tokens, {migrations} migrations in {elapsed:.0f}s")
+                count = self.state["total_tokens_seen"] - seen0
+                migrations = self.state["total_migrations"] - migrations0
+                _log(f"Snapshot done: {count} tokens ({self.state['bots_filtered'] - bots0} bots), "
+                     f"{self.state['total_trades'] - trades0} trades, {migrations} migrations in {elapsed:.0f}s")
                 self._save_state()
                 return {"tokens": count, "migrations": migrations, "duration_s": round(elapsed)}
 
@@ -301,6 +663,77 @@ class PumpFunMonitor:
             return {"error": str(e)}
 
 
+# ─────────────────────────────────────────────────────────
+# Benchmark
+# ─────────────────────────────────────────────────────────
+
+def _synthetic_stream(n: int, start_ts: float | None = None) -> list[tuple[float, str]]:
+    """Deterministic (ts, message) mix: ~4% launches, ~96% trades on recent mints, rare migrations.
+    ~200 msgs/s of market time, ending now unless `start_ts` is given."""
+    import random
+    rng = random.Random(11)
+    words = ["MOON", "PEPE", "DOGE", "CAT", "WIF", "BONK", "FROG", "APE", "SEND", "GIGA"]
+    creators = [f"Creator{i:036d}" for i in range(3_000)]
+    traders = [f"Trader{i:037d}" for i in range(20_000)]
+    live, out = [], []
+    ts = start_ts if start_ts is not None else time.time() - n / 200.0
+    for i in range(n):
+        ts += rng.expovariate(200.0)  # ~200 msgs/s of market time
+        roll = rng.random()
+        if roll < 0.04 or not live:
+            mint = f"{i:040d}pump"
+            creator = rng.choice(creators)
+            live.append((mint, creator))
+            if len(live) > 400:
+                live.pop(0)
+            msg = {"signature": f"c{i}", "mint": mint, "traderPublicKey": creator, "txType": "create",
+                   "initialBuy": 3e7, "solAmount": 1.0, "bondingCurveKey": f"bc{i}",
+                   "vTokensInBondingCurve": 1.04e9, "vSolInBondingCurve": 31.0, "marketCapSol": 29.8,
+                   "name": f"{rng.choice(words).title()} {i}",
+                   "symbol": "T" if rng.random() < 0.05 else f"{rng.choice(words)}{rng.randrange(10_000)}",
+                   "uri": "ipfs://x", "pool": "pump"}
+        elif roll < 0.9995:
+            mint, creator = live[len(live) - 1 - int(rng.random() ** 2 * len(live))]  # newest busiest
+            buy = rng.random() < 0.6
+            trader = creator if rng.random() < 0.01 else rng.choice(traders)
+            msg = {"signature": f"t{i}", "mint": mint, "traderPublicKey": trader,
+                   "txType": "buy" if buy else "sell", "tokenAmount": rng.uniform(1e5, 5e7),
+                   "solAmount": rng.uniform(0.01, 3.0), "bondingCurveKey": "bc",
+                   "vTokensInBondingCurve": rng.uniform(2.8e8, 1.07e9), "vSolInBondingCurve": 40.0,
+                   "marketCapSol": rng.uniform(28, 400), "pool": "pump"}
+        else:
+            mint, _ = rng.choice(live)
+            msg = {"signature": f"m{i}", "mint": mint, "txType": "migrate", "pool": "pump-amm"}
+        out.append((ts, json.dumps(msg)))
+    return out
+
+
+def _bench(n: int = 100_000) -> dict:
+    """Replay n messages through a fresh monitor (state, snapshots and router inbox in a temp dir)."""
+    import tempfile
+    import state_store
+    stream = _synthetic_stream(n)
+    with tempfile.TemporaryDirectory(prefix="pumpfun_bench_") as td:
+        td = Path(td)
+        state_store.init_db(td / "sanad_trader.db")
+        mon = PumpFunMonitor(td / "state.json", td / "lifecycle.json", db_path=td / "sanad_trader.db")
+        import contextlib
+        import io
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            for ts, message in stream:
+                mon.handle_message(message, now=ts)
+                mon.subscription_commands(now=ts)
+                mon.maybe_snapshot(interval_s=0.5)
+            mon._save_state()
+            elapsed = time.perf_counter() - t0
+        snap_kb = (td / "lifecycle.json").stat().st_size / 1024
+    return {"messages": n, "seconds": elapsed, "rate": n / elapsed if elapsed else 0.0,
+            "tokens": mon.state["total_tokens_seen"], "bots": mon.state["bots_filtered"],
+            "migrations": mon.state["total_migrations"], "tracked": len(mon.tracker.mints),
+            "snapshot_kb": snap_kb}
+
+
 async def main():
     monitor = PumpFunMonitor()
 
@@ -321,4 +754,11 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if "--bench" in sys.argv:
+        rest = sys.argv[sys.argv.index("--bench") + 1:]
+        r = _bench(int(rest[0]) if rest and rest[0].isdigit() else 100_000)
+        print(f"{r['messages']} messages in {r['seconds'] * 1000:.0f} ms ({r['rate']:,.0f}/s) — "
+              f"{r['tokens']} launches ({r['bots']} bots), {r['migrations']} migrations, "
+              f"{r['tracked']} tracked, snapshot {r['snapshot_kb']:.0f} KB")
+    else:
+        asyncio.run(main())
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader v3.1 — Cross-Process Token-Bucket Rate Limiter
+
+The API clients used to keep a per-module list of call timestamps. That only
+bounds one process: the router, the pipeline and the scanner crons each had
+the full provider budget, together overran it, got 429s and then slept 60 s
+inside the request path.
+
+  - One token bucket per provider (capacity = calls, refill = calls / per_s),
+    stored as 24 bytes in state/ratelimit/<provider>.bucket (struct_file) and
+    updated under fcntl.flock, so every process draws from the same budget.
+  - Priority classes: a class may not draw the bucket below its RESERVE
+    fraction of capacity. Background scans leave headroom that hot-path
+    decision lookups can always use; at steady state background still gets
+    the full refill rate when nothing hotter is asking.
+  - Non-blocking core: try_acquire() returns 0.0 or the seconds until a token
+    is available for that class. acquire() sleeps only if the wait fits the
+    caller's budget (MAX_WAIT_S per class — hot fails fast), acquire_async()
+    is the asyncio equivalent, limit() raises RateLimited instead of stalling.
+  - penalize() on a 429 empties the bucket and blocks it for Retry-After in
+    every process, not just the one that got the 429.
+
+If the state file cannot be opened the bucket degrades to in-process state
+(warned once).
+
+Priority is taken from the caller's context:
+  with rate_limiter.priority("hot"): ...      # router / decision lookups
+  rate_limiter.set_process_priority("background")   # scanner crons
+  SANAD_RATE_PRIORITY=background                    # same, from the environment
+
+Client usage:
+  _bucket = rate_limiter.bucket("birdeye", MAX_CALLS_PER_MINUTE, 60)
+  def _rate_limit():
+      _bucket.limit()
+
+CLI:
+  python3 scripts/rate_limiter.py        # current level of every shared bucket
+"""
+
+import contextvars
+import os
+import struct
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
+STATE_DIR = BASE_DIR / "state" / "ratelimit"
+
+sys.path.insert(0, str(SCRIPT_DIR))
+from struct_file import StructFile
+
+PRIORITIES = ("hot", "normal", "background")
+RESERVE = {"hot": 0.0, "normal": 0.2, "background": 0.5}     # capacity fraction a class may not use
+MAX_WAIT_S = {"hot": 2.0, "normal": 30.0, "background": None}  # None → wait as long as needed
+MAX_PENALTY_S = 600
+
+_STATE = struct.Struct("<ddd")  # tokens, updated_at, blocked_until (epoch s)
+_DEFAULT = object()
+
+_priority = contextvars.ContextVar("sanad_rate_priority", default=None)
+_process_priority = os.environ.get("SANAD_RATE_PRIORITY", "normal")
+_warned = set()
+
+
+def _log(msg: str):
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] [RATELIMIT] {msg}", flush=True)
+
+
+class RateLimited(RuntimeError):
+    """Provider budget exhausted for longer than the caller is willing to wait."""
+
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"{provider} rate limit: no budget, retry in {retry_in:.1f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+
+def _check_priority(p: str) -> str:
+    if p not in RESERVE:
+        raise ValueError(f"unknown priority {p!r} (expected one of {PRIORITIES})")
+    return p
+
+
+def set_process_priority(p: str):
+    """Default priority for every call in this process (scanner crons: "background")."""
+    global _process_priority
+    _process_priority = _check_priority(p)
+
+
+def current_priority() -> str:
+    return _priority.get() or _process_priority
+
+
+@contextmanager
+def priority(p: str):
+    """Run the enclosed calls at priority `p` (contextvar: per thread / task)."""
+    token = _priority.set(_check_priority(p))
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def retry_after_s(headers, default: float) -> float:
+    """Seconds from a Retry-After header (delta-seconds form), else `default`."""
+    try:
+        value = float((headers or {}).get("Retry-After"))
+    except (TypeError, ValueError):
+        value = default
+    return max(1.0, min(value, MAX_PENALTY_S))
+
+
+class TokenBucket:
+    """Token bucket for one provider, shared by every process using STATE_DIR."""
+
+    def __init__(self, provider: str, calls: float, per_s: float, state_dir: Path = None):
+        self.provider = provider
+        self.state_dir = state_dir
+        self.configure(calls, per_s)
+        self.rejected = 0
+        self.waited_s = 0.0
+        self._shared = StructFile(lambda: Path(self.state_dir or STATE_DIR) / f"{provider}.bucket", _STATE,
+                                  default=lambda now: (self.capacity, now, 0.0), on_unavailable=self._unavailable)
+
+    def configure(self, calls: float, per_s: float):
+        self.capacity = float(calls)
+        self.rate = calls / per_s
+
+    # ── shared state ──
+
+    def _unavailable(self, e: OSError):
+        if self.provider not in _warned:
+            _warned.add(self.provider)
+            _log(f"{self.provider}: shared bucket unavailable, limiting per process: {e}")
+
+    def _transact(self, fn):
+        """Apply fn(state, now) → (new_state, result) atomically across threads and processes."""
+        return self._shared.transact(fn)
+
+    def _refill(self, state, now):
+        tokens, updated, blocked = state
+        return min(self.capacity, tokens + max(0.0, now - updated) * self.rate)
+
+    # ── acquiring ──
+
+    def try_acquire(self, priority: str = None, tokens: float = 1.0) -> float:
+        """Take `tokens` if the class may; returns 0.0, else seconds until it could."""
+        floor = RESERVE[_check_priority(priority or current_priority())] * self.capacity
+        floor = min(floor, max(self.capacity - tokens, 0.0))
+
+        def take(state, now):
+            level = self._refill(state, now)
+            blocked = state[2]
+            if blocked > now:
+                return state, blocked - now
+            if level - tokens >= floor - 1e-9:
+                return (level - tokens, now, blocked), 0.0
+            return (level, now, blocked), (floor + tokens - level) / self.rate
+
+        return self._transact(take)
+
+    def _wait_plan(self, priority, timeout):
+        priority = _check_priority(priority or current_priority())
+        timeout = MAX_WAIT_S[priority] if timeout is _DEFAULT else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        return priority, deadline
+
+    def _fits(self, wait: float, deadline) -> bool:
+        if deadline is not None and time.monotonic() + wait > deadline:
+            self.rejected += 1
+            return False
+        if wait >= 1.0:
+            _log(f"{self.provider}: waiting {wait:.1f}s for budget ({current_priority()})")
+        self.waited_s += wait
+        return True
+
+    def wait(self, priority: str = None, timeout=_DEFAULT) -> float:
+        """Block until a token is taken → 0.0, or return the wait that would exceed `timeout`.
+
+        timeout defaults to MAX_WAIT_S[priority]; a wait that cannot fit is not slept at all.
+        """
+        priority, deadline = self._wait_plan(priority, timeout)
+        while True:
+            wait = self.try_acquire(priority)
+            if wait <= 0:
+                return 0.0
+            if not self._fits(wait, deadline):
+                return wait
+            time.sleep(wait)
+
+    def acquire(self, priority: str = None, timeout=_DEFAULT) -> bool:
+        """True once a token is taken; False (without sleeping) if it would exceed `timeout`."""
+        return self.wait(priority, timeout) == 0.0
+
+    async def acquire_async(self, priority: str = None, timeout=_DEFAULT) -> bool:
+        """acquire() for asyncio callers — waits with asyncio.sleep, never blocks the loop."""
+        import asyncio
+
+        priority, deadline = self._wait_plan(priority, timeout)
+        while True:
+            wait = self.try_acquire(priority)
+            if wait <= 0:
+                return True
+            if not self._fits(wait, deadline):
+                return False
+            await asyncio.sleep(wait)
+
+    def limit(self, priority: str = None, timeout=_DEFAULT):
+        """Take a token or raise RateLimited (what the clients' _rate_limit() calls)."""
+        wait = self.wait(priority, timeout)
+        if wait:
+            raise RateLimited(self.provider, wait)
+
+    # ── feedback ──
+
+    def penalize(self, seconds: float):
+        """Provider said 429: empty the bucket and block it for `seconds` in every process."""
+        def block(state, now):
+            until = max(state[2], now + seconds)
+            return (0.0, until, until), None
+
+        self._transact(block)
+        _log(f"{self.provider}: 429 — all processes backing off {seconds:.0f}s")
+
+    def level(self) -> float:
+        """Tokens available right now (no side effects beyond persisting the refill)."""
+        return self._transact(lambda state, now: (state, 0.0 if state[2] > now else self._refill(state, now)))
+
+
+# ─────────────────────────────────────────────────────────
+# Per-process registry
+# ─────────────────────────────────────────────────────────
+_buckets: dict = {}
+_buckets_lock = threading.Lock()
+
+
+def bucket(provider: str, calls: float, per_s: float) -> TokenBucket:
+    """Shared TokenBucket for `provider` (calls per per_s seconds)."""
+    with _buckets_lock:
+        b = _buckets.get(provider)
+        if b is None:
+            b = _buckets[provider] = TokenBucket(provider, calls, per_s)
+        elif (b.capacity, b.rate) != (float(calls), calls / per_s):
+            b.configure(calls, per_s)
+        return b
+
+
+def main():
+    files = sorted(STATE_DIR.glob("*.bucket")) if STATE_DIR.exists() else []
+    if not files:
+        print(f"No shared buckets in {STATE_DIR}")
+        return
+    now = time.time()
+    print(f"{'provider':<14} {'tokens':>8} {'age_s':>8} {'blocked_s':>10}  (tokens as of last update)")
+    for path in files:
+        raw = path.read_bytes()[:_STATE.size]
+        if len(raw) != _STATE.size:
+            continue
+        tokens, updated, blocked = _STATE.unpack(raw)
+        print(f"{path.stem:<14} {tokens:>8.2f} {now - updated:>8.1f} {max(0.0, blocked - now):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -29,7 +29,7 @@ from pathlib import Path
 SCRIPT_DIR = Path(__file__).resolve().parent
 sys.path.insert(0, str(SCRIPT_DIR))
 
-from state_store import DB_PATH
+from state_store import DB_PATH, bump_bandit_version
 
 BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
 BACKUP_DIR = BASE_DIR / "backups"
@@ -69,6 +69,7 @@ def truncate_stats():
     conn = sqlite3.connect(DB_PATH, timeout=5.0)
     conn.execute("DELETE FROM bandit_strategy_stats")
     conn.execute("DELETE FROM source_ucb_stats")
+    bump_bandit_version(conn)
     conn.commit()
     conn.close()
     
@@ -193,6 +194,7 @@ def replay_positions():
         )
         WHERE status = 'CLOSED' AND pnl_pct IS NOT NULL
     """)
+    bump_bandit_version(conn)
     
     conn.commit()
     conn.close()
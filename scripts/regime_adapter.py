@@ -8,7 +8,7 @@ Loads regime profiles from config/regime_profiles.yaml and applies them when reg
 Regimes: EXTREME_FEAR, BEAR_HIGH_VOL, BEAR_LOW_VOL, BULL_TREND, BULL_HIGH_VOL, SIDEWAYS
 
 Process:
-1. Load current regime from state/regime.json
+1. Load current regime from regime_classifier (genius-memory/regime-data/latest.json)
 2. Load matching profile from config/regime_profiles.yaml
 3. Write active profile to state/active_regime_profile.json
 4. Telegram notification on regime change
@@ -39,13 +39,14 @@ STATE_DIR = BASE_DIR / "state"
 
 sys.path.insert(0, str(SCRIPTS_DIR))
 
+import regime_classifier
+
 try:
     import notifier
     HAS_NOTIFIER = True
 except ImportError:
     HAS_NOTIFIER = False
 
-REGIME_FILE = BASE_DIR / "genius-memory" / "regime-data" / "latest.json"
 ACTIVE_PROFILE_FILE = STATE_DIR / "active_regime_profile.json"
 PROFILES_CONFIG = CONFIG_DIR / "regime_profiles.yaml"
 ADAPTER_STATE_FILE = STATE_DIR / "regime_adapter_state.json"
@@ -54,26 +55,13 @@ ADAPTER_STATE_FILE = STATE_DIR / "regime_adapter_state.json"
 # State Management
 # ─────────────────────────────────────────────
 
-def load_current_regime() -> str:
-    """Load current regime from state/regime.json."""
-    if not REGIME_FILE.exists():
-        print(f"⚠️  No regime.json found, defaulting to SIDEWAYS")
-        return "SIDEWAYS"
-    
-    try:
-        with open(REGIME_FILE, "r") as f:
-            data = json.load(f)
-        
-        # Handle different formats
-        if isinstance(data, dict):
-            regime = data.get("regime_tag", data.get("current_regime", data.get("regime", "SIDEWAYS")))
-        else:
-            regime = "SIDEWAYS"
-        
-        return regime.upper()
-    except Exception as e:
-        print(f"⚠️  Error reading regime.json: {e}, defaulting to SIDEWAYS")
+def load_current_regime(cluster: str = None) -> str:
+    """Current regime tag from regime_classifier (BTC/1d unless a cluster is given)."""
+    regime = regime_classifier.get_regime_tag(cluster=cluster, default="")
+    if not regime:
+        print(f"⚠️  No regime classified yet, defaulting to SIDEWAYS")
         return "SIDEWAYS"
+    return regime.upper()
 
 
 def load_regime_profiles() -> dict:
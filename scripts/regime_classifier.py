@@ -3,30 +3,47 @@
 Regime Classifier — Sprint 5.3
 Deterministic Python. No LLMs.
 
-Classifies the current crypto market regime based on:
-1. BTC 30-day price trend (SMA slope)
-2. BTC short-term volatility (14-day ATR as % of price)
+Classifies the current crypto market regime per asset cluster and timeframe:
+1. Price trend (30-bar SMA regression slope, in %/day)
+2. Short-term volatility (14-bar ATR as % of price, scaled to a daily figure)
 3. Fear & Greed Index (level + trend)
-4. BTC drawdown from recent high
+4. Drawdown from the 30-bar high
+
+Clusters (CLUSTERS): BTC, SOL (Solana ecosystem majors), MEMES (listed memecoins,
+equal-weighted). Timeframes (TIMEFRAMES): 1d, 4h, 1h. Slope and ATR are converted
+to daily units so one set of thresholds serves every timeframe.
 
 Regime outputs:
   Primary: BULL | BEAR | SIDEWAYS
   Volatility: HIGH_VOL | LOW_VOL | NORMAL_VOL
   Combined tag: e.g. "BULL_HIGH_VOL", "BEAR_LOW_VOL", "SIDEWAYS_NORMAL_VOL"
 
+Engine:
+- Closed candles are cached in state_store (candles table); each run fetches only
+  the candles closed since the last one it saw (startTime), never the full window.
+- Indicators are rolling state per (symbol, timeframe) in regime-data/indicators.json,
+  advanced one candle at a time — no recomputation over history.
+- The result (BTC/1d at the top level, as before, plus every cluster/timeframe
+  under "clusters") is written to regime-data/latest.json.
+- get_regime_tag(signal) / get_regime(signal) read that result from memory
+  (a stat() of latest.json at most every RELOAD_CHECK_S) — no network, no parsing.
+
 Used by:
 - post_trade_analyzer.py: tags every trade with regime at entry/exit
-- signal_router.py: regime-weighted signal scoring
-- Genius Memory RAG: filter past trades by matching regime
+- sanad_pipeline.py / thompson_sampler.py: regime per signal for strategy selection
+- fast_decision_engine.py: Kelly sizing stats per regime
+- regime_adapter.py: active regime profile (BTC/1d)
+- vector_db.py: regime-weighted RAG over past trades
 
-Runs on-demand (imported) and as standalone for cron/testing.
+Runs hourly under job_supervisor (run()) and as standalone for cron/testing.
 """
 
 import json
+import math
 import os
 import sys
 import time
-import requests
+from collections import Counter, deque
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
@@ -39,24 +56,51 @@ FEAR_GREED_PATH = BASE_DIR / "signals" / "market" / "fear_greed_latest.json"
 REGIME_DIR = BASE_DIR / "genius-memory" / "regime-data"
 REGIME_LATEST = REGIME_DIR / "latest.json"
 REGIME_HISTORY = REGIME_DIR / "history.jsonl"
+INDICATORS_PATH = REGIME_DIR / "indicators.json"
+
+sys.path.insert(0, str(SCRIPT_DIR))
+
+DB_PATH = None  # None → state_store.DB_PATH
 
-BINANCE_BASE = "https://api.binance.com"
+# ─────────────────────────────────────────────────────────
+# Universe
+# ─────────────────────────────────────────────────────────
 BTC_SYMBOL = "BTCUSDT"
+CLUSTERS = {
+    "BTC": [BTC_SYMBOL],
+    "SOL": ["SOLUSDT", "JUPUSDT", "RAYUSDT"],
+    "MEMES": ["DOGEUSDT", "PEPEUSDT", "WIFUSDT", "BONKUSDT"],
+}
+DEFAULT_CLUSTER = "BTC"        # CEX majors outside the clusters track BTC
+ONCHAIN_CLUSTER = "MEMES"      # unlisted on-chain tokens trade like memes
+
+# Timeframe → candle length in seconds
+TIMEFRAMES = {"1d": 86400, "4h": 14400, "1h": 3600}
+DEFAULT_TIMEFRAME = "1d"
+
+SLOPE_PERIOD = 30
+ATR_PERIOD = 14
+VOL_TREND_PERIOD = 7           # last 7 true ranges vs the 7 before
+DRAWDOWN_LOOKBACK = 30
+MIN_BARS = 15                  # fewer closes → series not classified
+WARMUP_BARS = 60               # candles fetched for a new (or broken) series
+
+RELOAD_CHECK_S = 30            # get_regime*() re-stat()s latest.json at most this often
 
 # ─────────────────────────────────────────────────────────
 # Thresholds (tuned for crypto)
 # ─────────────────────────────────────────────────────────
-# Trend classification: 30-day SMA slope as daily % change
+# Trend classification: 30-bar SMA slope as daily % change
 BULL_SLOPE_THRESHOLD = 0.15    # >0.15% per day avg = bull
 BEAR_SLOPE_THRESHOLD = -0.15   # <-0.15% per day avg = bear
 # Between -0.15% and +0.15% = sideways
 
-# Volatility: 14-day ATR as % of price
+# Volatility: 14-bar ATR as % of price (daily equivalent)
 HIGH_VOL_THRESHOLD = 3.5   # >3.5% daily ATR = high vol
 LOW_VOL_THRESHOLD = 1.5    # <1.5% daily ATR = low vol
 # Between 1.5% and 3.5% = normal vol
 
-# Drawdown from 30-day high
+# Drawdown from 30-bar high
 DRAWDOWN_BEAR_THRESHOLD = 0.15  # >15% from high reinforces bear
 DRAWDOWN_CORRECTION = 0.08     # >8% = meaningful correction
 
@@ -66,10 +110,6 @@ FG_FEAR = 35
 FG_GREED = 65
 FG_EXTREME_GREED = 80
 
-# Circuit breaker
-_consecutive_failures = 0
-CIRCUIT_BREAKER_THRESHOLD = 3
-
 
 def _log(msg: str):
     ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S+00:00")
@@ -116,224 +156,180 @@ def _append_jsonl(path: Path, record: dict):
 
 
 # ─────────────────────────────────────────────────────────
-# Data Fetching
+# Incremental indicators
 # ─────────────────────────────────────────────────────────
-def _fetch_btc_daily_klines(days: int = 30) -> list | None:
-    """Fetch BTC daily klines from Binance."""
-    global _consecutive_failures
-    try:
-        resp = requests.get(
-            f"{BINANCE_BASE}/api/v3/klines",
-            params={
-                "symbol": BTC_SYMBOL,
-                "interval": "1d",
-                "limit": days + 1,  # +1 for current incomplete day
-            },
-            timeout=15,
-        )
-        resp.raise_for_status()
-        _consecutive_failures = 0
-        return resp.json()
-    except Exception as e:
-        _consecutive_failures += 1
-        _log(f"ERROR fetching BTC klines: {e}")
-        if _consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD:
-            _log("CIRCUIT BREAKER — too many Binance failures")
-        return None
+class SeriesState:
+    """Rolling indicators for one (symbol, timeframe) candle stream.
 
+    push() advances by one closed candle in O(1): the regression sums slide
+    with the 30-bar window, true ranges live in a 14-slot deque, and the
+    drawdown peak is the head of a monotonic deque.
+    """
 
-def _fetch_btc_current_price() -> float | None:
-    """Fetch current BTC price."""
-    try:
-        resp = requests.get(
-            f"{BINANCE_BASE}/api/v3/ticker/price",
-            params={"symbol": BTC_SYMBOL},
-            timeout=10,
-        )
-        resp.raise_for_status()
-        return float(resp.json()["price"])
-    except Exception as e:
-        _log(f"ERROR fetching BTC price: {e}")
-        return None
+    def __init__(self, last_open_time: int = 0, count: int = 0, closes=(), trs=(), peaks=()):
+        self.last_open_time = int(last_open_time)
+        self.count = int(count)
+        self.closes = deque(closes, maxlen=SLOPE_PERIOD)
+        self.trs = deque(trs, maxlen=max(ATR_PERIOD, 2 * VOL_TREND_PERIOD))
+        self.peaks = deque(tuple(p) for p in peaks)  # (bar index, close), closes strictly decreasing
+        # Recomputed on load so float drift never outlives one run
+        self.sum_y = sum(self.closes)
+        self.sum_xy = sum(i * y for i, y in enumerate(self.closes))
+
+    def push(self, open_time: int, high: float, low: float, close: float) -> bool:
+        """Advance by one closed candle. Ignores candles at or before the last one seen."""
+        if open_time <= self.last_open_time:
+            return False
+        if self.closes:
+            prev = self.closes[-1]
+            self.trs.append(max(high - low, abs(high - prev), abs(low - prev)))
+
+        n = len(self.closes)
+        if n == SLOPE_PERIOD:
+            self.sum_y -= self.closes[0]
+            self.sum_xy -= self.sum_y  # remaining closes each shift one position left
+            n -= 1
+        self.closes.append(close)
+        self.sum_y += close
+        self.sum_xy += n * close
+
+        while self.peaks and self.peaks[-1][1] <= close:
+            self.peaks.pop()
+        self.peaks.append((self.count, close))
+        while self.peaks[0][0] <= self.count - DRAWDOWN_LOOKBACK:
+            self.peaks.popleft()
+
+        self.count += 1
+        self.last_open_time = int(open_time)
+        return True
+
+    def metrics(self, bars_per_day: float = 1.0) -> dict:
+        """Current indicator values; slope and ATR in daily units. {} until two closes."""
+        n = len(self.closes)
+        if n < 2:
+            return {}
+        close = self.closes[-1]
+        y_mean = self.sum_y / n
+        denominator = n * (n * n - 1) / 12  # Σ(i - x̄)²
+        slope = (self.sum_xy - (n - 1) / 2 * self.sum_y) / denominator
+        slope_pct = (slope / y_mean) * 100 if y_mean else 0.0
+
+        trs = list(self.trs)
+        recent_tr = trs[-ATR_PERIOD:]
+        atr = sum(recent_tr) / len(recent_tr) if recent_tr else 0.0
+        atr_pct = (atr / close) * 100 if close > 0 else 0.0
+
+        peak = self.peaks[0][1]
+        drawdown = (peak - close) / peak if peak > 0 else 0.0
+
+        vol_trend = "stable"
+        if len(trs) >= 2 * VOL_TREND_PERIOD:
+            recent = sum(trs[-VOL_TREND_PERIOD:]) / VOL_TREND_PERIOD
+            prior = sum(trs[-2 * VOL_TREND_PERIOD:-VOL_TREND_PERIOD]) / VOL_TREND_PERIOD
+            change = (recent - prior) / prior if prior > 0 else 0.0
+            if change > 0.20:
+                vol_trend = "increasing"
+            elif change < -0.20:
+                vol_trend = "decreasing"
+
+        return {
+            "price": close,
+            "sma_slope_pct_per_day": round(slope_pct * bars_per_day, 4),
+            "atr_pct": round(atr_pct * math.sqrt(bars_per_day), 4),
+            "drawdown": round(drawdown, 4),
+            "volatility_trend": vol_trend,
+            "data_points": n,
+        }
 
+    def to_dict(self) -> dict:
+        return {"last_open_time": self.last_open_time, "count": self.count, "closes": list(self.closes),
+                "trs": list(self.trs), "peaks": [list(p) for p in self.peaks]}
 
-def _load_fear_greed() -> dict:
-    """Load Fear & Greed data."""
-    data = _load_json(FEAR_GREED_PATH, {})
-    if not data:
-        return {"value": 50, "regime": "NEUTRAL", "trend_7d": "stable"}
-    return data
+    @classmethod
+    def from_dict(cls, data: dict) -> "SeriesState":
+        return cls(**{k: data[k] for k in ("last_open_time", "count", "closes", "trs", "peaks") if k in data})
 
 
 # ─────────────────────────────────────────────────────────
-# Analysis Functions
+# Candle cache
 # ─────────────────────────────────────────────────────────
-def _calc_sma_slope(closes: list[float], period: int = 30) -> float:
-    """Calculate SMA slope as average daily % change.
-    Positive = uptrend, Negative = downtrend.
-    Uses linear regression slope over the period.
-    """
-    if len(closes) < period:
-        return 0.0
-
-    recent = closes[-period:]
-    n = len(recent)
-
-    # Simple linear regression: slope of price over time
-    x_mean = (n - 1) / 2
-    y_mean = sum(recent) / n
-
-    numerator = sum((i - x_mean) * (y - y_mean) for i, y in enumerate(recent))
-    denominator = sum((i - x_mean) ** 2 for i in range(n))
-
-    if denominator == 0 or y_mean == 0:
-        return 0.0
-
-    slope = numerator / denominator
-    # Convert to daily % change
-    slope_pct = (slope / y_mean) * 100
-    return round(slope_pct, 4)
-
-
-def _calc_atr_pct(klines: list, period: int = 14) -> float:
-    """Calculate Average True Range as % of price.
-    Each kline: [open_time, open, high, low, close, volume, close_time, ...]
-    """
-    if len(klines) < period + 1:
-        return 0.0
-
-    true_ranges = []
-    for i in range(1, len(klines)):
-        try:
-            high = float(klines[i][2])
-            low = float(klines[i][3])
-            prev_close = float(klines[i - 1][4])
-            tr = max(
-                high - low,
-                abs(high - prev_close),
-                abs(low - prev_close),
-            )
-            true_ranges.append(tr)
-        except (ValueError, IndexError):
-            continue
-
-    if len(true_ranges) < period:
-        return 0.0
-
-    # Use most recent `period` values
-    recent_tr = true_ranges[-period:]
-    atr = sum(recent_tr) / len(recent_tr)
-
-    # As % of current price
-    try:
-        current_price = float(klines[-1][4])
-        if current_price <= 0:
-            return 0.0
-        return round((atr / current_price) * 100, 4)
-    except (ValueError, IndexError):
-        return 0.0
-
-
-def _calc_drawdown(closes: list[float], lookback: int = 30) -> float:
-    """Calculate drawdown from highest close in lookback period."""
-    if len(closes) < 2:
-        return 0.0
-    recent = closes[-lookback:]
-    peak = max(recent)
-    current = closes[-1]
-    if peak <= 0:
-        return 0.0
-    return round((peak - current) / peak, 4)
-
-
-def _calc_volatility_trend(klines: list) -> str:
-    """Is volatility increasing, decreasing, or stable?
-    Compare last 7-day ATR vs prior 7-day ATR.
-    """
-    if len(klines) < 16:
-        return "stable"
-
-    def atr_for_range(k_range):
-        trs = []
-        for i in range(1, len(k_range)):
-            try:
-                h = float(k_range[i][2])
-                l = float(k_range[i][3])
-                pc = float(k_range[i - 1][4])
-                trs.append(max(h - l, abs(h - pc), abs(l - pc)))
-            except (ValueError, IndexError):
-                continue
-        return sum(trs) / len(trs) if trs else 0
-
-    recent_atr = atr_for_range(klines[-8:])   # Last 7 days
-    prior_atr = atr_for_range(klines[-15:-7])  # Prior 7 days
+def _fetch_klines(symbol: str, timeframe: str, start_ms: int, limit: int) -> list | None:
+    """Closed and open candles from start_ms onwards (binance_client: breaker + error tracking)."""
+    import binance_client
+    return binance_client.get_klines(symbol, timeframe, limit=limit, start_time=start_ms)
+
+
+def _advance(state: SeriesState, symbol: str, timeframe: str, now_ms: int) -> tuple[SeriesState, int]:
+    """Feed every candle closed since state.last_open_time — from the cache first, then
+    Binance for whatever the cache lacks. Returns (state, candles fetched over the network)."""
+    import state_store
+    db = DB_PATH or state_store.DB_PATH
+    step_ms = TIMEFRAMES[timeframe] * 1000
+    last_closed = (now_ms // step_ms - 1) * step_ms  # open time of the latest closed candle
+
+    if state.last_open_time and last_closed - state.last_open_time > WARMUP_BARS * step_ms:
+        state = SeriesState()  # gap longer than the warm-up window: the rolling state is meaningless
+    if state.last_open_time:
+        rows = state_store.get_candles(symbol, timeframe, limit=WARMUP_BARS, since=state.last_open_time, db_path=db)
+    else:
+        rows = [r for r in state_store.get_candles(symbol, timeframe, limit=WARMUP_BARS, db_path=db)
+                if r[0] > last_closed - WARMUP_BARS * step_ms]
+
+    have = rows[-1][0] if rows else state.last_open_time
+    fetched = 0
+    if have < last_closed:
+        start = have + step_ms if have else last_closed - (WARMUP_BARS - 1) * step_ms
+        wanted = int((last_closed - start) // step_ms) + 1
+        klines = _fetch_klines(symbol, timeframe, start, min(wanted + 1, 1000)) or []
+        closed = [k for k in klines if start <= int(k[0]) <= last_closed]
+        if closed:
+            state_store.upsert_candles(symbol, timeframe, closed, db_path=db)
+            rows += [(int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5])) for k in closed]
+            fetched = len(closed)
+        elif klines is not None and wanted:
+            _log(f"{symbol} {timeframe}: no candles returned (wanted {wanted})")
+
+    for open_time, _open, high, low, close, _volume in rows:
+        state.push(open_time, high, low, close)
+    return state, fetched
 
-    if prior_atr <= 0:
-        return "stable"
 
-    change = (recent_atr - prior_atr) / prior_atr
-    if change > 0.20:
-        return "increasing"
-    elif change < -0.20:
-        return "decreasing"
-    return "stable"
+def _load_fear_greed() -> dict:
+    """Load Fear & Greed data."""
+    data = _load_json(FEAR_GREED_PATH, {})
+    if not data:
+        return {"value": 50, "regime": "NEUTRAL", "trend_7d": "stable"}
+    return data
 
 
 # ─────────────────────────────────────────────────────────
 # Regime Classification
 # ─────────────────────────────────────────────────────────
-def classify_regime() -> dict:
-    """Main regime classification function.
-    Returns a dict with regime info, or None on failure.
-    """
-    now = _now()
-    _log("=== REGIME CLASSIFICATION ===")
-
-    # Fetch data
-    klines = _fetch_btc_daily_klines(30)
-    if not klines or len(klines) < 15:
-        _log("ERROR: Insufficient BTC kline data")
-        # Return last known regime if available
-        last = _load_json(REGIME_LATEST)
-        if last:
-            _log(f"Using cached regime: {last.get('regime_tag', 'UNKNOWN')}")
-            return last
-        return {"regime_tag": "UNKNOWN", "error": "no_data"}
+def _cluster_metrics(series: list[dict]) -> dict:
+    """Equal-weight the members' metrics (members without MIN_BARS closes are skipped)."""
+    ready = [m for m in series if m and m["data_points"] >= MIN_BARS]
+    if not ready:
+        return {}
+    n = len(ready)
+    return {
+        "price": ready[0]["price"] if n == 1 else None,  # a basket has no single price
+        "sma_slope_pct_per_day": round(sum(m["sma_slope_pct_per_day"] for m in ready) / n, 4),
+        "atr_pct": round(sum(m["atr_pct"] for m in ready) / n, 4),
+        "drawdown": round(sum(m["drawdown"] for m in ready) / n, 4),
+        "volatility_trend": Counter(m["volatility_trend"] for m in ready).most_common(1)[0][0],
+        "data_points": min(m["data_points"] for m in ready),
+        "members": n,
+    }
 
-    btc_price = _fetch_btc_current_price()
-    fg_data = _load_fear_greed()
 
-    # Extract close prices
-    closes = []
-    for k in klines:
-        try:
-            closes.append(float(k[4]))
-        except (ValueError, IndexError):
-            continue
-
-    if len(closes) < 15:
-        _log("ERROR: Too few valid close prices")
-        return {"regime_tag": "UNKNOWN", "error": "insufficient_closes"}
-
-    # ── Calculate metrics ──
-    sma_slope = _calc_sma_slope(closes, min(30, len(closes)))
-    atr_pct = _calc_atr_pct(klines, min(14, len(klines) - 1))
-    drawdown = _calc_drawdown(closes, min(30, len(closes)))
-    vol_trend = _calc_volatility_trend(klines)
+def _classify(metrics: dict, fg_data: dict) -> dict:
+    """Primary + volatility regime for one cluster/timeframe from its metrics."""
+    sma_slope = metrics["sma_slope_pct_per_day"]
+    atr_pct = metrics["atr_pct"]
+    drawdown = metrics["drawdown"]
     fg_value = fg_data.get("value", 50)
-    fg_trend = fg_data.get("trend_7d", "stable")
-
-    _log(f"BTC price: ${btc_price:,.0f}" if btc_price else "BTC price: unavailable")
-    _log(f"SMA slope: {sma_slope:+.4f}%/day")
-    _log(f"ATR(14): {atr_pct:.2f}%")
-    _log(f"Drawdown from 30d high: {drawdown*100:.1f}%")
-    _log(f"Vol trend: {vol_trend}")
-    _log(f"Fear & Greed: {fg_value} ({fg_data.get('regime', 'N/A')}) trend={fg_trend}")
 
     # ── PRIMARY REGIME: BULL / BEAR / SIDEWAYS ──
-    primary = "SIDEWAYS"
-    primary_confidence = 0.5
-
     if sma_slope >= BULL_SLOPE_THRESHOLD:
         primary = "BULL"
         primary_confidence = min(0.5 + (sma_slope / 1.0), 0.95)
@@ -341,7 +337,6 @@ def classify_regime() -> dict:
         if drawdown >= DRAWDOWN_BEAR_THRESHOLD:
             primary = "BEAR"
             primary_confidence = 0.6
-            _log(f"  Override: slope says bull but {drawdown*100:.1f}% drawdown → BEAR")
     elif sma_slope <= BEAR_SLOPE_THRESHOLD:
         primary = "BEAR"
         primary_confidence = min(0.5 + (abs(sma_slope) / 1.0), 0.95)
@@ -351,10 +346,8 @@ def classify_regime() -> dict:
 
     # F&G reinforcement
     if primary == "BULL" and fg_value < FG_FEAR:
-        _log(f"  Conflict: slope says BULL but F&G={fg_value} (fear)")
         primary_confidence *= 0.8
     elif primary == "BEAR" and fg_value > FG_GREED:
-        _log(f"  Conflict: slope says BEAR but F&G={fg_value} (greed)")
         primary_confidence *= 0.8
 
     # ── VOLATILITY REGIME: HIGH / LOW / NORMAL ──
@@ -365,33 +358,100 @@ def classify_regime() -> dict:
     else:
         vol_regime = "NORMAL_VOL"
 
-    # ── Combined tag ──
-    regime_tag = f"{primary}_{vol_regime}"
-
-    # ── Trading implications ──
-    implications = _derive_implications(primary, vol_regime, fg_value, drawdown)
-
-    result = {
-        "regime_tag": regime_tag,
+    return {
+        "regime_tag": f"{primary}_{vol_regime}",
         "primary": primary,
         "volatility": vol_regime,
         "confidence": round(primary_confidence, 3),
+        "metrics": dict(metrics, fear_greed_value=fg_value, fear_greed_trend=fg_data.get("trend_7d", "stable")),
+        "implications": _derive_implications(primary, vol_regime, fg_value, drawdown),
+    }
+
+
+def _load_indicators() -> dict:
+    raw = _load_json(INDICATORS_PATH, {}) or {}
+    states = {}
+    for key, data in raw.items():
+        try:
+            states[key] = SeriesState.from_dict(data)
+        except (TypeError, ValueError, IndexError):
+            continue  # corrupt entry → warm up again from the candle cache
+    return states
+
+
+def classify_regime() -> dict:
+    """Main regime classification function: advance every series, classify every
+    cluster/timeframe, persist. Returns the result dict (BTC/1d at the top level)."""
+    now = _now()
+    now_ms = int(now.timestamp() * 1000)
+    _log("=== REGIME CLASSIFICATION ===")
+
+    fg_data = _load_fear_greed()
+    states = _load_indicators()
+    symbols = list(dict.fromkeys(s for members in CLUSTERS.values() for s in members))
+    fetched = 0
+    for timeframe in TIMEFRAMES:
+        for symbol in symbols:
+            key = f"{symbol}:{timeframe}"
+            try:
+                states[key], n = _advance(states.get(key) or SeriesState(), symbol, timeframe, now_ms)
+                fetched += n
+            except Exception as e:
+                _log(f"ERROR advancing {key}: {e}")
+    _save_json_atomic(INDICATORS_PATH, {k: s.to_dict() for k, s in states.items()})
+    _log(f"Indicators advanced: {len(symbols)} symbols × {len(TIMEFRAMES)} timeframes, {fetched} new candles")
+
+    clusters = {}
+    for cluster, members in CLUSTERS.items():
+        for timeframe, seconds in TIMEFRAMES.items():
+            bars_per_day = 86400 / seconds
+            series = [states[k].metrics(bars_per_day) for k in (f"{s}:{timeframe}" for s in members) if k in states]
+            metrics = _cluster_metrics(series)
+            if metrics:
+                clusters.setdefault(cluster, {})[timeframe] = _classify(metrics, fg_data)
+        tags = ", ".join(f"{tf}={r['regime_tag']}" for tf, r in clusters.get(cluster, {}).items())
+        _log(f"  {cluster}: {tags or 'insufficient data'}")
+
+    btc = clusters.get(DEFAULT_CLUSTER, {}).get(DEFAULT_TIMEFRAME)
+    if not btc:
+        _log("ERROR: Insufficient BTC kline data")
+        # Return last known regime if available
+        last = _load_json(REGIME_LATEST)
+        if last:
+            _log(f"Using cached regime: {last.get('regime_tag', 'UNKNOWN')}")
+            return last
+        return {"regime_tag": "UNKNOWN", "error": "no_data"}
+
+    m = btc["metrics"]
+    _log(f"BTC price: ${m['price']:,.0f}")
+    _log(f"SMA slope: {m['sma_slope_pct_per_day']:+.4f}%/day")
+    _log(f"ATR(14): {m['atr_pct']:.2f}%")
+    _log(f"Drawdown from 30d high: {m['drawdown']*100:.1f}%")
+    _log(f"Vol trend: {m['volatility_trend']}")
+    _log(f"Fear & Greed: {m['fear_greed_value']} ({fg_data.get('regime', 'N/A')}) trend={m['fear_greed_trend']}")
+
+    result = {
+        "regime_tag": btc["regime_tag"],
+        "primary": btc["primary"],
+        "volatility": btc["volatility"],
+        "confidence": btc["confidence"],
         "metrics": {
-            "btc_price": btc_price,
-            "sma_slope_pct_per_day": sma_slope,
-            "atr_14d_pct": atr_pct,
-            "drawdown_from_30d_high": round(drawdown, 4),
-            "volatility_trend": vol_trend,
-            "fear_greed_value": fg_value,
-            "fear_greed_trend": fg_trend,
+            "btc_price": m["price"],
+            "sma_slope_pct_per_day": m["sma_slope_pct_per_day"],
+            "atr_14d_pct": m["atr_pct"],
+            "drawdown_from_30d_high": m["drawdown"],
+            "volatility_trend": m["volatility_trend"],
+            "fear_greed_value": m["fear_greed_value"],
+            "fear_greed_trend": m["fear_greed_trend"],
         },
-        "implications": implications,
+        "implications": btc["implications"],
+        "clusters": clusters,
         "timestamp": now.isoformat(),
-        "data_points": len(closes),
+        "data_points": m["data_points"],
     }
 
-    _log(f"REGIME: {regime_tag} (confidence={primary_confidence:.0%})")
-    _log(f"Implications: {implications.get('risk_adjustment', 'normal')}")
+    _log(f"REGIME: {result['regime_tag']} (confidence={result['confidence']:.0%})")
+    _log(f"Implications: {result['implications'].get('risk_adjustment', 'normal')}")
 
     # Save latest
     _save_json_atomic(REGIME_LATEST, result)
@@ -399,15 +459,16 @@ def classify_regime() -> dict:
     # Append to history
     _append_jsonl(REGIME_HISTORY, {
         "timestamp": now.isoformat(),
-        "regime_tag": regime_tag,
-        "primary": primary,
-        "volatility": vol_regime,
-        "confidence": round(primary_confidence, 3),
-        "btc_price": btc_price,
-        "sma_slope": sma_slope,
-        "atr_pct": atr_pct,
-        "drawdown": round(drawdown, 4),
-        "fg_value": fg_value,
+        "regime_tag": result["regime_tag"],
+        "primary": result["primary"],
+        "volatility": result["volatility"],
+        "confidence": result["confidence"],
+        "btc_price": m["price"],
+        "sma_slope": m["sma_slope_pct_per_day"],
+        "atr_pct": m["atr_pct"],
+        "drawdown": m["drawdown"],
+        "fg_value": m["fear_greed_value"],
+        "clusters": {c: {tf: r["regime_tag"] for tf, r in tfs.items()} for c, tfs in clusters.items()},
     })
 
     _log("=== CLASSIFICATION COMPLETE ===")
@@ -470,11 +531,66 @@ def _derive_implications(
 
 
 # ─────────────────────────────────────────────────────────
-# Convenience: get current regime (for imports)
+# Readers (no network; latest.json re-stat()ed at most every RELOAD_CHECK_S)
 # ─────────────────────────────────────────────────────────
+_snapshot: dict = {}
+_snapshot_mtime = None
+_last_check = 0.0
+
+
+def _current() -> dict:
+    """Latest classification, held in memory and reloaded only when latest.json changes."""
+    global _snapshot, _snapshot_mtime, _last_check
+    now = time.monotonic()
+    if _snapshot_mtime is None or now - _last_check >= RELOAD_CHECK_S:
+        _last_check = now
+        try:
+            mtime = REGIME_LATEST.stat().st_mtime
+        except OSError:
+            mtime = 0.0
+        if mtime != _snapshot_mtime:
+            _snapshot = (_load_json(REGIME_LATEST, {}) or {}) if mtime else {}
+            _snapshot_mtime = mtime
+    return _snapshot
+
+
+def cluster_for(signal) -> str:
+    """Asset cluster for a signal dict or a symbol string."""
+    if isinstance(signal, str):
+        signal = {"symbol": signal}
+    symbol = str(signal.get("symbol") or signal.get("token") or "").upper().replace("/", "").replace("-", "")
+    pair = symbol if symbol.endswith("USDT") else f"{symbol}USDT"
+    for cluster, members in CLUSTERS.items():
+        if pair in members:
+            return cluster
+    if signal.get("token_address") or signal.get("contract_address") or signal.get("address") \
+            or str(signal.get("chain") or "").lower() not in ("", "binance", "mexc", "cex"):
+        return ONCHAIN_CLUSTER
+    return DEFAULT_CLUSTER
+
+
+def get_regime(signal=None, cluster: str = None, timeframe: str = DEFAULT_TIMEFRAME) -> dict:
+    """Precomputed regime entry (regime_tag, primary, volatility, confidence, metrics,
+    implications) for a signal's cluster — falls back to BTC, then to the legacy
+    top-level result. {} if nothing has been classified yet."""
+    snap = _current()
+    clusters = snap.get("clusters") or {}
+    cluster = cluster or (cluster_for(signal) if signal else DEFAULT_CLUSTER)
+    entry = (clusters.get(cluster) or {}).get(timeframe) or (clusters.get(DEFAULT_CLUSTER) or {}).get(timeframe)
+    if entry:
+        return entry
+    return snap if timeframe == DEFAULT_TIMEFRAME and snap.get("regime_tag") else {}
+
+
+def get_regime_tag(signal=None, cluster: str = None, timeframe: str = DEFAULT_TIMEFRAME,
+                   default: str = "UNKNOWN") -> str:
+    """Quick helper: just the regime tag string (cheap enough to call per signal)."""
+    return get_regime(signal, cluster, timeframe).get("regime_tag") or default
+
+
 def get_current_regime() -> dict:
     """Get the current regime. Uses cache if fresh (<1h), else reclassifies."""
-    cached = _load_json(REGIME_LATEST)
+    cached = _current()
     if cached:
         try:
             ts = datetime.fromisoformat(cached["timestamp"])
@@ -486,10 +602,11 @@ def get_current_regime() -> dict:
     return classify_regime()
 
 
-def get_regime_tag() -> str:
-    """Quick helper: returns just the regime tag string."""
-    regime = get_current_regime()
-    return regime.get("regime_tag", "UNKNOWN")
+def run():
+    """job_supervisor entry point."""
+    result = classify_regime()
+    if result.get("error"):
+        raise RuntimeError(f"regime classification failed: {result['error']}")
 
 
 # ─────────────────────────────────────────────────────────
@@ -519,6 +636,11 @@ if __name__ == "__main__":
         if impl.get("notes"):
             for note in impl["notes"]:
                 print(f"  Note: {note}")
+        if result.get("clusters"):
+            print(f"\n  {'Cluster':<8} " + " ".join(f"{tf:<22}" for tf in TIMEFRAMES))
+            for cluster, tfs in result["clusters"].items():
+                print(f"  {cluster:<8} " + " ".join(f"{tfs.get(tf, {}).get('regime_tag', '-'):<22}"
+                                                     for tf in TIMEFRAMES))
     except Exception as e:
         _log(f"FATAL: {e}")
         import traceback
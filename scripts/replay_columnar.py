@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+Columnar Replay — vectorized FAST mode for replay_engine.
+Deterministic Python + NumPy. No LLMs.
+
+Signals are loaded once into a SignalFrame (one NumPy array per field) and
+cached under state/replay_cache/, keyed by file path + mtime + size, so a
+re-run only parses files that are new or changed. The deterministic checks
+of replay_engine._fast_check and tradeability_scorer.score_tradeability are
+expressed as array predicates, and the by_source / by_token / by_direction
+tallies are bincounts over factorized group codes.
+
+Results are identical to the scalar path for the same signal list:
+    replay_fast_columnar(SignalFrame.from_signals(sigs), now) == replay_engine.replay_fast(sigs, now)
+(modulo started_at / completed_at). With tradeability=True the result also
+carries a "tradeability" block: Stage-1 passers scored against the router's
+tradeability gate.
+
+Usage:
+    python3 replay_engine.py --mode fast --columnar --days 30 [--tradeability]
+"""
+
+import json
+import math
+import os
+import sys
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import replay_engine
+
+CACHE_DIR = replay_engine.STATE_DIR / "replay_cache"
+CACHE_FILE = CACHE_DIR / "signals_frame.npz"
+TRADEABILITY_THRESHOLD = 55  # signal_router's BULL / NEUTRAL gate default
+CACHE_VERSION = 2  # 2: object columns stored as UTF-8 JSON, loaded without pickle
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_US = timedelta(microseconds=1)
+
+# Order matters: reasons are emitted in _fast_check order
+_REASONS = [
+    "missing_required_fields",
+    "negative_price",
+    "negative_market_cap",
+    "stale_signal",
+    "blacklisted_token",
+    "impossible_volume_mcap_ratio",
+    "prompt_injection_detected",
+    "extreme_price_change",
+]
+
+_FLOAT_COLS = [
+    "price", "market_cap", "volume_24h", "price_change_24h",
+    "price_change_1h_pct", "price_change_24h_pct", "trade_volume", "liquidity_usd",
+    "ind_rsi", "ind_macd_hist", "ind_volume_ratio",
+]
+_INT_COLS = ["ts_us"]
+_BOOL_COLS = ["ts_truthy", "ts_ok", "required_ok", "injection", "ind_present"]
+_OBJ_COLS = [
+    "token", "source", "direction", "token_address", "chain", "chain_lower",
+    "source_lower", "sort_key", "file",
+]
+
+
+def _log(msg):
+    replay_engine._log(f"[columnar] {msg}")
+
+
+# ─────────────────────────────────────────────────────────
+# Row extraction (the only per-signal Python work, done once per file)
+# ─────────────────────────────────────────────────────────
+
+def _num(value) -> float:
+    """Numeric field as float; None / non-numeric → NaN (scalar checks skip those)."""
+    if value is None:
+        return math.nan
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _or_num(value, default) -> float:
+    """`value or default` semantics (0 / None → default)."""
+    return _num(value or default)
+
+
+def _parse_ts_us(ts):
+    """Aware ISO timestamp → µs since epoch, or None (missing, naive or unparseable)."""
+    try:
+        dt = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+        if dt.tzinfo is None:
+            return None  # scalar path: aware - naive raises → treated as parse error
+        return (dt - _EPOCH) // _US
+    except Exception:
+        return None
+
+
+def _extract_row(signal: dict, injection_cache: dict) -> dict:
+    ts = signal.get("timestamp")
+    ts_us = _parse_ts_us(ts) if ts else None
+    thesis = signal.get("thesis", "")
+    if thesis:
+        if thesis not in injection_cache:
+            injection_cache[thesis] = _detect_injection(thesis)
+        injection = injection_cache[thesis]
+    else:
+        injection = False
+
+    indicators = signal.get("indicators", {})
+    ind_present = isinstance(indicators, dict) and bool(indicators)
+    ind = indicators if isinstance(indicators, dict) else {}
+
+    chain = signal.get("chain", "")
+    source = signal.get("source", "")
+    sort_key = signal.get("timestamp", "")
+    return {
+        "token": signal.get("token", "UNKNOWN"),
+        "source": signal.get("source", "unknown"),
+        "direction": signal.get("direction", "UNKNOWN"),
+        "token_address": signal.get("token_address", "") or "",
+        "chain": chain,
+        "chain_lower": chain.lower() if isinstance(chain, str) else "",
+        "source_lower": source.lower() if isinstance(source, str) else "",
+        "sort_key": sort_key if isinstance(sort_key, str) else "",
+        "file": signal.get("_source_file", ""),
+        "price": _num(signal.get("price", 0)),
+        "market_cap": _num(signal.get("market_cap", 0)),
+        "volume_24h": _num(signal.get("volume_24h", 0)),
+        "price_change_24h": _num(signal.get("price_change_24h", 0)),
+        "price_change_1h_pct": _or_num(signal.get("price_change_1h_pct"), 0),
+        "price_change_24h_pct": _or_num(signal.get("price_change_24h_pct"), 0),
+        "trade_volume": _num(signal.get("volume_24h_usd", signal.get("volume_24h", 0))),
+        "liquidity_usd": _num(signal.get("liquidity_usd", 0)),
+        "ind_rsi": _or_num(ind.get("rsi", 50), 50),
+        "ind_macd_hist": _or_num(ind.get("macd_hist", 0), 0),
+        "ind_volume_ratio": _num(ind.get("volume_ratio", 0)),
+        "ts_us": ts_us if ts_us is not None else 0,
+        "ts_truthy": bool(ts),
+        "ts_ok": ts_us is not None,
+        "required_ok": bool(signal.get("token", "")) and bool(signal.get("source", ""))
+                       and bool(signal.get("direction", "")),
+        "injection": injection,
+        "ind_present": ind_present,
+    }
+
+
+def _detect_injection(thesis: str) -> bool:
+    try:
+        from red_team import _detect_prompt_injection
+    except ImportError:
+        return False
+    return bool(_detect_prompt_injection(thesis))
+
+
+# ─────────────────────────────────────────────────────────
+# SignalFrame
+# ─────────────────────────────────────────────────────────
+
+class SignalFrame:
+    """Columnar signal set: one NumPy array per field, all of length n."""
+
+    def __init__(self, cols: dict):
+        self.cols = cols
+        self.n = len(cols["token"]) if cols else 0
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, name):
+        return self.cols[name]
+
+    @classmethod
+    def from_rows(cls, rows: list) -> "SignalFrame":
+        cols = {}
+        for name in _FLOAT_COLS:
+            cols[name] = np.fromiter((r[name] for r in rows), dtype=np.float64, count=len(rows))
+        for name in _INT_COLS:
+            cols[name] = np.fromiter((r[name] for r in rows), dtype=np.int64, count=len(rows))
+        for name in _BOOL_COLS:
+            cols[name] = np.fromiter((r[name] for r in rows), dtype=bool, count=len(rows))
+        for name in _OBJ_COLS:
+            arr = np.empty(len(rows), dtype=object)
+            arr[:] = [r[name] for r in rows]
+            cols[name] = arr
+        return cls(cols)
+
+    @classmethod
+    def from_signals(cls, signals: list) -> "SignalFrame":
+        """Build from in-memory signal dicts (order preserved)."""
+        cache = {}
+        return cls.from_rows([_extract_row(s, cache) for s in signals])
+
+    @classmethod
+    def concat(cls, frames: list) -> "SignalFrame":
+        frames = [f for f in frames if f.n]
+        if not frames:
+            return cls.from_rows([])
+        return cls({name: np.concatenate([f.cols[name] for f in frames]) for name in frames[0].cols})
+
+    def take(self, idx) -> "SignalFrame":
+        return SignalFrame({name: arr[idx] for name, arr in self.cols.items()})
+
+
+def _factorize(values) -> tuple[np.ndarray, list]:
+    """Group codes in first-seen order (matches dict insertion order of the scalar path)."""
+    seen = {}
+    codes = np.fromiter((seen.setdefault(v, len(seen)) for v in values), dtype=np.int64, count=len(values))
+    return codes, list(seen)
+
+
+# ─────────────────────────────────────────────────────────
+# Disk loading with incremental cache
+# ─────────────────────────────────────────────────────────
+
+def _scan_files() -> dict:
+    """path → [mtime_ns, size] for every signal file, in replay_engine's iteration order."""
+    files = {}
+    if not replay_engine.SIGNALS_DIR.exists():
+        return files
+    for subdir in replay_engine.SIGNALS_DIR.iterdir():
+        if not subdir.is_dir():
+            continue
+        for f in subdir.glob("*.json"):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            files[str(f)] = [st.st_mtime_ns, st.st_size]
+    return files
+
+
+def _obj_to_bytes(arr: np.ndarray) -> np.ndarray:
+    """Object column → UTF-8 JSON bytes (the cache never holds pickles)."""
+    return np.frombuffer(json.dumps(arr.tolist()).encode("utf-8"), dtype=np.uint8)
+
+
+def _obj_from_bytes(raw: np.ndarray) -> np.ndarray:
+    values = json.loads(raw.tobytes().decode("utf-8"))
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+
+def _load_cache():
+    if not CACHE_FILE.exists():
+        return None, {}
+    try:
+        with np.load(CACHE_FILE, allow_pickle=False) as npz:
+            meta = json.loads(str(npz["__meta__"]))
+            if meta.get("version") != CACHE_VERSION:
+                return None, {}
+            cols = {name: npz["col_" + name] for name in _FLOAT_COLS + _INT_COLS + _BOOL_COLS}
+            cols.update({name: _obj_from_bytes(npz["col_" + name]) for name in _OBJ_COLS})
+        return SignalFrame(cols), meta.get("manifest", {})
+    except Exception as e:
+        _log(f"Cache unreadable, rebuilding: {e}")
+        return None, {}
+
+
+def _save_cache(frame: SignalFrame, manifest: dict):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = CACHE_FILE.with_name(CACHE_FILE.stem + ".tmp.npz")
+    meta = json.dumps({"version": CACHE_VERSION, "manifest": manifest})
+    # Prefixed keys: np.savez reserves "file" as a keyword
+    arrays = {"col_" + name: _obj_to_bytes(arr) if name in _OBJ_COLS else arr
+              for name, arr in frame.cols.items()}
+    np.savez(tmp, __meta__=np.array(meta), **arrays)
+    os.replace(tmp, CACHE_FILE)
+
+
+def _parse_files(paths: list) -> SignalFrame:
+    rows = []
+    cache = {}
+    for path in paths:
+        data = replay_engine._load_json(path)
+        if not data or not isinstance(data, dict):
+            continue
+        data["_source_file"] = path
+        data["_source_dir"] = Path(path).parent.name
+        rows.append(_extract_row(data, cache))
+    return SignalFrame.from_rows(rows)
+
+
+def load_signal_frame(days: int = 30, use_cache: bool = True, now: datetime = None) -> SignalFrame:
+    """
+    Columnar equivalent of replay_engine.collect_signals_from_disk(days).
+
+    Only files that are new or changed since the cached run are parsed.
+    """
+    current = _scan_files()
+    frame, manifest = _load_cache() if use_cache else (None, {})
+
+    if frame is not None and frame.n:
+        keep_files = {p for p, sig in current.items() if manifest.get(p) == sig}
+        keep = np.fromiter((f in keep_files for f in frame["file"]), dtype=bool, count=frame.n)
+        frame = frame.take(keep)
+    else:
+        keep_files = set()
+        frame = SignalFrame.from_rows([])
+
+    fresh = [p for p in current if p not in keep_files]
+    if fresh:
+        frame = SignalFrame.concat([frame, _parse_files(fresh)])
+    if use_cache and (fresh or set(manifest) != set(current)):
+        _save_cache(frame, current)
+    _log(f"Frame: {frame.n} rows ({len(fresh)} files parsed, {len(keep_files)} from cache)")
+
+    # Cutoff: unparseable / naive timestamps are kept, as in the scalar path
+    cutoff_us = ((now or replay_engine._now()) - timedelta(days=days) - _EPOCH) // _US
+    in_window = ~frame["ts_ok"] | (frame["ts_us"] >= cutoff_us)
+    frame = frame.take(in_window)
+
+    order = np.argsort(frame["sort_key"], kind="stable")
+    frame = frame.take(order)
+    _log(f"Collected {frame.n} signals (last {days} days)")
+    return frame
+
+
+# ─────────────────────────────────────────────────────────
+# Vectorized checks
+# ─────────────────────────────────────────────────────────
+
+def _blacklist_mask(addresses: np.ndarray) -> np.ndarray:
+    """rugpull_scanner.is_blacklisted over unique addresses (blacklist loaded once)."""
+    try:
+        from rugpull_scanner import load_blacklist
+    except ImportError:
+        return np.zeros(len(addresses), dtype=bool)
+    contracts = load_blacklist().get("contracts", {})
+    codes, uniques = _factorize(addresses)
+    hit = np.array([bool(a) and a.lower() in contracts for a in uniques], dtype=bool)
+    return hit[codes] if len(uniques) else np.zeros(len(addresses), dtype=bool)
+
+
+def fast_check_arrays(frame: SignalFrame, now: datetime = None) -> dict:
+    """
+    _fast_check as array predicates.
+
+    Returns dict of boolean reason masks (keys = _REASONS) plus
+    "age_hours" and "vol_mcap_ratio" float arrays and "ratio_applies" mask.
+    """
+    now_us = ((now or replay_engine._now()) - _EPOCH) // _US
+    price, mcap, vol = frame["price"], frame["market_cap"], frame["volume_24h"]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        age_hours = (now_us - frame["ts_us"]) / 1e6 / 3600
+        ratio_applies = (vol != 0) & ~np.isnan(vol) & (mcap > 0)
+        ratio = np.where(ratio_applies, vol / np.where(ratio_applies, mcap, 1.0), np.nan)
+
+        masks = {
+            "missing_required_fields": ~frame["required_ok"],
+            "negative_price": price < 0,
+            "negative_market_cap": mcap < 0,
+            "stale_signal": frame["ts_truthy"] & frame["ts_ok"] & (age_hours > 24),
+            "blacklisted_token": _blacklist_mask(frame["token_address"]),
+            "impossible_volume_mcap_ratio": ratio_applies & (ratio > 10000),
+            "prompt_injection_detected": frame["injection"],
+            "extreme_price_change": np.abs(frame["price_change_24h"]) > 200,
+        }
+    masks["age_hours"] = age_hours
+    masks["vol_mcap_ratio"] = ratio
+    masks["ratio_applies"] = ratio_applies
+    return masks
+
+
+def _checks_dict(i, m, frame) -> dict:
+    """Per-signal `checks` dict, key order as in _fast_check."""
+    checks = {"required_fields": not m["missing_required_fields"][i]}
+    checks["value_sanity"] = not (m["negative_price"][i] or m["negative_market_cap"][i])
+    if frame["ts_truthy"][i]:
+        checks["freshness_hours"] = round(float(m["age_hours"][i]), 1) if frame["ts_ok"][i] else "parse_error"
+    checks["blacklist"] = not m["blacklisted_token"][i]
+    if m["ratio_applies"][i]:
+        checks["vol_mcap_ratio"] = round(float(m["vol_mcap_ratio"][i]), 2)
+    checks["prompt_injection"] = not m["prompt_injection_detected"][i]
+    checks["price_change_sanity"] = not m["extreme_price_change"][i]
+    return {k: bool(v) if isinstance(v, np.bool_) else v for k, v in checks.items()}
+
+
+def _group_counts(values, passed: np.ndarray) -> dict:
+    codes, uniques = _factorize(values)
+    total = np.bincount(codes, minlength=len(uniques))
+    ok = np.bincount(codes, weights=passed.astype(np.float64), minlength=len(uniques)).astype(np.int64)
+    return {
+        key: {"total": int(t), "passed": int(p), "blocked": int(t - p)}
+        for key, t, p in zip(uniques, total, ok)
+    }
+
+
+def replay_fast_columnar(frame: SignalFrame, now: datetime = None, include_signals: bool = True,
+                         tradeability: bool = False) -> dict:
+    """
+    Vectorized replay_engine.replay_fast. Same result dict.
+
+    include_signals=False skips the per-signal `signals_processed` list
+    (the only O(n) Python object construction left).
+    tradeability=True adds results["tradeability"] (see _tradeability_summary).
+    """
+    _log(f"FAST REPLAY (columnar): {frame.n} signals")
+    started_at = replay_engine._now().isoformat()
+
+    m = fast_check_arrays(frame, now=now)
+    reason_matrix = np.vstack([m[r] for r in _REASONS]) if frame.n else np.zeros((len(_REASONS), 0), dtype=bool)
+    blocked = reason_matrix.any(axis=0)
+    passed = ~blocked
+    n_passed = int(passed.sum())
+
+    blocked_reasons = {}
+    for r, row in zip(_REASONS, reason_matrix):
+        count = int(row.sum())
+        if count:
+            blocked_reasons[r] = count
+    # Scalar path inserts reasons in first-occurrence order across signals
+    first_hit = {r: int(np.argmax(row)) for r, row in zip(_REASONS, reason_matrix) if r in blocked_reasons}
+    blocked_reasons = {r: blocked_reasons[r] for r in sorted(blocked_reasons, key=lambda r: (first_hit[r], _REASONS.index(r)))}
+
+    results = {
+        "mode": "fast",
+        "total_signals": frame.n,
+        "passed_stage1": n_passed,
+        "blocked_stage1": frame.n - n_passed,
+        "blocked_reasons": blocked_reasons,
+        "by_source": _group_counts(frame["source"], passed),
+        "by_token": _group_counts(frame["token"], passed),
+        "by_direction": _group_counts(frame["direction"], passed),
+        "signals_processed": [],
+        "started_at": started_at,
+    }
+
+    if include_signals:
+        tokens, sources, directions = frame["token"], frame["source"], frame["direction"]
+        for i in range(frame.n):
+            reasons = [r for r in _REASONS if m[r][i]]
+            results["signals_processed"].append({
+                "index": i,
+                "token": tokens[i],
+                "source": sources[i],
+                "direction": directions[i],
+                "passed": not reasons,
+                "block_reasons": reasons,
+                "checks": _checks_dict(i, m, frame),
+            })
+
+    if tradeability:
+        results["tradeability"] = _tradeability_summary(frame, passed, now)
+
+    results["pass_rate"] = round(n_passed / max(frame.n, 1), 4)
+    results["completed_at"] = replay_engine._now().isoformat()
+    return results
+
+
+def _tradeability_summary(frame: SignalFrame, passed: np.ndarray, now: datetime = None) -> dict:
+    """Stage-1 passers scored by tradeability_scores; how many clear TRADEABILITY_THRESHOLD, by source."""
+    # Historical signals: today's open positions say nothing about crowding back then
+    scores = tradeability_scores(frame.take(passed), now=now, open_tokens=set())
+    ok = scores >= TRADEABILITY_THRESHOLD
+    by_source = _group_counts(frame["source"][passed], ok)
+    return {
+        "threshold": TRADEABILITY_THRESHOLD,
+        "scored": int(len(scores)),
+        "tradeable": int(ok.sum()),
+        "mean_score": round(float(scores.mean()), 2) if len(scores) else 0.0,
+        "by_source": {src: {"total": c["total"], "tradeable": c["passed"]} for src, c in by_source.items()},
+    }
+
+
+# ─────────────────────────────────────────────────────────
+# Vectorized tradeability_scorer.score_tradeability
+# ─────────────────────────────────────────────────────────
+
+def tradeability_scores(frame: SignalFrame, now: datetime = None, open_tokens: set = None) -> np.ndarray:
+    """score_tradeability for every row (int64 array, 0-100)."""
+    import tradeability_scorer
+
+    n = frame.n
+    if open_tokens is None:
+        open_tokens = tradeability_scorer._open_position_tokens()
+
+    # 1. Momentum
+    ind = frame["ind_present"]
+    rsi = frame["ind_rsi"]
+    macd = np.abs(frame["ind_macd_hist"])
+    m_ind = np.maximum(50 - np.abs(rsi - 50), 0) / 50 * 15
+    m_ind = m_ind + np.where(macd > 100, 10, np.where(macd > 50, 5, 0))
+
+    p1, p24 = frame["price_change_1h_pct"], frame["price_change_24h_pct"]
+    a1, a24 = np.abs(p1), np.abs(p24)
+    src_codes, src_uniques = _factorize(frame["source_lower"])
+    trending = np.array(["trending" in s for s in src_uniques], dtype=bool)[src_codes] if n else np.zeros(0, bool)
+    m_raw = (np.where(a1 > 5, 10, np.where(a1 > 2, 5, 0))
+             + np.where(a24 > 10, 10, np.where(a24 > 5, 5, 0))
+             + np.where(trending & (p24 < 0), 5, 0)
+             + np.where((p1 != 0) & (p24 != 0) & (a1 > np.abs(p24 / 24)), 5, 0))
+    momentum = np.minimum(25, np.trunc(np.where(ind, m_ind, m_raw))).astype(np.int64)
+
+    # 2. Volume
+    vr = frame["ind_volume_ratio"]
+    vol = frame["trade_volume"]
+    chain = frame["chain"]
+    is_binance = np.fromiter((c == "binance" for c in chain), dtype=bool, count=n)
+    is_solana = np.fromiter((c == "solana" for c in chain), dtype=bool, count=n)
+    with np.errstate(invalid="ignore"):
+        v_binance = np.select([vol > 1e9, vol > 1e8, vol > 1e7, vol > 1e6], [20, 15, 10, 5], 0)
+        v_solana = np.select([vol > 5e7, vol > 1e7, vol > 1e6, vol > 1e5], [20, 15, 10, 5], 0)
+        v_other = np.select([vol > 1e7, vol > 1e6], [10, 5], 0)
+        volume = np.select(
+            [vr > 3, vr > 2, vr > 1.5, is_binance, is_solana],
+            [20, 15, 10, v_binance, v_solana],
+            v_other,
+        )
+
+        # 3. Liquidity
+        liq = frame["liquidity_usd"]
+        liq_binance = frame["chain_lower"] == "binance"
+        liquidity = np.where(liq_binance, 20, np.select([liq >= 5e5, liq >= 1e5, liq >= 5e4], [20, 10, 5], 0))
+
+    # 4. Timing
+    now_us = ((now or datetime.now(timezone.utc)) - _EPOCH) // _US
+    age_min = (now_us - frame["ts_us"]) / 1e6 / 60
+    t_ok = np.select([age_min < 5, age_min < 15, age_min < 30], [15, 10, 5], 0)
+    timing = np.where(~frame["ts_truthy"], 0, np.where(frame["ts_ok"], t_ok, 5))
+
+    # 5. Catalyst
+    def _catalyst(s):
+        for needle, pts in (("whale", 10), ("pumpfun", 8), ("majors", 7),
+                            ("birdeye", 4), ("coingecko", 3), ("dexscreener", 1)):
+            if needle in s:
+                return pts
+        return 2
+    catalyst = np.array([_catalyst(s) for s in src_uniques], dtype=np.int64)[src_codes] if n else np.zeros(0, np.int64)
+
+    # 6. Anti-crowding
+    tok_codes, tok_uniques = _factorize(frame["token"])
+    crowded = np.array([t in open_tokens for t in tok_uniques], dtype=bool)[tok_codes] if n else np.zeros(0, bool)
+    crowding = np.where(crowded, 0, 10)
+
+    total = momentum + volume + liquidity + timing + catalyst + crowding
+    return np.minimum(100, total).astype(np.int64)
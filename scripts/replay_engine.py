@@ -12,6 +12,8 @@ Three modes:
 
 Usage:
     python3 replay_engine.py --mode fast --source signals/
+    python3 replay_engine.py --mode fast --columnar --days 30   (vectorized, cached — see replay_columnar.py)
+    python3 replay_engine.py --mode fast --columnar --tradeability   (+ tradeability gate summary)
     python3 replay_engine.py --mode fast --file replay_set.json
     python3 replay_engine.py --generate --count 30
 """
@@ -154,10 +156,13 @@ def generate_synthetic_signals(count: int = 20) -> list:
 # Fast Replay — Deterministic checks only
 # ─────────────────────────────────────────────────────────
 
-def replay_fast(signals: list) -> dict:
+def replay_fast(signals: list, now: datetime = None) -> dict:
     """
     Replay signals through deterministic checks only.
     No LLM calls — tests data quality gates, blacklist, basic filters.
+
+    now: reference time for staleness (default: wall clock per signal).
+    Scalar reference path — replay_columnar.replay_fast_columnar() must match it.
     """
     _log(f"FAST REPLAY: {len(signals)} signals")
 
@@ -179,7 +184,7 @@ def replay_fast(signals: list) -> dict:
         source = signal.get("source", "unknown")
         direction = signal.get("direction", "UNKNOWN")
 
-        outcome = _fast_check(signal)
+        outcome = _fast_check(signal, now=now)
 
         # Track results
         result = {
@@ -224,7 +229,7 @@ def replay_fast(signals: list) -> dict:
     return results
 
 
-def _fast_check(signal: dict) -> dict:
+def _fast_check(signal: dict, now: datetime = None) -> dict:
     """Run all deterministic checks on a signal."""
     reasons = []
     checks = {}
@@ -256,7 +261,7 @@ def _fast_check(signal: dict) -> dict:
     if ts:
         try:
             sig_time = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-            age_hours = (_now() - sig_time).total_seconds() / 3600
+            age_hours = ((now or _now()) - sig_time).total_seconds() / 3600
             if age_hours > 24:
                 reasons.append("stale_signal")
             checks["freshness_hours"] = round(age_hours, 1)
@@ -363,6 +368,8 @@ def generate_report(results: dict) -> dict:
         "by_token": results.get("by_token", {}),
         "by_direction": results.get("by_direction", {}),
     }
+    if "tradeability" in results:
+        report["tradeability"] = results["tradeability"]
 
     filename = f"replay_{_now().strftime('%Y%m%d_%H%M%S')}.json"
     _save_json(REPORTS_DIR / filename, report)
@@ -395,21 +402,38 @@ if __name__ == "__main__":
     parser.add_argument("--generate", action="store_true", help="Generate synthetic signals")
     parser.add_argument("--count", type=int, default=20, help="Number of synthetic signals")
     parser.add_argument("--days", type=int, default=30, help="Days of history to collect")
+    parser.add_argument("--columnar", action="store_true", help="Vectorized fast replay over cached columnar signals")
+    parser.add_argument("--no-cache", action="store_true", help="With --columnar: ignore and rebuild the signal cache")
+    parser.add_argument("--tradeability", action="store_true",
+                        help="With --columnar: score Stage-1 passers against the tradeability gate")
     args = parser.parse_args()
 
-    if args.generate:
+    frame = None
+    if args.columnar:
+        import replay_columnar
+
+    if args.columnar and args.mode == "fast" and not (args.generate or args.file):
+        frame = replay_columnar.load_signal_frame(args.days, use_cache=not args.no_cache)
+        signals = None  # rows live in the frame
+    elif args.generate:
         signals = generate_synthetic_signals(args.count)
     elif args.file:
         signals = _load_json(args.file, [])
     else:
         signals = collect_signals_from_disk(args.days)
 
-    if not signals:
+    if not signals and not (frame is not None and len(frame)):
+        frame = None
         _log("No signals to replay — generating synthetic set")
         signals = generate_synthetic_signals(20)
 
     if args.mode == "fast":
-        results = replay_fast(signals)
+        if args.columnar:
+            if frame is None:
+                frame = replay_columnar.SignalFrame.from_signals(signals)
+            results = replay_columnar.replay_fast_columnar(frame, tradeability=args.tradeability)
+        else:
+            results = replay_fast(signals)
         report = generate_report(results)
 
         print(f"\n{'='*50}")
@@ -428,6 +452,10 @@ if __name__ == "__main__":
             for src, stats in results["by_source"].items():
                 rate = stats["passed"] / max(stats["total"], 1) * 100
                 print(f"    {src}: {stats['passed']}/{stats['total']} ({rate:.0f}%)")
+        if "tradeability" in results:
+            t = results["tradeability"]
+            print(f"  Tradeable (>= {t['threshold']}): {t['tradeable']}/{t['scored']} "
+                  f"(mean score {t['mean_score']})")
         print(f"{'='*50}")
 
     elif args.mode == "shadow":
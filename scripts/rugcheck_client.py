@@ -22,6 +22,12 @@ from pathlib import Path
 SCRIPT_DIR = Path(__file__).resolve().parent
 BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
 SIGNALS_DIR = BASE_DIR / "signals" / "rugcheck"
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import breaker_registry
+import enrichment_cache
+import http_transport
+import rate_limiter
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -30,13 +36,13 @@ BASE_URL = "https://api.rugcheck.xyz"
 
 # Rate limiting — be conservative, no documented limits
 MAX_CALLS_PER_MINUTE = 20
-_call_timestamps: list[float] = []
+_bucket = rate_limiter.bucket("rugcheck", MAX_CALLS_PER_MINUTE, 60)
 
-# Circuit breaker
-_consecutive_failures = 0
-_circuit_open_until = 0.0
+# Circuit breaker (shared across processes — breaker_registry)
 CIRCUIT_BREAKER_THRESHOLD = 3
 CIRCUIT_BREAKER_COOLDOWN = 300
+_breaker = breaker_registry.breaker("rugcheck_api", trip_consecutive=CIRCUIT_BREAKER_THRESHOLD,
+                                    cooldown_s=CIRCUIT_BREAKER_COOLDOWN)
 
 
 def _log(msg: str):
@@ -47,41 +53,27 @@ def _log(msg: str):
 # Rate limiter
 # ---------------------------------------------------------------------------
 def _rate_limit():
-    global _call_timestamps
-    now = time.time()
-    _call_timestamps = [t for t in _call_timestamps if now - t < 60]
-    if len(_call_timestamps) >= MAX_CALLS_PER_MINUTE:
-        sleep_for = 60 - (now - _call_timestamps[0]) + 1.0
-        if sleep_for > 0:
-            _log(f"Rate limit: sleeping {sleep_for:.1f}s")
-            time.sleep(sleep_for)
-    _call_timestamps.append(time.time())
+    # Shared across processes; raises rate_limiter.RateLimited when this caller's
+    # priority can't wait for budget (hot path fails fast instead of stalling)
+    _bucket.limit()
 
 
 # ---------------------------------------------------------------------------
 # Circuit breaker
 # ---------------------------------------------------------------------------
 def _check_circuit():
-    global _circuit_open_until
-    if _consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD:
-        if time.time() < _circuit_open_until:
-            remaining = int(_circuit_open_until - time.time())
-            raise RuntimeError(f"Circuit breaker OPEN — {remaining}s remaining")
-        _reset_circuit()
+    remaining = _breaker.open_for_s()
+    if remaining:
+        raise RuntimeError(f"Circuit breaker OPEN — {remaining:.0f}s remaining")
 
 
 def _record_failure():
-    global _consecutive_failures, _circuit_open_until
-    _consecutive_failures += 1
-    if _consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD:
-        _circuit_open_until = time.time() + CIRCUIT_BREAKER_COOLDOWN
+    if _breaker.record_failure():
         _log(f"Circuit breaker OPENED — pausing API calls for {CIRCUIT_BREAKER_COOLDOWN}s")
 
 
 def _reset_circuit():
-    global _consecutive_failures, _circuit_open_until
-    _consecutive_failures = 0
-    _circuit_open_until = 0.0
+    _breaker.record_success()
 
 
 # ---------------------------------------------------------------------------
@@ -92,12 +84,13 @@ def _get(path: str, params: dict | None = None) -> dict | list:
     _rate_limit()
     url = f"{BASE_URL}{path}"
     try:
-        resp = requests.get(url, params=params, timeout=10,
+        resp = http_transport.get(url, params=params, timeout=10,
                             headers={"accept": "application/json"})
         if resp.status_code == 429:
-            _log("Rate limited (429) — sleeping 5s and retrying once")
-            time.sleep(5)
-            resp = requests.get(url, params=params, timeout=10,
+            # Back off in every process; retry once if this caller can afford the wait
+            _bucket.penalize(rate_limiter.retry_after_s(resp.headers, 5))
+            _bucket.limit()
+            resp = http_transport.get(url, params=params, timeout=10,
                                 headers={"accept": "application/json"})
         resp.raise_for_status()
         _reset_circuit()
@@ -110,6 +103,7 @@ def _get(path: str, params: dict | None = None) -> dict | list:
 # ---------------------------------------------------------------------------
 # Core API functions
 # ---------------------------------------------------------------------------
+@enrichment_cache.cached("rugcheck", provider="rugcheck")
 def get_token_summary(mint_address: str) -> dict:
     """GET /v1/tokens/{mint}/report/summary
     Returns: score, score_normalised (0-100, lower=safer), risks[], lpLockedPct, etc.
@@ -290,6 +284,7 @@ def run_scan():
 # Entry point
 # ---------------------------------------------------------------------------
 if __name__ == "__main__":
+    rate_limiter.set_process_priority("background")  # scans yield budget to decision lookups
     try:
         run_scan()
     except Exception as e:
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader v3.1 — Opt-in Sampling Profiler
+
+Answers "where did the 600 s go?" for router / pipeline / position monitor /
+async queue runs that the watchdog kills or diagnoses from outside.
+
+  - Timer-driven: a daemon thread samples every thread's stack
+    (sys._current_frames) SANAD_PROFILE_HZ times a second. No tracing hooks,
+    so untouched code runs at full speed.
+  - Stacks are aggregated in-process as collapsed stacks
+    ("Thread;file.py:func;file.py:func count" — flamegraph.pl / speedscope
+    input).
+  - Written to logs/profiles/<name>_<UTC start>_<pid>.collapsed only when the
+    run exceeds SANAD_PROFILE_MIN_S; past that, the file is rewritten every
+    SNAPSHOT_INTERVAL_S so a SIGKILLed run still leaves its profile.
+  - Signal-driven: SIGUSR2 writes the current profile immediately (the
+    watchdog sends it before killing a long-running process).
+
+Enable with SANAD_PROFILE=1 (off by default — profile() is a no-op):
+
+    with sampling_profiler.profile("signal_router"):
+        run_router()
+
+    sampling_profiler.latest_profile()       # newest .collapsed file
+    sampling_profiler.summarize(path)        # top self-time frames + hottest stacks
+
+CLI:
+  python3 scripts/sampling_profiler.py [--name signal_router] [--top 15]
+"""
+
+import argparse
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
+PROFILES_DIR = BASE_DIR / "logs" / "profiles"
+
+ENABLED = os.environ.get("SANAD_PROFILE", "0") == "1"
+SAMPLE_HZ = float(os.environ.get("SANAD_PROFILE_HZ", "50"))
+MIN_DURATION_S = float(os.environ.get("SANAD_PROFILE_MIN_S", "60"))
+SNAPSHOT_INTERVAL_S = 30
+MAX_DEPTH = 64
+KEEP_PROFILES = 50
+
+
+def _log(msg: str):
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] [PROFILER] {msg}", flush=True)
+
+
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Background stack sampler for the current process."""
+
+    def __init__(self, name: str, hz: float = None, min_duration_s: float = None, out_dir: Path = None):
+        self.name = name
+        self.interval = 1.0 / (hz or SAMPLE_HZ)
+        self.min_duration_s = MIN_DURATION_S if min_duration_s is None else min_duration_s
+        self.out_dir = Path(out_dir or PROFILES_DIR)
+        self.stacks = Counter()
+        self.samples = 0
+        self.path = None
+        self._lock = threading.RLock()  # SIGUSR2 write may interrupt a write on the main thread
+        self._stop = threading.Event()
+        self._thread = None
+        self._t0 = None
+        self._last_snapshot = 0.0
+        started = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        self._filename = f"{name}_{started}_{os.getpid()}.collapsed"
+
+    # ── sampling ──
+
+    def start(self):
+        self._t0 = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="sanad-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            self.sample(skip_ident=own)
+            elapsed = time.monotonic() - self._t0
+            if elapsed >= self.min_duration_s and elapsed - self._last_snapshot >= SNAPSHOT_INTERVAL_S:
+                self._last_snapshot = elapsed
+                self.write()
+
+    def sample(self, skip_ident=None):
+        """Take one sample of every thread's stack (except skip_ident)."""
+        names = {t.ident: t.name for t in threading.enumerate()}
+        frames = sys._current_frames()
+        with self._lock:
+            for ident, frame in frames.items():
+                if ident == skip_ident:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def elapsed(self) -> float:
+        return 0.0 if self._t0 is None else time.monotonic() - self._t0
+
+    # ── output ──
+
+    def collapsed(self) -> str:
+        with self._lock:
+            items = sorted(self.stacks.items(), key=lambda kv: kv[1], reverse=True)
+        return "".join(f"{stack} {count}\n" for stack, count in items)
+
+    def write(self) -> Path | None:
+        """(Re)write this run's .collapsed file atomically. Never raises."""
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            path = self.out_dir / self._filename
+            tmp = path.with_suffix(f".tmp.{os.getpid()}")
+            tmp.write_text(self.collapsed())
+            os.replace(tmp, path)
+            self.path = path
+            _prune(self.out_dir)
+            return path
+        except Exception as e:
+            _log(f"{self.name}: failed to write profile: {e}")
+            return None
+
+    def stop(self, force_write: bool = False) -> Path | None:
+        """Stop sampling; write the profile if the run was long enough (or forced)."""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        if self.samples and (force_write or self.elapsed() >= self.min_duration_s):
+            path = self.write()
+            if path:
+                _log(f"{self.name}: {self.samples} samples over {self.elapsed():.0f}s → {path}")
+            return path
+        return None
+
+
+def _prune(out_dir: Path):
+    files = sorted(out_dir.glob("*.collapsed"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in files[KEEP_PROFILES:]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+
+
+# ─────────────────────────────────────────────────────────
+# Entry-point hook
+# ─────────────────────────────────────────────────────────
+_active = None
+
+
+def _on_sigusr2(signum, frame):
+    if _active is not None:
+        _active.write()
+
+
+@contextmanager
+def _profiled(name: str, **kwargs):
+    global _active
+    prof = SamplingProfiler(name, **kwargs).start()
+    prev_active, _active = _active, prof
+    prev_handler = None
+    try:
+        prev_handler = signal.signal(signal.SIGUSR2, _on_sigusr2)
+    except (ValueError, OSError):
+        pass  # not the main thread — timer snapshots still apply
+    try:
+        yield prof
+    finally:
+        _active = prev_active
+        if prev_handler is not None:
+            signal.signal(signal.SIGUSR2, prev_handler)
+        prof.stop()
+
+
+def profile(name: str, enabled: bool = None, **kwargs):
+    """Context manager profiling the enclosed run when SANAD_PROFILE=1 (or enabled=True).
+
+    Also covers sys.exit() inside the block (e.g. the router's SIGALRM handler).
+    """
+    if not (ENABLED if enabled is None else enabled):
+        return nullcontext()
+    return _profiled(name, **kwargs)
+
+
+# ─────────────────────────────────────────────────────────
+# Reading profiles (watchdog diagnostics)
+# ─────────────────────────────────────────────────────────
+
+def latest_profile(name: str = None, out_dir: Path = None) -> Path | None:
+    """Newest .collapsed file (optionally for one entry point)."""
+    out_dir = Path(out_dir or PROFILES_DIR)
+    if not out_dir.exists():
+        return None
+    pattern = f"{name}_*.collapsed" if name else "*.collapsed"
+    files = list(out_dir.glob(pattern))
+    return max(files, key=lambda p: p.stat().st_mtime) if files else None
+
+
+def load_collapsed(path: Path) -> Counter:
+    stacks = Counter()
+    for line in Path(path).read_text().splitlines():
+        stack, _, count = line.rpartition(" ")
+        if stack and count.isdigit():
+            stacks[stack] += int(count)
+    return stacks
+
+
+def summarize(path: Path, top: int = 10) -> str:
+    """Text summary: total samples, top self-time frames, hottest stacks (leaf-most 6 frames)."""
+    stacks = load_collapsed(path)
+    total = sum(stacks.values())
+    if not total:
+        return f"{Path(path).name}: empty profile"
+    self_time = Counter()
+    for stack, count in stacks.items():
+        self_time[stack.rsplit(";", 1)[-1]] += count
+
+    lines = [f"{Path(path).name}: {total} samples"]
+    lines.append("  Top frames (self):")
+    for frame, count in self_time.most_common(top):
+        lines.append(f"    {count / total:6.1%}  {frame}")
+    lines.append("  Hottest stacks:")
+    for stack, count in stacks.most_common(min(top, 5)):
+        frames = stack.split(";")
+        tail = ";".join(frames[-6:])
+        lines.append(f"    {count / total:6.1%}  {'…;' if len(frames) > 6 else ''}{tail}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize the latest sampling profile")
+    parser.add_argument("--name", help="entry point (signal_router, sanad_pipeline, ...)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("path", nargs="?", help="explicit .collapsed file")
+    args = parser.parse_args()
+    path = Path(args.path) if args.path else latest_profile(args.name)
+    if not path:
+        print(f"No profiles in {PROFILES_DIR}")
+        sys.exit(1)
+    print(summarize(path, top=args.top))
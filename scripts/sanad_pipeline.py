@@ -56,13 +56,16 @@ except Exception:
     pass
 
 import yaml
-import requests  # Better timeout handling than urllib
-import binance_client
-try:
-    import notifier
-    HAS_NOTIFIER = True
-except ImportError:
-    HAS_NOTIFIER = False
+import lazy_imports
+import tracing
+
+# Deferred until first use — a run that exits early never pays for them
+requests = lazy_imports.lazy("requests")  # Better timeout handling than urllib
+http_transport = lazy_imports.lazy("http_transport")  # pooled keep-alive sessions
+binance_client = lazy_imports.lazy("binance_client")
+depth_cache = lazy_imports.lazy("depth_cache")
+notifier = lazy_imports.optional("notifier")
+HAS_NOTIFIER = notifier is not None
 
 # v3.0 imports
 from token_profile import (
@@ -73,7 +76,7 @@ from tier_prompts import get_bull_prompt, get_bear_prompt
 
 # Load thresholds
 with open(CONFIG_DIR / "thresholds.yaml", "r") as f:
-    THRESHOLDS = yaml.safe_load(f)
+    THRESHOLDS = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))  # libyaml when available
 
 
 # ─────────────────────────────────────────────
@@ -267,9 +270,6 @@ PIPELINE_PROMPT = _load_prompt("pipeline.md")
 # LLM CALLER (Direct APIs + OpenRouter Fallback)
 # ─────────────────────────────────────────────
 
-import urllib.request
-import urllib.parse
-
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
@@ -308,7 +308,7 @@ def call_claude(system_prompt, user_message, model="claude-haiku-4-5-20251001",
 
     try:
         # Use requests with proper timeout (connect + read)
-        response = requests.post(
+        response = http_transport.post(
             url,
             headers=headers,
             json={
@@ -386,7 +386,7 @@ def call_openai(system_prompt, user_message, model="gpt-5.2", max_tokens=2000, s
 
     try:
         # Use requests with proper timeout (connect + read)
-        response = requests.post(
+        response = http_transport.post(
             url,
             headers=headers,
             json={
@@ -455,7 +455,7 @@ def call_openai_responses(system_prompt, user_message, model="gpt-5.2-pro", max_
     }
 
     try:
-        response = requests.post(
+        response = http_transport.post(
             url,
             headers=headers,
             json={
@@ -544,7 +544,7 @@ def call_perplexity(query, model="sonar-pro", stage="unknown", token_symbol=""):
 
     try:
         # Use requests with proper timeout (connect + read)
-        response = requests.post(
+        response = http_transport.post(
             url,
             headers=headers,
             json={
@@ -622,7 +622,7 @@ def _fallback_openrouter(system_prompt, user_message, model, max_tokens=2000, st
 
     try:
         # Use requests with proper timeout (connect + read)
-        response = requests.post(
+        response = http_transport.post(
             url,
             headers=headers,
             json={
@@ -714,7 +714,9 @@ def stage_1_signal_intake(signal):
             return None, f"Missing required field: {field}"
 
     # Add metadata
-    signal["correlation_id"] = str(uuid.uuid4())[:12]
+    # Keep an upstream correlation_id (router trace id); otherwise join the current trace
+    signal["correlation_id"] = (signal.get("correlation_id") or tracing.current_trace_id()
+                                or str(uuid.uuid4())[:12])
     signal["pipeline_start"] = datetime.now(timezone.utc).isoformat()
 
     if "timestamp" not in signal:
@@ -756,6 +758,14 @@ def enrich_signal_with_onchain_data(signal: dict) -> dict:
     if not address or chain != "solana":
         return signal
 
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import enrichment_cache
+
+    def _pace():
+        # Space out live provider calls; lookups served from the enrichment cache need no spacing
+        if not enrichment_cache.last_lookup_cached():
+            _time.sleep(2)
+
     print("  [2pre] Enriching with on-chain verification data...")
     onchain_evidence = {}
 
@@ -776,7 +786,7 @@ def enrich_signal_with_onchain_data(signal: dict) -> dict:
         onchain_evidence["rugcheck"] = {"error": str(e)}
         print(f"    RugCheck: error — {e}")
 
-    _time.sleep(2)  # respect Birdeye rate limits
+    _pace()  # respect Birdeye rate limits
 
     # 2. Birdeye security + overview + creation
     try:
@@ -791,7 +801,7 @@ def enrich_signal_with_onchain_data(signal: dict) -> dict:
             }
             print(f"    Birdeye security: top10={onchain_evidence['birdeye_security']['top10_holder_pct']}%")
 
-        _time.sleep(2)
+        _pace()
 
         overview = get_token_overview(address)
         if overview:
@@ -805,7 +815,7 @@ def enrich_signal_with_onchain_data(signal: dict) -> dict:
             }
             print(f"    Birdeye overview: holders={overview.get('holder')}, liq=${overview.get('liquidity', 0):,.0f}")
 
-        _time.sleep(2)
+        _pace()
 
         creation = get_token_creation_info(address)
         if creation:
@@ -1186,7 +1196,8 @@ Return your analysis as valid JSON with these exact keys:
     rag_context = ""
     try:
         from vector_db import query_regime_weighted
-        similar = query_regime_weighted(f"{signal['token']} {signal.get('signal_type', '')}", n_results=3)
+        similar = query_regime_weighted(f"{signal['token']} {signal.get('signal_type', '')}", n_results=3,
+                                        signal=signal)
         if similar:
             rag_lines = []
             for s in similar:
@@ -1395,14 +1406,15 @@ def stage_3_strategy_match(signal, sanad_result, profile=None):
     if not available:
         return None, "No strategies available"
 
-    # ── Get current market regime ──
+    # ── Get market regime for this signal's cluster (precomputed, no I/O) ──
     regime_tag = "UNKNOWN"
     regime_data = {}
     try:
-        from regime_classifier import get_current_regime
-        regime_data = get_current_regime()
+        from regime_classifier import get_regime, cluster_for
+        regime_data = get_regime(signal)
         regime_tag = regime_data.get("regime_tag", "UNKNOWN")
-        print(f"  Market Regime: {regime_tag} (confidence: {regime_data.get('confidence', 0):.0%})")
+        print(f"  Market Regime: {regime_tag} [{cluster_for(signal)}] "
+              f"(confidence: {regime_data.get('confidence', 0):.0%})")
         implications = regime_data.get("implications", {})
         if implications.get("notes"):
             for note in implications["notes"][:2]:
@@ -2169,8 +2181,9 @@ def stage_6_policy_engine(signal, sanad_result, strategy_result, bull_result, be
         print(f"  Using signal price: ${current_price:,.6f}")
         print(f"  Estimated slippage: {slippage:.1f} bps (liquidity ${liquidity_usd:,.0f})")
     else:
-        # CEX: Use Binance API for price/slippage/spread
-        current_price = binance_client.get_price(symbol)
+        # CEX: price/slippage/spread all from one Binance depth snapshot
+        book = depth_cache.get_book(symbol, need_usd=strategy_result.get("position_usd", 200))
+        current_price = book.mid if book else binance_client.get_price(symbol)
         
         # Fallback if Binance unavailable (circuit breaker)
         if not current_price or current_price <= 0:
@@ -2186,8 +2199,8 @@ def stage_6_policy_engine(signal, sanad_result, strategy_result, bull_result, be
             spread = 20    # 0.2% conservative spread
         else:
             # Normal path: Binance API available
-            slippage = binance_client.estimate_slippage_bps(symbol, "BUY", strategy_result.get("position_usd", 200))
-            spread = binance_client.get_spread_bps(symbol)
+            slippage = book.slippage_bps("BUY", strategy_result.get("position_usd", 200)) if book else None
+            spread = book.spread_bps() if book else None
 
     decision_packet = {
         "token": {
@@ -2394,12 +2407,18 @@ def stage_7_execute(signal, sanad_result, strategy_result, bull_result, bear_res
         
         quantity = position_usd / current_price
 
-        # Partial fill simulation
+        # Partial fill simulation (walks the Binance book when the token trades there)
         try:
             from partial_fill_sim import simulate_fill
+            import venue_detector
+            venue_info = venue_detector.detect_venue(decision_record.get("token_profile", {}), signal)
+            book = None
+            if not venue_info["is_dex"] and venue_info["exchange"] == "binance":
+                book = depth_cache.get_book(symbol, need_usd=position_usd)
             fill_result = simulate_fill(
                 order_size_usd=position_usd,  # Use adjusted position_usd (may be micro-sized for REVISE)
                 liquidity_usd=signal.get("volume_24h", 1000000) / 24,
+                book=book,
             )
             if fill_result.get("fill_pct", 1.0) < 0.5:
                 # Less than 50% fill expected — skip trade
@@ -2712,7 +2731,7 @@ def _add_position(signal, strategy_result, order, sanad_result, bull_result=None
             "entry_price": order["price"],
             "current_price": order["price"],
             "quantity": order["quantity"],
-            "position_usd": strategy_result.get("position_usd", 0),
+            "position_usd": round(order["quantity"] * order["price"], 2),  # what filled, not what was sized
             "stop_loss_pct": _calc_stop_pct_with_strategy(order["price"], bull_result, strategy_result),
             "take_profit_pct": _calc_tp_pct_with_strategy(order["price"], bull_result, strategy_result),
             "bull_stop_loss": bull_result.get("stop_loss", "N/A") if bull_result else "N/A",
@@ -3118,15 +3137,16 @@ def _log_decision(record):
 
 
 def _sync_to_supabase(record):
-    """Sync decision to Supabase decision_packets table."""
+    """Queue decision for Supabase (local outbox; supabase_shipper delivers it)."""
     try:
         import supabase_client
-        supabase_client.log_event(
+        queued = supabase_client.log_event(
             event_type="DECISION",
             payload=record,
             correlation_id=record.get("correlation_id", ""),
         )
-        print("  Decision synced to Supabase")
+        if queued:
+            print(f"  Decision queued for Supabase (outbox seq {queued['seq']})")
     except Exception as e:
         print(f"  WARNING: Supabase sync failed: {e}")
 
@@ -3150,24 +3170,37 @@ def run_pipeline(signal):
     Fail-closed at every stage.
     Returns the full decision record.
     """
+    with tracing.span("pipeline.run", correlation_id=signal.get("correlation_id"),
+                      token=signal.get("token")) as sp:
+        result = _run_pipeline(signal)
+        sp.set(decision_id=result.get("decision_id"), final_action=result.get("final_action"),
+               stage=result.get("stage"))
+    return result
+
+
+def _run_pipeline(signal):
+    """run_pipeline body; one trace span per stage."""
     _funnel("signals_ingested")
     print("\n" + "=" * 60)
     print("SANAD TRADER v3.0 — INTELLIGENCE PIPELINE")
     print("=" * 60)
 
     # Stage 1: Signal Intake
-    signal, error = stage_1_signal_intake(signal)
+    with tracing.span("pipeline.stage_1_intake"):
+        signal, error = stage_1_signal_intake(signal)
     if error:
         print(f"\nPIPELINE BLOCKED at Stage 1: {error}")
         return {"final_action": "REJECT", "stage": 1, "reason": error}
 
     # Stage 1.5a: Paper mode fast-track for high-confidence corroborated signals
-    fast_track_result = _check_fast_track(signal)
+    with tracing.span("pipeline.fast_track"):
+        fast_track_result = _check_fast_track(signal)
     if fast_track_result:
         return fast_track_result
 
     # Stage 1.5b: Pre-Sanad deterministic reject (saves Sanad LLM call)
-    pre_reject = _pre_sanad_reject(signal)
+    with tracing.span("pipeline.pre_sanad"):
+        pre_reject = _pre_sanad_reject(signal)
     if pre_reject:
         _funnel("pre_sanad_rejected")
         print(f"\n⛔ PRE-SANAD REJECT: {pre_reject}")
@@ -3182,7 +3215,8 @@ def run_pipeline(signal):
         return {"final_action": "REJECT", "stage": 1.5, "reason": pre_reject}
 
     # Stage 2: Sanad Verification
-    sanad_result, error = stage_2_sanad_verification(signal)
+    with tracing.span("pipeline.stage_2_sanad"):
+        sanad_result, error = stage_2_sanad_verification(signal)
     if error:
         print(f"\nPIPELINE BLOCKED at Stage 2: {error}")
         return {"final_action": "REJECT", "stage": 2, "reason": error}
@@ -3216,37 +3250,43 @@ def run_pipeline(signal):
         return {"final_action": "REJECT", "stage": 2, "reason": f"Sanad BLOCK ({reason})"}
 
     # Stage 2.5: Token Profile & Classification (v3.0)
-    profile, error = stage_2_5_token_profile(signal, sanad_result)
+    with tracing.span("pipeline.stage_2_5_profile"):
+        profile, error = stage_2_5_token_profile(signal, sanad_result)
     if error:
         print(f"\nPIPELINE BLOCKED at Stage 2.5: {error}")
         return {"final_action": "REJECT", "stage": 2.5, "reason": error}
 
     # Stage 3: Strategy Match
-    strategy_result, error = stage_3_strategy_match(signal, sanad_result, profile)
+    with tracing.span("pipeline.stage_3_strategy"):
+        strategy_result, error = stage_3_strategy_match(signal, sanad_result, profile)
     if error:
         print(f"\nPIPELINE BLOCKED at Stage 3: {error}")
         return {"final_action": "REJECT", "stage": 3, "reason": error}
 
     # Stage 4: Bull/Bear Debate
-    bull_result, bear_result, error = stage_4_debate(signal, sanad_result, strategy_result, profile)
+    with tracing.span("pipeline.stage_4_debate"):
+        bull_result, bear_result, error = stage_4_debate(signal, sanad_result, strategy_result, profile)
     if error:
         print(f"\nPIPELINE BLOCKED at Stage 4: {error}")
         return {"final_action": "REJECT", "stage": 4, "reason": error}
 
     # Stage 5: Al-Muhasbi Judge
-    judge_result, error = stage_5_judge(signal, sanad_result, strategy_result, bull_result, bear_result, profile)
+    with tracing.span("pipeline.stage_5_judge"):
+        judge_result, error = stage_5_judge(signal, sanad_result, strategy_result, bull_result, bear_result, profile)
     if error:
         print(f"\nPIPELINE BLOCKED at Stage 5: {error}")
         return {"final_action": "REJECT", "stage": 5, "reason": error}
 
     # Stage 6: Policy Engine
-    policy_result, error = stage_6_policy_engine(signal, sanad_result, strategy_result, bull_result, bear_result, judge_result)
+    with tracing.span("pipeline.stage_6_policy"):
+        policy_result, error = stage_6_policy_engine(signal, sanad_result, strategy_result, bull_result, bear_result, judge_result)
     if error:
         print(f"\nPIPELINE BLOCKED at Stage 6: {error}")
         return {"final_action": "REJECT", "stage": 6, "reason": error}
 
     # Stage 7: Execute / Log
-    decision_record = stage_7_execute(signal, sanad_result, strategy_result, bull_result, bear_result, judge_result, policy_result, profile)
+    with tracing.span("pipeline.stage_7_execute"):
+        decision_record = stage_7_execute(signal, sanad_result, strategy_result, bull_result, bear_result, judge_result, policy_result, profile)
     
     # Hotfix: tolerate tuple return (legacy/alternate code path)
     if isinstance(decision_record, tuple):
@@ -3283,7 +3323,9 @@ if __name__ == "__main__":
             "verified_catalyst": False,
         }
 
-    result = run_pipeline(signal)
+    from sampling_profiler import profile as _profile  # opt-in: SANAD_PROFILE=1
+    with _profile("sanad_pipeline"):
+        result = run_pipeline(signal)
 
     # Print summary
     print(f"\n{'='*60}")
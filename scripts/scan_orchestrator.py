@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader v3.1 — Scan Orchestrator
+
+Every scanner (Birdeye, DexScreener, CoinGecko, meme radar, smart money,
+majors, Binance listings) used to be its own cron process: each paid
+interpreter startup, built its own rate-limiter buckets, breakers and
+enrichment cache, and a full multi-source sweep took the sum of every
+provider's latency.
+
+One sweep now runs all of them concurrently in one process:
+
+  - Scanners run through job_supervisor.JobSupervisor with isolation="thread"
+    (one worker per scanner): same job_lease, soft timeout, job_runs metrics
+    and cron_health.json entry as a supervised job, runner="sweep".
+  - They share this process's rate_limiter buckets, breaker_registry
+    breakers and enrichment_cache (concurrent misses for the same token are
+    coalesced), all at "background" priority.
+  - detail_pool.fan_out(): per-token detail fetches inside a scanner (Birdeye
+    overview + security + creation, DexScreener pair lookups) run concurrently
+    on one shared detail pool, carrying the caller's rate_limiter priority.
+
+A sweep finishes in the time of the slowest scanner, not the sum.
+
+Usage:
+  python3 scripts/scan_orchestrator.py                       # full sweep
+  python3 scripts/scan_orchestrator.py --only birdeye_scanner,coingecko_scanner
+  job_supervisor JOBS "scan_sweep" → scan_orchestrator:run
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+from detail_pool import fan_out, DETAIL_WORKERS  # scan_orchestrator.fan_out stays importable
+
+SCAN_TIMEOUT_S = 240
+
+# name = the job_lease / cron_health name the standalone cron entry used
+SCANNERS = [
+    {"name": "birdeye_scanner", "target": "birdeye_client:run_scan"},
+    {"name": "birdeye_dex_scanner", "target": "dex_scanner:main"},
+    {"name": "dex_scanner", "target": "dexscreener_client:run_scan"},
+    {"name": "coingecko_scanner", "target": "coingecko_client:run_scan"},
+    {"name": "meme_radar", "target": "meme_radar:run_radar"},
+    {"name": "smart_money_scanner", "target": "smart_money_scanner:run"},
+    {"name": "majors_scanner", "target": "majors_scanner:run_scanner"},
+    {"name": "binance_new_listings", "target": "binance_new_listings:check_new_listings"},
+]
+
+
+def _log(msg: str):
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] [SCAN] {msg}", flush=True)
+
+
+# ─────────────────────────────────────────────────────────
+# Sweep
+# ─────────────────────────────────────────────────────────
+def sweep(names=None, scanners=None, db_path=None) -> dict:
+    """Run every scanner (or those in `names`) concurrently → {name: run record}."""
+    import job_supervisor
+
+    table = [dict({"timeout_s": SCAN_TIMEOUT_S, "priority": "background"}, **s)
+             for s in (scanners if scanners is not None else SCANNERS)
+             if not names or s["name"] in names]
+    if not table:
+        return {}
+    sup = job_supervisor.JobSupervisor(jobs=table, max_workers=len(table), isolation="thread",
+                                       db_path=db_path)
+    sup.preload()  # import sequentially; workers only run
+    wall0 = time.monotonic()
+    futures = {name: sup.pool.submit(sup.run_job, name, "sweep") for name in sup.jobs}
+    runs = {}
+    for name, future in futures.items():
+        try:
+            runs[name] = future.result()
+        except Exception as e:  # run_job itself failed (lease/metrics); keep the sweep going
+            runs[name] = {"status": "error", "detail": f"{type(e).__name__}: {e}", "wall_ms": 0.0}
+    sup.pool.shutdown(wait=False)
+
+    wall_ms = (time.monotonic() - wall0) * 1000
+    ok = sum(1 for r in runs.values() if r["status"] == "ok")
+    slowest = max(runs, key=lambda n: runs[n]["wall_ms"])
+    _log(f"sweep: {ok}/{len(runs)} ok in {wall_ms:.0f}ms "
+         f"(scanners sum {sum(r['wall_ms'] for r in runs.values()):.0f}ms, slowest {slowest})")
+    for name, r in runs.items():
+        if r["status"] != "ok":
+            _log(f"  {name}: {r['status']} — {r.get('detail')}")
+    return runs
+
+
+def run():
+    """Job entry point: full sweep; False (job error) when no scanner succeeded."""
+    runs = sweep()
+    return False if runs and all(r["status"] != "ok" for r in runs.values()) else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every scanner concurrently in one process")
+    parser.add_argument("--only", help="Comma-separated scanner names (default: all)")
+    args = parser.parse_args()
+
+    import rate_limiter
+    rate_limiter.set_process_priority("background")  # scans yield budget to decision lookups
+    names = [n.strip() for n in args.only.split(",")] if args.only else None
+    runs = sweep(names)
+    if not runs:
+        _log(f"no scanners selected (known: {', '.join(s['name'] for s in SCANNERS)})")
+        return 2
+    return 0 if any(r["status"] == "ok" for r in runs.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -44,6 +44,9 @@ try:
 except ImportError:
     HAS_V31_HOT_PATH = False
 
+import tracing  # hot-path spans (see tracing.py)
+import regime_classifier  # precomputed regime tags, no I/O
+
 # Stablecoin filter (backup layer)
 try:
     from stablecoin_filter import is_stablecoin
@@ -78,7 +81,7 @@ import yaml as _yaml
 _THRESHOLDS_PATH = SCRIPT_DIR.parent / "config" / "thresholds.yaml"
 try:
     with open(_THRESHOLDS_PATH) as _f:
-        _cfg = _yaml.safe_load(_f)
+        _cfg = _yaml.load(_f, Loader=getattr(_yaml, "CSafeLoader", _yaml.SafeLoader))  # libyaml when available
     MAX_POSITIONS = _cfg.get("risk", {}).get("max_positions", 5)
     MAX_DAILY_RUNS = _cfg.get("budget", {}).get("daily_pipeline_runs", 50)
     COOLDOWN_HOURS = _cfg.get("policy_gates", {}).get("cooldown_minutes", 30) / 60  # now 30min default
@@ -216,6 +219,34 @@ def _latest_signal_file(directory: Path, exclude_names: set[str] | None = None)
 # ---------------------------------------------------------------------------
 # Load system state
 # ---------------------------------------------------------------------------
+def _load_pumpfun_signals(max_age_min: float = 30, limit: int = 10) -> list[dict]:
+    """Pump.fun migrations from the last `max_age_min`: handed off by pumpfun_monitor through
+    the state_store router inbox, plus signal files (monitor fallback when the DB is busy)."""
+    signals = []
+    try:
+        for age_s, sig in state_store.get_router_signals("pumpfun", max_age_min * 60, limit):
+            sig["_source_age_min"] = age_s / 60
+            signals.append(sig)
+    except Exception as e:
+        _log(f"Pump.fun inbox read error: {e}")
+    pf_dir = BASE_DIR / "signals" / "pumpfun"
+    if pf_dir.exists():
+        seen = {s.get("mint") for s in signals}
+        pf_files = sorted(pf_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for pf_file in pf_files[:limit]:
+            age_min = (datetime.now(timezone.utc) - datetime.fromtimestamp(pf_file.stat().st_mtime, tz=timezone.utc)).total_seconds() / 60
+            if age_min < max_age_min:
+                sig = json.loads(pf_file.read_text())
+                if sig.get("mint") and sig.get("mint") in seen:
+                    continue
+                sig["_source_age_min"] = age_min
+                signals.append(sig)
+    for sig in signals:
+        sig["_origin"] = "pumpfun"
+        sig.setdefault("source", "pumpfun_monitor")
+    return signals
+
+
 def _load_open_tokens() -> set[str]:
     """Load open tokens from SQLite (v3.1 source of truth)."""
     try:
@@ -501,13 +532,12 @@ def _score_signal(signal: dict, age_minutes: float, is_cross_source: bool) -> in
     except Exception:
         pass  # Sentiment unavailable — no penalty
 
-    # ── UCB1 SOURCE WEIGHTING (from SQLite — single source of truth) ──
+    # ── UCB1 SOURCE WEIGHTING (SQLite source_ucb_stats via in-memory bandit_stats) ──
     # Sources with better track records get a scoring bonus
     try:
-        from state_store import get_source_ucb_stats
+        import bandit_stats
         source_key = signal.get("source", "unknown")
-        ucb_stats = get_source_ucb_stats()
-        src = ucb_stats.get(source_key)
+        src = bandit_stats.get_service().source_stats(source_key)
         if src and src["n"] > 0:
             win_rate = src["reward_sum"] / src["n"]
             ucb1_score = win_rate * 100
@@ -654,7 +684,8 @@ def run_router():
     
     error_occurred = False
     try:
-        _run_router_impl()
+        with tracing.span("router.cycle"):
+            _run_router_impl()
     except Exception as e:
         error_occurred = True
         if HAS_LEASE:
@@ -708,6 +739,7 @@ def _run_router_impl():
         return
 
     # --- Load signals ---
+    load_span = tracing.start_span("router.load_signals")
     cg_path, cg_signals, cg_age = _latest_signal_file(SIGNALS_CG, exclude_names={"global_latest.json"})
     dex_path, dex_signals, dex_age = _latest_signal_file(SIGNALS_DEX)
     be_path, be_signals, be_age = _latest_signal_file(SIGNALS_BE)
@@ -756,21 +788,10 @@ def _run_router_impl():
 
     # ── Source 6: Pump.fun Migrations ──
     try:
-        pf_dir = BASE_DIR / "signals" / "pumpfun"
-        if pf_dir.exists():
-            pf_files = sorted(pf_dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
-            for pf_file in pf_files[:10]:  # Last 10 signal files
-                age_min = (datetime.now(timezone.utc) - datetime.fromtimestamp(pf_file.stat().st_mtime, tz=timezone.utc)).total_seconds() / 60
-                if age_min < 30:  # Only signals from last 30 minutes
-                    pf_signal = json.loads(pf_file.read_text())
-                    pf_signal["_source_age_min"] = age_min
-                    pf_signal["_origin"] = "pumpfun"
-                    if "source" not in pf_signal:
-                        pf_signal["source"] = "pumpfun_monitor"
-                    all_signals.append(pf_signal)
-            pf_count = sum(1 for s in all_signals if s.get("_origin") == "pumpfun")
-            if pf_count:
-                _log(f"Pump.fun: {pf_count} migration signals loaded")
+        pf_signals = _load_pumpfun_signals()
+        all_signals.extend(pf_signals)
+        if pf_signals:
+            _log(f"Pump.fun: {len(pf_signals)} migration signals loaded")
     except Exception as e:
         _log(f"Pump.fun signal load error: {e}")
 
@@ -813,6 +834,7 @@ def _run_router_impl():
                 _log(f"Telegram sniffer: {tg_count} signals loaded")
     except Exception as e:
         _log(f"Telegram sniffer signal load error: {e}")
+    load_span.set(signals=len(all_signals)).end()
 
     if not all_signals:
         _log("No actionable signals — no recent data from either source.")
@@ -959,6 +981,7 @@ def _run_router_impl():
     filtered_reasons: list[str] = []
     candidates: list[tuple[dict, float]] = []  # (signal, score)
 
+    score_span = tracing.start_span("router.score", signals=len(all_signals))
     for s in all_signals:
         token = (s.get("token") or "").upper()
         shash = _signal_hash(s)
@@ -979,6 +1002,7 @@ def _run_router_impl():
         age = s.get("_source_age_min", 30)
         score = _score_signal(s, age, is_cross) + regime_adjustment
         candidates.append((s, score))
+    score_span.set(candidates=len(candidates)).end()
 
     # ── Bear market quality filter (live mode only) ──
     # In paper mode, let memes through to learn which ones get correctly rejected
@@ -1212,7 +1236,14 @@ def _run_router_impl():
     state["last_run"] = now_str
     _save_json_atomic(ROUTER_STATE_PATH, state)
     
+    signal_span = None
     for batch_idx, (selected, selected_score) in enumerate(batch):
+        # One span per batch item; ended here on `continue`, or after the loop
+        if signal_span is not None:
+            signal_span.end()
+        signal_span = tracing.start_span("router.signal", token=selected.get("token", "?"),
+                                         score=selected_score)
+
         # Check budget before each run
         if state.get("daily_pipeline_runs", 0) >= MAX_DAILY_RUNS:
             _log(f"Daily pipeline budget exhausted after batch item {batch_idx}. Stopping.")
@@ -1228,7 +1259,8 @@ def _run_router_impl():
         try:
             # Enrich signal with real-time market data before scoring
             from market_data_enricher import enrich_signal
-            selected = enrich_signal(selected)
+            with tracing.span("router.enrich.market_data"):
+                selected = enrich_signal(selected)
             
             from tradeability_scorer import score_tradeability
             t_score = score_tradeability(selected)
@@ -1278,6 +1310,7 @@ def _run_router_impl():
                         cross_labels.append(f"Birdeye {be_type.lower().replace('_', ' ')}")
 
         pipeline_signal = _to_pipeline_signal(selected, cross_labels)
+        pipeline_signal["correlation_id"] = signal_span.trace_id or pipeline_signal.get("correlation_id")
         pipeline_signal["router_score"] = selected_score  # Pass to pipeline for tier routing
 
         # --- Validate required fields before sending to pipeline ---
@@ -1325,7 +1358,8 @@ def _run_router_impl():
         if pipeline_signal.get("contract_address") or pipeline_signal.get("address") or pipeline_signal.get("token_address"):
             try:
                 from solscan_client import enrich_signal_with_solscan
-                pipeline_signal = enrich_signal_with_solscan(pipeline_signal)
+                with tracing.span("router.enrich.solscan"):
+                    pipeline_signal = enrich_signal_with_solscan(pipeline_signal)
                 _log(f"Solscan enrichment applied: holders={pipeline_signal.get('solscan_holder_count', 'N/A')}, verified={pipeline_signal.get('solscan_verified', False)}")
                 
                 # Re-calculate corroboration with Solscan as 5th source
@@ -1391,37 +1425,17 @@ def _run_router_impl():
             
             runtime_state = {
                 "min_score": _min_score,
-                "regime_tag": "NEUTRAL",  # TODO: integrate regime_classifier
+                "regime_tag": regime_classifier.get_regime_tag(default="NEUTRAL"),
                 "kill_switch": False,
             }
             
-            # Load UCB1 source grades from DB (replaces JSON file reads)
+            # Load UCB1 source grades + Thompson state (cached; reloaded only when
+            # learning_loop bumps meta.bandit_stats_version)
             try:
-                from state_store import get_source_ucb_stats, get_bandit_stats
-                
-                # UCB1 grades: compute from source_ucb_stats table
-                ucb_raw = get_source_ucb_stats()
-                ucb1_grades = {}
-                for src_id, stats in ucb_raw.items():
-                    n = stats["n"]
-                    if n == 0:
-                        ucb1_grades[src_id] = {"grade": "C", "score": 50, "cold_start": True}
-                    else:
-                        win_rate = stats["reward_sum"] / n
-                        # UCB1 score: win_rate * 100 (simplified — no exploration bonus in hot path)
-                        score = win_rate * 100
-                        grade = "A" if score >= 80 else "B" if score >= 60 else "C" if score >= 40 else "D"
-                        ucb1_grades[src_id] = {"grade": grade, "score": score, "cold_start": False, "n": n}
-                runtime_state["ucb1_grades"] = ucb1_grades
-                
-                # Thompson state: from bandit_strategy_stats table
-                bandit_raw = get_bandit_stats()
-                thompson_state = {}
-                for (strat_id, regime), stats in bandit_raw.items():
-                    thompson_state.setdefault(strat_id, {})[regime] = {
-                        "alpha": stats["alpha"], "beta": stats["beta"], "n": stats["n"]
-                    }
-                runtime_state["thompson_state"] = thompson_state
+                import bandit_stats
+                stats_svc = bandit_stats.get_service()
+                runtime_state["ucb1_grades"] = stats_svc.ucb1_grades()
+                runtime_state["thompson_state"] = stats_svc.thompson_state()
                 
             except Exception as e:
                 _log(f"WARNING: Failed to load DB stats for hot path: {e}")
@@ -1602,6 +1616,10 @@ def _run_router_impl():
             except Exception as e:
                 _log(f"Counterfactual recording failed: {e}")
 
+        signal_span.set(result=pipeline_action)
+    if signal_span is not None:
+        signal_span.end()
+
     _save_json_atomic(ROUTER_STATE_PATH, state)
 
     # cron_health now updated in outer wrapper (finally block)
@@ -1645,8 +1663,12 @@ if __name__ == "__main__":
     signal.alarm(600)  # 10 minutes total for entire router run
     
     _update_heartbeat("started")
+    import rate_limiter
+    rate_limiter.set_process_priority("hot")  # decision lookups pre-empt background scans
+    from sampling_profiler import profile as _profile  # opt-in: SANAD_PROFILE=1
     try:
-        run_router()
+        with _profile("signal_router"):
+            run_router()
         signal.alarm(0)  # Cancel alarm if completed successfully
         _update_heartbeat("finished")
     except Exception as e:
@@ -3,7 +3,8 @@
 Smoke test: Import every architectural symbol from v3.0 Knowledge Base.
 Run after any refactor to catch import regressions immediately.
 
-Usage: python3 smoke_imports.py
+Usage: python3 smoke_imports.py              # symbols + import-time budget
+       python3 smoke_imports.py --importtime # import-time budget only
 """
 import sys
 
@@ -26,6 +27,98 @@ def assert_len(lst, expected):
 def assert_eq(actual, expected):
     assert actual == expected, f"Expected {expected}, got {actual}"
 
+
+# ── Import-time benchmark (python -X importtime per entry point) ──
+# Budget = cumulative import of the entry module, best of IMPORT_RUNS fresh
+# interpreters, excluding interpreter/site startup. ~3x measured on the VPS;
+# scale with SANAD_IMPORT_BUDGET_SCALE on slower hosts.
+IMPORT_BUDGET_MS = {
+    "signal_router": 300,
+    "sanad_pipeline": 350,
+    "fast_decision_engine": 200,
+    "price_snapshot": 150,
+    "heartbeat": 175,
+    "majors_scanner": 60,
+    "job_supervisor": 125,
+    "vector_db": 60,
+}
+# Heavy modules each entry point must not import at load (see lazy_imports.py)
+MUST_STAY_LAZY = {
+    "signal_router": ["requests", "pandas", "binance_client", "notifier", "chromadb"],
+    "sanad_pipeline": ["requests", "pandas", "binance_client", "notifier", "urllib.request"],
+    "fast_decision_engine": ["requests", "pandas", "binance_client"],
+    "majors_scanner": ["requests", "pandas", "ta"],
+    "job_supervisor": ["requests", "pandas", "binance_client"],
+    "vector_db": ["chromadb", "requests"],
+}
+IMPORT_RUNS = 3
+
+
+def _importtime(entry):
+    """One fresh interpreter → (cumulative_us, [(cumulative_us, module) direct children], loaded modules)."""
+    import json, os, subprocess
+    from pathlib import Path
+    script_dir = Path(__file__).resolve().parent
+    env = dict(os.environ)
+    env.setdefault("SANAD_HOME", str(script_dir.parent))
+    code = (f"import sys, json; sys.path.insert(0, {str(script_dir)!r}); import {entry}; "
+            f"print(json.dumps(sorted(sys.modules)))")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=script_dir,
+                          env=env, capture_output=True, text=True, timeout=120)
+    if proc.returncode != 0:
+        raise RuntimeError((proc.stderr.strip().splitlines() or ["import failed"])[-1])
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # header row
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((int(cumulative), depth, name.strip()))
+
+    # -X importtime is post-order: the entry's imports precede its own row
+    end = max(i for i, (_, depth, name) in enumerate(rows) if depth == 0 and name == entry)
+    start = end
+    while start > 0 and rows[start - 1][1] > 0:
+        start -= 1
+    children = [(us, name) for us, depth, name in rows[start:end] if depth == 1]
+    return rows[end][0], children, set(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+
+def run_import_benchmark():
+    import os
+    scale = float(os.environ.get("SANAD_IMPORT_BUDGET_SCALE", "1"))
+    print("\nImport time (cumulative, best of %d):" % IMPORT_RUNS)
+    for entry, budget_ms in IMPORT_BUDGET_MS.items():
+        def bench(entry=entry, budget_ms=budget_ms * scale):
+            results = [_importtime(entry) for _ in range(IMPORT_RUNS)]
+            total_us, children, loaded = min(results, key=lambda r: r[0])
+            heaviest = sorted(children, reverse=True)[:4]
+            print(f"     {entry:<22} {total_us / 1000:7.1f} ms  (budget {budget_ms:.0f})  "
+                  + ", ".join(f"{name} {us / 1000:.1f}" for us, name in heaviest))
+            eager = [m for m in MUST_STAY_LAZY.get(entry, []) if m in loaded]
+            assert not eager, f"imported eagerly: {', '.join(eager)}"
+            assert total_us / 1000 <= budget_ms, f"{total_us / 1000:.1f} ms > budget {budget_ms:.0f} ms"
+        check(f"{entry} import within budget", bench)
+
+
+def finish():
+    print(f"\n{'='*40}")
+    print(f"PASSED: {PASS}  |  FAILED: {FAIL}")
+    if FAIL > 0:
+        print("⛔ SMOKE TEST FAILED")
+        sys.exit(1)
+    else:
+        print("✅ ALL IMPORTS AND CLASSIFICATIONS VERIFIED")
+        sys.exit(0)
+
+
+if "--importtime" in sys.argv:
+    run_import_benchmark()
+    finish()
+
 print("=== Sanad v3.0 Smoke Import Test ===\n")
 
 # ── token_profile.py ──
@@ -68,6 +161,8 @@ check("index_all_trades()", lambda: __import__('vector_db').index_all_trades)
 check("index_post_mortems()", lambda: __import__('vector_db').index_post_mortems)
 check("query_similar()", lambda: __import__('vector_db').query_similar)
 check("query_regime_weighted()", lambda: __import__('vector_db').query_regime_weighted)
+check("vector_index.LocalVectorIndex", lambda: __import__('vector_index').LocalVectorIndex)
+check("vector_index.embed_text()", lambda: __import__('vector_index').embed_text)
 
 # ── thompson_sampler.py ──
 print("\nthompson_sampler.py:")
@@ -290,12 +385,22 @@ def test_block_no_bull_bear():
 check("Invariant: BLOCK → zero bull/bear/confidence", test_block_no_bull_bear)
 
 
+# ── lazy_imports.py ──
+print("\nlazy_imports.py:")
+
+def test_lazy_module():
+    import lazy_imports
+    sys.modules.pop("colorsys", None)
+    mod = lazy_imports.lazy("colorsys")
+    assert not lazy_imports.is_loaded(mod) and "colorsys" not in sys.modules
+    assert mod.rgb_to_hsv(1, 0, 0) == (0.0, 1.0, 1)
+    assert lazy_imports.is_loaded(mod)
+    assert lazy_imports.optional("no_such_module_sanad") is None
+    assert lazy_imports.lazy("json") is sys.modules["json"]
+check("lazy(): deferred until first attribute, optional() → None when missing", test_lazy_module)
+
+run_import_benchmark()
+
+
 # ── Summary ──
-print(f"\n{'='*40}")
-print(f"PASSED: {PASS}  |  FAILED: {FAIL}")
-if FAIL > 0:
-    print("⛔ SMOKE TEST FAILED")
-    sys.exit(1)
-else:
-    print("✅ ALL IMPORTS AND CLASSIFICATIONS VERIFIED")
-    sys.exit(0)
+finish()
@@ -7,6 +7,7 @@ Fast-fail connections (250ms timeout).
 
 import os
 import sqlite3
+import time
 import json
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
@@ -421,6 +422,214 @@ def init_db(db_path=DB_PATH):
         CREATE INDEX IF NOT EXISTS idx_eval_walkforward_runs_created ON eval_walkforward_runs(created_at);
     """)
 
+    # === Wallet funding graph (sybil detection — shared across tokens) ===
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS wallet_funding (
+            wallet           TEXT PRIMARY KEY,
+            funder           TEXT,
+            first_seen_ts    INTEGER,
+            first_signature  TEXT,
+            resolved_at      TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_wallet_funding_funder ON wallet_funding(funder);
+    """)
+
+    # === Job runs (resident supervisor metrics — see job_supervisor.py) ===
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS job_runs (
+            run_id       INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_name     TEXT NOT NULL,
+            started_at   TEXT NOT NULL,
+            finished_at  TEXT NOT NULL,
+            status       TEXT NOT NULL CHECK (status IN ('ok','error','timeout','skipped')),
+            wall_ms      REAL NOT NULL DEFAULT 0,
+            cpu_ms       REAL NOT NULL DEFAULT 0,
+            runner       TEXT NOT NULL DEFAULT 'supervisor',
+            detail       TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_job_runs_job ON job_runs(job_name, started_at);
+    """)
+
+    # === OMS journal (oms.py) — append-only transitions + materialized current state ===
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS oms_order_events (
+            event_id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            client_order_id   TEXT NOT NULL,
+            order_created_at  TEXT NOT NULL,
+            state             TEXT NOT NULL,
+            at                TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_oms_events_order ON oms_order_events(client_order_id, order_created_at);
+
+        CREATE TABLE IF NOT EXISTS oms_orders (
+            client_order_id  TEXT PRIMARY KEY,
+            symbol           TEXT NOT NULL,
+            side             TEXT NOT NULL,
+            state            TEXT NOT NULL,
+            exchange         TEXT,
+            strategy         TEXT,
+            created_at       TEXT NOT NULL,
+            updated_at       TEXT NOT NULL,
+            order_json       TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_oms_orders_symbol ON oms_orders(symbol, side, state);
+        CREATE INDEX IF NOT EXISTS idx_oms_orders_state ON oms_orders(state);
+
+        CREATE TABLE IF NOT EXISTS oms_intents (
+            client_order_id    TEXT PRIMARY KEY,
+            symbol             TEXT NOT NULL,
+            side               TEXT NOT NULL,
+            quantity           REAL,
+            price              REAL,
+            strategy           TEXT,
+            recorded_at        TEXT NOT NULL,
+            exchange_sent      INTEGER NOT NULL DEFAULT 0,
+            exchange_order_id  TEXT,
+            sent_at            TEXT
+        );
+    """)
+
+    # === Hot-path trace spans (tracing.py) — ring-buffered, flushed per root span ===
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS trace_spans (
+            span_id      TEXT PRIMARY KEY,
+            trace_id     TEXT NOT NULL,
+            parent_id    TEXT,
+            name         TEXT NOT NULL,
+            start_ts     REAL NOT NULL,
+            duration_ms  REAL NOT NULL,
+            status       TEXT NOT NULL DEFAULT 'ok',
+            decision_id  TEXT,
+            attrs_json   TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_trace_spans_name ON trace_spans(name, start_ts);
+        CREATE INDEX IF NOT EXISTS idx_trace_spans_trace ON trace_spans(trace_id);
+        CREATE INDEX IF NOT EXISTS idx_trace_spans_decision ON trace_spans(decision_id);
+    """)
+
+    # === Token enrichment cache (enrichment_cache.py) — shared across scanners/router/pipeline ===
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS enrichment_cache (
+            chain        TEXT NOT NULL,
+            address      TEXT NOT NULL,
+            field_group  TEXT NOT NULL,
+            provider     TEXT,
+            value_json   TEXT,
+            fetched_at   REAL,
+            expires_at   REAL,
+            lease_owner  TEXT,
+            lease_until  REAL,
+            PRIMARY KEY (chain, address, field_group)
+        );
+        CREATE INDEX IF NOT EXISTS idx_enrichment_cache_expires ON enrichment_cache(expires_at);
+
+        CREATE TABLE IF NOT EXISTS enrichment_cache_stats (
+            provider   TEXT NOT NULL,
+            day        TEXT NOT NULL,
+            hits       INTEGER NOT NULL DEFAULT 0,
+            misses     INTEGER NOT NULL DEFAULT 0,
+            coalesced  INTEGER NOT NULL DEFAULT 0,
+            errors     INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (provider, day)
+        );
+    """)
+
+    # === Circuit breaker transitions (breaker_registry.py) — append-only ===
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS circuit_breaker_events (
+            event_id    INTEGER PRIMARY KEY AUTOINCREMENT,
+            component   TEXT NOT NULL,
+            at          TEXT NOT NULL,
+            from_state  TEXT NOT NULL,
+            to_state    TEXT NOT NULL,
+            reason      TEXT,
+            failures    INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_breaker_events_component ON circuit_breaker_events(component, at);
+    """)
+
+    # === Closed OHLCV candles (regime_classifier.py) — fetched once, appended incrementally ===
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS candles (
+            symbol     TEXT NOT NULL,
+            interval   TEXT NOT NULL,
+            open_time  INTEGER NOT NULL,
+            open       REAL NOT NULL,
+            high       REAL NOT NULL,
+            low        REAL NOT NULL,
+            close      REAL NOT NULL,
+            volume     REAL,
+            PRIMARY KEY (symbol, interval, open_time)
+        );
+    """)
+
+    # === HTTP request timing histograms (http_transport.py) — hourly, per host + endpoint ===
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS http_request_stats (
+            host      TEXT NOT NULL,
+            endpoint  TEXT NOT NULL,
+            hour      TEXT NOT NULL,
+            requests  INTEGER NOT NULL DEFAULT 0,
+            errors    INTEGER NOT NULL DEFAULT 0,
+            retries   INTEGER NOT NULL DEFAULT 0,
+            total_ms  REAL NOT NULL DEFAULT 0,
+            max_ms    REAL NOT NULL DEFAULT 0,
+            buckets   TEXT NOT NULL DEFAULT '[]',
+            PRIMARY KEY (host, endpoint, hour)
+        );
+    """)
+
+    # === Router inbox — daemons (pumpfun_monitor) hand signals straight to signal_router ===
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS router_inbox (
+            id          INTEGER PRIMARY KEY AUTOINCREMENT,
+            source      TEXT NOT NULL,
+            token       TEXT,
+            payload     TEXT NOT NULL,
+            created_at  REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_router_inbox_source ON router_inbox(source, created_at);
+    """)
+
+    # === Event outbox — hash-chained events awaiting shipment to Supabase (supabase_client.py) ===
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS event_outbox (
+            seq             INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_type      TEXT NOT NULL,
+            payload         TEXT NOT NULL,
+            correlation_id  TEXT,
+            prev_hash       TEXT NOT NULL,
+            event_hash      TEXT NOT NULL,
+            created_at      TEXT NOT NULL,
+            error           TEXT
+        );
+        CREATE TABLE IF NOT EXISTS event_outbox_acks (
+            sink             TEXT PRIMARY KEY,
+            acked_seq        INTEGER NOT NULL DEFAULT 0,
+            attempts         INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at  REAL NOT NULL DEFAULT 0,
+            last_error       TEXT,
+            updated_at       TEXT
+        );
+    """)
+
+    # Migration: seed OMS tables from oms_orders.json / oms_intents.json if empty
+    if conn.execute("SELECT COUNT(*) FROM oms_orders").fetchone()[0] == 0:
+        orders_json_path = db_path.parent / "oms_orders.json"
+        intents_json_path = db_path.parent / "oms_intents.json"
+        try:
+            if orders_json_path.exists():
+                for order in json.loads(orders_json_path.read_text()).values():
+                    _oms_write_order(conn, order)
+        except Exception as e:
+            print(f"[STATE_STORE] OMS seed from {orders_json_path} failed: {e!r}", flush=True)
+        try:
+            if intents_json_path.exists():
+                for intent in json.loads(intents_json_path.read_text()).get("intents", []):
+                    _oms_write_intent(conn, intent)
+        except Exception as e:
+            print(f"[STATE_STORE] OMS seed from {intents_json_path} failed: {e!r}", flush=True)
+
     # === V4 Fix 6: Seed meta + policy_configs for fresh DB ===
     _seed_row = conn.execute("SELECT value FROM meta WHERE key='active_policy_version'").fetchone()
     if _seed_row is None:
@@ -974,6 +1183,677 @@ def get_bandit_stats(db_path=None):
     }
 
 
+BANDIT_VERSION_KEY = "bandit_stats_version"
+
+
+def bump_bandit_version(conn) -> None:
+    """Increment the bandit stats version inside the caller's transaction.
+
+    Every writer of bandit_strategy_stats / source_ucb_stats calls this in the
+    same transaction as the update, so readers caching the tables (bandit_stats)
+    can invalidate on a single-row meta lookup.
+    """
+    conn.execute("""
+        INSERT INTO meta(key, value, updated_at) VALUES (?, '1', ?)
+        ON CONFLICT(key) DO UPDATE SET
+            value = CAST(meta.value AS INTEGER) + 1,
+            updated_at = excluded.updated_at
+    """, (BANDIT_VERSION_KEY, datetime.now(timezone.utc).isoformat()))
+
+
+def get_bandit_version(db_path=None) -> int:
+    """Current bandit stats version (0 if never written)."""
+    with get_connection(db_path or DB_PATH) as conn:
+        row = conn.execute("SELECT value FROM meta WHERE key=?", (BANDIT_VERSION_KEY,)).fetchone()
+    return int(row["value"]) if row else 0
+
+
+def get_bandit_snapshot(db_path=None) -> dict:
+    """Version + both stat tables read in one transaction (consistent snapshot).
+
+    Returns: {"version": int,
+              "strategies": [(strategy_id, regime_tag, alpha, beta, n), ...],
+              "sources": [(source_id, n, reward_sum), ...]}
+    """
+    with get_connection(db_path or DB_PATH) as conn:
+        conn.execute("BEGIN")
+        row = conn.execute("SELECT value FROM meta WHERE key=?", (BANDIT_VERSION_KEY,)).fetchone()
+        strategies = conn.execute(
+            "SELECT strategy_id, regime_tag, alpha, beta, n FROM bandit_strategy_stats"
+        ).fetchall()
+        sources = conn.execute("SELECT source_id, n, reward_sum FROM source_ucb_stats").fetchall()
+    return {
+        "version": int(row["value"]) if row else 0,
+        "strategies": [tuple(r) for r in strategies],
+        "sources": [tuple(r) for r in sources],
+    }
+
+
+# ============================================================================
+# WALLET FUNDING GRAPH (sybil detection — see funding_graph.py)
+# ============================================================================
+
+_SQL_IN_CHUNK = 500  # Stay well under SQLITE_MAX_VARIABLE_NUMBER
+
+
+def get_wallet_funding(wallets, db_path=None) -> dict:
+    """Load stored funding edges for `wallets`.
+    
+    Returns: dict[wallet] = {"funder": str|None, "first_seen_ts": int|None,
+                             "first_signature": str|None, "resolved_at": str}
+    Wallets never looked up are absent. funder=None with a first_signature means
+    resolved, no external funder; without one, unresolved as of resolved_at.
+    """
+    wallets = list(dict.fromkeys(wallets))
+    out = {}
+    with get_connection(db_path or DB_PATH) as conn:
+        for i in range(0, len(wallets), _SQL_IN_CHUNK):
+            chunk = wallets[i:i + _SQL_IN_CHUNK]
+            rows = conn.execute(
+                f"SELECT wallet, funder, first_seen_ts, first_signature, resolved_at FROM wallet_funding "
+                f"WHERE wallet IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for row in rows:
+                out[row["wallet"]] = {
+                    "funder": row["funder"],
+                    "first_seen_ts": row["first_seen_ts"],
+                    "first_signature": row["first_signature"],
+                    "resolved_at": row["resolved_at"],
+                }
+    return out
+
+
+def upsert_wallet_funding(edges: dict, db_path=None):
+    """Store funding edges: dict[wallet] = {"funder", "first_seen_ts", "first_signature"}."""
+    if not edges:
+        return
+    now = datetime.now(timezone.utc).isoformat()
+    with get_connection(db_path or DB_PATH) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO wallet_funding(wallet, funder, first_seen_ts, first_signature, resolved_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (wallet, e.get("funder"), e.get("first_seen_ts"), e.get("first_signature"), now)
+                for wallet, e in edges.items()
+            ],
+        )
+
+
+def get_funded_wallets(funders, db_path=None) -> dict:
+    """Reverse edges: dict[funder] = [wallets it funded], across every token ever analyzed."""
+    funders = list(dict.fromkeys(f for f in funders if f))
+    out = {}
+    with get_connection(db_path or DB_PATH) as conn:
+        for i in range(0, len(funders), _SQL_IN_CHUNK):
+            chunk = funders[i:i + _SQL_IN_CHUNK]
+            rows = conn.execute(
+                f"SELECT funder, wallet FROM wallet_funding "
+                f"WHERE funder IN ({','.join('?' * len(chunk))}) ORDER BY wallet",
+                chunk,
+            ).fetchall()
+            for row in rows:
+                out.setdefault(row["funder"], []).append(row["wallet"])
+    return out
+
+
+# ============================================================================
+# JOB RUN METRICS (resident supervisor — see job_supervisor.py)
+# ============================================================================
+
+def record_job_run(job_name: str, started_at: str, finished_at: str, status: str,
+                   wall_ms: float, cpu_ms: float, runner: str = "supervisor",
+                   detail: str = None, db_path=None):
+    """Append one job execution (status: ok | error | timeout | skipped)."""
+    with get_connection(db_path or DB_PATH) as conn:
+        conn.execute(
+            "INSERT INTO job_runs(job_name, started_at, finished_at, status, wall_ms, cpu_ms, runner, detail) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_name, started_at, finished_at, status, float(wall_ms), float(cpu_ms), runner,
+             (detail or None) and str(detail)[:500]),
+        )
+
+
+def get_job_stats(since: str = None, db_path=None) -> dict:
+    """Per-job summary since `since` (ISO, default: last 24h).
+    
+    Returns: dict[job_name] = {"last_run", "status", "runs", "failures", "skipped",
+                               "avg_wall_ms", "max_wall_ms", "avg_cpu_ms"}
+    last_run/status come from the latest run regardless of `since`.
+    """
+    if since is None:
+        since = (datetime.now(timezone.utc) - timedelta(hours=24)).isoformat()
+    out = {}
+    with get_connection(db_path or DB_PATH) as conn:
+        latest = conn.execute(
+            "SELECT job_name, finished_at, status FROM job_runs WHERE run_id IN "
+            "(SELECT MAX(run_id) FROM job_runs GROUP BY job_name)"
+        ).fetchall()
+        for row in latest:
+            out[row["job_name"]] = {
+                "last_run": row["finished_at"], "status": row["status"],
+                "runs": 0, "failures": 0, "skipped": 0,
+                "avg_wall_ms": 0.0, "max_wall_ms": 0.0, "avg_cpu_ms": 0.0,
+            }
+        rows = conn.execute(
+            "SELECT job_name, COUNT(*) AS runs, "
+            "SUM(status IN ('error','timeout')) AS failures, "
+            "SUM(status = 'skipped') AS skipped, "
+            "AVG(CASE WHEN status != 'skipped' THEN wall_ms END) AS avg_wall_ms, "
+            "MAX(wall_ms) AS max_wall_ms, "
+            "AVG(CASE WHEN status != 'skipped' THEN cpu_ms END) AS avg_cpu_ms "
+            "FROM job_runs WHERE started_at >= ? GROUP BY job_name",
+            (since,),
+        ).fetchall()
+        for row in rows:
+            stats = out.setdefault(row["job_name"], {"last_run": None, "status": None})
+            stats.update({
+                "runs": row["runs"], "failures": row["failures"] or 0, "skipped": row["skipped"] or 0,
+                "avg_wall_ms": round(row["avg_wall_ms"] or 0.0, 1),
+                "max_wall_ms": round(row["max_wall_ms"] or 0.0, 1),
+                "avg_cpu_ms": round(row["avg_cpu_ms"] or 0.0, 1),
+            })
+    return out
+
+
+# ============================================================================
+# CIRCUIT BREAKER EVENTS (see breaker_registry.py)
+# ============================================================================
+
+def record_breaker_event(component: str, from_state: str, to_state: str, reason: str = None,
+                         failures: int = 0, db_path=None):
+    """Append one breaker transition (closed / open / half_open)."""
+    with get_connection(db_path or DB_PATH) as conn:
+        conn.execute(
+            "INSERT INTO circuit_breaker_events(component, at, from_state, to_state, reason, failures) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (component, datetime.now(timezone.utc).isoformat(), from_state, to_state,
+             (reason or None) and str(reason)[:200], int(failures)),
+        )
+
+
+def get_breaker_events(component: str = None, since: str = None, limit: int = 50, db_path=None) -> list[dict]:
+    """Latest transitions first, optionally for one component / since an ISO timestamp."""
+    query = "SELECT * FROM circuit_breaker_events WHERE 1=1"
+    params = []
+    if component:
+        query += " AND component = ?"
+        params.append(component)
+    if since:
+        query += " AND at >= ?"
+        params.append(since)
+    query += " ORDER BY event_id DESC LIMIT ?"
+    params.append(int(limit))
+    with get_connection(db_path or DB_PATH) as conn:
+        return [dict(r) for r in conn.execute(query, params).fetchall()]
+
+
+# ============================================================================
+# CANDLE CACHE (see regime_classifier.py)
+# ============================================================================
+
+def upsert_candles(symbol: str, interval: str, candles: list, db_path=None) -> int:
+    """Store closed candles: (open_time_ms, open, high, low, close, volume) tuples or raw Binance klines."""
+    rows = [(symbol, interval, int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]),
+             float(k[5]) if len(k) > 5 else None) for k in candles]
+    if not rows:
+        return 0
+    with get_connection(db_path or DB_PATH) as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO candles(symbol, interval, open_time, open, high, low, close, volume) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+def get_candles(symbol: str, interval: str, limit: int = 100, since: int = None, db_path=None) -> list[tuple]:
+    """Oldest-first (open_time, open, high, low, close, volume) — the latest `limit`, or all after `since`."""
+    with get_connection(db_path or DB_PATH) as conn:
+        if since is not None:
+            rows = conn.execute(
+                "SELECT open_time, open, high, low, close, volume FROM candles "
+                "WHERE symbol=? AND interval=? AND open_time > ? ORDER BY open_time LIMIT ?",
+                (symbol, interval, int(since), int(limit))).fetchall()
+            return [tuple(r) for r in rows]
+        rows = conn.execute(
+            "SELECT open_time, open, high, low, close, volume FROM candles "
+            "WHERE symbol=? AND interval=? ORDER BY open_time DESC LIMIT ?",
+            (symbol, interval, int(limit))).fetchall()
+    return [tuple(r) for r in reversed(rows)]
+
+
+# ============================================================================
+# HTTP REQUEST STATS (see http_transport.py)
+# ============================================================================
+
+def add_http_stats(rows: list, hour: str, db_path=None):
+    """Merge (host, endpoint, requests, errors, retries, total_ms, max_ms, buckets) into the hour's
+    row; `buckets` is a list of per-bucket counts (http_transport.BUCKETS_MS + overflow)."""
+    with get_connection(db_path or DB_PATH) as conn:
+        for host, endpoint, n, errors, retries, total_ms, max_ms, buckets in rows:
+            row = conn.execute("SELECT buckets FROM http_request_stats WHERE host=? AND endpoint=? AND hour=?",
+                               (host, endpoint, hour)).fetchone()
+            if row:
+                old = json.loads(row["buckets"])
+                buckets = [a + b for a, b in zip(old + [0] * (len(buckets) - len(old)), buckets)]
+            conn.execute(
+                "INSERT INTO http_request_stats(host, endpoint, hour, requests, errors, retries, total_ms, "
+                "max_ms, buckets) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(host, endpoint, hour) DO UPDATE SET "
+                "requests = requests + excluded.requests, errors = errors + excluded.errors, "
+                "retries = retries + excluded.retries, total_ms = total_ms + excluded.total_ms, "
+                "max_ms = MAX(max_ms, excluded.max_ms), buckets = excluded.buckets",
+                (host, endpoint, hour, n, errors, retries, total_ms, max_ms, json.dumps(buckets)),
+            )
+
+
+def get_http_stats(since_hour: str, db_path=None) -> list[dict]:
+    """Per (host, endpoint) sums over hours >= `since_hour`; buckets summed element-wise."""
+    out = {}
+    with get_connection(db_path or DB_PATH) as conn:
+        for r in conn.execute("SELECT * FROM http_request_stats WHERE hour >= ? ORDER BY host, endpoint",
+                              (since_hour,)):
+            key = (r["host"], r["endpoint"])
+            s = out.setdefault(key, {"host": r["host"], "endpoint": r["endpoint"], "requests": 0, "errors": 0,
+                                     "retries": 0, "total_ms": 0.0, "max_ms": 0.0, "buckets": []})
+            for k in ("requests", "errors", "retries", "total_ms"):
+                s[k] += r[k]
+            s["max_ms"] = max(s["max_ms"], r["max_ms"])
+            b = json.loads(r["buckets"])
+            s["buckets"] = [x + y for x, y in zip(s["buckets"] + [0] * (len(b) - len(s["buckets"])), b)]
+    return list(out.values())
+
+
+# ============================================================================
+# ROUTER INBOX (see pumpfun_monitor.py, signal_router.py)
+# ============================================================================
+# Rows are not consumed: the router re-reads recent ones each run (as it did
+# with signal files) and dedups by its own signal hash / cooldowns.
+
+ROUTER_INBOX_RETENTION_S = 86400
+
+
+def add_router_signal(source: str, signal: dict, db_path=None) -> int:
+    """Hand a signal to signal_router; prunes rows older than ROUTER_INBOX_RETENTION_S."""
+    now = time.time()
+    with get_connection(db_path or DB_PATH) as conn:
+        cur = conn.execute("INSERT INTO router_inbox(source, token, payload, created_at) VALUES (?, ?, ?, ?)",
+                           (source, signal.get("token"), json.dumps(signal, default=str), now))
+        conn.execute("DELETE FROM router_inbox WHERE created_at < ?", (now - ROUTER_INBOX_RETENTION_S,))
+        return cur.lastrowid
+
+
+def get_router_signals(source: str, max_age_s: float, limit: int = 10, db_path=None) -> list[tuple]:
+    """Newest-first (age_s, signal) for `source` handed off within the last `max_age_s`."""
+    now = time.time()
+    with get_connection(db_path or DB_PATH) as conn:
+        rows = conn.execute(
+            "SELECT payload, created_at FROM router_inbox WHERE source=? AND created_at >= ? "
+            "ORDER BY created_at DESC, id DESC LIMIT ?", (source, now - max_age_s, int(limit))).fetchall()
+    return [(now - r["created_at"], json.loads(r["payload"])) for r in rows]
+
+
+# ============================================================================
+# EVENT OUTBOX (see supabase_client.py)
+# ============================================================================
+# Appends take the write lock up front (BEGIN IMMEDIATE) so reading the chain
+# tip and inserting the next link is atomic across threads and processes.
+# The shipper's progress per sink is the acked_seq cursor; rows at or below it
+# may be pruned, except the tip (it seeds the next prev_hash).
+
+def append_outbox_event(event_type: str, payload_json: str, correlation_id, chain, db_path=None) -> tuple:
+    """Append one event; `chain(prev_hash) -> event_hash` runs under the write lock → (seq, event_hash)."""
+    with get_connection(db_path or DB_PATH, timeout_s=5.0, busy_timeout_ms=5000) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT event_hash FROM event_outbox ORDER BY seq DESC LIMIT 1").fetchone()
+        prev_hash = row["event_hash"] if row else "GENESIS"
+        event_hash = chain(prev_hash)
+        cur = conn.execute(
+            "INSERT INTO event_outbox(event_type, payload, correlation_id, prev_hash, event_hash, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (event_type, payload_json, correlation_id, prev_hash, event_hash,
+             datetime.now(timezone.utc).isoformat()))
+        return cur.lastrowid, event_hash
+
+
+def get_outbox_cursor(sink: str, db_path=None) -> dict:
+    with get_connection(db_path or DB_PATH) as conn:
+        row = conn.execute("SELECT * FROM event_outbox_acks WHERE sink=?", (sink,)).fetchone()
+        pending = conn.execute("SELECT COUNT(*), MAX(seq) FROM event_outbox WHERE seq > ?",
+                               (row["acked_seq"] if row else 0,)).fetchone()
+    cursor = dict(row) if row else {"sink": sink, "acked_seq": 0, "attempts": 0, "next_attempt_at": 0,
+                                    "last_error": None, "updated_at": None}
+    cursor["pending"], cursor["last_seq"] = pending[0], pending[1]
+    return cursor
+
+
+def get_outbox_batch(after_seq: int, limit: int, db_path=None) -> list[dict]:
+    """Oldest-first events with seq > after_seq (rows already marked with an error are skipped)."""
+    with get_connection(db_path or DB_PATH) as conn:
+        rows = conn.execute("SELECT * FROM event_outbox WHERE seq > ? AND error IS NULL ORDER BY seq LIMIT ?",
+                            (int(after_seq), int(limit))).fetchall()
+    return [dict(r) for r in rows]
+
+
+def ack_outbox(sink: str, acked_seq: int, db_path=None):
+    """Record a successful shipment up to `acked_seq` and clear the retry state."""
+    with get_connection(db_path or DB_PATH) as conn:
+        conn.execute(
+            "INSERT INTO event_outbox_acks(sink, acked_seq, attempts, next_attempt_at, last_error, updated_at) "
+            "VALUES (?, ?, 0, 0, NULL, ?) ON CONFLICT(sink) DO UPDATE SET "
+            "acked_seq = MAX(acked_seq, excluded.acked_seq), attempts = 0, next_attempt_at = 0, "
+            "last_error = NULL, updated_at = excluded.updated_at",
+            (sink, int(acked_seq), datetime.now(timezone.utc).isoformat()))
+
+
+def fail_outbox(sink: str, error: str, next_attempt_at: float, db_path=None) -> int:
+    """Record a failed shipment attempt → consecutive attempts so far."""
+    with get_connection(db_path or DB_PATH) as conn:
+        conn.execute(
+            "INSERT INTO event_outbox_acks(sink, acked_seq, attempts, next_attempt_at, last_error, updated_at) "
+            "VALUES (?, 0, 1, ?, ?, ?) ON CONFLICT(sink) DO UPDATE SET attempts = attempts + 1, "
+            "next_attempt_at = excluded.next_attempt_at, last_error = excluded.last_error, "
+            "updated_at = excluded.updated_at",
+            (sink, next_attempt_at, error[:500], datetime.now(timezone.utc).isoformat()))
+        return conn.execute("SELECT attempts FROM event_outbox_acks WHERE sink=?", (sink,)).fetchone()[0]
+
+
+def mark_outbox_error(seq: int, error: str, db_path=None):
+    """Set aside an event the sink rejects outright so it no longer blocks the ones behind it."""
+    with get_connection(db_path or DB_PATH) as conn:
+        conn.execute("UPDATE event_outbox SET error=? WHERE seq=?", (error[:500], int(seq)))
+
+
+def prune_outbox(sink: str, keep_days: float = 7, db_path=None) -> int:
+    """Delete acked events older than keep_days, always keeping the chain tip."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=keep_days)).isoformat()
+    with get_connection(db_path or DB_PATH) as conn:
+        row = conn.execute("SELECT acked_seq FROM event_outbox_acks WHERE sink=?", (sink,)).fetchone()
+        if not row:
+            return 0
+        cur = conn.execute(
+            "DELETE FROM event_outbox WHERE seq <= ? AND created_at < ? "
+            "AND seq < (SELECT MAX(seq) FROM event_outbox)", (row["acked_seq"], cutoff))
+        return cur.rowcount
+
+
+def get_outbox_events(after_seq: int = 0, db_path=None) -> list[dict]:
+    """Every stored event after `after_seq`, including set-aside ones (chain verification)."""
+    with get_connection(db_path or DB_PATH) as conn:
+        return [dict(r) for r in conn.execute("SELECT * FROM event_outbox WHERE seq > ? ORDER BY seq",
+                                              (int(after_seq),))]
+
+
+# ============================================================================
+# OMS JOURNAL (see oms.py)
+# ============================================================================
+# oms_order_events is append-only: one row per state transition.
+# oms_orders holds the current snapshot of each order, keyed by
+# client_order_id and indexed by (symbol, side, state) and state, so
+# lookups do not depend on order history size.
+
+def _oms_write_order(conn, order: dict):
+    """Upsert the order snapshot and append its not-yet-journaled events."""
+    cid = order["client_order_id"]
+    created_at = order.get("created_at") or datetime.now(timezone.utc).isoformat()
+    events = order.get("events") or []
+    journaled = conn.execute(
+        "SELECT COUNT(*) FROM oms_order_events WHERE client_order_id=? AND order_created_at=?",
+        (cid, created_at),
+    ).fetchone()[0]
+    if len(events) > journaled:
+        conn.executemany(
+            "INSERT INTO oms_order_events(client_order_id, order_created_at, state, at) VALUES (?, ?, ?, ?)",
+            [(cid, created_at, e.get("state"), e.get("at")) for e in events[journaled:]],
+        )
+    conn.execute(
+        "INSERT OR REPLACE INTO oms_orders(client_order_id, symbol, side, state, exchange, strategy, "
+        "created_at, updated_at, order_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (cid, order.get("symbol", ""), order.get("side", ""), order.get("state", "NEW"),
+         order.get("exchange"), order.get("strategy"), created_at,
+         order.get("updated_at") or created_at, json.dumps(order, default=str)),
+    )
+
+
+def _oms_write_intent(conn, intent: dict):
+    conn.execute(
+        "INSERT OR REPLACE INTO oms_intents(client_order_id, symbol, side, quantity, price, strategy, "
+        "recorded_at, exchange_sent, exchange_order_id, sent_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (intent["client_order_id"], intent.get("symbol", ""), intent.get("side", ""),
+         intent.get("quantity"), intent.get("price"), intent.get("strategy"),
+         intent.get("recorded_at") or datetime.now(timezone.utc).isoformat(),
+         1 if intent.get("exchange_sent") else 0, intent.get("exchange_order_id"), intent.get("sent_at")),
+    )
+
+
+def oms_create_order(order: dict, intent: dict, db_path=None):
+    """Record the order intent and the NEW order in one transaction."""
+    with get_connection(db_path or DB_PATH) as conn:
+        _oms_write_intent(conn, intent)
+        _oms_write_order(conn, order)
+
+
+def oms_save_order(order: dict, sent_exchange_order_id: str = None, db_path=None):
+    """Persist an order transition (snapshot + journal rows).
+    
+    sent_exchange_order_id marks the intent as sent in the same transaction.
+    """
+    with get_connection(db_path or DB_PATH) as conn:
+        if sent_exchange_order_id is not None:
+            conn.execute(
+                "UPDATE oms_intents SET exchange_sent=1, exchange_order_id=?, sent_at=? WHERE client_order_id=?",
+                (sent_exchange_order_id, datetime.now(timezone.utc).isoformat(), order["client_order_id"]),
+            )
+        _oms_write_order(conn, order)
+
+
+def oms_get_order(client_order_id: str, db_path=None) -> dict | None:
+    with get_connection(db_path or DB_PATH) as conn:
+        row = conn.execute("SELECT order_json FROM oms_orders WHERE client_order_id=?",
+                           (client_order_id,)).fetchone()
+    return json.loads(row["order_json"]) if row else None
+
+
+def oms_get_orders(symbol: str = None, side: str = None, states=None, db_path=None) -> list[dict]:
+    """Current order snapshots filtered by symbol / side / state (index lookups)."""
+    clauses, params = [], []
+    if symbol is not None:
+        clauses.append("symbol=?")
+        params.append(symbol)
+    if side is not None:
+        clauses.append("side=?")
+        params.append(side)
+    if states is not None:
+        states = list(states)
+        clauses.append(f"state IN ({','.join('?' * len(states))})")
+        params.extend(states)
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    with get_connection(db_path or DB_PATH) as conn:
+        rows = conn.execute(f"SELECT order_json FROM oms_orders{where} ORDER BY created_at", params).fetchall()
+    return [json.loads(r["order_json"]) for r in rows]
+
+
+def oms_state_counts(db_path=None) -> dict:
+    with get_connection(db_path or DB_PATH) as conn:
+        rows = conn.execute("SELECT state, COUNT(*) AS n FROM oms_orders GROUP BY state").fetchall()
+    return {r["state"]: r["n"] for r in rows}
+
+
+def oms_get_intent(client_order_id: str, db_path=None) -> dict | None:
+    with get_connection(db_path or DB_PATH) as conn:
+        row = conn.execute("SELECT * FROM oms_intents WHERE client_order_id=?", (client_order_id,)).fetchone()
+    if not row:
+        return None
+    intent = dict(row)
+    intent["exchange_sent"] = bool(intent["exchange_sent"])
+    return intent
+
+
+def oms_get_order_events(client_order_id: str, db_path=None) -> list[dict]:
+    """Journal rows for client_order_id, oldest first (all generations of the id)."""
+    with get_connection(db_path or DB_PATH) as conn:
+        rows = conn.execute(
+            "SELECT order_created_at, state, at FROM oms_order_events WHERE client_order_id=? ORDER BY event_id",
+            (client_order_id,),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+# ============================================================================
+# TRACE SPANS (see tracing.py)
+# ============================================================================
+
+def insert_trace_spans(rows, db_path=None):
+    """Bulk insert span tuples:
+    (span_id, trace_id, parent_id, name, start_ts, duration_ms, status, decision_id, attrs_json)
+    """
+    with get_connection(db_path or DB_PATH) as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO trace_spans(span_id, trace_id, parent_id, name, start_ts, "
+            "duration_ms, status, decision_id, attrs_json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+def get_span_durations(since_ts: float, name: str = None, db_path=None) -> dict:
+    """{span_name: [duration_ms, ...] ascending} for spans started at/after `since_ts` (epoch s)."""
+    sql = "SELECT name, duration_ms FROM trace_spans WHERE start_ts >= ?"
+    params = [since_ts]
+    if name:
+        sql += " AND name = ?"
+        params.append(name)
+    out = {}
+    with get_connection(db_path or DB_PATH) as conn:
+        for row in conn.execute(sql + " ORDER BY name, duration_ms", params):
+            out.setdefault(row["name"], []).append(row["duration_ms"])
+    return out
+
+
+def get_slowest_spans(since_ts: float, name: str = None, limit: int = 10, db_path=None) -> list[dict]:
+    """Slowest spans since `since_ts` (root spans only unless `name` is given)."""
+    sql = "SELECT * FROM trace_spans WHERE start_ts >= ?"
+    params = [since_ts]
+    if name:
+        sql += " AND name = ?"
+        params.append(name)
+    else:
+        sql += " AND parent_id IS NULL"
+    with get_connection(db_path or DB_PATH) as conn:
+        rows = conn.execute(sql + " ORDER BY duration_ms DESC LIMIT ?", params + [int(limit)]).fetchall()
+    return [dict(r) for r in rows]
+
+
+def get_trace_spans(trace_or_decision_id: str, db_path=None) -> list[dict]:
+    """Every span of the trace(s) with this trace_id or touching this decision_id, by start time."""
+    with get_connection(db_path or DB_PATH) as conn:
+        rows = conn.execute(
+            "SELECT * FROM trace_spans WHERE trace_id = ?1 OR trace_id IN "
+            "(SELECT trace_id FROM trace_spans WHERE decision_id = ?1) "
+            "ORDER BY start_ts, rowid",
+            (trace_or_decision_id,),
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def prune_trace_spans(before_ts: float, db_path=None) -> int:
+    """Delete spans started before `before_ts` (epoch s). Returns rows deleted."""
+    with get_connection(db_path or DB_PATH) as conn:
+        return conn.execute("DELETE FROM trace_spans WHERE start_ts < ?", (before_ts,)).rowcount
+
+
+# ============================================================================
+# ENRICHMENT CACHE (see enrichment_cache.py)
+# ============================================================================
+
+def enrichment_cache_get(chain: str, address: str, field_group: str, now: float = None, db_path=None):
+    """Fresh cached value for (chain, address, field_group) as (value_json, expires_at), or None."""
+    now = time.time() if now is None else now
+    with get_connection(db_path or DB_PATH) as conn:
+        row = conn.execute(
+            "SELECT value_json, expires_at FROM enrichment_cache "
+            "WHERE chain = ? AND address = ? AND field_group = ? "
+            "AND value_json IS NOT NULL AND expires_at > ?",
+            (chain, address, field_group, now),
+        ).fetchone()
+    return (row["value_json"], row["expires_at"]) if row else None
+
+
+def enrichment_cache_claim(chain: str, address: str, field_group: str, owner: str,
+                           lease_s: float, db_path=None) -> bool:
+    """Take the fetch lease for a key unless another live owner holds it. Returns True if taken."""
+    now = time.time()
+    with get_connection(db_path or DB_PATH) as conn:
+        cur = conn.execute(
+            "INSERT INTO enrichment_cache(chain, address, field_group, lease_owner, lease_until) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(chain, address, field_group) DO UPDATE SET "
+            "lease_owner = excluded.lease_owner, lease_until = excluded.lease_until "
+            "WHERE enrichment_cache.lease_until IS NULL OR enrichment_cache.lease_until < ? "
+            "OR enrichment_cache.lease_owner = excluded.lease_owner",
+            (chain, address, field_group, owner, now + lease_s, now),
+        )
+        return cur.rowcount == 1
+
+
+def enrichment_cache_put(chain: str, address: str, field_group: str, provider: str,
+                         value_json: str | None, ttl_s: float, owner: str = None, db_path=None):
+    """Store a fetched value (None → nothing stored) and release `owner`'s lease."""
+    now = time.time()
+    with get_connection(db_path or DB_PATH) as conn:
+        if value_json is not None:
+            conn.execute(
+                "INSERT INTO enrichment_cache(chain, address, field_group, provider, value_json, "
+                "fetched_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(chain, address, field_group) DO UPDATE SET "
+                "provider = excluded.provider, value_json = excluded.value_json, "
+                "fetched_at = excluded.fetched_at, expires_at = excluded.expires_at",
+                (chain, address, field_group, provider, value_json, now, now + ttl_s),
+            )
+        if owner:
+            conn.execute(
+                "UPDATE enrichment_cache SET lease_owner = NULL, lease_until = NULL "
+                "WHERE chain = ? AND address = ? AND field_group = ? AND lease_owner = ?",
+                (chain, address, field_group, owner),
+            )
+
+
+def add_enrichment_stats(counts: dict, day: str, db_path=None):
+    """Add {provider: {"hits", "misses", "coalesced", "errors"}} to the day's counters."""
+    rows = [(provider, day, c.get("hits", 0), c.get("misses", 0), c.get("coalesced", 0), c.get("errors", 0))
+            for provider, c in counts.items()]
+    with get_connection(db_path or DB_PATH) as conn:
+        conn.executemany(
+            "INSERT INTO enrichment_cache_stats(provider, day, hits, misses, coalesced, errors) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(provider, day) DO UPDATE SET "
+            "hits = hits + excluded.hits, misses = misses + excluded.misses, "
+            "coalesced = coalesced + excluded.coalesced, errors = errors + excluded.errors",
+            rows,
+        )
+
+
+def get_enrichment_stats(since_day: str, db_path=None) -> dict:
+    """{provider: {"hits", "misses", "coalesced", "errors"}} summed over days >= `since_day`."""
+    with get_connection(db_path or DB_PATH) as conn:
+        rows = conn.execute(
+            "SELECT provider, SUM(hits) AS hits, SUM(misses) AS misses, "
+            "SUM(coalesced) AS coalesced, SUM(errors) AS errors "
+            "FROM enrichment_cache_stats WHERE day >= ? GROUP BY provider ORDER BY provider",
+            (since_day,),
+        ).fetchall()
+    return {r["provider"]: {k: r[k] for k in ("hits", "misses", "coalesced", "errors")} for r in rows}
+
+
+def prune_enrichment_cache(before_ts: float, db_path=None) -> int:
+    """Delete entries that expired before `before_ts` and hold no live lease. Returns rows deleted."""
+    now = time.time()
+    with get_connection(db_path or DB_PATH) as conn:
+        return conn.execute(
+            "DELETE FROM enrichment_cache WHERE COALESCE(expires_at, 0) < ? "
+            "AND (lease_until IS NULL OR lease_until < ?)",
+            (before_ts, now),
+        ).rowcount
+
+
 # ============================================================================
 # UNIFIED STATE API (Ticket 12 — SQLite as single source of truth)
 # ============================================================================
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader v3.1 — Shared Fixed-Size State Records
+
+A small struct (a few doubles) in its own file, shared by every thread and
+process that opens it — the storage under rate_limiter's token buckets and
+breaker_registry's circuit breakers.
+
+  - read() is one lock-free pread: an 8-byte-aligned record of this size is
+    never seen half-written, so readers take no lock.
+  - transact(fn) applies fn(state, now) → (new_state, result) under a thread
+    lock + fcntl.flock, so read-modify-write is exact across processes.
+  - flock is per open file description: a forked child closes the inherited
+    descriptor right after fork and opens its own on first use.
+  - If the file cannot be opened, the record degrades to in-process state
+    (on_unavailable is called once so the owner can warn).
+
+Usage:
+  rec = StructFile(lambda: STATE_DIR / "x.bin", struct.Struct("<dd"), default=lambda now: (0.0, now))
+  state = rec.read()
+  result = rec.transact(lambda state, now: ((state[0] + 1, now), state[0] + 1))
+"""
+
+import fcntl
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+
+_pid_lock = threading.Lock()
+_instances = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    global _pid_lock
+    _pid_lock = threading.Lock()  # may have been held by another thread at fork time
+    for rec in list(_instances):
+        rec._drop_inherited()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+class StructFile:
+    """One struct.Struct record at path_fn(), shared across threads and processes."""
+
+    def __init__(self, path_fn, fmt, default, wrap=tuple, on_unavailable=None):
+        self.path_fn = path_fn          # called on (re)open, so a repointed state dir applies
+        self.fmt = fmt
+        self.default = default          # now → initial state for an empty / new file
+        self.wrap = wrap                # unpacked tuple → state (e.g. a namedtuple's _make)
+        self.on_unavailable = on_unavailable
+        self._pid = None
+        self._lock = threading.Lock()
+        self._fd = None
+        self._local = None  # fallback state when the shared file is unavailable
+        _instances.add(self)
+
+    def _drop_inherited(self):
+        """In a forked child: close the parent's descriptor (flock is per open file description)."""
+        if self._fd is not None and self._fd >= 0:
+            try:
+                os.close(self._fd)
+            except OSError:
+                pass
+        self._lock, self._fd, self._local = threading.Lock(), None, None
+        self._pid = os.getpid()
+
+    def _check_pid(self):
+        if self._pid != os.getpid():
+            # First use in this process (forked children are reset by _after_fork_in_child)
+            with _pid_lock:
+                if self._pid != os.getpid():
+                    self._drop_inherited()
+
+    def _open(self):
+        if self._fd is None:
+            try:
+                path = Path(self.path_fn())
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            except OSError as e:
+                self._fd = -1
+                if self.on_unavailable:
+                    self.on_unavailable(e)
+        return self._fd if self._fd >= 0 else None
+
+    def _unpack(self, raw: bytes, now: float):
+        return self.wrap(self.fmt.unpack(raw)) if len(raw) == self.fmt.size else self.default(now)
+
+    def read(self):
+        """Current state, lock-free."""
+        self._check_pid()
+        fd = self._open()
+        now = time.time()
+        if fd is None:
+            return self._local if self._local is not None else self.default(now)
+        return self._unpack(os.pread(fd, self.fmt.size, 0), now)
+
+    def transact(self, fn):
+        """Apply fn(state, now) → (new_state, result) atomically across threads and processes."""
+        self._check_pid()
+        with self._lock:
+            fd = self._open()
+            now = time.time()
+            if fd is None:
+                state = self._local if self._local is not None else self.default(now)
+                self._local, result = fn(state, now)
+                return result
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                state, result = fn(self._unpack(os.pread(fd, self.fmt.size, 0), now), now)
+                os.pwrite(fd, self.fmt.pack(*state), 0)
+                return result
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
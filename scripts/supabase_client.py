@@ -4,16 +4,39 @@ Supabase Client Utility — Sanad Trader v3.0
 Handles all communication with Supabase for event logging,
 system status sync, and real-time dashboard data.
 
+Event logging goes through a local outbox (state_store event_outbox):
+  - log_event() appends to SQLite and returns — no network on the decision
+    path. The hash chain is computed locally, in append order, under the
+    outbox write lock, so concurrent writers cannot fork it.
+  - ship() (job_supervisor job "supabase_shipper") sends pending events in
+    batched PostgREST inserts with retry + backoff and records the
+    acknowledged offset per sink. Delivery is at-least-once; each event's
+    hash identifies duplicates. An event Supabase rejects outright (4xx) is
+    set aside so it cannot block the rest of the chain.
+
 Uses service role key for server-side operations.
 Credentials loaded from trading/config/.env (gitignored).
+
+Usage:
+  python3 scripts/supabase_client.py            # connection test
+  python3 scripts/supabase_client.py --ship     # ship pending events now
+  python3 scripts/supabase_client.py --status   # outbox cursor / pending count
+  python3 scripts/supabase_client.py --verify   # re-check the local hash chain
 """
 
 import os
+import sys
 import json
+import time
+import random
 import hashlib
+import sqlite3
 from datetime import datetime, timezone
 from pathlib import Path
 
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
 # Load .env from config directory
 BASE_DIR = Path(os.environ.get("SANAD_HOME", "/data/.openclaw/workspace/trading"))
 ENV_PATH = BASE_DIR / "config" / ".env"
@@ -29,7 +52,20 @@ except Exception as e:
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
 
+SINK = "supabase_events"
+SHIP_BATCH = 200
+SHIP_BUDGET_S = 15           # run deadline; requests are cut to fit it
+SHIP_TIMEOUT_S = 5           # worst-case run: SHIP_BUDGET_S + SHIP_TIMEOUT_S < job timeout_s (25)
+SHIP_MIN_REQUEST_S = 1.0     # don't start a request with less time than this left
+SHIP_RETRIES = 2             # in-run retries per batch
+RETRY_BASE_S = 0.5
+BACKOFF_BASE_S = 5.0         # between runs after a failed run
+BACKOFF_CAP_S = 300.0
+OUTBOX_KEEP_DAYS = 7
+REJECT_STATUSES = frozenset({400, 409, 413, 422})
+
 _client = None
+_outbox_ready = set()
 
 
 def get_client():
@@ -46,61 +82,211 @@ def get_client():
     return _client
 
 
-def compute_event_hash(event_type, payload, prev_hash="GENESIS"):
-    """Compute SHA-256 hash for event chain integrity."""
-    content = f"{event_type}|{json.dumps(payload, sort_keys=True)}|{prev_hash}"
-    return hashlib.sha256(content.encode()).hexdigest()
+def _chain_hash(event_type, payload_json, prev_hash):
+    return hashlib.sha256(f"{event_type}|{payload_json}|{prev_hash}".encode()).hexdigest()
 
 
-def get_last_event_hash():
-    """Retrieve the hash of the most recent event for chain continuity."""
-    try:
-        client = get_client()
-        result = (
-            client.table("events")
-            .select("prev_event_hash")
-            .order("created_at", desc=True)
-            .limit(1)
-            .execute()
-        )
-        if result.data and len(result.data) > 0:
-            return result.data[0].get("prev_event_hash", "GENESIS")
-    except Exception as e:
-        print(f"[SUPABASE] Warning: Could not fetch last event hash: {e}")
-    return "GENESIS"
-
-
-def log_event(event_type, payload, correlation_id=None):
+def log_event(event_type, payload, correlation_id=None, db_path=None):
     """
-    Log an event to the Supabase events table.
-    Events are hash-chained for integrity (v3 doc requirement).
-    DB auto-generates created_at timestamp.
+    Log an event for the Supabase events table via the local outbox.
+    Events are hash-chained for integrity (v3 doc requirement); the chain is
+    extended locally, atomically, in append order. No network: the shipper
+    delivers it. Returns {"seq", "event_type", "prev_event_hash",
+    "correlation_id"} or None on error.
     """
     try:
-        client = get_client()
-        prev_hash = get_last_event_hash()
-        event_hash = compute_event_hash(event_type, payload, prev_hash)
+        import state_store
+        db_path = db_path or state_store.DB_PATH
+        payload_json = json.dumps(payload, sort_keys=True, default=str)
+
+        def append():
+            return state_store.append_outbox_event(
+                event_type, payload_json, correlation_id or None,
+                lambda prev_hash: _chain_hash(event_type, payload_json, prev_hash), db_path=db_path)
+
+        try:
+            seq, event_hash = append()
+        except sqlite3.OperationalError as e:
+            if "no such table" not in str(e) or str(db_path) in _outbox_ready:
+                raise
+            state_store.init_db(db_path)  # DB predates the outbox tables
+            _outbox_ready.add(str(db_path))
+            seq, event_hash = append()
+        return {"seq": seq, "event_type": event_type, "prev_event_hash": event_hash,
+                "correlation_id": correlation_id}
 
-        record = {
-            "event_type": event_type,
-            "payload": payload,
-            "prev_event_hash": event_hash,
-        }
-        if correlation_id:
-            record["correlation_id"] = correlation_id
+    except Exception as e:
+        print(f"[SUPABASE] Error logging event: {e}")
+        return None
 
-        result = client.table("events").insert(record).execute()
 
-        if result.data:
-            print(f"[SUPABASE] Event logged: {event_type} (id={result.data[0].get('id')})")
-            return result.data[0]
-        else:
-            print(f"[SUPABASE] Warning: Event insert returned no data")
-            return None
+# ─────────────────────────────────────────────────────────
+# Outbox shipper
+# ─────────────────────────────────────────────────────────
+
+def _record(row: dict) -> dict:
+    record = {
+        "event_type": row["event_type"],
+        "payload": json.loads(row["payload"]),
+        "prev_event_hash": row["event_hash"],
+        "created_at": row["created_at"],
+    }
+    if row["correlation_id"]:
+        record["correlation_id"] = row["correlation_id"]
+    return record
+
 
+def _post_batch(rows: list, timeout: float = SHIP_TIMEOUT_S) -> tuple:
+    """One batched insert → (ok, retryable, error)."""
+    import http_transport
+    try:
+        r = http_transport.post(
+            f"{SUPABASE_URL.rstrip('/')}/rest/v1/events",
+            json=[_record(row) for row in rows],
+            headers={"apikey": SUPABASE_KEY, "Authorization": f"Bearer {SUPABASE_KEY}",
+                     "Content-Type": "application/json", "Prefer": "return=minimal"},
+            timeout=timeout, idempotent=False, retries=0, endpoint="rest:events")
     except Exception as e:
-        print(f"[SUPABASE] Error logging event: {e}")
+        return False, True, f"{type(e).__name__}: {e}"
+    if r.status_code < 300:
+        return True, False, ""
+    # Only payload-level rejections are final; auth / routing / server errors are retried
+    return False, r.status_code not in REJECT_STATUSES, f"HTTP {r.status_code}: {r.text[:200]}"
+
+
+def _post_with_retry(rows: list, deadline: float):
+    """→ (ok, retryable, error) of the last attempt; None if the deadline left no time to try."""
+    result = None
+    for attempt in range(SHIP_RETRIES + 1):
+        left = deadline - time.monotonic()
+        if left < SHIP_MIN_REQUEST_S:
+            break
+        result = _post_batch(rows, timeout=min(SHIP_TIMEOUT_S, left))
+        if result[0] or not result[1] or attempt == SHIP_RETRIES:
+            break
+        pause = random.uniform(0, RETRY_BASE_S * 2 ** attempt)  # full jitter
+        time.sleep(min(pause, max(0.0, deadline - time.monotonic())))
+    return result
+
+
+def _run_backoff_s(attempts: int) -> float:
+    """Delay before the next run may retry: equal jitter on BACKOFF_BASE_S·2^(n-1), capped."""
+    delay = min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _ship_locked(batch_size, max_batches, db_path, force) -> dict:
+    import state_store
+    cursor = state_store.get_outbox_cursor(SINK, db_path=db_path)
+    result = {"shipped": 0, "batches": 0, "rejected": 0, "error": None, "acked_seq": cursor["acked_seq"]}
+    if not force and cursor["next_attempt_at"] > time.time():
+        result["backoff_s"] = round(cursor["next_attempt_at"] - time.time(), 1)
+        return result
+    acked = cursor["acked_seq"]
+    deadline = time.monotonic() + SHIP_BUDGET_S
+    while max_batches is None or result["batches"] < max_batches:
+        rows = state_store.get_outbox_batch(acked, batch_size, db_path=db_path)
+        if not rows:
+            break
+        outcome = _post_with_retry(rows, deadline)
+        if outcome is None:
+            break  # out of time; the next run continues from acked
+        ok, retryable, error = outcome
+        if not ok and not retryable and len(rows) > 1:
+            # Rejected batch: ship its events one by one to find the offending ones
+            for row in rows:
+                outcome = _post_with_retry([row], deadline)
+                if outcome is None:
+                    break
+                ok, retryable, error = outcome
+                if ok:
+                    result["shipped"] += 1
+                elif retryable:
+                    break
+                else:
+                    state_store.mark_outbox_error(row["seq"], error, db_path=db_path)
+                    result["rejected"] += 1
+                    print(f"[SUPABASE] Event seq={row['seq']} rejected, set aside: {error}")
+                acked = row["seq"]
+                state_store.ack_outbox(SINK, acked, db_path=db_path)
+            result["batches"] += 1
+            if outcome is None:
+                break
+        elif ok:
+            acked = rows[-1]["seq"]
+            state_store.ack_outbox(SINK, acked, db_path=db_path)
+            result["shipped"] += len(rows)
+            result["batches"] += 1
+        elif not retryable:
+            state_store.mark_outbox_error(rows[0]["seq"], error, db_path=db_path)
+            result["rejected"] += 1
+            print(f"[SUPABASE] Event seq={rows[0]['seq']} rejected, set aside: {error}")
+            acked = rows[0]["seq"]
+            state_store.ack_outbox(SINK, acked, db_path=db_path)
+        if not ok and retryable:
+            attempts = cursor["attempts"] + 1
+            state_store.fail_outbox(SINK, error, time.time() + _run_backoff_s(attempts), db_path=db_path)
+            result["error"] = error
+            break
+    result["acked_seq"] = acked
+    return result
+
+
+def ship(batch_size=SHIP_BATCH, max_batches=None, db_path=None, force=False) -> dict:
+    """Send pending outbox events to Supabase in batched inserts.
+
+    Honours the per-sink backoff recorded by the last failed run unless `force`.
+    Only one shipper runs at a time (flock next to the DB); others return at once.
+    → {"shipped", "batches", "rejected", "error", "acked_seq"[, "backoff_s" | "busy"]}
+    """
+    import fcntl
+    import state_store
+    if not SUPABASE_URL or not SUPABASE_KEY:
+        return {"shipped": 0, "batches": 0, "rejected": 0, "error": "Supabase credentials not found",
+                "acked_seq": None}
+    db_path = Path(db_path or state_store.DB_PATH)
+    with open(db_path.parent / "supabase_shipper.lock", "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return {"shipped": 0, "batches": 0, "rejected": 0, "error": None, "acked_seq": None, "busy": True}
+        try:
+            return _ship_locked(batch_size, max_batches, db_path, force)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def outbox_status(db_path=None) -> dict:
+    import state_store
+    return state_store.get_outbox_cursor(SINK, db_path=db_path)
+
+
+def verify_outbox_chain(db_path=None) -> dict:
+    """Recompute every stored link → {"ok", "checked", "bad_seq"} (first broken link, if any)."""
+    import state_store
+    prev = None
+    checked = 0
+    for row in state_store.get_outbox_events(db_path=db_path):
+        if (prev is not None and row["prev_hash"] != prev) or \
+                _chain_hash(row["event_type"], row["payload"], row["prev_hash"]) != row["event_hash"]:
+            return {"ok": False, "checked": checked, "bad_seq": row["seq"]}
+        prev = row["event_hash"]
+        checked += 1
+    return {"ok": True, "checked": checked, "bad_seq": None}
+
+
+def run_shipper():
+    """Job entry point: ship, prune old acked events; False (job error) when Supabase is failing."""
+    import state_store
+    r = ship()
+    if r.get("busy") or "backoff_s" in r:
         return None
+    pruned = state_store.prune_outbox(SINK, OUTBOX_KEEP_DAYS)
+    if r["shipped"] or r["rejected"] or r["error"]:
+        print(f"[SUPABASE] Shipped {r['shipped']} events in {r['batches']} batches "
+              f"(rejected {r['rejected']}, pruned {pruned}, acked seq {r['acked_seq']})"
+              + (f" — {r['error']}" if r["error"] else ""))
+    return False if r["error"] else None
 
 
 def sync_system_status(status_data):
@@ -173,7 +359,7 @@ def test_connection():
         event_count = result.count if hasattr(result, 'count') else 0
         print(f"[SUPABASE] Connection OK. Events table has {event_count} records.")
 
-        # Write test
+        # Write test (through the outbox, shipped right away)
         test_event = log_event(
             "SYSTEM_ERROR",
             {
@@ -184,12 +370,13 @@ def test_connection():
                 "auto_response_taken": "none"
             }
         )
+        shipped = ship(force=True) if test_event else {}
 
-        if test_event:
-            print(f"[SUPABASE] Test event logged. ID: {test_event.get('id')}")
+        if test_event and not shipped.get("error") and shipped.get("acked_seq", 0) >= test_event["seq"]:
+            print(f"[SUPABASE] Test event shipped. Outbox seq: {test_event['seq']}")
             return True
         else:
-            print("[SUPABASE] Warning: Connection works but event insert failed.")
+            print(f"[SUPABASE] Warning: Connection works but event insert failed. {shipped.get('error') or ''}")
             return False
 
     except Exception as e:
@@ -198,6 +385,16 @@ def test_connection():
 
 
 if __name__ == "__main__":
+    if "--ship" in sys.argv:
+        print(json.dumps(ship(force=True), indent=2))
+        exit(0)
+    if "--status" in sys.argv:
+        print(json.dumps(outbox_status(), indent=2, default=str))
+        exit(0)
+    if "--verify" in sys.argv:
+        v = verify_outbox_chain()
+        print(json.dumps(v, indent=2))
+        exit(0 if v["ok"] else 1)
     print("=" * 50)
     print("Supabase Client — Connection Test")
     print("=" * 50)
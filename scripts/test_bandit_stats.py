@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Bandit stats service tests (bandit_stats.py + meta bandit_stats_version).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_bandit_stats.py
+"""
+import os, sys, json, tempfile, uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import state_store
+import learning_loop
+import bandit_stats
+import thompson_sampler
+import ucb1_scorer
+
+
+def _mkdb():
+    td = Path(tempfile.mkdtemp(prefix="sanad_bandit_"))
+    db = td / "state" / "sanad_trader.db"
+    learning_loop.LOG_FILE = td / "learning_loop.log"
+    state_store.init_db(db)
+    return td, db
+
+
+def _close(db, strategy_id, regime_tag, pnl_pct, source="dexscreener"):
+    pid = str(uuid.uuid4())
+    now = datetime.now(timezone.utc).isoformat()
+    with state_store.get_connection(db) as conn:
+        conn.execute("""
+            INSERT INTO positions (position_id, signal_id, token_address, entry_price, size_usd, chain,
+                strategy_id, decision_id, status, created_at, updated_at, pnl_usd, pnl_pct,
+                regime_tag, source_primary, closed_at, learning_status)
+            VALUES (?, ?, 'TEST_TOKEN', 1.0, 100.0, 'sol', ?, ?, 'CLOSED', ?, ?, ?, ?, ?, ?, ?, 'PENDING')
+        """, (pid, "sig_" + pid[:8], strategy_id, "dec_" + pid[:8], now, now,
+              pnl_pct * 100, pnl_pct, regime_tag, source, now))
+    return learning_loop.process_closed_position(pid, db)
+
+
+def _seed(db, rows):
+    """rows: [(strategy_id, regime_tag, alpha, beta, n)] written like a learning update."""
+    now = datetime.now(timezone.utc).isoformat()
+    with state_store.get_connection(db) as conn:
+        for r in rows:
+            conn.execute("INSERT OR REPLACE INTO bandit_strategy_stats VALUES (?, ?, ?, ?, ?, ?)", (*r, now))
+        state_store.bump_bandit_version(conn)
+
+
+# ========== TESTS ==========
+
+def test_version_bumped_by_learning_loop_and_reload_on_change():
+    _, db = _mkdb()
+    svc = bandit_stats.BanditStats(db)
+    assert svc.refresh() and svc.version == 0 and svc.strategies == []
+    assert not svc.refresh() and svc.loads == 1  # unchanged → meta lookup only
+
+    _close(db, "s_a", "BULL", 0.10)
+    _close(db, "s_a", "BULL", -0.05)
+    _close(db, "s_b", "BEAR", 0.02, source="coingecko")
+    assert state_store.get_bandit_version(db) == 3
+
+    assert svc.refresh() and svc.loads == 2
+    assert not svc.refresh()
+    assert svc.get("s_a", "BULL") == {"alpha": 2.0, "beta": 2.0, "n": 2}
+    assert svc.get("s_a", "BEAR") is None
+    assert svc.source_stats("dexscreener:general") == {"n": 2, "reward_sum": 1.0}
+    assert svc.total_source_trades() == 3
+
+    # Skipped claim (already DONE) does not bump the version
+    with state_store.get_connection(db) as conn:
+        done = conn.execute("SELECT position_id FROM positions LIMIT 1").fetchone()[0]
+    assert learning_loop.process_closed_position(done, db)["skipped"]
+    assert state_store.get_bandit_version(db) == 3
+
+
+def test_router_shapes_match_table_readers():
+    _, db = _mkdb()
+    for i in range(6):
+        _close(db, "s_a", "BULL", 0.1 if i % 3 else -0.1, source=("dexscreener", "coingecko")[i % 2])
+    _close(db, "s_b", "SIDEWAYS", -0.1, source="birdeye")
+    svc = bandit_stats.get_service(db)
+
+    expected_ts = {}
+    for (sid, regime), st in state_store.get_bandit_stats(db).items():
+        expected_ts.setdefault(sid, {})[regime] = st
+    assert svc.thompson_state() == expected_ts
+
+    grades = svc.ucb1_grades()
+    for src, st in state_store.get_source_ucb_stats(db).items():
+        assert grades[src]["n"] == st["n"]
+        assert abs(grades[src]["score"] - st["reward_sum"] / st["n"] * 100) < 1e-9
+    assert grades["birdeye:general"]["grade"] == "D"
+    assert bandit_stats.get_service(db) is svc
+
+
+def test_sample_all_vectorized_prior_and_seeded():
+    _, db = _mkdb()
+    _seed(db, [("hot", "BULL", 90.0, 10.0, 98), ("cold", "BULL", 10.0, 90.0, 98),
+               ("cold", "BEAR", 50.0, 50.0, 98)])
+    svc = bandit_stats.get_service(db)
+
+    calls = []
+
+    class CountingRng:
+        def __init__(self, seed):
+            self.rng = np.random.default_rng(seed)
+
+        def beta(self, a, b):
+            calls.append(len(a))
+            return self.rng.beta(a, b)
+
+    names = ["hot", "cold", "new"]
+    s1 = svc.sample_all("BULL", strategies=names, rng=CountingRng(7))
+    s2 = svc.sample_all("BULL", strategies=names, rng=CountingRng(7))
+    assert calls == [3, 3] and s1 == s2
+    assert s1["hot"] > 0.7 and s1["cold"] < 0.3
+
+    ev = svc.expected_all("BULL", strategies=names, prior={"new": (3, 1), "hot": (1, 99)})
+    assert ev == {"hot": 0.9, "cold": 0.1, "new": 0.75}  # prior only where the DB has no row
+    assert svc.expected_all("UNSEEN", strategies=["hot"]) == {"hot": 0.5}
+    assert set(svc.sample_all("BEAR")) == {"cold", "hot"}
+
+    draws = np.array([list(svc.sample_all("BULL", rng=np.random.default_rng(i)).values())
+                      for i in range(300)])
+    assert abs(draws[:, svc.strategies.index("hot")].mean() - 0.9) < 0.02
+
+
+def test_thompson_sampler_uses_service_and_caches_state():
+    td, db = _mkdb()
+    orig = (state_store.DB_PATH, thompson_sampler.THOMPSON_STATE, thompson_sampler._load_json)
+    state_store.DB_PATH = db
+    thompson_sampler.THOMPSON_STATE = td / "state" / "thompson_state.json"
+    reads = []
+
+    def counting_load(path, default=None):
+        reads.append(path)
+        return orig[2](path, default)
+    thompson_sampler._load_json = counting_load
+    try:
+        regime = "SIDEWAYS_NORMAL_VOL"  # whale-following and cex-listing-play both preferred
+        _seed(db, [("whale-following", regime, 2.0, 60.0, 60), ("cex-listing-play", regime, 60.0, 2.0, 60)])
+        for k in range(5):
+            r = thompson_sampler.select_strategy(current_regime=regime, seed=k,
+                                                 eligible_strategies=["whale-following", "cex-listing-play"])
+            assert r["selected"] == "cex-listing-play", r
+        assert len(reads) == 1, reads  # state file parsed once, then served from memory
+
+        # Exploitation uses posterior means from the same arrays
+        state = thompson_sampler._load_state()
+        state["mode"] = "exploitation"
+        assert thompson_sampler._load_state()["mode"] == "thompson"  # unsaved edits don't leak into the cache
+        thompson_sampler._save_state(state)
+        r = thompson_sampler.select_strategy(current_regime=regime,
+                                             eligible_strategies=["whale-following", "cex-listing-play"])
+        assert r["scores"]["cex-listing-play"] == round(60 / 62 * 1.15, 6)
+
+        ranks = {x["strategy"]: x for x in thompson_sampler.rank_strategies(current_regime=regime)}
+        assert ranks["cex-listing-play"]["alpha"] == 60.0 and ranks["meme-momentum"]["expected_value"] == 0.5
+
+        # Another process rewrites the file → picked up
+        on_disk = json.loads(thompson_sampler.THOMPSON_STATE.read_text())
+        on_disk["strategies"]["cex-listing-play"]["status"] = "RETIRED"
+        thompson_sampler.THOMPSON_STATE.write_text(json.dumps(on_disk) + " ")
+        r = thompson_sampler.select_strategy(current_regime=regime, seed=1,
+                                             eligible_strategies=["whale-following", "cex-listing-play"])
+        assert r["selected"] == "whale-following" and r["excluded"]["cex-listing-play"] == "RETIRED"
+    finally:
+        state_store.DB_PATH, thompson_sampler.THOMPSON_STATE, thompson_sampler._load_json = orig
+
+
+def test_ucb1_sources_reparsed_only_when_changed():
+    td = Path(tempfile.mkdtemp(prefix="sanad_ucb_"))
+    orig_dir, orig_load = ucb1_scorer.SOURCE_DIR, ucb1_scorer.json.load
+    ucb1_scorer.SOURCE_DIR = td
+    ucb1_scorer._sources_cache.clear()
+    parsed = []
+
+    def counting_load(fh):
+        parsed.append(fh.name)
+        return orig_load(fh)
+    ucb1_scorer.json.load = counting_load
+    try:
+        for i in range(20):
+            ucb1_scorer._save_source(f"src{i}", ucb1_scorer._new_source_record(f"src{i}"))
+        assert len(ucb1_scorer._load_all_sources()) == 20 and len(parsed) == 20
+        parsed.clear()
+        ucb1_scorer.record_trade_outcome("src3", True, 5.0, 0.05)
+        assert len(parsed) == 1, parsed  # src3 loaded for update; the other 19 come from cache
+        parsed.clear()
+        sources = ucb1_scorer._load_all_sources()
+        assert len(parsed) == 1 and sources["src3"]["trades_executed"] == 1
+        os.remove(td / "src0.json")
+        assert "src0" not in ucb1_scorer._load_all_sources()
+    finally:
+        ucb1_scorer.SOURCE_DIR, ucb1_scorer.json.load = orig_dir, orig_load
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_version_bumped_by_learning_loop_and_reload_on_change,
+        test_router_shapes_match_table_readers,
+        test_sample_all_vectorized_prior_and_seeded,
+        test_thompson_sampler_uses_service_and_caches_state,
+        test_ucb1_sources_reparsed_only_when_changed,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: bandit_stats.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
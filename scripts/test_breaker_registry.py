@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker registry tests (breaker_registry.py + API clients, cex_price_provider, policy_engine).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_breaker_registry.py
+"""
+import sys, io, os, json, tempfile, time, contextlib
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import breaker_registry
+import state_store
+
+_TMP = Path(tempfile.mkdtemp(prefix="sanad_breakers_"))
+breaker_registry.STATE_DIR = _TMP / "breakers"
+breaker_registry.LEGACY_FILE = _TMP / "circuit_breakers.json"
+breaker_registry.DB_PATH = _TMP / "sanad_trader.db"
+
+
+def _quiet():
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _events(component):
+    return [(e["from_state"], e["to_state"])
+            for e in reversed(state_store.get_breaker_events(component, db_path=breaker_registry.DB_PATH))]
+
+
+# ========== TESTS ==========
+
+def test_consecutive_trip_half_open_and_events():
+    b = breaker_registry.Breaker("t_consec", trip_consecutive=3, cooldown_s=0.3)
+    path = breaker_registry.STATE_DIR / "t_consec.cb"
+    with _quiet():
+        assert b.record_success() is False and b.state() == "closed"
+        raw = path.read_bytes()
+        for _ in range(50):
+            b.record_success()
+        assert path.read_bytes() == raw  # healthy path never writes
+
+        assert not b.record_failure() and not b.record_failure()
+        b.record_success()                     # streak cleared
+        assert not b.record_failure() and not b.record_failure()
+        assert b.record_failure("HTTP 503")    # third in a row opens it
+        assert b.state() == "open" and not b.allow() and 0 < b.open_for_s() <= 0.3
+        assert not b.record_failure()          # already open: no second transition
+
+        time.sleep(0.35)
+        assert b.state() == "half_open" and b.allow()
+        assert b.record_failure("probe")       # failed probe re-opens immediately
+        time.sleep(0.35)
+        assert b.record_success() and b.state() == "closed"
+    snap = b.snapshot()
+    assert snap["trips"] == 2 and snap["total_errors"] == 7 and snap["cooldown_until"] is None
+    assert _events("t_consec") == [("closed", "open"), ("half_open", "open"), ("half_open", "closed")]
+
+
+def test_error_window_and_cross_process_view():
+    b = breaker_registry.Breaker("t_window", trip_errors=5, window_s=0.5, cooldown_s=60)
+    with _quiet():
+        for _ in range(4):
+            b.record_failure()
+        time.sleep(1.1)                      # errors age out of the window
+        b.record_success()
+        assert b.snapshot()["failure_count"] == 0 and b.state() == "closed"
+        for _ in range(3):
+            b.record_failure()
+            b.record_success()               # successes do not clear the window
+        pid = os.fork()
+        if pid == 0:                         # another process adds the last two errors
+            child = breaker_registry.Breaker("t_window", trip_errors=5, window_s=0.5, cooldown_s=60)
+            child.record_failure()
+            os._exit(0 if child.record_failure() else 1)
+        _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert b.state() == "open" and not breaker_registry.is_closed("t_window")
+    assert breaker_registry.read("t_window")["trips"] == 1
+    assert breaker_registry.read("never_registered") is None and breaker_registry.is_closed("never_registered")
+    with _quiet():
+        b.reset()
+    assert b.state() == "closed" and _events("t_window")[-1] == ("open", "closed")
+
+
+def test_clients_share_uniform_breakers():
+    import binance_client, mexc_client, dexscreener_client, helius_client, rugcheck_client, cex_price_provider
+    with _quiet():
+        for _ in range(5):
+            binance_client._error_tracker.record_error("HTTP 500")
+        assert binance_client._error_tracker.is_tripped()
+        assert not cex_price_provider._is_breaker_closed("binance") and cex_price_provider._is_breaker_closed("mexc")
+
+        for _ in range(3):
+            mexc_client._tracker.record_error("timeout")
+        assert mexc_client._tracker.is_tripped() and mexc_client._tracker.time_remaining() > 0
+        mexc_client._tracker.reset_after_success()
+        assert not mexc_client._tracker.is_tripped()
+
+        for client, component in ((dexscreener_client, "dexscreener_api"), (helius_client, "helius_rpc"),
+                                  (rugcheck_client, "rugcheck_api")):
+            for _ in range(3):
+                client._record_failure()
+            try:
+                client._check_circuit()
+                raise AssertionError(f"{component} did not open")
+            except RuntimeError as e:
+                assert "Circuit breaker OPEN" in str(e)
+            assert breaker_registry.read(component)["state"] == "open"
+            client._breaker.reset()
+            client._check_circuit()
+
+
+def test_readers_use_registry_and_legacy_entries():
+    import policy_engine
+    breaker_registry.LEGACY_FILE.write_text(json.dumps({
+        "debate_agents": {"state": "open", "failure_count": 3},
+        "binance_api": {"state": "closed", "failure_count": 0},  # stale file entry: registry wins
+    }))
+    with _quiet():
+        breaker_registry.breaker("binance_api").reset()
+        for name in ("t_reader_a", "t_reader_b"):
+            b = breaker_registry.breaker(name, trip_consecutive=1, cooldown_s=60)
+            b.record_failure()
+        states = breaker_registry.all_states()
+    assert states["debate_agents"]["state"] == "open" and states["binance_api"]["state"] == "closed"
+    assert states["t_reader_a"]["state"] == "open" and "trips" in states["binance_api"]
+    ok, evidence = policy_engine.check_circuit_breakers({"circuit_breakers": {"simultaneous_trip_pause": 3}},
+                                                        {"circuit_breakers": states})
+    assert not ok and "3 circuit breakers tripped" in evidence, evidence
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_consecutive_trip_half_open_and_events,
+        test_error_window_and_cross_process_view,
+        test_clients_share_uniform_breakers,
+        test_readers_use_registry_and_legacy_entries,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: breaker_registry.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
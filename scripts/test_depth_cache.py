@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Order-book depth cache tests (depth_cache.py + binance_client Gate 6/7 helpers).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_depth_cache.py
+"""
+import sys, random, tempfile, time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import depth_cache
+import binance_client
+
+
+def _random_book(rng, mid=1.0, levels=100):
+    bids = [[f"{mid * (1 - 0.001 * (i + 1)):.8f}", f"{rng.uniform(1, 500):.2f}"] for i in range(levels)]
+    asks = [[f"{mid * (1 + 0.001 * (i + 1)):.8f}", f"{rng.uniform(1, 500):.2f}"] for i in range(levels)]
+    rng.shuffle(asks)  # snapshot order must not matter
+    return {"bids": bids, "asks": asks}
+
+
+def _walk(levels, quantity):
+    """Reference: the level-by-level loop binance_client used to run."""
+    filled = cost = 0.0
+    for price, qty in levels:
+        take = min(quantity - filled, qty)
+        cost += take * price
+        filled += take
+        if filled >= quantity:
+            break
+    return filled, cost
+
+
+class _FakeRest:
+    def __init__(self, book):
+        self.book, self.calls = book, []
+
+    def __call__(self, symbol, limit=20):
+        self.calls.append((symbol, limit))
+        return self.book
+
+
+def _with_rest(fake):
+    orig = binance_client.get_order_book
+    binance_client.get_order_book = fake
+    return orig
+
+
+# ========== TESTS ==========
+
+def test_prefix_sum_fill_matches_level_walk():
+    rng = random.Random(41)
+    for _ in range(20):
+        raw = _random_book(rng, mid=rng.uniform(0.0001, 100))
+        book = depth_cache.DepthBook("X", raw["bids"], raw["asks"])
+        asks = sorted((float(p), float(q)) for p, q in raw["asks"])
+        for quantity in (0.5, 1.0, rng.uniform(1, 30000), book.asks.cum_qty[-1], 1e9):
+            filled, cost = book.fill("BUY", quantity)
+            ref_filled, ref_cost = _walk(asks, quantity)
+            assert abs(filled - ref_filled) < 1e-6 * max(1, ref_filled)
+            assert abs(cost - ref_cost) < 1e-6 * max(1, ref_cost), (quantity, cost, ref_cost)
+    assert book.best_bid < book.mid < book.best_ask and book.bids.prices == sorted(book.bids.prices, reverse=True)
+
+
+def test_slippage_spread_and_insufficient_depth():
+    book = depth_cache.DepthBook("PEPEUSDT", bids=[["0.99", "100"], ["0.98", "100"]],
+                                 asks=[["1.01", "100"], ["1.02", "100"], ["1.03", "0"]])
+    assert book.mid == 1.0 and book.spread_bps() == 202.0  # vs best bid, as Gate 7 always used
+    assert book.slippage_bps("BUY", 50) == 100.0           # fits in the first ask
+    assert book.slippage_bps("BUY", 150) == 133.3          # 100 @ 1.01 + 50 @ 1.02
+    assert book.slippage_bps("SELL", 100) == 100.0
+    assert book.slippage_bps("BUY", 205) != depth_cache.INSUFFICIENT_DEPTH_BPS  # ≥ 95% fillable
+    assert book.slippage_bps("BUY", 500) == depth_cache.INSUFFICIENT_DEPTH_BPS
+    assert depth_cache.DepthBook("X", [], [["1", "1"]]).spread_bps() is None
+    assert book.depth_usd("BUY") == 203.0
+
+
+def test_gates_6_and_7_share_one_book_request():
+    depth_cache.invalidate()
+    depth_cache.DEPTH_DIR = Path(tempfile.mkdtemp(prefix="sanad_depth_"))
+    fake = _FakeRest(_random_book(random.Random(7), mid=2.0))
+    orig = _with_rest(fake)
+    try:
+        slip = binance_client.estimate_slippage_bps("solusdt", "BUY", 200)
+        spread = binance_client.get_spread_bps("SOLUSDT")
+        book = depth_cache.get_book("SOLUSDT")
+        assert len(fake.calls) == 1 and fake.calls[0] == ("SOLUSDT", depth_cache.REST_LIMIT)
+        assert slip == book.slippage_bps("BUY", 200) and spread == book.spread_bps()
+        assert 0 < slip < 100 and 19.9 < spread < 20.1
+
+        # After the TTL the next evaluation fetches again
+        depth_cache._books["SOLUSDT"] = (time.monotonic() - depth_cache.BOOK_TTL_S - 1, book)
+        binance_client.get_spread_bps("SOLUSDT")
+        assert len(fake.calls) == 2
+    finally:
+        binance_client.get_order_book = orig
+
+
+def test_ws_snapshot_preferred_when_fresh_and_deep():
+    depth_cache.invalidate()
+    depth_cache.DEPTH_DIR = Path(tempfile.mkdtemp(prefix="sanad_depth_"))
+    fake = _FakeRest(_random_book(random.Random(3), mid=1.0))
+    orig = _with_rest(fake)
+    try:
+        depth_cache.write_ws_snapshot("wifusdt", [["0.999", "50"]], [["1.001", "50"]])
+        book = depth_cache.get_book("WIFUSDT", need_usd=20)
+        assert book.source == "binance_ws" and not fake.calls
+        assert not list(depth_cache.DEPTH_DIR.glob("*.tmp.*"))
+
+        # 20-level ws book too thin for the order → the 100-level REST book
+        book = depth_cache.get_book("WIFUSDT", need_usd=5000)
+        assert book.source == "rest" and len(fake.calls) == 1
+
+        # Stale ws snapshot is ignored
+        depth_cache.invalidate()
+        depth_cache.write_ws_snapshot("WIFUSDT", [["0.999", "50"]], [["1.001", "50"]],
+                                      ts=time.time() - depth_cache.WS_MAX_AGE_S - 1)
+        assert depth_cache.get_book("WIFUSDT").source == "rest" and len(fake.calls) == 2
+
+        fake.book = None
+        depth_cache.invalidate()
+        depth_cache.write_ws_snapshot("WIFUSDT", [], [])
+        assert depth_cache.get_book("WIFUSDT") is None and depth_cache.stats()["errors"] >= 1
+    finally:
+        binance_client.get_order_book = orig
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_prefix_sum_fill_matches_level_walk,
+        test_slippage_spread_and_insufficient_depth,
+        test_gates_6_and_7_share_one_book_request,
+        test_ws_snapshot_preferred_when_fresh_and_deep,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: depth_cache.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Batched DEX price poller tests (dex_price_poller.py + heartbeat/position_monitor/ws_manager wiring).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_dex_price_poller.py
+"""
+import sys, io, json, tempfile, contextlib
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import dex_price_poller
+import dexscreener_client
+
+
+def _mint(i):
+    return f"Mint{i:040d}"
+
+
+def _pair(mint, price, liquidity, pair="P"):
+    return {"pairAddress": f"{pair}{mint[-4:]}", "baseToken": {"address": mint},
+            "priceUsd": str(price), "liquidity": {"usd": liquidity}, "volume": {"h24": 1000.0}}
+
+
+class _FakeTokens:
+    """Stands in for dexscreener_client.get_tokens; prices every address it is given."""
+
+    def __init__(self, unlisted=()):
+        self.calls = []
+        self.unlisted = set(unlisted)
+
+    def __call__(self, chain_id, token_addresses):
+        assert len(token_addresses) <= 30
+        self.calls.append((chain_id, list(token_addresses)))
+        pairs = []
+        for a in token_addresses:
+            if a in self.unlisted:
+                continue
+            pairs.append(_pair(a, 0.5, 1_000, "thin"))
+            pairs.append(_pair(a, 0.42, 250_000, "deep"))
+            pairs.append({"baseToken": {"address": "So11111111111111111111111111111111111111112"},
+                          "priceUsd": "150", "liquidity": {"usd": 9e9}})  # quote side of some pair
+        return pairs
+
+
+@contextlib.contextmanager
+def _patched_get_tokens(fake):
+    orig = dexscreener_client.get_tokens
+    dexscreener_client.get_tokens = fake
+    try:
+        yield fake
+    finally:
+        dexscreener_client.get_tokens = orig
+
+
+# ========== TESTS ==========
+
+def test_300_addresses_take_10_requests():
+    positions = [{"token_address": _mint(i), "exchange": "raydium", "chain": "solana"} for i in range(300)]
+    positions += [{"token_address": _mint(7), "exchange": "raydium"},                  # duplicate
+                  {"symbol": "BTCUSDT", "exchange": "binance", "token_address": "x"},  # CEX
+                  {"token_address": "0xabc", "exchange": "uniswap", "chain": "base"}]  # other chain
+    with _patched_get_tokens(_FakeTokens(unlisted={_mint(3)})) as fake:
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            prices = dex_price_poller.poll(positions, include_watchlist=False, dry_run=True)
+    assert len(fake.calls) == 10, len(fake.calls)
+    assert all(chain == "solana" for chain, _ in fake.calls)
+    assert len(prices) == 299 and _mint(3) not in prices
+    entry = prices[_mint(0)]
+    assert entry["price"] == 0.42 and entry["liquidity_usd"] == 250_000  # deepest pair wins
+    assert entry["source"] == "dexscreener" and entry["timestamp"] and entry["pair_address"].startswith("deep")
+    assert "priced 299/300 addresses in 10 request(s)" in out.getvalue() and "1 not listed" in out.getvalue()
+
+
+def test_merge_keeps_binance_entries_and_price_of():
+    td = Path(tempfile.mkdtemp(prefix="sanad_dexprice_"))
+    path = td / "price_cache.json"
+    path.write_text(json.dumps({"BTCUSDT": 65000.0, "SOLUSDT": {"price": 150.0, "source": "binance_ws"}}))
+    with _patched_get_tokens(_FakeTokens()):
+        prices = dex_price_poller.fetch_prices([_mint(1), _mint(2), _mint(1)])
+    assert dex_price_poller.merge_price_cache(prices, path) == 2
+    cache = json.loads(path.read_text())
+    assert cache["BTCUSDT"] == 65000.0 and cache[_mint(2)]["price"] == 0.42
+    assert not list(td.glob("*.tmp.*"))
+    assert [dex_price_poller.price_of(cache[k]) for k in ("BTCUSDT", "SOLUSDT", _mint(1))] == [65000.0, 150.0, 0.42]
+    assert dex_price_poller.price_of(None) is None and dex_price_poller.price_of({"price": 0}) is None
+
+    # Batch failure: that chunk is skipped, the rest still priced
+    def flaky(chain_id, addrs):
+        if _mint(0) in addrs:
+            raise RuntimeError("DexScreener 503")
+        return _FakeTokens()(chain_id, addrs)
+    with _patched_get_tokens(flaky), contextlib.redirect_stdout(io.StringIO()):
+        prices = dex_price_poller.fetch_prices([_mint(i) for i in range(45)])
+    assert len(prices) == 15 and _mint(44) in prices
+
+
+def test_watchlist_tokens_collected():
+    td = Path(tempfile.mkdtemp(prefix="sanad_dexprice_"))
+    wl = td / "watchlist.json"
+    wl.write_text(json.dumps({"symbols": ["BTCUSDT", {"symbol": "WIF", "token_address": _mint(9)}],
+                              "dex_tokens": [_mint(1), {"address": "0xdef", "chain": "base"}]}))
+    orig = dex_price_poller.WATCHLIST_PATH
+    dex_price_poller.WATCHLIST_PATH = wl
+    try:
+        got = dex_price_poller.collect_addresses([{"token_address": _mint(1), "exchange": "raydium"}])
+    finally:
+        dex_price_poller.WATCHLIST_PATH = orig
+    assert got == [_mint(1), _mint(9)], got
+
+
+def test_heartbeat_prices_positions_in_one_batch():
+    home = Path(tempfile.mkdtemp(prefix="sanad_dexprice_home_"))
+    (home / "state").mkdir(parents=True, exist_ok=True)
+    import heartbeat
+    orig_state = heartbeat.STATE_DIR
+    heartbeat.STATE_DIR = home / "state"
+    positions = [{"status": "OPEN", "chain": "solana", "token": f"T{i}", "token_address": _mint(i),
+                  "entry_price": 0.4, "stop_loss": 0.1, "take_profit": 9.0} for i in range(5)]
+    orig_load, orig_cache = heartbeat.load_state, dex_price_poller.PRICE_CACHE_PATH
+    heartbeat.load_state = lambda name: {"positions": positions} if name == "positions.json" else {}
+    dex_price_poller.PRICE_CACHE_PATH = Path(tempfile.mkdtemp(prefix="sanad_dexprice_")) / "price_cache.json"
+    now = datetime.now(timezone.utc)
+    price_cache = {
+        _mint(0): {"price": 0.45, "source": "dexscreener", "timestamp": now.isoformat()},  # fresh: not re-fetched
+        _mint(1): {"price": 0.05, "source": "dexscreener",  # stalled poller: below the stop, must not alert
+                   "timestamp": (now - timedelta(seconds=heartbeat.PRICE_MAX_AGE_S + 60)).isoformat()},
+    }
+    try:
+        with _patched_get_tokens(_FakeTokens()) as fake, contextlib.redirect_stdout(io.StringIO()):
+            result = heartbeat.check_positions({}, {}, price_cache)
+    finally:
+        heartbeat.load_state, dex_price_poller.PRICE_CACHE_PATH = orig_load, orig_cache
+        heartbeat.STATE_DIR = orig_state
+    assert len(fake.calls) == 1 and len(fake.calls[0][1]) == 4, fake.calls
+    assert not [a for a in result.get("alerts", []) if "invalid price" in a], result
+    assert not [a for a in result.get("alerts", []) if "STOP-LOSS" in a], result
+    assert price_cache[_mint(1)]["price"] != 0.05  # refreshed by the batch pass
+
+
+def test_stale_and_closed_entries_dropped_on_merge():
+    td = Path(tempfile.mkdtemp(prefix="sanad_dexprice_"))
+    path = td / "price_cache.json"
+    now = datetime.now(timezone.utc)
+    old = (now - timedelta(seconds=dex_price_poller.STALE_ENTRY_S + 60)).isoformat()
+    path.write_text(json.dumps({
+        "BTCUSDT": 65000.0,                                                        # undated: kept
+        "ETHUSDT": {"price": 3000.0, "source": "binance_ws", "timestamp": old},    # dead feed
+        _mint(1): {"price": 0.4, "source": "dexscreener", "timestamp": now.isoformat()},  # position closed
+        _mint(2): {"price": 0.4, "source": "birdeye", "timestamp": now.isoformat()},      # not ours to retire
+    }))
+    fresh = {_mint(3): {"price": 0.42, "source": "dexscreener", "timestamp": now.isoformat()}}
+    assert dex_price_poller.merge_price_cache(fresh, path, live={_mint(3)}) == 1
+    assert sorted(json.loads(path.read_text())) == sorted(["BTCUSDT", _mint(2), _mint(3)])
+
+    # ws_manager ticks go through the same locked merge, so neither writer loses the other's keys
+    import ws_manager
+    orig = ws_manager.PRICE_CACHE_PATH
+    ws_manager.PRICE_CACHE_PATH = path
+    try:
+        ws_manager._update_price_cache("SOLUSDT", 150.0, "binance_ws")
+    finally:
+        ws_manager.PRICE_CACHE_PATH = orig
+    cache = json.loads(path.read_text())
+    assert cache["SOLUSDT"]["source"] == "binance_ws" and _mint(3) in cache
+
+
+def test_position_monitor_checks_each_price_age():
+    import position_monitor as pm
+    now = datetime.now(timezone.utc)
+    stale = (now - timedelta(minutes=pm.PRICE_MAX_AGE_MIN + 1)).isoformat()
+    cache = {
+        "BTCUSDT": 65000.0,  # Binance snapshot: dated by price_history
+        "ETHUSDT": 3000.0,
+        _mint(1): {"price": 0.42, "source": "dexscreener", "timestamp": now.isoformat()},
+        _mint(2): {"price": 0.42, "source": "dexscreener", "timestamp": stale},
+    }
+    history = {"BTCUSDT": [{"timestamp": stale, "price": 1.0}, {"timestamp": now.isoformat(), "price": 65000.0}],
+               "ETHUSDT": [{"timestamp": stale, "price": 3000.0}]}
+    assert pm._cached_price(cache, "BTCUSDT", history) == 65000.0
+    assert pm._cached_price(cache, "ETHUSDT", history) is None  # snapshot job dead
+    assert pm._cached_price(cache, "BTCUSDT") is None           # undated float: not trusted
+    assert pm._cached_price(cache, _mint(1)) == 0.42
+    assert pm._cached_price(cache, _mint(2), history) is None
+    assert pm._cached_price(cache, "SOLUSDT", history) is None
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_300_addresses_take_10_requests,
+        test_merge_keeps_binance_entries_and_price_of,
+        test_watchlist_tokens_collected,
+        test_heartbeat_prices_positions_in_one_batch,
+        test_stale_and_closed_entries_dropped_on_merge,
+        test_position_monitor_checks_each_price_age,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: dex_price_poller.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Token enrichment cache tests (enrichment_cache.py + state_store enrichment_cache tables).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_enrichment_cache.py
+"""
+import os, sys, io, tempfile, threading, time, types, contextlib
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import state_store
+import enrichment_cache
+
+
+def _mkdb():
+    td = Path(tempfile.mkdtemp(prefix="sanad_enrich_"))
+    db = td / "state" / "sanad_trader.db"
+    state_store.init_db(db)
+    enrichment_cache.DB_PATH = db
+    enrichment_cache._memory.clear()
+    enrichment_cache._counts.clear()
+    enrichment_cache._pending.clear()
+    enrichment_cache.STATS_FLUSH_INTERVAL_S = 3600  # tests flush explicitly
+    return db
+
+
+class _Provider:
+    """Counts calls; returns a fresh dict per call like a JSON API."""
+
+    def __init__(self, value=None, delay=0.0, error=None):
+        self.calls = 0
+        self.value = {"liquidity": 12345.0, "holder": 321} if value is None else value
+        self.delay = delay
+        self.error = error
+
+    def __call__(self):
+        self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return dict(self.value) if isinstance(self.value, dict) else self.value
+
+
+# ========== TESTS ==========
+
+def test_tiers_ttls_and_negative_results():
+    db = _mkdb()
+    fetch = _Provider()
+    first = enrichment_cache.get_or_fetch("birdeye", "solana", "MintA", "overview", fetch)
+    first["liquidity"] = 0  # callers own their copy
+    again = enrichment_cache.get_or_fetch("birdeye", "solana", "MintA", "overview", fetch)
+    assert fetch.calls == 1 and again["liquidity"] == 12345.0
+    assert enrichment_cache.last_lookup_cached()
+
+    # Another process (empty memory tier) is served from SQLite
+    enrichment_cache._memory.clear()
+    assert enrichment_cache.get_or_fetch("birdeye", "solana", "MintA", "overview", fetch)["holder"] == 321
+    assert fetch.calls == 1
+
+    # Per-group TTLs: creation outlives overview by orders of magnitude
+    enrichment_cache.get_or_fetch("birdeye", "solana", "MintA", "creation", _Provider({"blockUnixTime": 1}))
+    with state_store.get_connection(db) as conn:
+        ttl = {r["field_group"]: r["expires_at"] - r["fetched_at"]
+               for r in conn.execute("SELECT * FROM enrichment_cache WHERE address = 'MintA'")}
+    assert ttl["overview"] == enrichment_cache.FIELD_TTLS["overview"]
+    assert ttl["creation"] == enrichment_cache.FIELD_TTLS["creation"]
+
+    # Expired → refetched; address keys stay case-sensitive for base58
+    enrichment_cache.get_or_fetch("birdeye", "solana", "minta", "overview", fetch)
+    assert fetch.calls == 2
+    enrichment_cache._memory.clear()
+    with state_store.get_connection(db) as conn:
+        conn.execute("UPDATE enrichment_cache SET expires_at = 0 WHERE address = 'MintA' AND field_group = 'overview'")
+    enrichment_cache.get_or_fetch("birdeye", "solana", "MintA", "overview", fetch)
+    assert fetch.calls == 3 and not enrichment_cache.last_lookup_cached()
+
+    # Empty results and errors are not cached
+    empty = _Provider(value={})
+    for _ in range(2):
+        assert enrichment_cache.get_or_fetch("birdeye", "solana", "MintB", "security", empty) == {}
+    assert empty.calls == 2
+    boom = _Provider(error=RuntimeError("API error on /defi/token_security: 500"))
+    for _ in range(2):
+        try:
+            enrichment_cache.get_or_fetch("birdeye", "solana", "MintC", "security", boom)
+            assert False, "expected RuntimeError"
+        except RuntimeError:
+            pass
+    assert boom.calls == 2
+    assert state_store.enrichment_cache_claim("solana", "MintC", "security", "other", 15, db_path=db)  # lease released
+
+
+def test_concurrent_misses_coalesce_in_process():
+    _mkdb()
+    fetch = _Provider(delay=0.3)
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(enrichment_cache.get_or_fetch("rugcheck", "solana", "MintD", "rugcheck", fetch))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors and fetch.calls == 1, (errors, fetch.calls)
+    assert len(results) == 8 and all(r == results[0] for r in results)
+    assert len({id(r) for r in results}) == 8  # no shared mutable result
+    st = enrichment_cache.stats()["rugcheck"]
+    assert (st["misses"], st["coalesced"]) == (1, 7) and st["hit_rate"] == 0.875, st
+
+
+def test_memory_eviction_under_concurrent_writers():
+    _mkdb()
+    orig = enrichment_cache.MEMORY_MAX_ENTRIES, sys.getswitchinterval()
+    enrichment_cache.MEMORY_MAX_ENTRIES = 64
+    sys.setswitchinterval(1e-6)  # switch threads mid-iteration
+    errors = []
+
+    def writer(n):
+        try:
+            for i in range(2000):
+                enrichment_cache._remember(("solana", f"W{n}_{i}", "overview"), "{}", time.time() + (i % 2) - 0.5)
+                if i % 50 == 0:
+                    enrichment_cache.invalidate("solana", f"W{n}_{i - 1}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        enrichment_cache.MEMORY_MAX_ENTRIES = orig[0]
+        sys.setswitchinterval(orig[1])
+    assert not errors, errors[:3]
+    assert len(enrichment_cache._memory) <= 64
+
+
+def test_cross_process_lease_waits_for_owner():
+    db = _mkdb()
+    enrichment_cache.POLL_INTERVAL_S = 0.02
+    # Another process holds the lease and stores its result shortly after
+    assert state_store.enrichment_cache_claim("solana", "MintE", "holders", "9999:1", 15, db_path=db)
+
+    def other_process():
+        time.sleep(0.2)
+        state_store.enrichment_cache_put("solana", "MintE", "holders", "helius", '[{"address": "w1"}]',
+                                         600, owner="9999:1", db_path=db)
+
+    threading.Thread(target=other_process).start()
+    fetch = _Provider(value=[{"address": "ours"}])
+    t0 = time.monotonic()
+    got = enrichment_cache.get_or_fetch("helius", "solana", "MintE", "holders", fetch)
+    assert got == [{"address": "w1"}] and fetch.calls == 0
+    assert time.monotonic() - t0 < 2
+    assert enrichment_cache.stats()["helius"]["coalesced"] == 1
+
+    # A lease whose owner died (expired) is taken over immediately
+    assert state_store.enrichment_cache_claim("solana", "MintF", "holders", "9999:2", -1, db_path=db)
+    assert enrichment_cache.get_or_fetch("helius", "solana", "MintF", "holders", fetch) == [{"address": "ours"}]
+    assert fetch.calls == 1
+
+
+def test_clients_and_pipeline_share_cache():
+    _mkdb()
+    os.environ.setdefault("BIRDEYE_API_KEY", "test-key")  # never used: _get is replaced
+    import birdeye_client, rugcheck_client, sanad_pipeline
+    calls = []
+
+    def fake_birdeye(path, params=None):
+        calls.append(path)
+        return {"data": {"holder": 50, "liquidity": 9000.0, "top10HolderPercent": 0.3,
+                         "blockUnixTime": int(time.time()) - 7200}}
+
+    def fake_rugcheck(path, params=None):
+        calls.append(path)
+        return {"score_normalised": 10, "risks": [], "lpLockedPct": 100}
+
+    orig = (birdeye_client._get, rugcheck_client._get, time.sleep)
+    offline = {m: sys.modules.get(m) for m in ("holder_analyzer", "honeypot_detector", "rugpull_scanner")}
+    sleeps = []
+    birdeye_client._get, rugcheck_client._get = fake_birdeye, fake_rugcheck
+    time.sleep = lambda s: sleeps.append(s) if s == 2 else None  # only the Birdeye pacing sleeps
+    sys.modules.update({m: types.ModuleType(m) for m in offline})  # later on-chain steps: ImportError → skipped
+    try:
+        signal = {"token": "PEPE", "token_address": "MintG", "chain": "solana"}
+        with contextlib.redirect_stdout(io.StringIO()):
+            sanad_pipeline.enrich_signal_with_onchain_data(dict(signal))
+            live_calls, live_sleeps = len(calls), len(sleeps)
+            enrichment_cache._memory.clear()  # next cron process
+            sanad_pipeline.enrich_signal_with_onchain_data(dict(signal))
+        # Scanner path reuses the pipeline's overview
+        assert birdeye_client.get_token_overview("MintG")["liquidity"] == 9000.0
+    finally:
+        birdeye_client._get, rugcheck_client._get, time.sleep = orig
+        for m, mod in offline.items():
+            if mod is None:
+                sys.modules.pop(m, None)
+            else:
+                sys.modules[m] = mod
+    assert live_calls == 4 and live_sleeps == 3, (calls, sleeps)
+    assert len(calls) == 4 and len(sleeps) == 3  # second run: no provider calls, no pacing sleeps
+    assert birdeye_client.get_token_overview.uncached.__name__ == "get_token_overview"
+
+
+def test_stats_flush_and_cli():
+    db = _mkdb()
+    fetch = _Provider()
+    for _ in range(3):
+        enrichment_cache.get_or_fetch("birdeye", "solana", "MintH", "overview", fetch)
+    enrichment_cache.get_or_fetch("dexscreener", "solana", "MintH", "pairs", fetch)
+    assert enrichment_cache.flush_stats() == 2
+    enrichment_cache.get_or_fetch("birdeye", "solana", "MintH", "overview", fetch)
+
+    st = enrichment_cache.provider_stats()
+    assert st["birdeye"]["hits"] == 3 and st["birdeye"]["misses"] == 1 and st["birdeye"]["hit_rate"] == 0.75
+    assert st["dexscreener"]["misses"] == 1
+
+    with state_store.get_connection(db) as conn:
+        conn.execute("UPDATE enrichment_cache SET expires_at = 1")
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        enrichment_cache.main(["stats"])
+        enrichment_cache.main(["prune"])
+    text = out.getvalue()
+    assert "birdeye" in text and "75.0%" in text and "Pruned 2 entries" in text, text
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_tiers_ttls_and_negative_results,
+        test_concurrent_misses_coalesce_in_process,
+        test_memory_eviction_under_concurrent_writers,
+        test_cross_process_lease_waits_for_owner,
+        test_clients_and_pipeline_share_cache,
+        test_stats_flush_and_cli,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: enrichment_cache.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Paper matching engine tests (fill_engine.py + depth_cache tape, paper_execution, partial_fill_sim).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_fill_engine.py
+"""
+import sys, io, random, tempfile, time, contextlib
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import depth_cache
+import fill_engine
+
+
+def _book(mid=1.0, levels=50, qty=100.0, ts=None, seed=None):
+    rng = random.Random(seed)
+    q = (lambda: rng.uniform(10, 500)) if seed is not None else (lambda: qty)
+    return depth_cache.DepthBook("TESTUSDT",
+                                 [[mid * (1 - 0.001 * (i + 1)), q()] for i in range(levels)],
+                                 [[mid * (1 + 0.001 * (i + 1)), q()] for i in range(levels)], ts=ts)
+
+
+# ========== TESTS ==========
+
+def test_book_fills_vectorized_match_scalar_walk():
+    book = _book(seed=5)
+    sizes = np.array([1.0, 50.0, 500.0, 5000.0, 1e7])
+    res = fill_engine.book_fills(book, "BUY", sizes)
+    for i, size in enumerate(sizes):
+        filled, cost = book.fill("BUY", size / book.mid)
+        assert abs(res["filled_qty"][i] - filled) < 1e-9 and abs(res["notional_usd"][i] - cost) < 1e-6
+    assert np.all(np.diff(res["slippage_bps"]) >= 0)  # bigger orders walk deeper
+    assert res["fill_pct"][-1] < 1 and res["fill_pct"][0] == 1.0  # larger than the visible book → partial
+    sell = fill_engine.quote_book(book, "SELL", 50.0)
+    assert sell["vwap"] < book.mid and sell["slippage_bps"] > 0 and not sell["partial"]
+
+
+def test_amm_constant_product():
+    rb, rq = fill_engine.reserves_from_liquidity(200_000, 0.5)  # 200k base, 100k USD per side
+    assert (rb, rq) == (200_000, 100_000)
+    buy = fill_engine.amm_fills(rb, rq, "BUY", np.array([10.0, 1_000.0, 10_000.0]), fee_bps=25)
+    dx = 10_000 * (1 - 0.0025)
+    assert abs(buy["filled_qty"][2] - rb * dx / (rq + dx)) < 1e-6
+    assert (rb - buy["filled_qty"][2]) * (rq + 10_000) >= rb * rq  # k never shrinks (fee stays in pool)
+    assert 25 < buy["slippage_bps"][0] < 27  # tiny order: ~ just the LP fee
+    assert buy["slippage_bps"][2] > 1000 and np.all(buy["fill_pct"] == 1.0)
+
+    sell = fill_engine.amm_fills(rb, rq, "SELL", 1_000.0, fee_bps=25)
+    assert sell["vwap"] < 0.5 and sell["slippage_bps"] > 25
+
+    capped = fill_engine.quote_amm(200_000, 0.5, "BUY", 10_000, exchange="raydium", max_slippage_bps=300)
+    assert capped["fill_pct"] == 0.0 and capped["lp_fee_bps"] == 25  # swap reverts past the tolerance
+
+    # Thousands of pools in one call (broadcast)
+    pools = fill_engine.amm_fills(np.full(5000, rb), np.full(5000, rq), "BUY", np.linspace(10, 10_000, 5000))
+    assert pools["vwap"].shape == (5000,) and np.all(np.diff(pools["vwap"]) > 0)
+
+
+def test_replay_uses_book_at_fill_time_with_latency_drift():
+    tape = [_book(mid=1.0, ts=100.0), _book(mid=1.2, ts=200.0)]
+    order_ts = np.array([50.0, 199.8, 199.0, 250.0])
+    res = fill_engine.replay_fills(tape, order_ts, np.array(["BUY", "BUY", "SELL", "BUY"]), 50.0, latency_s=0.5)
+    assert res["fill_pct"][0] == 0.0 and np.isnan(res["vwap"][0])   # before the first snapshot
+    assert abs(res["vwap"][1] - 1.2 * 1.001) < 1e-9                  # decided at 1.0, filled on the 1.2 book
+    assert res["slippage_bps"][1] > 1900
+    assert res["vwap"][2] < 1.0                                      # SELL decided and filled on the 1.0 book
+    assert abs(res["vwap"][3] - 1.2 * 1.001) < 1e-9 and res["slippage_bps"][3] < 11
+
+    # Trade prints move the snapshot price to the fill instant
+    trades = (np.array([200.0, 250.2]), np.array([1.2, 1.26]))
+    res = fill_engine.replay_fills(tape, np.array([250.0]), "BUY", 50.0, latency_s=0.5, trades=trades)
+    assert abs(res["vwap"][0] - 1.2 * 1.001 * 1.05) < 1e-9
+
+    # Vectorized replay throughput
+    rng = np.random.default_rng(0)
+    tape = [_book(mid=1 + 0.01 * i, ts=float(60 * i), seed=i) for i in range(60)]
+    n = 50_000
+    t0 = time.perf_counter()
+    res = fill_engine.replay_fills(tape, np.sort(rng.uniform(0, 3600, n)),
+                                   np.where(np.arange(n) % 2, "SELL", "BUY"), rng.uniform(10, 5000, n))
+    elapsed = time.perf_counter() - t0
+    assert np.all(res["fill_pct"] > 0) and n / elapsed > 20_000, f"{n / elapsed:,.0f} fills/s"
+
+
+def test_tape_roundtrip():
+    depth_cache.DEPTH_DIR = Path(tempfile.mkdtemp(prefix="sanad_tape_"))
+    day = 1_760_000_000.0
+    for i in range(3):
+        depth_cache.append_tape("solusdt", [[150 - i, 1]], [[151 - i, 1]], ts=day + 60 * i)
+    depth_cache.append_tape("SOLUSDT", [[149, 1]], [[150, 1]], ts=day + 86_400)
+    (depth_cache.DEPTH_DIR / "tape" / "SOLUSDT" / "x.jsonl").write_text('{"ts": 1, "bids"')  # ignored
+    tape = depth_cache.load_tape("SOLUSDT", since_ts=day + 30, until_ts=day + 86_400)
+    assert [b.ts for b in tape] == [day + 60, day + 120, day + 86_400]
+    assert tape[0].best_ask == 150 and tape[0].source == "tape"
+
+    # Retention: starting a day past TAPE_RETENTION_DAYS drops the old day files
+    later = day + (depth_cache.TAPE_RETENTION_DAYS + 2) * 86_400
+    depth_cache.append_tape("SOLUSDT", [[149, 1]], [[150, 1]], ts=later)
+    assert [b.ts for b in depth_cache.load_tape("SOLUSDT", until_ts=later)] == [later]
+
+
+def test_paper_execution_and_partial_fill_sim_use_depth():
+    import paper_execution, partial_fill_sim
+    thin = _book(mid=2.0, levels=5, qty=10.0)  # ~$100 of asks
+    orig, orig_base = depth_cache.get_book, paper_execution.BASE_DIR
+    depth_cache.get_book = lambda symbol, need_usd=None, **kw: thin if symbol == "THINUSDT" else None
+    paper_execution.BASE_DIR = Path(tempfile.mkdtemp(prefix="sanad_paper_"))  # execution-logs/paper_fills.jsonl
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cex = paper_execution.execute_paper_trade("THIN", "THINUSDT", "BUY", 100.0, 2.0)
+            again = paper_execution.execute_paper_trade("THIN", "THINUSDT", "BUY", 100.0, 2.0)
+            dex = paper_execution.execute_paper_trade("BP", "BP/USDT", "BUY", 1000.0, 0.5, venue="DEX",
+                                                      exchange="raydium", liquidity_usd=200_000)
+            blind = paper_execution.execute_paper_trade("XYZ", "XYZUSDT", "BUY", 10.0, 1.0)
+    finally:
+        depth_cache.get_book, paper_execution.BASE_DIR = orig, orig_base
+    assert cex["fill_model"] == "book" and cex["status"] == "PARTIALLY_FILLED" and cex["quantity"] == 50.0
+    assert cex["price"] == again["price"]  # deterministic
+    assert abs(cex["price"] - 2.0 * 1.003) < 1e-9 and cex["fee_rate"] == 0.001
+    assert dex["fill_model"] == "amm" and dex["fee_rate"] == 0.0 and dex["price"] > 0.5 * 1.0025
+    assert blind["fill_model"] == "random" and blind["status"] == "FILLED"
+
+    sim = partial_fill_sim.simulate_fill(300, book=thin)
+    assert sim["model"] == "book" and sim["partial"] and abs(sim["fill_pct"] - 50 / 150) < 1e-3  # 5 levels × 10
+    assert partial_fill_sim.simulate_fill(10, book=thin)["reason"] == "full_fill"
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_book_fills_vectorized_match_scalar_walk,
+        test_amm_constant_product,
+        test_replay_uses_book_at_fill_time_with_latency_drift,
+        test_tape_roundtrip,
+        test_paper_execution_and_partial_fill_sim_use_depth,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: fill_engine.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
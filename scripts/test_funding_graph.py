@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Funding graph tests — batched resolution, cross-token reuse, cluster queries.
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_funding_graph.py
+
+helius_client._rpc_batch is replaced by an in-process fake chain. Isolated temp DB.
+"""
+import os, sys, tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import state_store
+import helius_client
+import funding_graph
+
+
+class FakeChain:
+    """wallet → funder, optional wallet → history length. Counts batch POSTs and individual calls."""
+
+    def __init__(self, funders, history=None):
+        self.funders = funders
+        self.history = history or {}
+        self.posts = 0
+        self.calls = 0
+
+    def rpc_batch(self, calls):
+        self.posts += (len(calls) + helius_client.RPC_BATCH_SIZE - 1) // helius_client.RPC_BATCH_SIZE
+        self.calls += len(calls)
+        out = []
+        for method, params in calls:
+            if method == "getSignaturesForAddress":
+                w, opts = params
+                n = self.history.get(w, 2)  # newest first; index n-1 is the first transaction
+                sigs = [{"signature": f"first_{w}" if i == n - 1 else f"s{i}_{w}", "blockTime": 2000 - i}
+                        for i in range(n)]
+                if opts.get("before"):
+                    sigs = sigs[[x["signature"] for x in sigs].index(opts["before"]) + 1:]
+                out.append(sigs[:opts["limit"]])
+            elif method == "getTransaction":
+                w = params[0][len("first_"):]
+                out.append({"transaction": {"message": {"accountKeys": [
+                    {"pubkey": self.funders.get(w, w)}, {"pubkey": w}]}}})
+            else:
+                out.append(None)
+        return out
+
+
+def _mkdb():
+    td = Path(tempfile.mkdtemp(prefix="sanad_funding_"))
+    db = td / "sanad_trader.db"
+    state_store.init_db(db)
+    return db
+
+
+def _install(funders, history=None):
+    chain = FakeChain(funders, history)
+    helius_client._rpc_batch = chain.rpc_batch
+    return chain
+
+
+# ========== TESTS ==========
+
+def test_resolution_is_batched():
+    db = _mkdb()
+    holders = [f"H{i}" for i in range(30)]
+    chain = _install({h: "PARENT" for h in holders[:4]})
+
+    edges = funding_graph.resolve_funding(holders, db_path=db)
+    assert len(edges) == 30, len(edges)
+    assert edges["H0"]["funder"] == "PARENT"
+    assert edges["H10"]["funder"] is None  # self-funded
+    assert edges["H0"]["first_seen_ts"] == 1999
+    # 30 sigs + 30 txs = 60 calls in 4 POSTs (2 per 20-call chunk), not 60 POSTs
+    assert chain.calls == 60, chain.calls
+    assert chain.posts == 4, chain.posts
+
+
+def test_overlapping_holders_cost_zero_rpcs():
+    db = _mkdb()
+    chain = _install({})
+    funding_graph.resolve_funding([f"H{i}" for i in range(20)], db_path=db)
+    chain.calls = chain.posts = 0
+
+    # Second token: same holders — nothing to fetch
+    funding_graph.resolve_funding([f"H{i}" for i in range(20)], db_path=db)
+    assert chain.calls == 0, chain.calls
+
+    # Third token: 5 new holders — only those are fetched
+    funding_graph.resolve_funding([f"H{i}" for i in range(15, 25)], db_path=db)
+    assert chain.calls == 10, chain.calls
+
+
+def test_failed_rpc_not_persisted():
+    db = _mkdb()
+    helius_client._rpc_batch = lambda calls: [None] * len(calls)
+    assert funding_graph.resolve_funding(["X1"], db_path=db) == {}
+    assert state_store.get_wallet_funding(["X1"], db_path=db) == {}
+
+
+def test_long_history_paged_to_first_transaction():
+    db = _mkdb()
+    orig = funding_graph.SIGNATURE_PAGE, funding_graph.MAX_SIGNATURE_PAGES
+    funding_graph.SIGNATURE_PAGE, funding_graph.MAX_SIGNATURE_PAGES = 10, 3
+    try:
+        # ACTIVE's funder is only visible on its 25th-newest transaction; BUSY has too much history
+        chain = _install({"ACTIVE": "PARENT", "BUSY": "PARENT"}, history={"ACTIVE": 25, "BUSY": 40, "EMPTY": 0})
+        edges = funding_graph.resolve_funding(["ACTIVE", "BUSY", "EMPTY"], db_path=db)
+    finally:
+        funding_graph.SIGNATURE_PAGE, funding_graph.MAX_SIGNATURE_PAGES = orig
+    assert edges["ACTIVE"] == {"funder": "PARENT", "first_seen_ts": 1976, "first_signature": "first_ACTIVE"}, edges
+    assert edges["BUSY"]["funder"] is None and edges["BUSY"]["first_signature"] is None
+    assert edges["EMPTY"]["funder"] is None and edges["EMPTY"]["first_signature"] is None
+    assert chain.calls == 3 + 2 + 2 + 1  # three page rounds, then one getTransaction
+
+    # Unresolved wallets are retried once UNRESOLVED_RETRY_S has passed, resolved ones never
+    chain.calls = 0
+    funding_graph.resolve_funding(["ACTIVE", "BUSY", "EMPTY"], db_path=db)
+    assert chain.calls == 0
+    with state_store.get_connection(db) as conn:
+        conn.execute("UPDATE wallet_funding SET resolved_at = '2000-01-01T00:00:00+00:00'")
+    funding_graph.resolve_funding(["ACTIVE", "BUSY", "EMPTY"], db_path=db)
+    assert chain.calls == 2 + 1, chain.calls  # BUSY: 40 sigs in 1000-sized pages, then its tx; EMPTY: one page
+    assert state_store.get_wallet_funding(["BUSY"], db_path=db)["BUSY"]["funder"] == "PARENT"
+
+
+def test_find_clusters_graph_query():
+    db = _mkdb()
+    funders = {"A1": "P", "A2": "P", "A3": "P", "B1": "Q", "B2": "Q"}
+    _install(funders)
+    wallets = list(funders) + ["C1"]
+    funding_graph.resolve_funding(wallets, db_path=db)
+
+    clusters = funding_graph.find_clusters(wallets, min_children=3, db_path=db)
+    assert clusters == [{"parent_wallet": "P", "child_count": 3, "addresses": ["A1", "A2", "A3"]}], clusters
+
+
+def test_wallet_cluster_spans_tokens():
+    db = _mkdb()
+    funders = {"T1a": "P", "T2a": "P", "T3a": "P", "LONE": "Z"}
+    _install(funders)
+    # Each sibling seen on a different token
+    for w in ["T1a", "T2a", "T3a", "LONE"]:
+        funding_graph.resolve_funding([w], db_path=db)
+
+    cluster = funding_graph.wallet_cluster("T2a", db_path=db)
+    assert cluster and cluster["parent_wallet"] == "P" and cluster["child_count"] == 3, cluster
+    assert funding_graph.wallet_cluster("LONE", db_path=db) is None
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_resolution_is_batched,
+        test_overlapping_holders_cost_zero_rpcs,
+        test_failed_rpc_not_persisted,
+        test_long_history_paged_to_first_transaction,
+        test_find_clusters_graph_query,
+        test_wallet_cluster_spans_tokens,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: funding_graph.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
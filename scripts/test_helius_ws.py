@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Helius WS event buffer tests (helius_ws.py: rolling aggregates, bounded memory, incremental snapshots).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_helius_ws.py
+"""
+import sys, json, random, tempfile
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import helius_ws as hws
+
+T0 = 1_700_000_000
+LAMPORTS = hws.LAMPORTS_PER_SOL
+
+
+def _swap(sig, ts, wallet, mint, sol, buy=True):
+    leg = {"userAccount": wallet, "mint": mint, "rawTokenAmount": {"tokenAmount": "2500000", "decimals": 6}}
+    native = {"account": wallet, "amount": str(int(sol * LAMPORTS))}
+    swap = {"nativeInput": native, "tokenOutputs": [leg]} if buy else {"nativeOutput": native, "tokenInputs": [leg]}
+    return {"signature": sig, "type": "SWAP", "timestamp": ts, "feePayer": wallet,
+            "description": f"{wallet} swapped", "events": {"swap": swap}}
+
+
+def _brute(trades, key_index, key, now):
+    """Reference window totals from the raw trade list (ts, wallet, mint, sol, side)."""
+    window = [t for t in trades if t[key_index] == key
+              and now // hws.AGG_BUCKET_S - t[0] // hws.AGG_BUCKET_S < hws.AGG_WINDOW_BUCKETS]
+    return (sum(t[3] for t in window), sum(t[3] * t[4] for t in window), len(window),
+            len({t[1] for t in window if t[4] > 0}))
+
+
+# ========== TESTS ==========
+
+def test_rolling_aggregates_match_brute_force():
+    rng = random.Random(3)
+    buf = hws.HeliusEventBuffer()
+    mints, wallets = ["MintA", "MintB", "MintC"], [f"W{i}" for i in range(12)]
+    trades = []
+    ts = T0
+    for i in range(3000):
+        ts += rng.choice([1, 5, 30, 120, 900]) if rng.random() < 0.3 else 0  # bursts and gaps > window
+        w, m, sol, side = rng.choice(wallets), rng.choice(mints), round(rng.uniform(0.1, 20), 3), rng.choice([1, -1])
+        buf.process(_swap(f"s{i}", ts, w, m, sol, buy=side > 0))
+        trades.append((ts, w, m, sol, side))
+        if i % 250 == 0 or i == 2999:
+            for m2 in mints:
+                snap = buf.token_stats(m2, now=ts)
+                if snap is None:
+                    continue
+                vol, flow, n, buyers = _brute(trades, 2, m2, ts)
+                assert abs(snap["volume_sol"] - vol) < 1e-6 and abs(snap["net_flow_sol"] - flow) < 1e-6, (snap, vol, flow)
+                assert snap["trades"] == n and snap["unique_buyers"] == buyers, (i, m2, snap, n, buyers)
+            for w2 in wallets[:4]:
+                snap = buf.wallet_stats(w2, now=ts)
+                if snap is not None:
+                    vol, flow, n, _ = _brute(trades, 1, w2, ts)
+                    assert abs(snap["net_flow_sol"] - flow) < 1e-6 and snap["trades"] == n
+                    assert snap["unique_buyers"] is None  # wallets keep no buyer set
+
+    # Quiet period longer than the window empties it
+    later = ts + hws.AGG_BUCKET_S * hws.AGG_WINDOW_BUCKETS
+    assert buf.token_stats("MintA", now=later)["trades"] == 0
+    assert buf.token_stats("MintA", now=later)["unique_buyers"] == 0
+    assert buf.stats["swaps"] == 3000 and buf.stats["total_received"] == 3000
+
+
+def test_signals_only_for_actionable_events():
+    buf = hws.HeliusEventBuffer()
+    assert buf.process(_swap("a", T0, "W1", "MintA", 2.0)) is None  # routine swap: aggregates only
+    big = buf.process(_swap("b", T0 + 1, "W2", "MintA", hws.LARGE_SWAP_SOL + 5, buy=False))
+    assert big["large_swap"] and big["side"] == "SELL" and big["sol_amount"] == hws.LARGE_SWAP_SOL + 5
+    assert big["mint"] == "MintA" and big["wallet"] == "W2" and big["token_amount"] == 2.5
+    assert big["token_window"]["trades"] == 2 and big["token_window"]["unique_buyers"] == 1
+    assert abs(big["token_window"]["net_flow_sol"] - (2.0 - hws.LARGE_SWAP_SOL - 5)) < 1e-9
+
+    whale = buf.process({"signature": "c", "type": "TRANSFER", "timestamp": T0 + 2, "description": "x" * 500,
+                         "tokenTransfers": [{"mint": "MintA", "tokenAmount": 10, "fromUserAccount": "F",
+                                             "toUserAccount": "T"},
+                                            {"mint": "MintA", "tokenAmount": 5_000_000, "fromUserAccount": "W3",
+                                             "toUserAccount": "W4"}]})
+    assert whale["whale_alert"] and whale["from"] == "W3" and whale["to"] == "W4" and len(whale["description"]) == 200
+    assert whale["token_window"]["whale_transfers"] == 1 and buf.wallet_stats("W4")["transfers"] == 1
+    assert buf.process({"signature": "d", "type": "TOKEN_TRANSFER", "tokenTransfers": []}) is None
+    assert buf.process({"signature": "e", "type": "NFT_SALE"}) is None
+    assert buf.process(_swap("a", T0, "W1", "MintA", 2.0)) is None
+    assert buf.stats == {"total_received": 5, "transfers": 2, "swaps": 2, "other": 1, "whale_alerts": 1,
+                         "large_swaps": 1, "duplicates": 1}
+    assert [e.signature for e in buf.events] == ["a", "b", "c", "d", "e"]
+
+
+def test_memory_bounded():
+    buf = hws.HeliusEventBuffer(maxlen=50)
+    saved = hws.MAX_TRACKED_TOKENS, hws.MAX_TRACKED_WALLETS
+    hws.MAX_TRACKED_TOKENS, hws.MAX_TRACKED_WALLETS = 20, 30
+    try:
+        for i in range(5000):
+            buf.process(_swap(f"sig{i}", T0 + i, f"W{i % 400}", f"M{i % 100}", 1.0))
+    finally:
+        hws.MAX_TRACKED_TOKENS, hws.MAX_TRACKED_WALLETS = saved
+    assert len(buf.events) == 50 and len(buf.tokens) == 20 and len(buf.wallets) == 30
+    assert len(buf.seen_sigs) == len(buf._sig_order) == hws.SEEN_SIG_MAX
+    assert "sig4999" in buf.seen_sigs and "sig0" not in buf.seen_sigs  # oldest evicted, FIFO
+    assert buf.process(_swap("sig4999", T0, "W", "M0", 1.0)) is None
+    assert set(buf.tokens) == {f"M{i}" for i in range(80, 100)}  # least recently active evicted
+    assert buf.dirty_tokens <= set(buf.tokens)
+    # Per-token buyer index only spans the window
+    assert all(len(a.buyers) <= 400 for a in buf.tokens.values())
+
+
+def test_incremental_snapshots_and_restore():
+    td = Path(tempfile.mkdtemp(prefix="sanad_helius_"))
+    buf = hws.HeliusEventBuffer()
+    snap = hws.StateSnapshotter(buf, state_dir=td, interval_s=0, compact_lines=3)
+    for i in range(200):
+        buf.process(_swap(f"a{i}", T0 + i, f"W{i % 20}", f"M{i % 10}", 1.0 + i % 3, buy=i % 4 != 0))
+    assert snap.save() == 30
+    assert snap.save() == 0  # nothing dirty → no journal line
+    buf.process(_swap("b1", T0 + 300, "W1", "M1", 3.0))
+    assert snap.save() == 2  # only the touched token + wallet
+    lines = [json.loads(l) for l in (td / "helius_ws_aggregates.jsonl").read_text().splitlines()]
+    assert [sorted(l["tokens"]) for l in lines] == [sorted(f"M{i}" for i in range(10)), ["M1"]]
+    assert [l["seq"] for l in lines] == [1, 2]
+    status = json.loads((td / "helius_ws_state.json").read_text())
+    assert status["stats"]["swaps"] == 201 and status["last_events"][-1]["signature"] == "b1"
+
+    restored = hws.HeliusEventBuffer()
+    assert hws.StateSnapshotter(restored, state_dir=td).restore() == 30
+    for m in buf.tokens:
+        assert restored.token_stats(m) == buf.token_stats(m), m
+    assert restored.wallet_stats("W1") == buf.wallet_stats("W1")
+
+    # Third line triggers compaction: base holds everything, journal emptied
+    buf.process(_swap("b2", T0 + 400, "W2", "M2", 1.0))
+    snap.save()
+    assert (td / "helius_ws_aggregates.jsonl").read_text() == ""
+    assert json.loads((td / "helius_ws_aggregates.json").read_text())["seq"] == 3
+    # Crash after the base rewrite but before truncation: stale journal lines are skipped
+    (td / "helius_ws_aggregates.jsonl").write_text("\n".join(json.dumps(l) for l in lines) + "\n{torn")
+    again = hws.HeliusEventBuffer()
+    s2 = hws.StateSnapshotter(again, state_dir=td)
+    s2.restore()
+    assert again.token_stats("M2") == buf.token_stats("M2") and s2.seq == 3
+    again.process(_swap("c1", T0 + 500, "W9", "M9", 1.0))
+    s2.save()
+    assert json.loads((td / "helius_ws_aggregates.jsonl").read_text().splitlines()[-1])["seq"] == 4
+
+
+def test_replay_benchmark_throughput():
+    td = Path(tempfile.mkdtemp(prefix="sanad_helius_rec_"))
+    recorded = td / "events.jsonl"
+    recorded.write_text("".join(json.dumps(e) + "\n" for e in hws._synthetic_events(2000)))
+    r = hws._bench(20_000, recorded)  # recorded events cycled with unique signatures
+    assert r["events"] == 20_000 and r["tokens"] == 200
+    assert r["rate"] > 3_000, f"only {r['rate']:.0f} events/s"
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_rolling_aggregates_match_brute_force,
+        test_signals_only_for_actionable_events,
+        test_memory_bounded,
+        test_incremental_snapshots_and_restore,
+        test_replay_benchmark_throughput,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: helius_ws.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
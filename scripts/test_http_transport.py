@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP transport tests (http_transport.py + binance_client) against a local stub server.
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_http_transport.py
+"""
+import sys, io, os, json, socket, tempfile, threading, contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import requests
+import state_store
+import http_transport
+
+_TMP = Path(tempfile.mkdtemp(prefix="sanad_http_"))
+http_transport.DB_PATH = _TMP / "sanad_trader.db"
+http_transport.BACKOFF_BASE_S = 0.01
+state_store.init_db(http_transport.DB_PATH)
+
+
+class _Stub(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive stub: counts TCP connections, can drop a request without answering."""
+    protocol_version = "HTTP/1.1"
+    connections = set()
+    drops = {}  # path → requests still to drop
+    hits = []
+
+    def setup(self):
+        super().setup()
+        _Stub.connections.add(self.client_address)
+
+    def log_message(self, *args):
+        pass
+
+    def _answer(self):
+        path = self.path.split("?")[0]
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        _Stub.hits.append((self.command, path, body))
+        if _Stub.drops.get(path):
+            _Stub.drops[path] -= 1
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)  # no response at all
+            return
+        if path == "/api/v3/ticker/price":
+            status, payload = 200, {"symbol": "BTCUSDT", "price": "65000.5"}
+        elif path.startswith("/fail"):
+            status, payload = 500 if "500" in path else 400, {"code": -1121, "msg": "Invalid symbol."}
+        else:
+            status, payload = 200, {"ok": True, "path": path}
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = _answer
+
+
+def _server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    _Stub.connections.clear()
+    _Stub.drops.clear()
+    _Stub.hits.clear()
+    http_transport.close_all()
+    return srv, f"http://127.0.0.1:{srv.server_address[1]}"
+
+
+def _stat(host, endpoint):
+    return next(s for s in http_transport.stats() if s["host"] == host and s["endpoint"] == endpoint)
+
+
+# ========== TESTS ==========
+
+def test_keep_alive_pooled_per_host():
+    srv, url = _server()
+    try:
+        for i in range(20):
+            assert http_transport.get(f"{url}/ping", params={"i": i}, timeout=5).json()["ok"]
+        assert len(_Stub.connections) == 1  # one TCP connection for 20 sequential requests
+        assert http_transport.session(url + "/other") is http_transport.session(url)
+
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(5):
+                    http_transport.post(f"{url}/ping", json={"x": 1}, timeout=5)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert not errors and len(_Stub.hits) == 60
+        assert len(_Stub.connections) <= 1 + 8  # concurrent callers reuse the pool
+    finally:
+        srv.shutdown()
+
+    # A forked child never reuses the parent's pooled sockets
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.write(w, b"1" if not http_transport._sessions and not http_transport._pending else b"0")
+        os._exit(0)
+    os.waitpid(pid, 0)
+    assert os.read(r, 1) == b"1"
+
+
+def test_connection_retries_only_when_safe():
+    srv, url = _server()
+    try:
+        _Stub.drops["/flaky"] = 2
+        assert http_transport.get(f"{url}/flaky", timeout=5).json()["ok"]  # 2 dropped, 3rd answered
+        assert _stat("127.0.0.1", "/flaky")["retries"] == 2
+
+        _Stub.drops["/order"] = 1
+        try:
+            http_transport.post(f"{url}/order", data=b"side=BUY", timeout=5)  # may have been received
+            raise AssertionError("POST was retried")
+        except requests.exceptions.ConnectionError:
+            pass
+        assert [h for h in _Stub.hits if h[1] == "/order"] == [("POST", "/order", b"side=BUY")]
+
+        _Stub.drops["/rpc"] = 1
+        assert http_transport.post(f"{url}/rpc", json={"method": "getAsset"}, timeout=5,
+                                   idempotent=True, endpoint="rpc:getAsset").json()["ok"]
+        assert _stat("127.0.0.1", "rpc:getAsset")["retries"] == 1
+    finally:
+        srv.shutdown()
+
+    # Connection refused: never sent, so even a POST retries (then raises)
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    try:
+        http_transport.post(f"http://127.0.0.1:{port}/order", data=b"x", timeout=2)
+        raise AssertionError("expected ConnectionError")
+    except requests.exceptions.ConnectionError:
+        pass
+    refused = _stat("127.0.0.1", "/order")
+    assert refused["retries"] == http_transport.RETRIES and refused["errors"] == 2
+    assert all(0 <= http_transport._backoff_s(a) <= http_transport.BACKOFF_CAP_S for a in range(1, 12))
+
+
+def test_histograms_per_endpoint_flushed():
+    srv, url = _server()
+    try:
+        mint = "So11111111111111111111111111111111111111112"
+        for _ in range(3):
+            http_transport.get(f"{url}/latest/dex/tokens/{mint}", timeout=5)
+        http_transport.post(f"{url}/bot123456789:AAHdqTcvCH1vGWJxfSeofSAs0K5PALDsaw/sendMessage", json={}, timeout=5)
+        http_transport.get(f"{url}/fail500", timeout=5)
+    finally:
+        srv.shutdown()
+    endpoints = {s["endpoint"] for s in http_transport.stats()}
+    assert "/latest/dex/tokens/:id" in endpoints and "/:id/sendMessage" in endpoints  # no addresses / bot token
+    tokens = _stat("127.0.0.1", "/latest/dex/tokens/:id")
+    assert tokens["requests"] == 3 and tokens["errors"] == 0 and sum(tokens["buckets"]) == 3
+    assert 0 < tokens["p50_ms"] <= tokens["p99_ms"] <= max(tokens["max_ms"], http_transport.BUCKETS_MS[0])
+    assert _stat("127.0.0.1", "/fail500")["errors"] == 1
+
+    assert http_transport.flush_stats() >= 3
+    assert http_transport.flush_stats() == 0  # nothing pending
+    http_transport._observe("127.0.0.1", "/latest/dex/tokens/:id", 30.0, 0, False)
+    http_transport.flush_stats()
+    stored = {(r["host"], r["endpoint"]): r for r in http_transport.stored_stats(hours=1)}
+    row = stored[("127.0.0.1", "/latest/dex/tokens/:id")]
+    assert row["requests"] == 4 and sum(row["buckets"]) == 4 and row["buckets"][1] >= 1  # 30ms → ≤50 bucket
+
+
+def test_binance_client_uses_pooled_transport():
+    import breaker_registry
+    breaker_registry.STATE_DIR = _TMP / "breakers"
+    import binance_client
+    srv, url = _server()
+    base = binance_client.BINANCE_BASE_URL
+    binance_client.BINANCE_BASE_URL = url
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            assert binance_client.get_price("btcusdt") == 65000.5
+            assert binance_client.get_price("BTCUSDT") == 65000.5
+            assert binance_client._request("GET", "/fail", {"symbol": "NOPE"}) is None
+        assert "HTTP 400" in out.getvalue() and "Invalid symbol" in out.getvalue()
+        assert len(_Stub.connections) == 1
+        assert [h[:2] for h in _Stub.hits] == [("GET", "/api/v3/ticker/price")] * 2 + [("GET", "/fail")]
+        assert binance_client._error_tracker.total_errors >= 1
+    finally:
+        binance_client.BINANCE_BASE_URL = base
+        srv.shutdown()
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_keep_alive_pooled_per_host,
+        test_connection_retries_only_when_safe,
+        test_histograms_per_endpoint_flushed,
+        test_binance_client_uses_pooled_transport,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: http_transport.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
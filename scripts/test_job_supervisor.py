@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Resident job supervisor tests (job_supervisor.py + state_store job_runs).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_job_supervisor.py
+"""
+import os, sys, json, tempfile, textwrap, threading, time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import state_store
+import job_lease
+import job_supervisor
+
+JOB_MODULE = textwrap.dedent("""
+    import os, sys, time
+    CALLS = []
+
+    def ok():
+        print("ok ran")
+        CALLS.append(os.getpid())
+        return {"done": True}
+
+    def burn():
+        t0 = time.process_time()
+        while time.process_time() - t0 < 0.2:
+            pass
+
+    def boom():
+        raise RuntimeError("boom")
+
+    def bad_exit():
+        sys.exit(3)
+
+    def clean_exit():
+        sys.exit(0)
+
+    def no_prices():
+        return False
+
+    def hang():
+        time.sleep(30)
+
+    def slow():
+        time.sleep(0.4)
+""")
+
+
+def _setup():
+    td = Path(tempfile.mkdtemp(prefix="sanad_jobsup_"))
+    (td / "sup_jobs_mod.py").write_text(JOB_MODULE)
+    if str(td) not in sys.path:
+        sys.path.insert(0, str(td))
+    sys.modules.pop("sup_jobs_mod", None)
+    db = td / "sanad_trader.db"
+    state_store.init_db(db)
+    job_supervisor.CRON_HEALTH_PATH = td / "state" / "cron_health.json"
+    job_supervisor.LOGS_DIR = td / "logs"
+    job_lease.LEASE_DIR = td / "state" / "leases"
+    return td, db
+
+
+def _job(name, func, interval_s=60, timeout_s=5):
+    return {"name": name, "target": f"sup_jobs_mod:{func}", "interval_s": interval_s,
+            "timeout_s": timeout_s, "log": f"{name}.log"}
+
+
+def _runs(db, name):
+    with state_store.get_connection(db) as conn:
+        return [dict(r) for r in conn.execute(
+            "SELECT * FROM job_runs WHERE job_name=? ORDER BY run_id", (name,)).fetchall()]
+
+
+# ========== TESTS ==========
+
+def test_fork_isolation_statuses_and_metrics():
+    td, db = _setup()
+    jobs = [_job("ok", "ok"), _job("burn", "burn"), _job("boom", "boom"), _job("bad_exit", "bad_exit"),
+            _job("clean_exit", "clean_exit"), _job("no_prices", "no_prices"),
+            _job("missing", "does_not_exist")]
+    sup = job_supervisor.JobSupervisor(jobs, isolation="fork", db_path=db)
+    sup.preload()
+
+    got = {j["name"]: sup.run_job(j["name"]) for j in jobs}
+    assert got["ok"]["status"] == "ok", got["ok"]
+    assert got["clean_exit"]["status"] == "ok"
+    assert got["boom"]["status"] == "error" and "boom" in got["boom"]["detail"]
+    assert got["bad_exit"] == {**got["bad_exit"], "status": "error", "detail": "exit 3"}
+    assert got["no_prices"]["status"] == "error"
+    assert got["missing"]["status"] == "error" and "import failed" in got["missing"]["detail"]
+    # Child rusage → CPU attributed to the job
+    assert got["burn"]["cpu_ms"] >= 150, got["burn"]
+
+    # Job state and output stay in the child; stdout goes to the job's log like cron did
+    import sup_jobs_mod
+    assert sup_jobs_mod.CALLS == []
+    assert "ok ran" in (td / "logs" / "ok.log").read_text()
+
+    runs = _runs(db, "burn")
+    assert len(runs) == 1 and runs[0]["cpu_ms"] >= 150 and runs[0]["wall_ms"] > 0
+    health = json.loads(job_supervisor.CRON_HEALTH_PATH.read_text())
+    assert health["boom"]["status"] == "error" and health["ok"]["status"] == "ok"
+    assert "cpu_ms" in health["burn"] and health["ok"]["runner"] == "supervisor"
+    lease = job_lease.check_lease("bad_exit")
+    assert lease["status"] == "error" and lease["detail"] == "exit 3", lease
+
+
+def test_fork_timeout_kills_child():
+    _, db = _setup()
+    sup = job_supervisor.JobSupervisor([_job("hang", "hang", timeout_s=0.3)], isolation="fork", db_path=db)
+    t0 = time.monotonic()
+    run = sup.run_job("hang")
+    assert time.monotonic() - t0 < 3
+    assert run["status"] == "timeout", run
+    assert job_lease.check_lease("hang")["status"] == "timeout"
+    assert _runs(db, "hang")[0]["status"] == "timeout"
+
+
+def test_thread_isolation_soft_timeout():
+    _, db = _setup()
+    jobs = [_job("ok", "ok"), _job("slow", "slow", timeout_s=0.1)]
+    sup = job_supervisor.JobSupervisor(jobs, isolation="thread", db_path=db)
+    assert sup.run_job("ok")["status"] == "ok"
+    import sup_jobs_mod
+    assert len(sup_jobs_mod.CALLS) == 1  # in-process
+
+    sup._running.add("slow")
+    assert sup.run_job("slow")["status"] == "timeout"
+    # Abandoned run still blocks a new one until it actually finishes
+    assert sup.submit("slow") is None
+    time.sleep(0.6)
+    assert "slow" not in sup._running
+    sup.pool.shutdown(wait=True)
+
+
+def test_scheduler_alignment_pool_and_overlap():
+    _, db = _setup()
+    jobs = [_job("a", "slow", interval_s=180), _job("b", "ok", interval_s=300)]
+    sup = job_supervisor.JobSupervisor(jobs, isolation="thread", max_workers=2, db_path=db)
+    base = 1_800_000_000.0  # multiple of 180 and 300
+    sup.schedule(base + 10)
+    assert sup._next_due == {"a": base + 180, "b": base + 300}
+
+    assert sup.tick(base + 100) == []
+    t0 = time.monotonic()
+    assert sup.tick(base + 300) == ["a", "b"]  # both due, run concurrently
+    assert sup._next_due == {"a": base + 360, "b": base + 600}
+    # "a" still running (sleeps 0.4s) when due again → skipped, not queued
+    assert sup.tick(base + 360) == []
+    sup.pool.shutdown(wait=True)
+    assert time.monotonic() - t0 < 0.9
+    assert [r["status"] for r in _runs(db, "a")] == ["skipped", "ok"]
+    assert [r["status"] for r in _runs(db, "b")] == ["ok"]
+
+
+def test_fork_scheduler_forks_and_reaps_on_main_thread():
+    td, db = _setup()
+    jobs = [_job("a", "slow", interval_s=180), _job("b", "ok", interval_s=300),
+            _job("hang", "hang", interval_s=300, timeout_s=0.3)]
+    sup = job_supervisor.JobSupervisor(jobs, isolation="fork", db_path=db)
+    sup.preload()
+    base = 1_800_000_000.0
+    sup.schedule(base + 10)
+    threads = threading.active_count()
+    assert sup.tick(base + 300) == ["a", "b", "hang"]
+    assert len(sup._children) == 3 and not sup.pool._threads  # no worker threads involved
+    assert threading.active_count() == threads
+    assert sup.tick(base + 360) == []  # "a" still running → skipped
+    t0 = time.monotonic()
+    while sup.reap():
+        assert time.monotonic() - t0 < 3
+        time.sleep(0.02)
+    assert not sup._running
+    assert [r["status"] for r in _runs(db, "a")] == ["skipped", "ok"]
+    assert [r["status"] for r in _runs(db, "b")] == ["ok"]
+    assert [r["status"] for r in _runs(db, "hang")] == ["timeout"]
+    assert "ok ran" in (td / "logs" / "b.log").read_text()
+
+
+def test_job_stats_and_default_jobs():
+    _, db = _setup()
+    sup = job_supervisor.JobSupervisor([_job("ok", "ok"), _job("boom", "boom")], isolation="thread", db_path=db)
+    for _ in range(3):
+        sup.run_job("ok")
+    sup.run_job("boom")
+    stats = state_store.get_job_stats(db_path=db)
+    assert stats["ok"]["runs"] == 3 and stats["ok"]["failures"] == 0 and stats["ok"]["status"] == "ok"
+    assert stats["boom"]["failures"] == 1 and stats["boom"]["status"] == "error"
+
+    # Default table covers the cron jobs it replaces, at the same cadence
+    cadence = {j["name"]: j["interval_s"] for j in job_supervisor.JOBS}
+    assert cadence == {"price_snapshot": 180, "dex_price_poller": 60, "signal_router": 300, "heartbeat": 600,
+                       "quality_circuit_breaker": 600, "listing_index": 1800, "regime_classifier": 3600,
+                       "onchain_analytics": 900, "social_sentiment": 900, "scan_sweep": 300,
+                       "supabase_shipper": 30}
+    for j in job_supervisor.JOBS:
+        assert j["timeout_s"] < j["interval_s"] or j["name"] == "signal_router"
+        assert ":" in j["target"]
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_fork_isolation_statuses_and_metrics,
+        test_fork_timeout_kills_child,
+        test_thread_isolation_soft_timeout,
+        test_scheduler_alignment_pool_and_overlap,
+        test_fork_scheduler_forks_and_reaps_on_main_thread,
+        test_job_stats_and_default_jobs,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: job_supervisor.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Batched learning loop tests (learning_loop.process_closed_batch / run batching).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_learning_loop_batch.py
+"""
+import os, sys, json, tempfile, time, uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import state_store
+import learning_loop
+
+REJECT_JSON = json.dumps({"judge": {"parsed": {"verdict": "REJECT", "confidence": 90}}})
+
+
+def _mkdb():
+    td = Path(tempfile.mkdtemp(prefix="sanad_lbatch_"))
+    db = td / "state" / "sanad_trader.db"
+    learning_loop.LOG_FILE = td / "learning_loop.log"
+    state_store.init_db(db)
+    return db
+
+
+def _insert(db, specs):
+    """specs: dicts with pnl_pct and optional strategy/regime/source/status/reward_bin/async_json/pid."""
+    now = datetime.now(timezone.utc).isoformat()
+    rows = []
+    for i, sp in enumerate(specs):
+        pid = sp.get("pid") or str(uuid.uuid4())
+        pnl = sp["pnl_pct"]
+        rows.append((pid, f"sig_{i}_{pid[:8]}", "TOKEN", 1.0, 100.0, "sol", sp.get("strategy", "s_a"),
+                     f"dec_{i}_{pid[:8]}", sp.get("status", "CLOSED"), now, now,
+                     None if pnl is None else pnl * 100, pnl, sp.get("regime", "BULL"),
+                     sp.get("source", "dexscreener"), f"{now}_{i:06d}", "PENDING",
+                     sp.get("reward_bin"), sp.get("async_json")))
+    with state_store.get_connection(db) as conn:
+        conn.executemany("""
+            INSERT INTO positions (position_id, signal_id, token_address, entry_price, size_usd, chain,
+                strategy_id, decision_id, status, created_at, updated_at, pnl_usd, pnl_pct,
+                regime_tag, source_primary, closed_at, learning_status, reward_bin, async_analysis_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+    return [r[0] for r in rows]
+
+
+def _mixed_specs():
+    specs = []
+    for i in range(60):
+        specs.append({
+            "pid": f"pos_{i:03d}",
+            "pnl_pct": (0.05 if i % 3 else -0.04),
+            "strategy": ("s_a", "s_b", "s_c")[i % 3],
+            "regime": ("BULL", "BEAR")[i % 2],
+            "source": ("dexscreener", "coingecko", "solscan", "birdeye")[i % 4],  # solscan = enricher
+            "reward_bin": (1 if i % 7 == 0 else None),
+            "async_json": (REJECT_JSON if i % 11 == 0 else None),
+        })
+    return specs
+
+
+def _tables(db):
+    with state_store.get_connection(db) as conn:
+        bandit = [tuple(r) for r in conn.execute(
+            "SELECT strategy_id, regime_tag, alpha, beta, n FROM bandit_strategy_stats ORDER BY 1, 2")]
+        sources = [tuple(r) for r in conn.execute(
+            "SELECT source_id, n, reward_sum FROM source_ucb_stats ORDER BY 1")]
+        status = dict(conn.execute("SELECT position_id, learning_status FROM positions").fetchall())
+    return bandit, sources, status
+
+
+# ========== TESTS ==========
+
+def test_batch_matches_per_position_path():
+    single, batched = _mkdb(), _mkdb()
+    _insert(single, _mixed_specs())
+    _insert(batched, _mixed_specs())
+
+    r1 = learning_loop.run(single, batch_size=1)
+    r2 = learning_loop.run(batched, batch_size=25)
+    assert len(r1) == len(r2) == 60
+    assert _tables(single) == _tables(batched)
+    assert sorted(r["is_win"] for r in r1) == sorted(r["is_win"] for r in r2)
+
+    bandit, sources, status = _tables(batched)
+    assert set(status.values()) == {"DONE"}
+    assert not any(s.startswith("solscan") for s, _, _ in sources)  # enrichers skipped
+    assert sum(n for *_, n in bandit) == 60
+    assert state_store.get_bandit_version(batched) == 3  # one bump per batch (60 / 25)
+
+
+def test_exactly_once_and_skips():
+    db = _mkdb()
+    ids = _insert(db, [{"pnl_pct": 0.1}, {"pnl_pct": -0.1}, {"pnl_pct": 0.2, "status": "OPEN"}])
+    first = learning_loop.process_closed_batch(ids + ids[:1] + ["missing"], db)
+    assert [r["position_id"] for r in first] == ids[:2]
+    assert first[-1]["bandit"] == {"strategy_id": "s_a", "regime_tag": "BULL", "alpha": 2.0,
+                                   "beta": 2.0, "n": 2, "expected_value": 0.5}
+    version = state_store.get_bandit_version(db)
+
+    assert learning_loop.process_closed_batch(ids, db) == []
+    assert learning_loop.process_closed_position(ids[0], db)["skipped"]
+    bandit, _, status = _tables(db)
+    assert bandit == [("s_a", "BULL", 2.0, 2.0, 2)]
+    assert status[ids[2]] == "PENDING" and state_store.get_bandit_version(db) == version
+
+
+def test_failed_position_isolated_within_batch():
+    db = _mkdb()
+    ids = _insert(db, [{"pnl_pct": 0.1}, {"pnl_pct": None}, {"pnl_pct": 0.1, "strategy": "bad"},
+                       {"pnl_pct": -0.1}])
+    orig = learning_loop._learning_outcome
+
+    def flaky(pos):
+        if pos["strategy_id"] == "bad":
+            raise RuntimeError("scoring exploded")
+        return orig(pos)
+    learning_loop._learning_outcome = flaky
+    try:
+        results = learning_loop.process_closed_batch(ids, db)
+    finally:
+        learning_loop._learning_outcome = orig
+
+    assert [r["position_id"] for r in results] == [ids[0], ids[3]]
+    bandit, _, status = _tables(db)
+    assert bandit == [("s_a", "BULL", 2.0, 2.0, 2)]
+    assert [status[i] for i in ids] == ["DONE", "FAILED", "FAILED", "DONE"]
+    with state_store.get_connection(db) as conn:
+        err = conn.execute("SELECT learning_error FROM positions WHERE position_id=?", (ids[2],)).fetchone()[0]
+    assert err == "scoring exploded"
+
+
+def test_batch_failure_rolls_back_then_run_falls_back():
+    db = _mkdb()
+    ids = _insert(db, [{"pnl_pct": 0.1}, {"pnl_pct": -0.1}, {"pnl_pct": 0.3}])
+    orig = learning_loop.bump_bandit_version
+    calls = []
+
+    def fail_once(conn):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("disk I/O error")
+        return orig(conn)
+    learning_loop.bump_bandit_version = fail_once
+    try:
+        try:
+            learning_loop.process_closed_batch(ids, db)
+            assert False, "expected failure"
+        except RuntimeError:
+            pass
+        bandit, sources, status = _tables(db)
+        assert bandit == [] and sources == [] and set(status.values()) == {"PENDING"}
+
+        calls.clear()
+        results = learning_loop.run(db, batch_size=10)  # batch fails → per-position retry
+    finally:
+        learning_loop.bump_bandit_version = orig
+    assert len(results) == 3 and len(calls) == 4
+    bandit, _, status = _tables(db)
+    assert bandit == [("s_a", "BULL", 3.0, 2.0, 3)] and set(status.values()) == {"DONE"}
+
+
+def test_throughput_10k_backlog():
+    db = _mkdb()
+    specs = [{"pnl_pct": 0.02 if i % 2 else -0.02, "strategy": f"s{i % 5}", "regime": ("BULL", "BEAR")[i % 2],
+              "source": ("dexscreener", "coingecko", "birdeye")[i % 3]} for i in range(10_000)]
+    _insert(db, specs)
+
+    sample_db = _mkdb()
+    _insert(sample_db, specs[:200])
+    t0 = time.perf_counter()
+    learning_loop.run(sample_db, batch_size=1)
+    per_position = (time.perf_counter() - t0) / 200
+
+    t0 = time.perf_counter()
+    results = learning_loop.run(db)
+    batched = time.perf_counter() - t0
+    print(f"  10k backlog batched: {batched:.2f}s ({batched / 10_000 * 1e6:.0f} µs/pos) "
+          f"vs per-position {per_position * 1e6:.0f} µs/pos (est. {per_position * 10_000:.1f}s)")
+
+    assert len(results) == 10_000
+    bandit, sources, status = _tables(db)
+    assert set(status.values()) == {"DONE"}
+    assert sum(n for *_, n in bandit) == 10_000 and sum(n for _, n, _ in sources) == 10_000
+    assert state_store.get_bandit_version(db) == 10_000 // learning_loop.BATCH_SIZE
+    assert batched / 10_000 < per_position / 5, (batched, per_position)
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_batch_matches_per_position_path,
+        test_exactly_once_and_skips,
+        test_failed_position_isolated_within_batch,
+        test_batch_failure_rolls_back_then_run_falls_back,
+        test_throughput_10k_backlog,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: learning_loop.py batch mode")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+CEX listing index tests (listing_index.py + exchange_router, venue_detector, paper_execution, OMS).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_listing_index.py
+"""
+import sys, io, json, tempfile, time, contextlib
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import listing_index
+import exchange_router
+
+BINANCE_INFO = {"symbols": [
+    {"symbol": "PEPEUSDT", "status": "TRADING", "isSpotTradingAllowed": True, "baseAsset": "PEPE",
+     "quoteAsset": "USDT", "quotePrecision": 8,
+     "filters": [{"filterType": "PRICE_FILTER", "tickSize": "0.00000001"},
+                 {"filterType": "LOT_SIZE", "stepSize": "1.00000000", "minQty": "1.00000000"},
+                 {"filterType": "NOTIONAL", "minNotional": "5.00000000"}]},
+    {"symbol": "SOLUSDT", "status": "TRADING", "isSpotTradingAllowed": True, "baseAsset": "SOL",
+     "quoteAsset": "USDT", "filters": [{"filterType": "PRICE_FILTER", "tickSize": "0.01"},
+                                       {"filterType": "LOT_SIZE", "stepSize": "0.001", "minQty": "0.001"},
+                                       {"filterType": "MIN_NOTIONAL", "minNotional": "10"}]},
+    {"symbol": "OLDUSDT", "status": "BREAK", "isSpotTradingAllowed": True, "quoteAsset": "USDT"},
+    {"symbol": "SOLBTC", "status": "TRADING", "isSpotTradingAllowed": True, "quoteAsset": "BTC"},
+]}
+MEXC_INFO = {"symbols": [
+    {"symbol": "PEPEUSDT", "status": "1", "isSpotTradingAllowed": True, "baseAsset": "PEPE", "quoteAsset": "USDT",
+     "quotePrecision": 10, "baseSizePrecision": "0", "quoteAmountPrecision": "1", "filters": []},
+    {"symbol": "MEMEXUSDT", "status": "1", "isSpotTradingAllowed": True, "baseAsset": "MEMEX",
+     "quoteAsset": "USDT", "quotePrecision": 6, "baseSizePrecision": "0.01", "quoteAmountPrecision": "5",
+     "filters": []},
+]}
+
+
+def _fresh_home():
+    home = Path(tempfile.mkdtemp(prefix="sanad_listings_"))
+    listing_index.INDEX_PATH = home / "state" / "listing_index.json"
+    listing_index.KNOWN_SYMBOLS_PATH = home / "state" / "known_binance_symbols.json"
+    listing_index.reload()
+    return home
+
+
+class _Live:
+    def __init__(self, binance=None, mexc=None):
+        self.prices, self.calls = {"binance": binance or {}, "mexc": mexc or {}}, []
+        self.orig = exchange_router._check_binance_live, exchange_router._check_mexc_live
+
+    def __enter__(self):
+        exchange_router._check_binance_live = lambda s: self._call("binance", s)
+        exchange_router._check_mexc_live = lambda s: self._call("mexc", s)
+        return self
+
+    def __exit__(self, *exc):
+        exchange_router._check_binance_live, exchange_router._check_mexc_live = self.orig
+
+    def _call(self, exchange, symbol):
+        self.calls.append((exchange, symbol))
+        return self.prices[exchange].get(symbol)
+
+
+def _route(*args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return exchange_router.route(*args)
+
+
+# ========== TESTS ==========
+
+def test_parse_binance_and_mexc_exchange_info():
+    binance = listing_index.parse_exchange_info(BINANCE_INFO)
+    assert set(binance) == {"PEPEUSDT", "SOLUSDT"}  # halted and non-USDT pairs dropped
+    assert binance["SOLUSDT"] == {"base": "SOL", "tick_size": 0.01, "step_size": 0.001,
+                                  "min_qty": 0.001, "min_notional": 10.0}
+    mexc = listing_index.parse_exchange_info(MEXC_INFO)
+    assert mexc["MEMEXUSDT"]["tick_size"] == 1e-6 and mexc["MEMEXUSDT"]["step_size"] == 0.01
+    assert mexc["MEMEXUSDT"]["min_notional"] == 5.0 and mexc["PEPEUSDT"]["step_size"] is None
+    assert listing_index.parse_exchange_info(None) == {}
+
+
+def test_routing_is_an_index_lookup():
+    _fresh_home()
+    with contextlib.redirect_stdout(io.StringIO()):
+        listing_index.ingest("binance", BINANCE_INFO)
+        listing_index.ingest("mexc", MEXC_INFO)
+    with _Live() as live:
+        assert _route("pepe")["exchange"] == "binance"        # on both → Binance preferred
+        assert _route("MEMEXUSDT")["exchange"] == "mexc"
+        assert _route("FAKECOIN", "solana")["exchange"] == "dex"
+        assert _route("FAKECOIN")["exchange"] == "none"
+        assert not live.calls  # fresh index: a miss means "not listed"
+    assert listing_index.venues("PEPE/USDT") == ("binance", "mexc")
+    assert listing_index.filters("memex", "MEXC")["min_notional"] == 5.0
+
+    # Another process refreshed the file → picked up on the next reload check
+    data = json.loads(listing_index.INDEX_PATH.read_text())
+    data["mexc"]["NEWUSDT"] = {}
+    listing_index.INDEX_PATH.write_text(json.dumps(data))
+    listing_index._last_check = time.monotonic() - listing_index.RELOAD_CHECK_S - 1
+    assert listing_index.venue("NEWUSDT") == "mexc"
+
+
+def test_stale_index_live_checks_once_then_negative_cache():
+    home = _fresh_home()
+    (home / "state").mkdir(parents=True)
+    listing_index.KNOWN_SYMBOLS_PATH.write_text(json.dumps(
+        {"symbols": ["SOLUSDT"], "last_checked": "2026-01-01T00:00:00+00:00"}))
+    with _Live(mexc={"WIFUSDT": 2.5}) as live:
+        assert _route("SOLUSDT")["exchange"] == "binance" and not live.calls  # seeded from the detector list
+        assert not listing_index.is_fresh()
+
+        assert _route("BONKUSDT", "solana")["exchange"] == "dex"
+        assert live.calls == [("binance", "BONKUSDT"), ("mexc", "BONKUSDT")]
+        assert _route("BONKUSDT", "solana")["exchange"] == "dex" and len(live.calls) == 2  # negative hit
+
+        assert _route("WIFUSDT")["exchange"] == "mexc" and _route("WIFUSDT")["exchange"] == "mexc"
+        assert len(live.calls) == 4  # live "listed" answer kept too
+
+        # Negative entry expires after NEGATIVE_TTL_S ...
+        listing_index._negative["BONKUSDT"] = time.monotonic() - 1
+        _route("BONKUSDT")
+        assert len(live.calls) == 6
+
+        # ... or as soon as the new-listings detector ingests exchangeInfo
+        info = {"symbols": [dict(BINANCE_INFO["symbols"][1], symbol="BONKUSDT", baseAsset="BONK")]}
+        with contextlib.redirect_stdout(io.StringIO()):
+            listing_index.ingest("binance", info)
+        assert not listing_index._negative
+        assert _route("BONKUSDT")["exchange"] == "binance" and len(live.calls) == 6
+    assert listing_index.stats()["negative_hits"] >= 1
+
+
+def test_filters_applied_by_paper_execution_and_oms():
+    home = _fresh_home()
+    with contextlib.redirect_stdout(io.StringIO()):
+        listing_index.ingest("binance", BINANCE_INFO)
+    assert listing_index.conform("SOLUSDT", "binance", 0.12345, 150.004) == (0.123, 150.0, None)
+    assert listing_index.conform("SOLUSDT", "binance", 0.05, 150.0)[2].startswith("notional")
+    assert listing_index.conform("PEPEUSDT", "binance", 0.4, 0.00001)[2].startswith("quantity")
+    assert listing_index.conform("ZZZUSDT", "binance", 0.12345, 1.0) == (0.12345, 1.0, None)
+
+    import depth_cache, paper_execution, oms
+    orig, orig_base = depth_cache.get_book, paper_execution.BASE_DIR
+    depth_cache.get_book = lambda symbol, **kw: None
+    paper_execution.BASE_DIR = home  # execution-logs/paper_fills.jsonl
+    oms.DB_PATH, oms.LOGS_DIR = home / "state" / "sanad_trader.db", home / "logs"
+    oms._schema_ready.clear()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            paper = paper_execution.execute_paper_trade("SOL", "SOL/USDT", "BUY", 0.12345, 150.0)
+            tiny = paper_execution.execute_paper_trade("SOL", "SOLUSDT", "BUY", 0.05, 150.0)
+            dex = paper_execution.execute_paper_trade("SOL", "SOLUSDT", "BUY", 0.05, 150.0, venue="DEX")
+            order = oms.place_order("SOLUSDT", "BUY", 0.12345, price=150.004, strategy="s", correlation_id="l1")
+            reject = oms.place_order("SOLUSDT", "SELL", 0.05, price=150.0, strategy="s", correlation_id="l2")
+    finally:
+        depth_cache.get_book, paper_execution.BASE_DIR = orig, orig_base
+    assert paper["success"] and paper["quantity"] == 0.123
+    assert not tiny["success"] and "min_notional" in tiny["detail"]
+    assert dex["success"]  # pools have no lot filters
+    assert order["state"] == "FILLED" and order["quantity"] == 0.123 and order["price"] == 150.0
+    assert reject["state"] == "FAILED" and reject["error"].startswith("Exchange filter")
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_parse_binance_and_mexc_exchange_info,
+        test_routing_is_an_index_lookup,
+        test_stale_index_live_checks_once_then_negative_cache,
+        test_filters_applied_by_paper_execution_and_oms,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: listing_index.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
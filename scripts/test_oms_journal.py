@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+OMS journal tests (oms.py on state_store oms_orders / oms_order_events / oms_intents).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_oms_journal.py
+"""
+import os, sys, json, tempfile, time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import state_store
+import oms
+
+
+def _mkdb():
+    td = Path(tempfile.mkdtemp(prefix="sanad_oms_"))
+    db = td / "state" / "sanad_trader.db"
+    oms.DB_PATH = db
+    oms.LOGS_DIR = td / "logs"
+    oms._schema_ready.clear()
+    return td, db
+
+
+def _ack_only(order):
+    return {"success": True, "exchange_order_id": "ex_" + order["client_order_id"][:6], "status": "NEW"}
+
+
+def _place(symbol="BTCUSDT", side="BUY", corr="c1", **kw):
+    return oms.place_order(symbol=symbol, side=side, quantity=1.0, price=100.0,
+                           strategy="s", correlation_id=corr, **kw)
+
+
+# ========== TESTS ==========
+
+def test_paper_fill_journal_and_intent():
+    _, db = _mkdb()
+    order = _place()
+    assert order["state"] == "FILLED", order
+    cid = order["client_order_id"]
+
+    events = state_store.oms_get_order_events(cid, db_path=db)
+    assert [e["state"] for e in events] == ["NEW", "SUBMITTED", "FILLED"], events
+    assert oms.get_order(cid) == order
+
+    intent = state_store.oms_get_intent(cid, db_path=db)
+    assert intent["exchange_sent"] is True and intent["exchange_order_id"] == order["exchange_order_id"]
+    assert oms.status()["by_state"] == {"FILLED": 1}
+
+
+def test_duplicate_conflict_and_cancel():
+    _, db = _mkdb()
+    orig = oms._execute_paper
+    oms._execute_paper = _ack_only
+    try:
+        first = _place(corr="a")
+        assert first["state"] == "ACKNOWLEDGED"
+        again = _place(corr="a")
+        assert again == first  # active duplicate → existing order, nothing new journaled
+        assert len(state_store.oms_get_order_events(first["client_order_id"], db_path=db)) == 3
+
+        other = _place(corr="b")
+        assert oms._check_conflicting_orders("btcusdt", "buy") == [first["client_order_id"], other["client_order_id"]]
+        _place(symbol="ETHUSDT", corr="c")
+    finally:
+        oms._execute_paper = orig
+
+    assert len(oms.get_active_orders()) == 3
+    assert len(oms.get_orders_by_symbol("btcusdt")) == 2
+    assert oms.cancel_all("BTCUSDT") == 2
+    assert [o["symbol"] for o in oms.get_active_orders()] == ["ETHUSDT"]
+    events = state_store.oms_get_order_events(first["client_order_id"], db_path=db)
+    assert events[-1]["state"] == "CANCELED"
+    s = oms.status()
+    assert s["total_orders"] == 3 and s["active"] == 1 and s["by_state"]["CANCELED"] == 2
+
+
+def test_intent_and_order_created_atomically():
+    _, db = _mkdb()
+    oms._ensure_schema()
+    orig = state_store._oms_write_order
+
+    def boom(conn, order):
+        raise RuntimeError("disk full")
+    state_store._oms_write_order = boom
+    try:
+        try:
+            _place(corr="x")
+            assert False, "expected failure"
+        except RuntimeError:
+            pass
+    finally:
+        state_store._oms_write_order = orig
+    with state_store.get_connection(db) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM oms_intents").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM oms_orders").fetchone()[0] == 0
+
+
+def test_reused_id_after_terminal_state_journals_new_generation():
+    _, db = _mkdb()
+    first = _place(corr="r")
+    second = _place(corr="r")  # FILLED is terminal → same client_order_id placed again
+    assert second["client_order_id"] == first["client_order_id"]
+    events = state_store.oms_get_order_events(first["client_order_id"], db_path=db)
+    assert [e["state"] for e in events] == ["NEW", "SUBMITTED", "FILLED"] * 2, events
+    assert len({e["order_created_at"] for e in events}) == 2
+
+
+def test_json_state_migrated_once():
+    td = Path(tempfile.mkdtemp(prefix="sanad_oms_"))
+    state = td / "state"
+    state.mkdir()
+    (state / "oms_orders.json").write_text(json.dumps({
+        "ST_old": {"client_order_id": "ST_old", "symbol": "SOLUSDT", "side": "SELL", "state": "ACKNOWLEDGED",
+                   "created_at": "2026-01-01T00:00:00+00:00", "updated_at": "2026-01-01T00:00:01+00:00",
+                   "events": [{"state": "NEW", "at": "t0"}, {"state": "SUBMITTED", "at": "t1"},
+                              {"state": "ACKNOWLEDGED", "at": "t2"}]},
+    }))
+    (state / "oms_intents.json").write_text(json.dumps({"intents": [
+        {"client_order_id": "ST_old", "symbol": "SOLUSDT", "side": "SELL", "quantity": 2, "price": 10,
+         "recorded_at": "t0", "exchange_sent": True, "exchange_order_id": "ex1"}]}))
+    db = state / "sanad_trader.db"
+    state_store.init_db(db)
+    state_store.init_db(db)  # idempotent
+    assert [o["client_order_id"] for o in state_store.oms_get_orders(db_path=db)] == ["ST_old"]
+    assert len(state_store.oms_get_order_events("ST_old", db_path=db)) == 3
+    assert state_store.oms_get_intent("ST_old", db_path=db)["exchange_order_id"] == "ex1"
+
+
+def test_lookup_latency_flat_with_history():
+    _, db = _mkdb()
+    oms._ensure_schema()
+
+    def fill_history(n, start):
+        with state_store.get_connection(db) as conn:
+            for i in range(start, start + n):
+                state_store._oms_write_order(conn, {
+                    "client_order_id": f"ST_h{i}", "symbol": f"T{i % 200}USDT", "side": "BUY",
+                    "state": "FILLED", "created_at": f"2025-01-01T00:00:{i:07d}", "updated_at": "x",
+                    "events": [{"state": "NEW", "at": "x"}, {"state": "FILLED", "at": "x"}]})
+
+    def timed():
+        t0 = time.perf_counter()
+        for k in range(20):
+            _place(symbol="BTCUSDT", corr=f"p{k}_{time.perf_counter_ns()}")
+            oms.get_active_orders()
+            oms._check_duplicate("ST_h5")
+        return time.perf_counter() - t0
+
+    fill_history(1_000, 0)
+    small = timed()
+    fill_history(30_000, 1_000)
+    large = timed()
+    print(f"  20 place+lookup: {small * 1000:.0f} ms @1k orders, {large * 1000:.0f} ms @31k orders")
+    assert large < small * 2 + 0.05, (small, large)
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_paper_fill_journal_and_intent,
+        test_duplicate_conflict_and_cancel,
+        test_intent_and_order_created_atomically,
+        test_reused_id_after_terminal_state_journals_new_generation,
+        test_json_state_migrated_once,
+        test_lookup_latency_flat_with_history,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: oms.py journal")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Counterfactual policy simulator tests (policy_simulator.py + eval_walkforward --simulate).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_policy_simulator.py
+"""
+import os, sys, json, tempfile, argparse
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import state_store
+import eval_walkforward
+import policy_simulator
+
+NOW = datetime(2026, 2, 23, 0, 0, 0, tzinfo=timezone.utc)
+
+
+def _iso(dt):
+    return dt.astimezone(timezone.utc).isoformat()
+
+
+def _mkdb():
+    td = Path(tempfile.mkdtemp(prefix="sanad_sim_"))
+    db = td / "sanad_trader.db"
+    state_store.init_db(db)
+    policy_simulator.STATE_DIR = td / "state"  # no price_history.json
+    return db
+
+
+def _seed_policies(db, configs, active="pvA"):
+    with state_store.get_connection(db) as conn:
+        for pv, cfg in configs.items():
+            conn.execute(
+                "INSERT OR REPLACE INTO policy_configs(policy_version, config_json, created_at, notes) VALUES (?,?,?,?)",
+                (pv, json.dumps(cfg), _iso(NOW), "test")
+            )
+        conn.execute(
+            "INSERT OR REPLACE INTO meta(key, value, updated_at) VALUES ('active_policy_version', ?, ?)",
+            (active, _iso(NOW))
+        )
+
+
+def _decision(db, did, at, token, price, score, stage="STAGE_2_SCORE", result="SKIP",
+              reason="SKIP_SCORE_LOW", signal_id=None, policy_version="pvA"):
+    signal = {"token": token, "token_address": token, "price": price, "source": "dexscreener"}
+    breakdown = {"rugcheck": {"raw": 0, "points": score}, "total": score}
+    with state_store.get_connection(db) as conn:
+        state_store._insert_decision_internal(conn, {
+            "decision_id": did, "signal_id": signal_id or f"sig_{did}", "created_at": _iso(at),
+            "policy_version": policy_version, "result": result, "stage": stage,
+            "reason_code": reason, "token_address": token, "chain": "solana",
+            "source_primary": "dexscreener", "score_total": score,
+            "score_breakdown_json": json.dumps(breakdown), "position_usd": 100.0,
+            "timings_json": "{}",
+            "decision_packet_json": json.dumps({"signal": signal, "score": {"score_total": score}}),
+        })
+
+
+def _path(db, token, start, prices, step_min=30, score=0):
+    """Later observations of `token` (blocked decisions carry the price tick)."""
+    for k, p in enumerate(prices):
+        _decision(db, f"{token}_tick{k}", start + timedelta(minutes=step_min * (k + 1)), token, p,
+                  score, stage="STAGE_1_SAFETY", result="BLOCK", reason="BLOCK_MISSING_HOLDER_DATA")
+
+
+def _args(db, **kw):
+    d = {"db": str(db), "candidate": "pvB", "baseline": "pvA", "horizon_days": 6,
+         "train_days": 2, "test_days": 2, "step_days": 2, "min_trades": 1,
+         "promote_if_pass": True, "notify": False, "now_iso": _iso(NOW),
+         "simulate": True, "workers": 1}
+    d.update(kw)
+    return argparse.Namespace(**d)
+
+
+# ========== TESTS ==========
+
+def test_lower_threshold_takes_skipped_signal():
+    db = _mkdb()
+    _seed_policies(db, {"pvA": {}, "pvB": {"min_score": 20}})
+    t0 = NOW - timedelta(days=1)
+    _decision(db, "d1", t0, "TOKA", 1.0, score=30)   # SKIP under min_score 40
+    _path(db, "TOKA", t0, [1.1, 1.35])               # +35% → TP at 30%
+
+    base_cfg = policy_simulator.load_sim_config("pvA", db_path=db)
+    cand_cfg = policy_simulator.load_sim_config("pvB", db_path=db)
+    with state_store.get_connection(db) as conn:
+        decisions = policy_simulator.load_decisions(conn, _iso(t0 - timedelta(hours=1)), _iso(NOW))
+        ticks = policy_simulator.load_price_ticks(conn, decisions, _iso(t0 - timedelta(hours=1)), _iso(NOW))
+    signals = policy_simulator._dedupe_signals(decisions)
+
+    assert policy_simulator.simulate_policy(signals, base_cfg, ticks) == []
+    trades = policy_simulator.simulate_policy(signals, cand_cfg, ticks)
+    assert len(trades) == 1, trades
+    t = trades[0]
+    assert t["close_reason"] == "TAKE_PROFIT", t
+    assert t["closed_at"] == _iso(t0 + timedelta(minutes=60))
+
+    # Same cost math as state_store.close_position (10 bps fee, 5 bps slippage per side)
+    entry = 1.0 * 1.0005
+    exit_px = 1.35 * 0.9995
+    qty = 100.0 / entry
+    expected = qty * exit_px - 100.0 - (100.0 + qty * exit_px) * 0.001
+    assert abs(t["pnl_usd"] - expected) < 1e-9, (t["pnl_usd"], expected)
+    assert t["reward_bin"] == 1
+
+
+def test_safety_blocks_never_trade():
+    db = _mkdb()
+    _seed_policies(db, {"pvA": {}, "pvB": {"min_score": 0}})
+    t0 = NOW - timedelta(days=1)
+    _decision(db, "blk", t0, "TOKB", 1.0, score=99, stage="STAGE_1_SAFETY",
+              result="BLOCK", reason="BLOCK_STABLECOIN")
+    _path(db, "TOKB", t0, [2.0])
+    cfg = policy_simulator.load_sim_config("pvB", db_path=db)
+    with state_store.get_connection(db) as conn:
+        decisions = policy_simulator.load_decisions(conn, _iso(t0 - timedelta(hours=1)), _iso(NOW))
+    d = policy_simulator._dedupe_signals(decisions)[0]
+    assert policy_simulator.redecide(d, cfg) == "BLOCK_STABLECOIN"
+
+
+def test_stop_loss_and_time_exit():
+    cfg = dict(policy_simulator._threshold_defaults(), max_hold_hours=2)
+    base = {"decision_id": "x", "token_address": "T", "symbol": "T", "ts": 0.0,
+            "price": 1.0, "position_usd": 100.0}
+    # Falls 20% → stop at first crossing tick
+    ticks = {"T": [(0.0, 1.0), (600.0, 0.95), (1200.0, 0.80), (1800.0, 2.0)]}
+    t = policy_simulator.simulate_trade(base, cfg, ticks)
+    assert t["close_reason"] == "STOP_LOSS" and t["close_price"] == 0.80 * 0.9995, t
+    # Drifts, hold window ends → last tick inside the window
+    ticks = {"T": [(600.0, 1.02), (7000.0, 1.05), (9000.0, 3.0)]}
+    t = policy_simulator.simulate_trade(base, cfg, ticks)
+    assert t["close_reason"] == "TIME_EXIT" and t["closed_at"] == policy_simulator._iso(7000.0), t
+    # No later tick → cannot close
+    assert policy_simulator.simulate_trade(base, cfg, {"T": [(0.0, 1.0)]}) is None
+
+
+def test_score_weights_rescore():
+    d = {"score_total": 30, "score_breakdown": {"rugcheck": {"points": 20}, "volume": {"points": 10}, "total": 30}}
+    assert policy_simulator.rescore(d, {"score_weights": None}) == 30
+    assert policy_simulator.rescore(d, {"score_weights": {"rugcheck": 2.0}}) == 50.0
+
+
+def test_run_eval_simulate_parallel_and_no_promotion():
+    db = _mkdb()
+    _seed_policies(db, {"pvA": {}, "pvB": {"min_score": 20}})
+    # horizon 6d, train 2, test 2, step 2 → 2 folds: [-4d,-2d), [-2d,0)
+    for i, days in enumerate([3.5, 3.0, 1.5, 1.0]):
+        t0 = NOW - timedelta(days=days)
+        tok = f"TOK{i}"
+        _decision(db, f"d{i}", t0, tok, 1.0, score=30)
+        _path(db, tok, t0, [1.1, 1.4])
+        # Both policies take these (score 50) and lose
+        _decision(db, f"l{i}", t0, f"LOSS{i}", 1.0, score=50)
+        _path(db, f"LOSS{i}", t0, [0.9, 0.8])
+
+    serial = eval_walkforward.run_eval(_args(db, workers=1))
+    parallel = eval_walkforward.run_eval(_args(db, workers=2))
+
+    assert parallel["simulated"] is True
+    assert parallel["folds"] == 2 and parallel["passed"] == 2, parallel
+    assert parallel["total_candidate_trades"] == 8 and parallel["total_baseline_trades"] == 4
+    assert parallel["decision"] == "SIMULATED_PASS", parallel
+    for k in ("passed", "median_improvement_usd", "total_candidate_trades", "decision"):
+        assert serial[k] == parallel[k], k
+    # Counterfactual evidence never flips the live policy
+    assert parallel["promoted_policy"] is None
+    assert state_store.get_active_policy_version(db_path=db) == "pvA"
+
+    with state_store.get_connection(db) as conn:
+        rows = conn.execute("SELECT candidate_metrics_json FROM eval_folds ORDER BY fold_idx").fetchall()
+    assert json.loads(rows[0]["candidate_metrics_json"])["trades"] == 4
+
+
+def test_simulate_missing_candidate_config():
+    db = _mkdb()
+    _seed_policies(db, {"pvA": {}})
+    result = eval_walkforward.run_eval(_args(db, candidate="pvZ"))
+    assert result == {"decision": "HOLD", "reason": "policy_config_missing"}, result
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_lower_threshold_takes_skipped_signal,
+        test_safety_blocks_never_trade,
+        test_stop_loss_and_time_exit,
+        test_score_weights_rescore,
+        test_run_eval_simulate_parallel_and_no_promotion,
+        test_simulate_missing_candidate_config,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: policy_simulator.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
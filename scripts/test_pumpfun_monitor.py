@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Pump.fun lifecycle tracker tests (pumpfun_monitor.py + state_store router inbox + signal_router hand-off).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_pumpfun_monitor.py
+"""
+import sys, io, json, time, tempfile, contextlib
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import state_store
+import pumpfun_monitor as pf
+
+T0 = time.time() - 3600
+
+
+def _quiet():
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _monitor():
+    td = Path(tempfile.mkdtemp(prefix="sanad_pumpfun_"))
+    db = td / "sanad_trader.db"
+    state_store.init_db(db)
+    pf.SIGNALS_DIR = td / "signals" / "pumpfun"
+    pf.LOGS_DIR = td / "logs"
+    return td, db, pf.PumpFunMonitor(td / "state.json", td / "lifecycle.json", db_path=db)
+
+
+def _create(mint, creator, symbol="GOOD", name="Good Token", sol=1.5):
+    return json.dumps({"txType": "create", "mint": mint, "traderPublicKey": creator, "symbol": symbol,
+                       "name": name, "initialBuy": 5e7, "solAmount": sol,
+                       "vTokensInBondingCurve": pf.CURVE_START_TOKENS - 5e7, "marketCapSol": 30.0})
+
+
+def _trade(mint, trader, buy=True, sol=1.0, v_tokens=9e8):
+    return json.dumps({"txType": "buy" if buy else "sell", "mint": mint, "traderPublicKey": trader,
+                       "solAmount": sol, "tokenAmount": 1e6, "vTokensInBondingCurve": v_tokens,
+                       "marketCapSol": 55.0})
+
+
+# ========== TESTS ==========
+
+def test_lifecycle_and_router_hand_off():
+    td, db, mon = _monitor()
+    with _quiet():
+        lc = mon.handle_message(_create("MintA", "Dev1"), now=T0)
+        assert lc.stage() == "created" and lc.bot_reason is None and lc.initial_buy_sol == 1.5
+        assert mon.subscription_commands(now=T0, force=True) == [{"method": "subscribeTokenTrade", "keys": ["MintA"]}]
+        for i, (trader, buy, sol) in enumerate([("B1", True, 2.0), ("B2", True, 1.0), ("B1", True, 0.5),
+                                                ("B3", False, 0.4), ("Dev1", False, 1.2)]):
+            mon.handle_message(_trade("MintA", trader, buy, sol, v_tokens=1e9 - i * 1e8), now=T0 + 10 + i)
+        mon.handle_message(_trade("MintA", "Late", True, 9.0, v_tokens=pf.CURVE_START_TOKENS - 0.9 * pf.CURVE_SELLABLE_TOKENS),
+                           now=T0 + pf.EARLY_WINDOW_S + 60)  # after early window: curve only
+        assert mon.handle_message(_trade("Unknown", "X"), now=T0 + 20) is None
+        assert mon.handle_message("not json") is None and mon.handle_message("[1]") is None
+
+        assert lc.early_buys == 3 and lc.unique_buyers == 2 and lc.early_sells == 2
+        assert abs(lc.early_buy_sol - 3.5) < 1e-9 and lc.creator_sold_sol == 1.2 and lc.trades == 6
+        assert abs(lc.progress - 0.9) < 1e-9 and lc.buyers is None  # buyer set freed after the window
+        assert mon.tracker.creator_reputation("Dev1", T0 + 400)["dumps"] == 1
+        assert mon.subscription_commands(now=T0 + pf.EARLY_WINDOW_S + 1, force=True) == [
+            {"method": "unsubscribeTokenTrade", "keys": ["MintA"]}]
+        assert not mon.subscribed
+
+        signal = mon.handle_message(json.dumps({"txType": "migrate", "mint": "MintA", "pool": "pump-amm"}),
+                                    now=T0 + 900)
+    assert signal["token"] == "GOOD" and signal["signal_score"] == pf.MIGRATION_SCORE
+    raw = signal["raw_data"]
+    assert raw["creator"] == "Dev1" and raw["creator_flag"] is None and raw["pool"] == "pump-amm"
+    assert raw["lifecycle"]["stage"] == "migrated" and raw["lifecycle"]["early_unique_buyers"] == 2
+    assert raw["creator_reputation"] == {"launches": 1, "dumps": 1, "migrations": 1, "abandoned": 0}
+    assert not pf.SIGNALS_DIR.exists()  # handed off through the inbox, no signal file
+
+    inbox = state_store.get_router_signals("pumpfun", max_age_s=3600, db_path=db)
+    assert len(inbox) == 1 and inbox[0][1]["mint"] == "MintA" and inbox[0][0] < 5
+
+    import signal_router
+    saved = state_store.DB_PATH, signal_router.BASE_DIR
+    state_store.DB_PATH, signal_router.BASE_DIR = db, td
+    try:
+        loaded = signal_router._load_pumpfun_signals()
+    finally:
+        state_store.DB_PATH, signal_router.BASE_DIR = saved
+    assert [(s["mint"], s["_origin"], s["source"]) for s in loaded] == [("MintA", "pumpfun", "pumpfun_monitor")]
+
+    # Migration of a mint created before the monitor started, DB unavailable → signal file fallback
+    mon.db_path = td / "missing" / "x.db"
+    with _quiet():
+        sig = mon.handle_message(json.dumps({"txType": "migration", "mint": "MintOld", "symbol": "OLD"}), now=T0 + 950)
+    assert sig["raw_data"]["lifecycle"]["age_s"] is None and sig["raw_data"]["creator_reputation"] is None
+    assert len(list(pf.SIGNALS_DIR.glob("*_OLD_migration.json"))) == 1
+    assert mon.state["total_signals"] == 2 and mon.state["total_migrations"] == 2
+
+
+def test_creator_reputation_rolling_bot_filter():
+    _, _, mon = _monitor()
+    with _quiet():
+        # Name patterns still apply in isolation
+        assert mon.handle_message(_create("M0", "Dev0", symbol="SCAM", name="x"), now=T0).bot_reason == "pattern:scam"
+        assert mon.handle_message(_create("M1", "Dev0", symbol="Q", name="q"), now=T0).bot_reason == "short_symbol"
+        # Serial launcher: the SERIAL_LAUNCHES-th launch in the window with no migration is flagged
+        reasons = [mon.handle_message(_create(f"S{i}", "Serial", symbol=f"SER{i}"), now=T0 + i).bot_reason
+                   for i in range(pf.SERIAL_LAUNCHES)]
+        assert reasons == [None] * (pf.SERIAL_LAUNCHES - 1) + ["serial_launcher"]
+        assert mon._is_likely_bot({"symbol": "FINE", "name": "fine", "traderPublicKey": "Serial"})
+        # ... and forgiven once the launches roll out of the window
+        later = T0 + pf.CREATOR_WINDOW_S + 10
+        assert mon.handle_message(_create("S_late", "Serial", symbol="SERLATE"), now=later).bot_reason is None
+
+        # Early dumps by the creator
+        for i in range(pf.DUMP_LIMIT):
+            mon.handle_message(_create(f"D{i}", "Dumper", symbol=f"DMP{i}"), now=T0 + i)
+            mon.handle_message(_trade(f"D{i}", "Dumper", buy=False, sol=5.0), now=T0 + i + 30)
+            mon.handle_message(_trade(f"D{i}", "Dumper", buy=False, sol=5.0), now=T0 + i + 31)  # one dump per mint
+        assert mon.tracker.creator_reputation("Dumper", T0 + 60)["dumps"] == pf.DUMP_LIMIT
+        assert mon.handle_message(_create("D9", "Dumper", symbol="DMP9"), now=T0 + 60).bot_reason == "creator_dumps"
+
+        # Copycat symbol spam across different creators
+        spam = [mon.handle_message(_create(f"C{i}", f"Copy{i}", symbol="KITTY"), now=T0 + i).bot_reason
+                for i in range(pf.SYMBOL_SPAM)]
+        assert spam[-1] == "symbol_spam" and spam[0] is None
+
+        # A flagged creator's migration is still handed off, scored down
+        sig = mon.handle_message(json.dumps({"txType": "migrate", "mint": "D9"}), now=T0 + 120)
+    assert sig["signal_score"] == pf.FLAGGED_CREATOR_SCORE and sig["raw_data"]["creator_flag"] == "creator_dumps"
+    assert mon.state["bots_filtered"] == 2 + 1 + 1 + 1
+    flagged = {lc.mint for lc in mon.tracker.mints.values() if lc.bot_reason}
+    assert not flagged & set(mon._pending_subs)  # bots never get a trade subscription
+
+
+def test_memory_bounded_and_expiry():
+    _, _, mon = _monitor()
+    saved = pf.MAX_TRACKED_MINTS, pf.MAX_TRACKED_CREATORS, pf.MAX_TRADE_SUBSCRIPTIONS
+    pf.MAX_TRACKED_MINTS, pf.MAX_TRACKED_CREATORS, pf.MAX_TRADE_SUBSCRIPTIONS = 100, 50, 20
+    try:
+        with _quiet():
+            for i in range(500):
+                mon.handle_message(_create(f"M{i}", f"Dev{i}", symbol=f"TOK{i}"), now=T0 + i)
+            assert len(mon.tracker.mints) == 100 and len(mon.tracker.creators) == 50
+            assert len(mon._pending_subs) + len(mon.subscribed) == 20  # subscriptions capped
+            assert "M499" in mon.tracker.mints and "M0" not in mon.tracker.mints
+            assert mon.tracker.creator_reputation("Dev450", T0 + 500)["abandoned"] == 0
+
+            mon.handle_message(_trade("M420", "B"), now=T0 + pf.LIFECYCLE_TTL_S + 300)  # keeps M420 alive
+            assert mon.tracker.expire(T0 + pf.LIFECYCLE_TTL_S + 460) == 59  # M400..M459 idle, M420 traded
+            assert "M420" in mon.tracker.mints and "M459" not in mon.tracker.mints and "M460" in mon.tracker.mints
+            assert mon.tracker.creator_reputation("Dev455", T0 + 500)["abandoned"] == 1
+    finally:
+        pf.MAX_TRACKED_MINTS, pf.MAX_TRACKED_CREATORS, pf.MAX_TRADE_SUBSCRIPTIONS = saved
+
+
+def test_no_io_per_message_and_compact_snapshot_restore():
+    td, db, mon = _monitor()
+    now = time.time()
+    with _quiet():
+        for i in range(300):
+            mon.handle_message(_create(f"M{i}", f"Dev{i % 40}", symbol=f"TOK{i}"), now=now - 300 + i)
+            mon.handle_message(_trade(f"M{i}", f"B{i}", sol=0.5), now=now - 299 + i)
+            mon.maybe_snapshot()
+    assert not (td / "state.json").exists() and not (td / "lifecycle.json").exists() and not pf.LOGS_DIR.exists()
+
+    with _quiet():
+        assert mon.maybe_snapshot(interval_s=0)
+    snap = json.loads((td / "lifecycle.json").read_text())
+    assert snap["fields"] == list(pf.TokenLifecycle.FIELDS) and len(snap["mints"]) == 300
+    assert all(isinstance(row, list) for row in snap["mints"])
+    assert "\n" not in (td / "lifecycle.json").read_text()  # compact, not pretty-printed
+    state = json.loads((td / "state.json").read_text())
+    assert state["total_tokens_seen"] == 300 and state["total_trades"] == 300 and state["tracked_mints"] == 300
+
+    with _quiet():
+        again = pf.PumpFunMonitor(td / "state.json", td / "lifecycle.json", db_path=db)
+    assert again.state["total_tokens_seen"] == 300
+    a, b = mon.tracker.mints["M299"], again.tracker.mints["M299"]
+    assert a.to_row() == b.to_row() and b.buyers == set()  # still in early window: counting resumes
+    assert again.tracker.mints["M0"].buyers is None
+    assert again.tracker.creator_reputation("Dev1", now) == mon.tracker.creator_reputation("Dev1", now)
+    assert list(again.tracker.mints) == list(mon.tracker.mints)  # activity order preserved
+
+
+def test_replay_benchmark_throughput():
+    r = pf._bench(20_000)
+    assert r["messages"] == 20_000 and r["tokens"] > 500 and r["migrations"] > 0
+    assert r["rate"] > 5_000, f"only {r['rate']:.0f} messages/s"
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_lifecycle_and_router_hand_off,
+        test_creator_reputation_rolling_bot_filter,
+        test_memory_bounded_and_expiry,
+        test_no_io_per_message_and_compact_snapshot_restore,
+        test_replay_benchmark_throughput,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: pumpfun_monitor.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Cross-process rate limiter tests (rate_limiter.py + client wiring).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_rate_limiter.py
+"""
+import os, sys, asyncio, subprocess, tempfile, time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import rate_limiter
+import breaker_registry
+
+_TMP = Path(tempfile.mkdtemp(prefix="sanad_rl_home_"))
+rate_limiter.STATE_DIR = _TMP / "ratelimit"
+breaker_registry.STATE_DIR = _TMP / "breakers"
+breaker_registry.LEGACY_FILE = _TMP / "circuit_breakers.json"
+breaker_registry.DB_PATH = _TMP / "sanad_trader.db"
+
+
+def _bucket(name, calls, per_s):
+    state_dir = Path(tempfile.mkdtemp(prefix="sanad_rl_"))
+    return rate_limiter.TokenBucket(name, calls, per_s, state_dir=state_dir), state_dir
+
+
+# ========== TESTS ==========
+
+def test_refill_and_wait():
+    b, _ = _bucket("fast", 5, 1)
+    assert all(b.try_acquire("hot") == 0.0 for _ in range(5))
+    wait = b.try_acquire("hot")
+    assert 0.15 < wait <= 0.2, wait
+    t0 = time.monotonic()
+    assert b.acquire("hot")
+    assert 0.1 < time.monotonic() - t0 < 0.5
+
+
+def test_priority_reserve_and_fast_fail():
+    b, _ = _bucket("birdeye", 10, 60)
+    taken = 0
+    while b.try_acquire("background") == 0.0:
+        taken += 1
+    assert taken == 5  # background leaves RESERVE["background"] of capacity
+    assert b.try_acquire("normal") == 0.0 and b.try_acquire("normal") == 0.0 and b.try_acquire("normal") == 0.0
+    assert b.try_acquire("normal") > 0  # normal stops at 20%
+    assert b.try_acquire("hot") == 0.0 and b.try_acquire("hot") == 0.0
+
+    # Bucket empty, refill 1 per 6 s: hot fails fast instead of stalling
+    t0 = time.monotonic()
+    try:
+        with rate_limiter.priority("hot"):
+            b.limit()
+        assert False, "expected RateLimited"
+    except rate_limiter.RateLimited as e:
+        assert e.provider == "birdeye" and 5 < e.retry_in <= 6, e.retry_in
+    assert time.monotonic() - t0 < 0.1 and b.rejected == 1
+    assert not b.acquire("normal", timeout=0.5)
+    try:
+        rate_limiter.set_process_priority("urgent")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_budget_shared_across_processes():
+    state_dir = Path(tempfile.mkdtemp(prefix="sanad_rl_"))
+    code = (
+        "import sys; sys.path.insert(0, %r)\n"
+        "import rate_limiter\n"
+        "b = rate_limiter.TokenBucket('dexscreener', 20, 600, state_dir=%r)\n"
+        "print(sum(b.try_acquire('hot') == 0.0 for _ in range(15)))\n"
+    ) % (str(BASE_DIR / "scripts"), str(state_dir))
+    procs = [subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True) for _ in range(4)]
+    granted = [int(p.communicate(timeout=30)[0].strip()) for p in procs]
+    assert sum(granted) == 20, granted  # 4 × 15 attempts, one shared budget
+
+    # Forked child closes the inherited descriptor and reopens (flock is per open file description)
+    b = rate_limiter.TokenBucket("dexscreener", 20, 600, state_dir=state_dir)
+    assert b.try_acquire("hot") > 0
+    inherited = b._shared._fd
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.fstat(inherited)
+            closed = False
+        except OSError:
+            closed = True
+        os._exit(0 if closed and b.try_acquire("hot") > 0 and b._shared._pid == os.getpid() else 1)
+    assert os.waitpid(pid, 0)[1] == 0
+
+
+def test_penalty_blocks_every_process_and_async():
+    b, state_dir = _bucket("rugcheck", 20, 1)
+    other = rate_limiter.TokenBucket("rugcheck", 20, 1, state_dir=state_dir)  # another process's view
+    b.penalize(rate_limiter.retry_after_s({"Retry-After": "0.3"}, 5))
+    assert rate_limiter.retry_after_s({}, 5) == 5 and rate_limiter.retry_after_s({"Retry-After": "x"}, 60) == 60
+    assert 0.9 < other.try_acquire("hot") <= 1.0  # clamped to ≥ 1 s
+    assert other.level() == 0.0
+
+    async def fetch_all():
+        return await asyncio.gather(*(other.acquire_async("normal") for _ in range(3)))
+
+    t0 = time.monotonic()
+    assert asyncio.run(fetch_all()) == [True, True, True]  # block, then refill past the normal reserve
+    assert 1.1 < time.monotonic() - t0 < 2.5
+
+
+def test_client_429_and_stale_fallback():
+    import state_store, enrichment_cache
+    td = Path(tempfile.mkdtemp(prefix="sanad_rl_db_"))
+    db = td / "sanad_trader.db"
+    state_store.init_db(db)
+    enrichment_cache.DB_PATH = db
+    enrichment_cache._memory.clear()
+
+    os.environ.setdefault("BIRDEYE_API_KEY", "test-key")
+    import birdeye_client  # bucket and breaker open under _TMP on first use
+
+    class _Resp:
+        def __init__(self, status, body=None):
+            self.status_code, self._body, self.headers = status, body or {}, {"Retry-After": "30"}
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return self._body
+
+    responses = [_Resp(200, {"data": {"liquidity": 5000.0}}), _Resp(429)]
+    orig_get = birdeye_client.http_transport.get
+    birdeye_client.http_transport.get = lambda *a, **k: responses.pop(0)
+    try:
+        assert birdeye_client.get_token_overview("MintRL")["liquidity"] == 5000.0
+        enrichment_cache._memory.clear()
+        with state_store.get_connection(db) as conn:
+            conn.execute("UPDATE enrichment_cache SET expires_at = 1")  # expired everywhere
+        with rate_limiter.priority("hot"):
+            t0 = time.monotonic()
+            stale = birdeye_client.get_token_overview("MintRL")  # 429 → RateLimited → last known value
+            assert time.monotonic() - t0 < 1.0
+            assert stale == {"liquidity": 5000.0}
+            try:
+                birdeye_client.get_token_overview.uncached("MintRL")  # no cache: error surfaces
+                assert False, "expected RateLimited"
+            except rate_limiter.RateLimited as e:
+                assert 25 < e.retry_in <= 30
+    finally:
+        birdeye_client.http_transport.get = orig_get
+    assert not responses
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_refill_and_wait,
+        test_priority_reserve_and_fast_fail,
+        test_budget_shared_across_processes,
+        test_penalty_blocks_every_process_and_async,
+        test_client_429_and_stale_fallback,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: rate_limiter.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Regime engine tests (regime_classifier.py + thompson_sampler, regime_adapter, fast_decision_engine).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_regime_classifier.py
+"""
+import sys, io, json, math, random, tempfile, contextlib
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import regime_classifier as rc
+
+NOW = datetime(2026, 6, 1, 0, 30, tzinfo=timezone.utc)
+T0 = int(NOW.timestamp() * 1000)
+DRIFT = {"BTCUSDT": 0.01, "SOLUSDT": 0.0, "JUPUSDT": 0.0, "RAYUSDT": 0.0}  # per day; memes -1.5%
+
+
+class _Binance:
+    """Deterministic klines: exponential drift per symbol, ±1% bar range, includes the open candle."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, symbol, timeframe, start_ms, limit):
+        self.calls.append((symbol, timeframe))
+        step = rc.TIMEFRAMES[timeframe] * 1000
+        now_ms = int(rc._now().timestamp() * 1000)
+        out = []
+        for i in range(limit):
+            t = start_ms + i * step
+            if t > now_ms:
+                break
+            close = 100 * math.exp(DRIFT.get(symbol, -0.015) * (t - T0) / 86_400_000)
+            out.append([t, str(close), str(close * 1.01), str(close * 0.99), str(close), "1", t + step - 1])
+        return out
+
+
+def _fresh_home():
+    home = Path(tempfile.mkdtemp(prefix="sanad_regime_"))
+    rc.REGIME_DIR = home / "regime-data"
+    rc.REGIME_LATEST = rc.REGIME_DIR / "latest.json"
+    rc.REGIME_HISTORY = rc.REGIME_DIR / "history.jsonl"
+    rc.INDICATORS_PATH = rc.REGIME_DIR / "indicators.json"
+    rc.FEAR_GREED_PATH = home / "fear_greed_latest.json"
+    rc.DB_PATH = home / "sanad_trader.db"
+    rc._snapshot_mtime = None
+    import state_store
+    state_store.ensure_tables(rc.DB_PATH)
+    return home
+
+
+def _classify(at=NOW):
+    rc._now = lambda: at
+    with contextlib.redirect_stdout(io.StringIO()):
+        return rc.classify_regime()
+
+
+# ========== TESTS ==========
+
+def test_incremental_indicators_match_batch():
+    rng = random.Random(7)
+    candles, close = [], 100.0
+    for i in range(120):
+        prev, close = close, close * (1 + rng.uniform(-0.04, 0.045))
+        candles.append((i + 1, max(prev, close) * 1.01, min(prev, close) * 0.99, close))
+
+    state = rc.SeriesState()
+    for k, c in enumerate(candles):
+        if k == 70:  # persist/restore mid-stream, as between two runs
+            state = rc.SeriesState.from_dict(json.loads(json.dumps(state.to_dict())))
+        assert state.push(*c)
+    assert not state.push(*candles[-1])  # already seen
+
+    closes = [c[3] for c in candles]
+    window = closes[-30:]
+    n, y_mean = len(window), sum(window) / len(window)
+    slope = sum((i - (n - 1) / 2) * (y - y_mean) for i, y in enumerate(window)) / sum(
+        (i - (n - 1) / 2) ** 2 for i in range(n))
+    trs = [max(h - l, abs(h - closes[i - 1]), abs(l - closes[i - 1])) for i, (_, h, l, _) in enumerate(candles) if i]
+    m = state.metrics(bars_per_day=6)
+    assert abs(m["sma_slope_pct_per_day"] - round(slope / y_mean * 100 * 6, 4)) < 1e-3
+    assert abs(m["atr_pct"] - round(sum(trs[-14:]) / 14 / closes[-1] * 100 * math.sqrt(6), 4)) < 1e-3
+    assert m["drawdown"] == round((max(window) - closes[-1]) / max(window), 4)
+    assert m["data_points"] == 30 and m["price"] == closes[-1]
+
+
+def test_engine_fetches_only_new_candles():
+    _fresh_home()
+    fake = _Binance()
+    rc._fetch_klines = fake
+    result = _classify()
+    symbols = {s for members in rc.CLUSTERS.values() for s in members}
+    assert len(fake.calls) == len(symbols) * len(rc.TIMEFRAMES)
+
+    clusters = result["clusters"]
+    assert set(clusters) == {"BTC", "SOL", "MEMES"} and all(set(c) == {"1d", "4h", "1h"} for c in clusters.values())
+    assert all(clusters["BTC"][tf]["primary"] == "BULL" for tf in rc.TIMEFRAMES)
+    assert all(clusters["SOL"][tf]["primary"] == "SIDEWAYS" for tf in rc.TIMEFRAMES)
+    assert all(clusters["MEMES"][tf]["primary"] == "BEAR" for tf in rc.TIMEFRAMES)
+    assert abs(clusters["BTC"]["1h"]["metrics"]["sma_slope_pct_per_day"] - 1.0) < 0.05  # daily units on every timeframe
+    assert result["regime_tag"] == clusters["BTC"]["1d"]["regime_tag"] and result["metrics"]["btc_price"]
+    assert json.loads(rc.REGIME_LATEST.read_text())["clusters"]["MEMES"]["4h"]["primary"] == "BEAR"
+
+    fake.calls.clear()
+    _classify()
+    assert fake.calls == []  # nothing closed since the last run
+
+    _classify(NOW + timedelta(hours=1))
+    assert {tf for _, tf in fake.calls} == {"1h"} and len(fake.calls) == len(symbols)
+
+    # Lost indicator state → rebuilt from the SQLite candle cache, no network
+    before = json.loads(rc.INDICATORS_PATH.read_text())
+    rc.INDICATORS_PATH.unlink()
+    fake.calls.clear()
+    after = _classify(NOW + timedelta(hours=1))
+    assert fake.calls == [] and after["clusters"] == json.loads(rc.REGIME_LATEST.read_text())["clusters"]
+    assert json.loads(rc.INDICATORS_PATH.read_text())["BTCUSDT:1d"]["closes"] == before["BTCUSDT:1d"]["closes"]
+
+
+def test_regime_tag_per_signal_without_io():
+    home = _fresh_home()
+    rc._fetch_klines = _Binance()
+    assert rc.get_regime_tag() == "UNKNOWN" and rc.get_regime_tag(default="NEUTRAL") == "NEUTRAL"
+    result = _classify()
+    rc._snapshot_mtime = None  # force the reload check
+    meme = {"token": "NEWCAT", "chain": "solana", "token_address": "So1aNa111"}
+    assert rc.cluster_for(meme) == "MEMES" and rc.cluster_for("SOL/USDT") == "SOL"
+    assert rc.cluster_for({"symbol": "BONK"}) == "MEMES" and rc.cluster_for("ETHUSDT") == "BTC"
+    assert rc.get_regime_tag(meme) == result["clusters"]["MEMES"]["1d"]["regime_tag"]
+    assert rc.get_regime_tag({"symbol": "ETHUSDT"}, timeframe="4h") == result["clusters"]["BTC"]["4h"]["regime_tag"]
+    assert rc.get_regime(meme, timeframe="1h")["implications"]["risk_adjustment"] == "defensive"
+
+    # Readers serve the in-memory result; the file is not consulted again inside RELOAD_CHECK_S
+    rc.REGIME_LATEST.unlink()
+    assert rc.get_regime_tag(meme).startswith("BEAR_")
+
+    import thompson_sampler, regime_adapter, fast_decision_engine, state_store
+    saved = thompson_sampler.THOMPSON_STATE, state_store.DB_PATH
+    thompson_sampler.THOMPSON_STATE = home / "thompson_state.json"
+    state_store.DB_PATH = rc.DB_PATH
+    thompson_sampler._state_cache.update(key=None, state=None)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            picked = thompson_sampler.select_strategy(signal=meme, seed=3)
+    finally:
+        thompson_sampler.THOMPSON_STATE, state_store.DB_PATH = saved
+        thompson_sampler._state_cache.update(key=None, state=None)
+    assert picked["excluded"].get("meme-momentum", "").startswith("regime_avoided (BEAR_")
+    assert regime_adapter.load_current_regime() == result["regime_tag"]
+    assert regime_adapter.load_current_regime("MEMES").startswith("BEAR_")
+
+    seen = []
+    orig = fast_decision_engine.kelly_position_size
+    fast_decision_engine.kelly_position_size = lambda s, regime, *a, **k: (seen.append(regime), (100.0, {}))[1]
+    has_strategy = fast_decision_engine.HAS_STRATEGY
+    fast_decision_engine.HAS_STRATEGY = False
+    try:
+        fast_decision_engine.stage_3_strategy_selection(meme, {}, {"regime_tag": "NEUTRAL"}, {}, 0)
+    finally:
+        fast_decision_engine.kelly_position_size = orig
+        fast_decision_engine.HAS_STRATEGY = has_strategy
+    assert seen == [rc.get_regime_tag(meme)]
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_incremental_indicators_match_batch,
+        test_engine_fetches_only_new_candles,
+        test_regime_tag_per_signal_without_io,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: regime_classifier.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
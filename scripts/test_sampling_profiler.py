@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Sampling profiler tests (sampling_profiler.py + watchdog diagnostic attachment).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_sampling_profiler.py
+"""
+import os, sys, signal, subprocess, tempfile, time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import sampling_profiler
+
+
+def _tmpdir():
+    return Path(tempfile.mkdtemp(prefix="sanad_prof_"))
+
+
+def _hot_loop(seconds):
+    end = time.perf_counter() + seconds
+    x = 0
+    while time.perf_counter() < end:
+        x += sum(i * i for i in range(200))
+    return x
+
+
+# ========== TESTS ==========
+
+def test_long_run_writes_collapsed_stacks():
+    out = _tmpdir()
+    with sampling_profiler.profile("signal_router", enabled=True, hz=200,
+                                   min_duration_s=0.2, out_dir=out) as prof:
+        _hot_loop(0.6)
+    assert prof.samples >= 30, prof.samples
+    path = sampling_profiler.latest_profile("signal_router", out_dir=out)
+    assert path == prof.path and path.name.startswith("signal_router_") and path.suffix == ".collapsed"
+
+    stacks = sampling_profiler.load_collapsed(path)
+    assert sum(stacks.values()) >= prof.samples  # one line per thread per sample
+    hot = sum(c for s, c in stacks.items() if "test_sampling_profiler.py:_hot_loop" in s)
+    assert hot / prof.samples > 0.8, (hot, prof.samples)
+    assert all(s.startswith("MainThread;") for s in stacks if "_hot_loop" in s)
+
+    summary = sampling_profiler.summarize(path, top=5)
+    assert "samples" in summary and "_hot_loop" in summary, summary
+
+
+def test_short_or_disabled_runs_write_nothing():
+    out = _tmpdir()
+    with sampling_profiler.profile("sanad_pipeline", enabled=True, hz=200, min_duration_s=5, out_dir=out) as prof:
+        _hot_loop(0.05)
+    assert prof.path is None and not list(out.glob("*"))
+
+    assert not sampling_profiler.ENABLED  # SANAD_PROFILE unset → no sampler thread at all
+    with sampling_profiler.profile("sanad_pipeline", out_dir=out) as prof:
+        _hot_loop(0.01)
+    assert prof is None
+    assert sampling_profiler.latest_profile(out_dir=out / "missing") is None
+
+
+def test_periodic_snapshot_survives_sigkill():
+    out = _tmpdir()
+    code = (
+        "import sys, time; sys.path.insert(0, %r)\n"
+        "import sampling_profiler as sp\n"
+        "sp.SNAPSHOT_INTERVAL_S = 0.2\n"
+        "with sp.profile('position_monitor', enabled=True, hz=100, min_duration_s=0.1, out_dir=%r):\n"
+        "    def stuck_in_api_call():\n"
+        "        time.sleep(60)\n"
+        "    stuck_in_api_call()\n"
+    ) % (str(BASE_DIR / "scripts"), str(out))
+    proc = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.DEVNULL)
+    try:
+        deadline = time.time() + 10
+        while time.time() < deadline and not list(out.glob("*.collapsed")):
+            time.sleep(0.05)
+        time.sleep(0.3)
+    finally:
+        proc.kill()
+        proc.wait()
+    path = sampling_profiler.latest_profile("position_monitor", out_dir=out)
+    assert path is not None, list(out.iterdir())
+    assert "stuck_in_api_call" in path.read_text()
+
+
+def test_sigusr2_dumps_immediately():
+    out = _tmpdir()
+    code = (
+        "import sys, time; sys.path.insert(0, %r)\n"
+        "import sampling_profiler as sp\n"
+        "with sp.profile('async_analysis_queue', enabled=True, hz=100, min_duration_s=3600, out_dir=%r):\n"
+        "    print('ready', flush=True)\n"
+        "    end = time.time() + 30\n"
+        "    while time.time() < end:\n"
+        "        sum(range(1000))\n"
+    ) % (str(BASE_DIR / "scripts"), str(out))
+    proc = subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, text=True)
+    try:
+        assert proc.stdout.readline().strip() == "ready"
+        time.sleep(0.3)
+        proc.send_signal(signal.SIGUSR2)
+        deadline = time.time() + 5
+        while time.time() < deadline and not list(out.glob("*.collapsed")):
+            time.sleep(0.05)
+        assert proc.poll() is None  # handled, still running
+    finally:
+        proc.kill()
+        proc.wait()
+    assert sampling_profiler.latest_profile("async_analysis_queue", out_dir=out) is not None
+
+
+def test_watchdog_diagnostic_attaches_latest_profile():
+    import watchdog
+    out = _tmpdir()
+    (out / "sanad_pipeline_20260101T000000Z_1.collapsed").write_text("MainThread;a.py:main 3\n")
+    time.sleep(0.01)
+    (out / "signal_router_20260101T000000Z_2.collapsed").write_text(
+        "MainThread;signal_router.py:run_router;solscan_client.py:enrich_signal_with_solscan 90\n"
+        "MainThread;signal_router.py:run_router;signal_router.py:_score_signal 10\n")
+    os.utime(out / "sanad_pipeline_20260101T000000Z_1.collapsed")  # newer, but router is preferred
+    orig = sampling_profiler.PROFILES_DIR
+    sampling_profiler.PROFILES_DIR = out
+    try:
+        diag = watchdog._compile_diagnostic_package({"last_token": "PEPE"}, 45)
+    finally:
+        sampling_profiler.PROFILES_DIR = orig
+    assert "Latest profile" in diag and "signal_router_20260101T000000Z_2.collapsed" in diag, diag
+    assert "90.0%  solscan_client.py:enrich_signal_with_solscan" in diag, diag
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_long_run_writes_collapsed_stacks,
+        test_short_or_disabled_runs_write_nothing,
+        test_periodic_snapshot_survives_sigkill,
+        test_sigusr2_dumps_immediately,
+        test_watchdog_diagnostic_attaches_latest_profile,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: sampling_profiler.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
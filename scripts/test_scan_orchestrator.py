@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Scan orchestrator tests (scan_orchestrator.py + job_supervisor, detail_pool fan-out in dexscreener_client).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_scan_orchestrator.py
+"""
+import sys, io, json, tempfile, textwrap, time, threading, contextlib
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import state_store
+import job_lease
+import job_supervisor
+import rate_limiter
+import detail_pool
+import scan_orchestrator
+
+SCANNER_MODULE = textwrap.dedent("""
+    import threading, time
+    import rate_limiter, detail_pool
+    SEEN = {}
+
+    def _detail(token):
+        time.sleep(0.1)
+        return (token, rate_limiter.current_priority())
+
+    def birdeye():
+        SEEN["birdeye"] = detail_pool.fan_out(_detail, ["A", "B", "C", "D"])  # 0.1s, not 0.4s
+        time.sleep(0.2)
+
+    def coingecko():
+        SEEN["coingecko"] = rate_limiter.current_priority()
+        time.sleep(0.3)
+
+    def radar():
+        time.sleep(0.3)
+        raise RuntimeError("upstream 502")
+
+    def majors():
+        time.sleep(0.3)
+        raise SystemExit(1)
+""")
+
+
+def _quiet():
+    return contextlib.redirect_stdout(io.StringIO())
+
+
+def _setup():
+    td = Path(tempfile.mkdtemp(prefix="sanad_scan_"))
+    (td / "scan_fake_mod.py").write_text(SCANNER_MODULE)
+    if str(td) not in sys.path:
+        sys.path.insert(0, str(td))
+    sys.modules.pop("scan_fake_mod", None)
+    db = td / "sanad_trader.db"
+    state_store.init_db(db)
+    job_supervisor.CRON_HEALTH_PATH = td / "state" / "cron_health.json"
+    job_lease.LEASE_DIR = td / "state" / "leases"
+    return td, db
+
+
+# ========== TESTS ==========
+
+def test_sweep_takes_slowest_not_sum():
+    td, db = _setup()
+    scanners = [
+        {"name": "birdeye_scanner", "target": "scan_fake_mod:birdeye"},
+        {"name": "coingecko_scanner", "target": "scan_fake_mod:coingecko"},
+        {"name": "meme_radar", "target": "scan_fake_mod:radar"},
+        {"name": "majors_scanner", "target": "scan_fake_mod:majors"},
+        {"name": "smart_money_scanner", "target": "scan_fake_mod:missing"},
+    ]
+    t0 = time.monotonic()
+    with _quiet():
+        runs = scan_orchestrator.sweep(scanners=scanners, db_path=db)
+    elapsed = time.monotonic() - t0
+    assert elapsed < 0.7, f"sweep took {elapsed:.2f}s (serial would be ≥1.2s)"
+
+    status = {n: r["status"] for n, r in runs.items()}
+    assert status == {"birdeye_scanner": "ok", "coingecko_scanner": "ok", "meme_radar": "error",
+                      "majors_scanner": "error", "smart_money_scanner": "error"}, status
+    assert "upstream 502" in runs["meme_radar"]["detail"] and runs["majors_scanner"]["detail"] == "exit 1"
+    assert "AttributeError" in runs["smart_money_scanner"]["detail"]  # failing target isolated too
+
+    import scan_fake_mod
+    assert scan_fake_mod.SEEN["coingecko"] == "background"
+    assert scan_fake_mod.SEEN["birdeye"] == [(t, "background") for t in "ABCD"]  # priority carried into fan-out
+
+    health = json.loads(job_supervisor.CRON_HEALTH_PATH.read_text())
+    assert set(health) == set(status) and health["meme_radar"]["status"] == "error"
+    assert all(h["runner"] == "sweep" for h in health.values())
+    stats = state_store.get_job_stats(db_path=db)
+    assert stats["birdeye_scanner"]["runs"] == 1 and stats["majors_scanner"]["failures"] == 1
+    assert job_lease.check_lease("coingecko_scanner")["status"] == "ok"
+
+    with _quiet():
+        assert scan_orchestrator.sweep(names=["coingecko_scanner"], scanners=scanners, db_path=db).keys() \
+            == {"coingecko_scanner"}
+
+
+def test_fan_out_order_errors_and_nesting():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def slow(x):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return x * x
+
+    t0 = time.monotonic()
+    assert detail_pool.fan_out(slow, range(8)) == [x * x for x in range(8)]
+    assert time.monotonic() - t0 < 0.3 and peak[0] > 1
+
+    with rate_limiter.priority("hot"):
+        assert detail_pool.fan_out(lambda _: rate_limiter.current_priority(), [1, 2]) == ["hot", "hot"]
+
+    # Nested fan-out runs inline on the detail thread (no pool starvation)
+    nested = detail_pool.fan_out(
+        lambda _: {threading.current_thread().name for _ in detail_pool.fan_out(lambda y: y, [1, 2, 3])},
+        range(detail_pool.DETAIL_WORKERS * 2))
+    assert all(len(names) == 1 for names in nested)
+
+    done = []
+
+    def flaky(x):
+        if x == 0:
+            raise ValueError("bad token")
+        time.sleep(0.05)
+        done.append(x)
+
+    try:
+        detail_pool.fan_out(flaky, range(4))
+        raise AssertionError("error not raised")
+    except ValueError:
+        pass
+    assert sorted(done) == [1, 2, 3]  # raised only after the other calls finished
+
+
+def test_dexscreener_pair_lookups_concurrent():
+    import dexscreener_client as dx
+    td = Path(tempfile.mkdtemp(prefix="sanad_scan_dx_"))
+    boosts = [{"chainId": "solana", "tokenAddress": f"B{i}", "totalAmount": 100} for i in range(6)]
+    ctos = [{"chainId": "solana", "tokenAddress": "B1"}, {"chainId": "solana", "tokenAddress": "C0"}]
+    pair = {"liquidity": {"usd": 90_000}, "volume": {"h24": 500_000}, "txns": {"h24": {"buys": 400}},
+            "pairCreatedAt": (time.time() - 86_400) * 1000}
+    looked_up = []
+
+    def lookup(addr):
+        looked_up.append(addr)
+        time.sleep(0.1)
+        return None if addr == "B3" else dict(pair)
+
+    saved = {k: getattr(dx, k) for k in ("get_token_boosts_top", "get_token_profiles_latest",
+                                          "get_community_takeovers", "_enrich_with_pair_data",
+                                          "_build_signal", "SIGNALS_DIR")}
+    dx.get_token_boosts_top, dx.get_token_profiles_latest = lambda: boosts, lambda: []
+    dx.get_community_takeovers = lambda: ctos
+    dx._enrich_with_pair_data = lookup
+    dx._build_signal = lambda entry, p, stype, boost: {
+        "token": entry["tokenAddress"], "signal_type": stype, "boost_amount": boost,
+        "volume_24h": 500_000, "liquidity_usd": 90_000}
+    dx.SIGNALS_DIR = td
+    try:
+        t0 = time.monotonic()
+        with _quiet():
+            signals = dx.run_scan()
+        elapsed = time.monotonic() - t0
+    finally:
+        for k, v in saved.items():
+            setattr(dx, k, v)
+    assert elapsed < 0.45, f"pair lookups took {elapsed:.2f}s (serial ≥0.7s)"
+    assert sorted(looked_up) == sorted(["B0", "B1", "B2", "B3", "B4", "B5", "C0"])  # B1 CTO deduped
+    assert [(s["token"], s["signal_type"]) for s in signals] == [
+        ("B0", "BOOSTED_TOKEN"), ("B1", "BOOSTED_TOKEN"), ("B2", "BOOSTED_TOKEN"), ("B4", "BOOSTED_TOKEN"),
+        ("B5", "BOOSTED_TOKEN"), ("C0", "COMMUNITY_TAKEOVER")]
+    assert signals[0]["boost_amount"] == 100 and signals[-1]["boost_amount"] is None
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_sweep_takes_slowest_not_sum,
+        test_fan_out_order_errors_and_nesting,
+        test_dexscreener_pair_lookups_concurrent,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: scan_orchestrator.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Supabase event outbox tests (supabase_client.py + state_store event_outbox) against a stand-in PostgREST server.
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_supabase_outbox.py
+"""
+import sys, io, os, json, shutil, socket, sqlite3, tempfile, threading, time, contextlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+HOME = Path(tempfile.mkdtemp(prefix="sanad_sb_home_"))
+for _d in ("config", "prompts"):
+    shutil.copytree(BASE_DIR / _d, HOME / _d)
+os.environ["SANAD_HOME"] = str(HOME)  # sanad_pipeline reads config/prompts at import
+with contextlib.redirect_stdout(io.StringIO()):
+    import supabase_client as sb
+import state_store
+import http_transport
+
+http_transport.DB_PATH = Path(tempfile.mkdtemp(prefix="sanad_sb_http_")) / "none.db"  # no stats flush
+sb.RETRY_BASE_S = 0.01
+sb.SUPABASE_KEY = "service-key"
+
+
+class _PostgREST(BaseHTTPRequestHandler):
+    """POST /rest/v1/events: stores inserted rows; scripted failures per request."""
+    protocol_version = "HTTP/1.1"
+    rows = []
+    posts = []
+    script = []        # statuses to answer before succeeding; "drop" closes without answering,
+                       # "hang" stalls for 3s (longer than the test's request timeout)
+    reject_marker = None
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"[]")
+        _PostgREST.posts.append((self.path, self.headers.get("apikey"), self.headers.get("Prefer"), len(body)))
+        status = _PostgREST.script.pop(0) if _PostgREST.script else 201
+        if status == "drop":
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        if status == "hang":
+            time.sleep(3)
+            status = 201
+        if status == 201 and _PostgREST.reject_marker and any(
+                r["payload"].get("marker") == _PostgREST.reject_marker for r in body):
+            status = 400
+        if status == 201:
+            _PostgREST.rows.extend(body)
+        data = b"" if status == 201 else json.dumps({"code": "22P02", "message": "bad"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _server():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _PostgREST)
+    srv.daemon_threads = True
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    _PostgREST.rows, _PostgREST.posts, _PostgREST.script = [], [], []
+    _PostgREST.reject_marker = None
+    http_transport.close_all()
+    sb.SUPABASE_URL = f"http://127.0.0.1:{srv.server_address[1]}"
+    return srv
+
+
+def _db():
+    db = Path(tempfile.mkdtemp(prefix="sanad_sb_")) / "sanad_trader.db"
+    state_store.init_db(db)
+    return db
+
+
+def _closed_port_url():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+# ========== TESTS ==========
+
+def test_log_event_local_and_chained():
+    db = _db()
+    sb.SUPABASE_URL = _closed_port_url()  # remote down: logging must not care
+    t0 = time.perf_counter()
+    events = [sb.log_event("DECISION", {"token": f"T{i}", "score": i, "at": datetime_now()},
+                           correlation_id=f"c{i}", db_path=db) for i in range(50)]
+    per_event_ms = (time.perf_counter() - t0) * 1000 / 50
+    assert all(events) and [e["seq"] for e in events] == list(range(1, 51))
+    assert per_event_ms < 50, f"{per_event_ms:.1f}ms per event"
+
+    stored = state_store.get_outbox_events(db_path=db)
+    assert stored[0]["prev_hash"] == "GENESIS"
+    assert all(b["prev_hash"] == a["event_hash"] for a, b in zip(stored, stored[1:]))
+    assert stored[3]["event_hash"] == sb._chain_hash("DECISION", stored[3]["payload"], stored[2]["event_hash"])
+    assert events[3]["prev_event_hash"] == stored[3]["event_hash"]  # field name the remote table uses
+    assert sb.verify_outbox_chain(db_path=db) == {"ok": True, "checked": 50, "bad_seq": None}
+
+    with state_store.get_connection(db) as conn:  # tampering is detected
+        conn.execute("UPDATE event_outbox SET payload=? WHERE seq=10", (json.dumps({"token": "X"}),))
+    assert sb.verify_outbox_chain(db_path=db)["bad_seq"] == 10
+
+    # A DB created before the outbox existed gets its tables on first use
+    old = Path(tempfile.mkdtemp(prefix="sanad_sb_old_")) / "sanad_trader.db"
+    sqlite3.connect(old).close()
+    assert sb.log_event("TRADE_CLOSED", {"token": "A"}, db_path=old)["seq"] == 1
+
+
+def datetime_now():
+    from datetime import datetime, timezone
+    return datetime.now(timezone.utc)  # not JSON-serializable on purpose (default=str)
+
+
+def test_concurrent_writers_single_chain():
+    db = _db()
+
+    def writer(tag):
+        for i in range(25):
+            assert sb.log_event("DECISION", {"w": tag, "i": i}, db_path=db)
+
+    pids = []
+    for p in range(3):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    writer(f"proc{p}")
+                os._exit(0)
+            except BaseException:
+                os._exit(1)
+        pids.append(pid)
+    threads = [threading.Thread(target=writer, args=(f"thread{t}",)) for t in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(os.waitpid(pid, 0)[1] == 0 for pid in pids)
+    v = sb.verify_outbox_chain(db_path=db)
+    assert v == {"ok": True, "checked": 150, "bad_seq": None}, v  # one linear chain, no forks
+    assert len({e["prev_hash"] for e in state_store.get_outbox_events(db_path=db)}) == 150
+
+
+def test_batched_shipping_and_acked_offsets():
+    db = _db()
+    srv = _server()
+    try:
+        for i in range(250):
+            sb.log_event("DECISION", {"token": f"T{i}"}, correlation_id=f"c{i}" if i % 2 else None, db_path=db)
+        r = sb.ship(batch_size=100, db_path=db)
+        assert r["shipped"] == 250 and r["batches"] == 3 and r["acked_seq"] == 250 and r["error"] is None
+        assert [p[3] for p in _PostgREST.posts] == [100, 100, 50]
+        assert {p[:3] for p in _PostgREST.posts} == {("/rest/v1/events", "service-key", "return=minimal")}
+
+        stored = state_store.get_outbox_events(db_path=db)
+        assert [row["prev_event_hash"] for row in _PostgREST.rows] == [e["event_hash"] for e in stored]
+        assert _PostgREST.rows[1]["correlation_id"] == "c1" and "correlation_id" not in _PostgREST.rows[0]
+        assert _PostgREST.rows[0]["created_at"] == stored[0]["created_at"]
+
+        assert sb.ship(db_path=db)["shipped"] == 0 and len(_PostgREST.posts) == 3  # nothing pending
+        sb.log_event("DECISION", {"token": "late"}, db_path=db)
+        assert sb.ship(db_path=db)["acked_seq"] == 251
+        cursor = sb.outbox_status(db_path=db)
+        assert cursor["acked_seq"] == 251 and cursor["pending"] == 0 and cursor["attempts"] == 0
+
+        # Acked rows past retention are pruned, the chain tip always stays
+        with state_store.get_connection(db) as conn:
+            conn.execute("UPDATE event_outbox SET created_at='2020-01-01T00:00:00+00:00'")
+        assert state_store.prune_outbox(sb.SINK, keep_days=7, db_path=db) == 250
+        sb.log_event("DECISION", {"token": "after-prune"}, db_path=db)
+        tip = state_store.get_outbox_events(db_path=db)
+        assert tip[-1]["prev_hash"] == _PostgREST.rows[-1]["prev_event_hash"]
+    finally:
+        srv.shutdown()
+
+
+def test_retry_backoff_and_rejected_events():
+    db = _db()
+    srv = _server()
+    try:
+        for i in range(10):
+            sb.log_event("DECISION", {"token": f"T{i}", "marker": "poison" if i == 6 else None}, db_path=db)
+
+        _PostgREST.script = [503, "drop"]  # transient: retried within the run
+        _PostgREST.reject_marker = "never"
+        r = sb.ship(batch_size=4, max_batches=1, db_path=db)
+        assert r["shipped"] == 4 and r["error"] is None and len(_PostgREST.posts) == 3
+
+        _PostgREST.script = [503] * (sb.SHIP_RETRIES + 1)  # outage: run fails, backoff recorded
+        r = sb.ship(batch_size=4, db_path=db)
+        assert r["shipped"] == 0 and "HTTP 503" in r["error"] and r["acked_seq"] == 4
+        cursor = sb.outbox_status(db_path=db)
+        assert cursor["attempts"] == 1 and cursor["next_attempt_at"] > time.time()
+        posts = len(_PostgREST.posts)
+        assert "backoff_s" in sb.ship(db_path=db) and len(_PostgREST.posts) == posts  # waits out the backoff
+
+        _PostgREST.script = [401] * (sb.SHIP_RETRIES + 1)  # auth errors are never treated as bad events
+        r = sb.ship(batch_size=4, db_path=db, force=True)
+        assert "HTTP 401" in r["error"] and r["rejected"] == 0 and sb.outbox_status(db_path=db)["attempts"] == 2
+
+        _PostgREST.reject_marker = "poison"  # batch with a bad event: split, set aside, rest shipped
+        with contextlib.redirect_stdout(io.StringIO()):
+            r = sb.ship(batch_size=4, db_path=db, force=True)
+        assert r["shipped"] == 5 and r["rejected"] == 1 and r["acked_seq"] == 10 and r["error"] is None
+        assert [row["payload"]["token"] for row in _PostgREST.rows] == [f"T{i}" for i in range(10) if i != 6]
+        bad = [e for e in state_store.get_outbox_events(db_path=db) if e["error"]]
+        assert [e["seq"] for e in bad] == [7] and "HTTP 400" in bad[0]["error"]
+        assert sb.outbox_status(db_path=db)["attempts"] == 0
+        assert sb.verify_outbox_chain(db_path=db)["ok"]  # set-aside events stay in the chain
+    finally:
+        srv.shutdown()
+
+    # Decision path never waits on the network
+    sb.SUPABASE_URL = _closed_port_url()
+    import sanad_pipeline
+    saved = state_store.DB_PATH
+    state_store.DB_PATH = db
+    try:
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            t0 = time.perf_counter()
+            sanad_pipeline._sync_to_supabase({"decision_id": "d1", "correlation_id": "corr-1"})
+            elapsed = time.perf_counter() - t0
+    finally:
+        state_store.DB_PATH = saved
+    assert "queued for Supabase (outbox seq 11)" in out.getvalue() and elapsed < 0.5
+
+
+def test_hung_endpoint_run_fits_job_timeout():
+    import job_supervisor
+    job = next(j for j in job_supervisor.JOBS if j["name"] == "supabase_shipper")
+    assert sb.SHIP_BUDGET_S + sb.SHIP_TIMEOUT_S < job["timeout_s"] < job["interval_s"]
+
+    db = _db()
+    srv = _server()
+    saved = sb.SHIP_BUDGET_S, sb.SHIP_TIMEOUT_S, sb.SHIP_MIN_REQUEST_S
+    sb.SHIP_BUDGET_S, sb.SHIP_TIMEOUT_S, sb.SHIP_MIN_REQUEST_S = 1.2, 0.5, 0.1
+    try:
+        for i in range(5):
+            sb.log_event("DECISION", {"token": f"T{i}"}, db_path=db)
+        _PostgREST.script = ["hang"] * 10
+        t0 = time.monotonic()
+        r = sb.ship(batch_size=2, db_path=db)
+        elapsed = time.monotonic() - t0
+        assert elapsed < sb.SHIP_BUDGET_S + sb.SHIP_TIMEOUT_S + 0.5, f"{elapsed:.2f}s"
+        assert r["shipped"] == 0 and "Timeout" in r["error"], r  # recorded as a failure, not killed
+        cursor = sb.outbox_status(db_path=db)
+        assert cursor["attempts"] == 1 and cursor["next_attempt_at"] > time.time()
+    finally:
+        sb.SHIP_BUDGET_S, sb.SHIP_TIMEOUT_S, sb.SHIP_MIN_REQUEST_S = saved
+        srv.shutdown()
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_log_event_local_and_chained,
+        test_concurrent_writers_single_chain,
+        test_batched_shipping_and_acked_offsets,
+        test_retry_backoff_and_rejected_events,
+        test_hung_endpoint_run_fits_job_timeout,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: supabase_client.py outbox")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Hot-path tracing tests (tracing.py + state_store trace_spans).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_tracing.py
+"""
+import os, sys, io, tempfile, time, contextlib
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+import state_store
+import tracing
+
+
+def _mkdb():
+    tracing.FLUSH_INTERVAL_S = 3600  # tests flush explicitly
+    td = Path(tempfile.mkdtemp(prefix="sanad_trace_"))
+    db = td / "state" / "sanad_trader.db"
+    state_store.init_db(db)
+    tracing._ring.clear()  # drop anything buffered by earlier tests
+    tracing.DB_PATH = db
+    return db
+
+
+# ========== TESTS ==========
+
+def test_nesting_propagation_and_decision_join():
+    db = _mkdb()
+    with tracing.span("router.cycle", correlation_id="corr123") as root:
+        assert tracing.current() is root and tracing.current_trace_id() == "corr123"
+        with tracing.span("router.score", correlation_id="ignored") as child:
+            assert child.trace_id == "corr123" and child.parent is root
+        sig = tracing.start_span("router.signal", token="PEPE")
+        with tracing.span("fast.evaluate") as fe:
+            fe.set(decision_id="dec_1", result="EXECUTE")
+        sig.end()
+        assert tracing.current() is root
+    assert tracing.current() is tracing.NOOP
+
+    # Cold path in "another process": own trace, joined by decision_id
+    with tracing.span("async.process_task", task_id="t1") as task:
+        task.set(decision_id="dec_1")
+        with tracing.span("async.judge"):
+            pass
+    assert tracing.flush() == 6
+
+    by_trace = tracing.get_trace("corr123")
+    assert [(s["name"], s["depth"]) for s in by_trace] == [
+        ("router.cycle", 0), ("router.score", 1), ("router.signal", 1), ("fast.evaluate", 2)]
+    assert by_trace[2]["attrs"] == {"token": "PEPE"} and by_trace[3]["decision_id"] == "dec_1"
+
+    joined = {s["name"] for s in tracing.get_trace("dec_1")}
+    assert joined == {"router.cycle", "router.score", "router.signal", "fast.evaluate",
+                      "async.process_task", "async.judge"}
+
+
+def test_errors_and_unended_children():
+    db = _mkdb()
+    try:
+        with tracing.span("pipeline.run", correlation_id="tr_err"):
+            with tracing.span("pipeline.stage_2_sanad"):
+                raise ValueError("sanad timeout")
+    except ValueError:
+        pass
+    assert tracing.current() is tracing.NOOP
+
+    # Router `continue` pattern: a child left open does not wedge the context
+    root = tracing.start_span("router.cycle", correlation_id="tr_loop")
+    for i in range(3):
+        sig = tracing.start_span("router.signal", i=i)
+        tracing.start_span("router.enrich.market_data")  # never ended
+        sig.end()
+    with tracing.span("async.process_task") as task:
+        task.mark_error("ERR_JUDGE_PARSE: bad json")
+    root.end()
+    tracing.flush()
+
+    spans = {s["name"]: s for s in tracing.get_trace("tr_err")}
+    assert spans["pipeline.stage_2_sanad"]["status"] == "error"
+    assert spans["pipeline.stage_2_sanad"]["attrs"]["error"] == "ValueError: sanad timeout"
+    assert spans["pipeline.run"]["status"] == "error"
+
+    loop = tracing.get_trace("tr_loop")
+    assert [s["name"] for s in loop] == ["router.cycle"] + ["router.signal"] * 3 + ["async.process_task"]
+    assert all(s["depth"] == 1 for s in loop[1:]) and loop[-1]["status"] == "error"
+
+
+def test_fast_engine_stage_spans():
+    db = _mkdb()
+    orig = state_store.DB_PATH
+    state_store.DB_PATH = db
+    try:
+        import fast_decision_engine
+        signal = {"token": "NOPE", "token_address": "addr_nope", "chain": "solana",
+                  "source": "dexscreener", "correlation_id": "tr_fast"}
+        record = fast_decision_engine.evaluate_signal_fast(signal, {"current_balance_usd": 10000},
+                                                           {"min_score": 40})
+    finally:
+        state_store.DB_PATH = orig
+    tracing.flush()
+
+    spans = tracing.get_trace(record["decision_id"])
+    assert spans[0]["name"] == "fast.evaluate" and spans[0]["trace_id"] == "tr_fast"
+    assert spans[0]["attrs"]["result"] == record["result"]
+    assert spans[1]["name"] == "fast.stage_1_safety" and spans[1]["depth"] == 1
+    assert sum(s["duration_ms"] for s in spans[1:]) <= spans[0]["duration_ms"]
+
+
+def test_stats_slowest_and_cli():
+    db = _mkdb()
+    rows = [(f"s{i}", f"c{i}", None, "router.cycle", time.time(), float(i), "ok", None, None)
+            for i in range(1, 101)]  # deterministic durations 1..100 ms
+    state_store.insert_trace_spans(rows, db_path=db)
+
+    st = tracing.stage_stats(60)["router.cycle"]
+    assert (st["count"], st["p50"], st["p90"], st["p99"], st["max"]) == (100, 50.0, 90.0, 99.0, 100.0)
+    assert tracing.percentile([], 99) == 0.0
+    assert [s["trace_id"] for s in tracing.slowest(3)] == ["c100", "c99", "c98"]
+
+    old = time.time() - (tracing.RETENTION_HOURS + 1) * 3600
+    state_store.insert_trace_spans([("old", "c_old", None, "router.cycle", old, 1.0, "ok", None, None)],
+                                   db_path=db)
+    assert state_store.prune_trace_spans(time.time() - tracing.RETENTION_HOURS * 3600, db_path=db) == 1
+
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        tracing.main(["stats"])
+        tracing.main(["trace", "c42"])
+    text = out.getvalue()
+    assert "router.cycle" in text and "trace c42" in text, text
+
+
+def test_overhead_and_disabled():
+    db = _mkdb()
+    n = 20_000
+    t0 = time.perf_counter()
+    with tracing.span("router.cycle"):
+        for _ in range(n):
+            with tracing.span("fast.stage_2_scoring"):
+                pass
+    per_span = (time.perf_counter() - t0) / n
+    with state_store.get_connection(db) as conn:
+        written = conn.execute("SELECT COUNT(*) FROM trace_spans").fetchone()[0]
+    print(f"  span overhead: {per_span * 1e6:.1f} µs/span ({written} rows flushed at root end)")
+    assert per_span < 50e-6, per_span
+    assert written == tracing.RING_SIZE  # bounded buffer: oldest spans dropped, root kept
+
+    tracing.ENABLED = False
+    try:
+        with tracing.span("router.cycle") as sp:
+            sp.set(decision_id="x").mark_error("nope")
+        assert sp is tracing.NOOP and tracing.current_trace_id() is None
+        assert tracing.flush() == 0
+    finally:
+        tracing.ENABLED = True
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_nesting_propagation_and_decision_join,
+        test_errors_and_unended_children,
+        test_fast_engine_stage_spans,
+        test_stats_slowest_and_cli,
+        test_overhead_and_disabled,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: tracing.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Local vector index tests (vector_index.py + vector_db local backend).
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_vector_index.py
+"""
+import os, sys, json, tempfile, time
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+os.environ["SANAD_VECTOR_BACKEND"] = "local"
+import vector_index
+import vector_db
+import regime_classifier
+
+
+def _tmp():
+    return Path(tempfile.mkdtemp(prefix="sanad_vec_"))
+
+
+def _trade(i, regime, strategy, token="BONK", result="WIN"):
+    return {
+        "id": f"t{i}",
+        "document": f"Token: {token} | Strategy: {strategy} | Result: {result} | Regime: {regime} | Source: whale",
+        "metadata": {"token": token, "strategy": strategy, "regime": regime, "result": result, "type": "trade"},
+    }
+
+
+def _upsert(index, docs):
+    index.upsert(ids=[d["id"] for d in docs], documents=[d["document"] for d in docs],
+                 metadatas=[d["metadata"] for d in docs])
+
+
+# ========== TESTS ==========
+
+def test_embedding_deterministic_and_semantic():
+    a = vector_index.embed_text("meme coin pump high volume whale")
+    b = vector_index.embed_text("meme coin pump high volume whale")
+    assert np.array_equal(a, b)
+    assert abs(float(np.linalg.norm(a)) - 1.0) < 1e-5
+    near = float(a @ vector_index.embed_text("meme coins pumping on whale volume"))
+    far = float(a @ vector_index.embed_text("federal reserve balance sheet liquidity"))
+    assert near > far, (near, far)
+    assert not vector_index.embed_text("").any()
+
+
+def test_bitmap_filter_and_supersede():
+    index = vector_index.LocalVectorIndex(_tmp())
+    _upsert(index, [_trade(0, "BULL", "meme-momentum"), _trade(1, "BEAR", "meme-momentum"),
+                    _trade(2, "BEAR", "whale-following")])
+    hits = index.search("meme momentum", n_results=5, where={"regime": "BEAR"})
+    assert {h["id"] for h in hits} == {"t1", "t2"}, hits
+    hits = index.search("x", n_results=5, where={"regime": "BEAR", "strategy": "whale-following"})
+    assert [h["id"] for h in hits] == ["t2"]
+    assert index.search("x", where={"regime": "SIDEWAYS"}) == []
+    # Non-bitmap field falls back to a metadata scan
+    assert [h["id"] for h in index.search("x", where={"token": "BONK", "regime": "BULL"})] == ["t0"]
+
+    # Upsert same id → old row retired, no rebuild
+    _upsert(index, [_trade(1, "BULL", "meme-momentum")])
+    assert index.count() == 3
+    assert {h["id"] for h in index.search("x", n_results=5, where={"regime": "BEAR"})} == {"t2"}
+
+
+def test_appends_visible_across_instances():
+    path = _tmp()
+    writer = vector_index.LocalVectorIndex(path)
+    reader = vector_index.LocalVectorIndex(path)
+    _upsert(writer, [_trade(0, "BULL", "meme-momentum")])
+    assert reader.count() == 1  # tail read, not reload
+    _upsert(writer, [_trade(1, "BULL", "meme-momentum")])
+    assert {h["id"] for h in reader.search("bonk", n_results=5)} == {"t0", "t1"}
+
+    # Orphan vector row from a crash between the two appends is dropped
+    with open(writer.vectors_path, "ab") as f:
+        f.write(np.ones(vector_index.DIM, dtype=np.float32).tobytes())
+    _upsert(writer, [_trade(2, "BEAR", "meme-momentum")])
+    fresh = vector_index.LocalVectorIndex(path)
+    assert os.path.getsize(fresh.vectors_path) == 3 * vector_index.DIM * 4
+    top = fresh.search(_trade(2, "BEAR", "meme-momentum")["document"], n_results=1)
+    assert top[0]["id"] == "t2" and top[0]["distance"] < 1e-4, top
+
+
+def test_weighted_matches_two_query_reference():
+    index = vector_index.LocalVectorIndex(_tmp())
+    docs = [_trade(i, "BULL" if i % 4 == 0 else "BEAR", s, token=t)
+            for i, (s, t) in enumerate([(s, t) for s in ("meme-momentum", "whale-following")
+                                        for t in ("BONK", "WIF", "PEPE", "DOGE", "FLOKI")])]
+    _upsert(index, docs)
+    query = "BONK meme-momentum whale"
+
+    for regime, n in (("BULL", 4), ("BULL", 8), ("BEAR", 4)):
+        same = index.search(query, n_results=n, where={"regime": regime})
+        if len(same) >= n // 2:
+            expected = [h["id"] for h in same]
+        else:
+            allr = index.search(query, n_results=len(docs))
+            for h in allr:
+                if h["metadata"]["regime"] != regime:
+                    h["distance"] *= 1.3
+            allr.sort(key=lambda h: h["distance"])
+            expected = [h["id"] for h in allr[:n]]
+        got = index.query_weighted(query, "regime", regime, n_results=n)
+        assert [h["id"] for h in got] == expected, (regime, n, got, expected)
+        assert all(h["field_match"] == (h["metadata"]["regime"] == regime) for h in got)
+
+
+def test_vector_db_local_backend():
+    td = _tmp()
+    vector_db.INDEX_PATH = td / "vector_index"
+    regime_classifier.REGIME_LATEST = td / "latest.json"
+    regime_classifier._snapshot_mtime = None
+    vector_db.TRADE_HISTORY = td / "trade_history.json"
+    vector_db._collection = None
+    (td / "latest.json").write_text(json.dumps({"regime_tag": "BULL"}))
+    (td / "trade_history.json").write_text(json.dumps([
+        {"trade_id": "a", "token": "BONK", "strategy": "meme-momentum", "pnl_pct": 12, "regime": "BULL"},
+        {"trade_id": "b", "token": "WIF", "strategy": "meme-momentum", "pnl_pct": -5, "regime": "BEAR"},
+    ]))
+
+    # Expert knowledge seeded on first open → RAG works without running setup
+    ctx = vector_db.get_rag_context("BONK", "TIER_3", "meme-momentum", "BULL", n_results=2)
+    assert "EXPERT KNOWLEDGE" in ctx and "Murad" in ctx, ctx
+
+    assert vector_db.index_all_trades() == 2
+    assert vector_db.index_trade({"token": "PEPE", "strategy": "meme-momentum", "pnl_pct": 3,
+                                  "regime": "BULL"}, trade_id="c")
+    hits = vector_db.query_regime_weighted("BONK meme-momentum", n_results=2)
+    assert len(hits) == 2 and all(h["regime_match"] for h in hits), hits
+    assert {h["id"] for h in hits} == {"a", "c"}
+
+
+def test_query_latency_100k():
+    index = vector_index.LocalVectorIndex(_tmp())
+    rng = np.random.default_rng(1)
+    n = 100_000
+    vecs = rng.standard_normal((n, vector_index.DIM)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    regimes = ["BULL", "BEAR", "SIDEWAYS", "HIGH_VOL", "LOW_VOL"]
+    index.upsert(ids=[f"d{i}" for i in range(n)], documents=[""] * n,
+                 metadatas=[{"regime": regimes[i % 5], "strategy": f"s{i % 7}"} for i in range(n)],
+                 embeddings=vecs)
+
+    def timed(fn, reps=20):
+        fn()
+        t0 = time.perf_counter()
+        for _ in range(reps):
+            fn()
+        return (time.perf_counter() - t0) / reps * 1000
+
+    full = timed(lambda: index.search("meme pump", n_results=10))
+    filtered = timed(lambda: index.search("meme pump", n_results=10, where={"regime": "BEAR", "strategy": "s3"}))
+    weighted = timed(lambda: index.query_weighted("meme pump", "regime", "BEAR", n_results=10))
+    print(f"  100k docs: full={full:.2f}ms filtered={filtered:.2f}ms weighted={weighted:.2f}ms")
+    assert full < 100 and filtered < 100 and weighted < 150, (full, filtered, weighted)
+    assert filtered < full
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_embedding_deterministic_and_semantic,
+        test_bitmap_filter_and_supersede,
+        test_appends_visible_across_instances,
+        test_weighted_matches_two_query_reference,
+        test_vector_db_local_backend,
+        test_query_latency_100k,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: vector_index.py")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Whale tracker incremental polling tests.
+Run: cd /data/.openclaw/workspace/trading
+     python3 scripts/test_whale_tracker_incremental.py
+
+Helius is replaced by an in-process fake — no network, no production state.
+"""
+import os, sys, json, tempfile, threading
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / "scripts"))
+os.environ.setdefault("BIRDEYE_API_KEY", "test")  # birdeye_client refuses to import without one
+import whale_tracker
+
+
+MINT = "MINTaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa"
+
+
+def _swap(sig, wallet, mint, minutes_ago=5, sol=2.0):
+    ts = (datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)).timestamp()
+    return {
+        "signature": sig,
+        "timestamp": ts,
+        "type": "SWAP",
+        "tokenTransfers": [{"fromUserAccount": "pool", "toUserAccount": wallet,
+                            "mint": mint, "tokenAmount": 1000}],
+        "nativeTransfers": [{"fromUserAccount": wallet, "toUserAccount": "pool",
+                             "amount": int(sol * 1e9)}],
+    }
+
+
+class FakeHelius:
+    """Per-wallet newest-first tx history honouring the `until` and `before` cursors."""
+
+    def __init__(self):
+        self.history = {}
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def push(self, wallet, tx):
+        self.history.setdefault(wallet, []).insert(0, tx)
+
+    def get_recent_transactions(self, address, limit=20, until=None, max_enhanced=10, before=None):
+        with self._lock:
+            self.calls.append((address, until))
+        out, started = [], before is None
+        for tx in self.history.get(address, []):
+            if tx["signature"] == until:
+                break
+            if started:
+                out.append(tx)
+            started = started or tx["signature"] == before
+        return out[:min(limit, max_enhanced)]
+
+
+def _setup(n_wallets=3):
+    td = Path(tempfile.mkdtemp(prefix="sanad_whale_"))
+    wallets = [{"address": f"W{i}" + "x" * 40, "label": f"whale{i}", "grade": "S", "active": True}
+               for i in range(n_wallets)]
+    config = {"wallets": wallets, "min_accumulation_wallets": 3, "min_weighted_score": 5.0,
+              "poll_concurrency": 4}
+    (td / "config.json").write_text(json.dumps(config))
+
+    whale_tracker.CONFIG_FILE = td / "config.json"
+    whale_tracker.STATE_FILE = td / "whale_activity.json"
+    whale_tracker.SIGNAL_DIR = td / "signals"
+    whale_tracker.ALERT_FILE = td / "alerts.json"
+    whale_tracker.CRON_HEALTH = td / "cron_health.json"
+    whale_tracker.LOG_FILE = td / "whale_tracker.log"
+    whale_tracker.get_token_metadata = lambda mint: {"symbol": "TESTW"}
+    whale_tracker._enrich_token_data = lambda mint: {"volume_24h": 0, "price_change_24h_pct": 0, "liquidity_usd": 0}
+
+    fake = FakeHelius()
+    whale_tracker.get_recent_transactions = fake.get_recent_transactions
+    return td, wallets, fake
+
+
+def _signals(td):
+    out = []
+    for f in sorted((td / "signals").glob("*.json")) if (td / "signals").exists() else []:
+        out.extend(json.loads(f.read_text())["signals"])
+    return out
+
+
+# ========== TESTS ==========
+
+def test_cursor_advances_and_fetches_only_new():
+    td, wallets, fake = _setup(n_wallets=2)
+    w = wallets[0]["address"]
+    fake.push(w, _swap("sig1", w, MINT))
+    fake.push(w, _swap("sig2", w, MINT))
+
+    whale_tracker.run_tracker()
+    state = json.loads(whale_tracker.STATE_FILE.read_text())
+    assert state[w]["last_signature"] == "sig2", state[w].get("last_signature")
+    assert len(state[w]["transactions"]) == 2
+
+    fake.calls.clear()
+    fake.push(w, _swap("sig3", w, MINT))
+    whale_tracker.run_tracker()
+    state = json.loads(whale_tracker.STATE_FILE.read_text())
+    assert (w, "sig2") in fake.calls, fake.calls
+    assert state[w]["last_signature"] == "sig3"
+    # sig1/sig2 not re-appended
+    sigs = [tx["signature"] for tx in state[w]["transactions"]]
+    assert sorted(sigs) == ["sig1", "sig2", "sig3"], sigs
+
+
+def test_backlog_paged_back_to_cursor():
+    td, wallets, fake = _setup(n_wallets=1)
+    w = wallets[0]["address"]
+    config = json.loads(whale_tracker.CONFIG_FILE.read_text())
+    config["max_new_tx_per_poll"] = 3
+    whale_tracker.CONFIG_FILE.write_text(json.dumps(config))
+    fake.push(w, _swap("sig0", w, MINT))
+    whale_tracker.run_tracker()
+
+    for i in range(1, 8):
+        fake.push(w, _swap(f"sig{i}", w, MINT))
+    fake.calls.clear()
+    whale_tracker.run_tracker()
+    state = json.loads(whale_tracker.STATE_FILE.read_text())
+    assert len(fake.calls) == 3  # pages of 3, 3, 1
+    assert len(state[w]["transactions"]) == 8 and state[w]["last_signature"] == "sig7"
+    assert "gaps_skipped" not in state[w]
+
+    # More than MAX_POLL_PAGES pages behind: newest pages kept, the gap is counted
+    orig = whale_tracker.MAX_POLL_PAGES
+    whale_tracker.MAX_POLL_PAGES = 2
+    try:
+        for i in range(8, 15):
+            fake.push(w, _swap(f"sig{i}", w, MINT))
+        whale_tracker.run_tracker()
+    finally:
+        whale_tracker.MAX_POLL_PAGES = orig
+    state = json.loads(whale_tracker.STATE_FILE.read_text())
+    assert len(state[w]["transactions"]) == 14 and state[w]["last_signature"] == "sig14"
+    assert state[w]["gaps_skipped"] == 1
+
+
+def test_accumulation_detected_via_index():
+    td, wallets, fake = _setup(n_wallets=3)
+    for i, w in enumerate(wallets):
+        fake.push(w["address"], _swap(f"s{i}", w["address"], MINT))
+
+    whale_tracker.run_tracker()
+    sigs = _signals(td)
+    assert len(sigs) == 1, sigs
+    assert sigs[0]["token_address"] == MINT
+    assert sigs[0]["metadata"]["total_whales"] == 3
+
+
+def test_index_matches_full_rescan():
+    now = datetime.now(timezone.utc)
+    state = {
+        f"W{i}": {"name": f"w{i}", "grade": "A", "transactions": [
+            {"action": "BUY", "mint": MINT, "sol_amount": 1.0,
+             "timestamp": (now - timedelta(minutes=i)).isoformat()},
+            {"action": "SELL", "mint": "OTHER", "sol_amount": 0,
+             "timestamp": (now - timedelta(hours=10)).isoformat()},
+        ]} for i in range(4)
+    }
+    index = whale_tracker.MintActivityIndex.from_state(state)
+    buys = index.recent("BUY", now - timedelta(hours=6))
+    sells = index.recent("SELL", now - timedelta(hours=6))
+    assert set(buys) == {MINT}
+    assert len(buys[MINT]) == 4
+    assert sells == {}
+    assert len(index.recent("BUY", now - timedelta(seconds=90))[MINT]) == 2
+
+
+def test_old_cold_start_transactions_dropped():
+    td, wallets, fake = _setup(n_wallets=1)
+    w = wallets[0]["address"]
+    fake.push(w, _swap("old", w, MINT, minutes_ago=60 * 8))
+    whale_tracker.run_tracker()
+    state = json.loads(whale_tracker.STATE_FILE.read_text())
+    assert state[w]["transactions"] == []
+    assert state[w]["last_signature"] == "old"
+
+
+# ========== HARNESS ==========
+
+def main():
+    tests = [
+        test_cursor_advances_and_fetches_only_new,
+        test_backlog_paged_back_to_cursor,
+        test_accumulation_detected_via_index,
+        test_index_matches_full_rescan,
+        test_old_cold_start_transactions_dropped,
+    ]
+    ok = fails = 0
+    print("=" * 60)
+    print("TESTS: whale_tracker incremental polling")
+    print("=" * 60)
+    for t in tests:
+        try:
+            t()
+            print(f"✓ {t.__name__}")
+            ok += 1
+        except AssertionError as e:
+            print(f"✗ {t.__name__}: {e}")
+            fails += 1
+        except Exception as e:
+            print(f"✗ {t.__name__}: ERROR {e}")
+            import traceback
+            traceback.print_exc()
+            fails += 1
+    print("=" * 60)
+    print(f"RESULTS: {ok} passed, {fails} failed")
+    if fails:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -28,16 +28,25 @@ Used by:
 - sanad_pipeline.py: strategy selection stage
 - Can also rank strategies for a given signal
 
-State stored in: state/thompson_state.json
+Beta parameters come from bandit_stats (SQLite bandit_strategy_stats, per
+regime, kept in memory and reloaded only when learning_loop bumps the
+version). Strategies with no closed trades in the current regime fall back
+to the alpha/beta in thompson_state.json. All strategies are sampled in one
+NumPy call.
+
+State stored in: state/thompson_state.json (mode, status, selection times;
+cached in memory until the file changes)
 """
 
+import copy
 import json
 import os
 import sys
-import random
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
 
+import numpy as np
+
 # ─────────────────────────────────────────────────────────
 # Paths
 # ─────────────────────────────────────────────────────────
@@ -48,6 +57,10 @@ STRATEGIES_DIR = BASE_DIR / "strategies"
 THOMPSON_STATE = STATE_DIR / "thompson_state.json"
 CONFIG_DIR = BASE_DIR / "config"
 
+sys.path.insert(0, str(SCRIPT_DIR))
+import bandit_stats
+import regime_classifier
+
 # ─────────────────────────────────────────────────────────
 # Config
 # ─────────────────────────────────────────────────────────
@@ -150,11 +163,37 @@ THOMPSON_STRATEGIES = {
 # Backward-compat alias (canonical name is THOMPSON_STRATEGIES)
 STRATEGY_REGISTRY = THOMPSON_STRATEGIES
 
+_state_cache = {"key": None, "state": None}
+_EMPTY_STATS = bandit_stats.BanditStats()
+
+
+def _state_file_key():
+    try:
+        st = THOMPSON_STATE.stat()
+    except OSError:
+        return None
+    return (str(THOMPSON_STATE), st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _save_state(state: dict):
+    _save_json_atomic(THOMPSON_STATE, state)
+    _state_cache["key"] = _state_file_key()
+    _state_cache["state"] = copy.deepcopy(state)
+
 
 def _load_state() -> dict:
-    """Load Thompson Sampling state."""
+    """Load Thompson Sampling state (re-read only when the file changed).
+
+    Returns a private copy: callers mutate it before _save_state(), and an
+    update that never gets saved must not leak into the cache.
+    """
+    key = _state_file_key()
+    if key is not None and key == _state_cache["key"]:
+        return copy.deepcopy(_state_cache["state"])
     state = _load_json(THOMPSON_STATE, None)
     if state:
+        _state_cache["key"] = key
+        _state_cache["state"] = copy.deepcopy(state)
         return state
 
     # Initialize fresh state
@@ -181,10 +220,26 @@ def _load_state() -> dict:
             "status": "PAPER",
         }
 
-    _save_json_atomic(THOMPSON_STATE, state)
+    _save_state(state)
     return state
 
 
+def _bandit_service() -> bandit_stats.BanditStats:
+    """Shared DB-backed stats; empty (JSON priors only) if the DB is unavailable."""
+    try:
+        return bandit_stats.get_service()
+    except Exception as e:
+        _log(f"WARNING: bandit stats unavailable ({e}) — using thompson_state.json only")
+        return _EMPTY_STATS
+
+
+def _json_priors(state: dict) -> dict:
+    return {
+        name: (s.get("alpha", 1), s.get("beta", 1))
+        for name, s in state["strategies"].items()
+    }
+
+
 def _check_mode_transition(state: dict) -> str:
     """Check if we should switch from thompson to exploitation."""
     if state["mode"] == "exploitation":
@@ -215,7 +270,7 @@ def _check_mode_transition(state: dict) -> str:
 # ─────────────────────────────────────────────────────────
 def select_strategy(
     signal: dict = None,
-    current_regime: str = "UNKNOWN",
+    current_regime: str = None,
     seed: int = None,
     eligible_strategies: list = None,  # v3.0: tier-filtered strategies
 ) -> dict:
@@ -223,7 +278,8 @@ def select_strategy(
 
     Args:
         signal: Signal dict (optional, used for type matching)
-        current_regime: Current market regime tag (e.g. "BEAR_HIGH_VOL")
+        current_regime: Current market regime tag (e.g. "BEAR_HIGH_VOL");
+            None → the precomputed regime of the signal's cluster
         seed: Random seed for reproducibility in testing
 
     Returns:
@@ -235,8 +291,9 @@ def select_strategy(
             "excluded": {"strategy-name": "reason", ...},
         }
     """
-    if seed is not None:
-        random.seed(seed)
+    rng = np.random.default_rng(seed) if seed is not None else None
+    if current_regime is None:
+        current_regime = regime_classifier.get_regime_tag(signal)
 
     state = _load_state()
     mode = _check_mode_transition(state)
@@ -250,7 +307,7 @@ def select_strategy(
         except (ValueError, TypeError):
             pass
 
-    eligible = {}
+    candidates = {}
     excluded = {}
 
     # v3.0: Filter by tier-eligible strategies first
@@ -280,16 +337,20 @@ def select_strategy(
             excluded[name] = f"regime_avoided ({current_regime})"
             continue
 
-        # Strategy is eligible — calculate score
-        alpha = strat_state.get("alpha", 1)
-        beta_param = strat_state.get("beta", 1)
+        candidates[name] = registry
 
-        if mode == "thompson":
-            # Sample from Beta distribution
-            sample = random.betavariate(alpha, beta_param)
-        else:
-            # Exploitation: use expected value (mean of Beta)
-            sample = alpha / (alpha + beta_param)
+    # Strategies are eligible — one vectorized draw (or posterior mean) for all of them
+    stats = _bandit_service()
+    if mode == "thompson":
+        samples = stats.sample_all(current_regime, strategies=list(candidates),
+                                   prior=_json_priors(state), rng=rng)
+    else:
+        samples = stats.expected_all(current_regime, strategies=list(candidates),
+                                     prior=_json_priors(state))
+
+    eligible = {}
+    for name, registry in candidates.items():
+        sample = samples[name]
 
         # Regime affinity bonus/penalty (v3.0: added cautious handling)
         if current_regime in registry.get("preferred_regimes", []):
@@ -324,7 +385,7 @@ def select_strategy(
     state["strategies"].setdefault(selected, {"alpha": 1, "beta": 1})
     state["strategies"][selected]["last_selected_at"] = _now_iso()
     state["updated_at"] = _now_iso()
-    _save_json_atomic(THOMPSON_STATE, state)
+    _save_state(state)
 
     _log(f"Selected: {selected} (score={eligible[selected]:.4f}, mode={mode})")
     for name, score in sorted(eligible.items(), key=lambda x: x[1], reverse=True):
@@ -343,20 +404,26 @@ def select_strategy(
 
 
 def rank_strategies(
-    current_regime: str = "UNKNOWN",
+    current_regime: str = None,
     signal: dict = None,
 ) -> list[dict]:
     """Rank all strategies by expected value (no randomness).
     Useful for displaying in console/reports.
     """
+    if current_regime is None:
+        current_regime = regime_classifier.get_regime_tag(signal)
     state = _load_state()
+    stats = _bandit_service()
+    priors = _json_priors(state)
+    expected_values = stats.expected_all(current_regime, strategies=list(THOMPSON_STRATEGIES), prior=priors)
     rankings = []
 
     for name, registry in THOMPSON_STRATEGIES.items():
         strat_state = state["strategies"].get(name, {"alpha": 1, "beta": 1})
-        alpha = strat_state.get("alpha", 1)
-        beta_param = strat_state.get("beta", 1)
-        expected = alpha / (alpha + beta_param)
+        db_stats = stats.get(name, current_regime)
+        alpha, beta_param = ((db_stats["alpha"], db_stats["beta"]) if db_stats
+                             else priors.get(name, (1, 1)))
+        expected = expected_values[name]
         trades = strat_state.get("trades", 0)
         wins = strat_state.get("wins", 0)
         win_rate = wins / trades if trades > 0 else 0
@@ -425,7 +492,7 @@ def record_outcome(strategy_name: str, is_win: bool, pnl_pct: float = 0.0):
         state["first_trade_at"] = _now_iso()
 
     state["updated_at"] = _now_iso()
-    _save_json_atomic(THOMPSON_STATE, state)
+    _save_state(state)
 
     expected = strat["alpha"] / (strat["alpha"] + strat["beta"])
     _log(
@@ -441,12 +508,7 @@ def record_outcome(strategy_name: str, is_win: bool, pnl_pct: float = 0.0):
 # CLI
 # ─────────────────────────────────────────────────────────
 if __name__ == "__main__":
-    # Try to get current regime
-    try:
-        from regime_classifier import get_regime_tag
-        regime = get_regime_tag()
-    except ImportError:
-        regime = "UNKNOWN"
+    regime = regime_classifier.get_regime_tag()
 
     if len(sys.argv) > 1 and sys.argv[1] == "select":
         _log(f"=== STRATEGY SELECTION (regime={regime}) ===")
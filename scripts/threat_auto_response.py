@@ -183,21 +183,34 @@ class RateLimitResponder:
     - EXHAUSTED: Pause feed, notify, use cached data
     """
 
+    # "breaker": breaker_registry component; clients outside the registry keep a state file
     APIS = [
-        {"name": "binance", "circuit_file": "binance_circuit.json", "fallback": "mexc"},
-        {"name": "mexc", "circuit_file": "mexc_circuit.json", "fallback": None},
+        {"name": "binance", "breaker": "binance_api", "fallback": "mexc"},
+        {"name": "mexc", "breaker": "mexc_api", "fallback": None},
         {"name": "coingecko", "circuit_file": "coingecko_circuit.json", "fallback": "dexscreener"},
-        {"name": "birdeye", "circuit_file": "birdeye_circuit.json", "fallback": "dexscreener"},
-        {"name": "helius", "circuit_file": "helius_circuit.json", "fallback": None},
+        {"name": "birdeye", "breaker": "birdeye_api", "fallback": "dexscreener"},
+        {"name": "dexscreener", "breaker": "dexscreener_api", "fallback": None},
+        {"name": "helius", "breaker": "helius_rpc", "fallback": None},
+        {"name": "rugcheck", "breaker": "rugcheck_api", "fallback": None},
         {"name": "perplexity", "circuit_file": "perplexity_circuit.json", "fallback": "openrouter"},
     ]
 
+    @staticmethod
+    def _circuit_state(api: dict) -> dict:
+        if "breaker" not in api:
+            return _load_json(STATE_DIR / api["circuit_file"])
+        import breaker_registry
+        snap = breaker_registry.read(api["breaker"])
+        if not snap:
+            return {}
+        return {**snap, "state": snap["state"].upper(), "error_count": snap["failure_count"]}
+
     def check_all(self) -> dict:
         results = {"apis": {}, "actions": [], "overall": "HEALTHY"}
 
         for api in self.APIS:
             name = api["name"]
-            state = _load_json(STATE_DIR / api["circuit_file"])
+            state = self._circuit_state(api)
 
             if not state:
                 results["apis"][name] = {"status": "NO_STATE", "circuit": "UNKNOWN"}
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Sanad Trader v3.1 — Hot-Path Tracing
+
+Lightweight per-stage spans for the decision path:
+
+  router.cycle
+    router.load_signals → router.score → router.signal
+      router.enrich.market_data / router.enrich.solscan
+      fast.evaluate
+        fast.stage_1_safety … fast.stage_5_execute
+  pipeline.run → pipeline.stage_* (sanad_pipeline CLI path)
+  async.process_task → async.sanad / async.debate / async.judge
+
+Context propagation:
+  - Nested spans pick up the current span (contextvars) as parent and share
+    its trace_id.
+  - A root span takes trace_id from an explicit correlation_id (the router
+    stamps pipeline_signal["correlation_id"] with its trace id), else a new id.
+  - decision_id is recorded on the span that knows it; the async cold path
+    runs in another process and is joined to the hot-path trace by that
+    decision_id (state_store.get_trace_spans).
+
+Overhead: a span is a __slots__ object + two perf_counter calls. Finished
+spans go into a bounded ring buffer (RING_SIZE) and are written to
+state_store trace_spans in one executemany when a root span ends and
+FLUSH_INTERVAL_S has passed (or FLUSH_EVERY spans are pending), and at exit —
+never mid-trace, so no stage pays for a DB write.
+Write errors are logged and dropped — tracing never fails the caller.
+SANAD_TRACE=0 disables recording (spans become no-ops).
+
+Usage:
+  with tracing.span("router.enrich.solscan", token=tok):
+      ...
+  sp = tracing.start_span("router.signal"); ...; sp.end()
+
+CLI:
+  python3 scripts/tracing.py stats [--minutes 60] [--name fast.evaluate]
+  python3 scripts/tracing.py slowest [-n 10] [--name router.signal]
+  python3 scripts/tracing.py trace <trace_id|decision_id>
+"""
+
+import argparse
+import atexit
+import contextvars
+import json
+import math
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SCRIPT_DIR))
+
+import state_store
+
+ENABLED = os.environ.get("SANAD_TRACE", "1") != "0"
+RING_SIZE = 4096
+FLUSH_EVERY = 256
+FLUSH_INTERVAL_S = 5.0
+RETENTION_HOURS = 72
+PRUNE_INTERVAL_S = 3600
+DB_PATH = None  # None → state_store.DB_PATH at flush time
+
+_current = contextvars.ContextVar("sanad_trace_span", default=None)
+_ring = deque(maxlen=RING_SIZE)
+_ring_lock = threading.Lock()
+_flush_lock = threading.Lock()
+_last_flush = time.monotonic()
+_last_prune = 0.0
+_flush_warned = False
+
+
+def _log(msg: str):
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    print(f"[{ts}] [TRACE] {msg}", flush=True)
+
+
+def new_id() -> str:
+    return os.urandom(6).hex()
+
+
+class Span:
+    """One timed stage. Use as a context manager or call end() explicitly."""
+
+    __slots__ = ("span_id", "trace_id", "parent", "name", "decision_id", "attrs",
+                 "status", "start_ts", "_t0", "duration_ms")
+
+    def __init__(self, name, trace_id, parent, decision_id=None, attrs=None):
+        self.span_id = new_id()
+        self.trace_id = trace_id
+        self.parent = parent
+        self.name = name
+        self.decision_id = decision_id
+        self.attrs = attrs or None
+        self.status = "ok"
+        self.start_ts = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms = None
+
+    def set(self, decision_id=None, **attrs):
+        """Attach attributes (and decision_id once known)."""
+        if decision_id:
+            self.decision_id = decision_id
+        if attrs:
+            if self.attrs is None:
+                self.attrs = {}
+            self.attrs.update(attrs)
+        return self
+
+    def mark_error(self, error):
+        """Flag the span as failed (for callers that handle the exception themselves)."""
+        self.status = "error"
+        return self.set(error=str(error)[:200])
+
+    def end(self, status=None):
+        """Finish the span (idempotent) and restore its parent as current."""
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = (time.perf_counter() - self._t0) * 1000
+        if status:
+            self.status = status
+        # Restore the parent if current is this span or a descendant left open
+        sp = _current.get()
+        while sp is not None and sp is not self:
+            sp = sp.parent
+        if sp is self:
+            _current.set(self.parent)
+        _record(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.mark_error(f"{exc_type.__name__}: {exc}")
+        self.end()
+        return False
+
+
+class _NoopSpan:
+    """Stand-in when tracing is disabled; same interface, records nothing."""
+
+    __slots__ = ()
+    span_id = trace_id = decision_id = None
+
+    def set(self, decision_id=None, **attrs):
+        return self
+
+    def mark_error(self, error):
+        return self
+
+    def end(self, status=None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP = _NoopSpan()
+
+
+def start_span(name: str, correlation_id: str = None, decision_id: str = None, **attrs):
+    """Start a span under the current one (or a new trace) and make it current.
+
+    correlation_id: trace id to use when this is a root span (ignored when
+    nested — children always share the parent's trace).
+    """
+    if not ENABLED:
+        return NOOP
+    parent = _current.get()
+    if parent is not None and parent.duration_ms is not None:
+        parent = None  # stale (ended out of order)
+    trace_id = parent.trace_id if parent is not None else (correlation_id or new_id())
+    sp = Span(name, trace_id, parent, decision_id, attrs)
+    _current.set(sp)
+    return sp
+
+
+span = start_span
+
+
+def current():
+    """The active span (NOOP if none)."""
+    return _current.get() or NOOP
+
+
+def current_trace_id() -> str | None:
+    sp = _current.get()
+    return sp.trace_id if sp is not None else None
+
+
+def _record(sp: Span):
+    parent = sp.parent
+    row = (sp.span_id, sp.trace_id, parent.span_id if parent is not None else None, sp.name,
+           sp.start_ts, round(sp.duration_ms, 3), sp.status, sp.decision_id,
+           json.dumps(sp.attrs, default=str) if sp.attrs else None)
+    with _ring_lock:
+        _ring.append(row)
+        pending = len(_ring)
+    # Only at a root boundary: never stall a stage mid-trace on a DB write
+    if parent is None and (pending >= FLUSH_EVERY or time.monotonic() - _last_flush >= FLUSH_INTERVAL_S):
+        flush()
+
+
+def flush(db_path=None) -> int:
+    """Write buffered spans to trace_spans. Returns rows written (0 on error)."""
+    global _last_flush, _last_prune, _flush_warned
+    with _flush_lock:
+        with _ring_lock:
+            rows = list(_ring)
+            _ring.clear()
+        _last_flush = time.monotonic()
+        if not rows:
+            return 0
+        db = db_path or DB_PATH or state_store.DB_PATH
+        if not Path(db).exists():
+            return 0  # never create a database just to hold spans
+        try:
+            state_store.insert_trace_spans(rows, db_path=db)
+            if _last_flush - _last_prune >= PRUNE_INTERVAL_S:
+                _last_prune = _last_flush
+                state_store.prune_trace_spans(time.time() - RETENTION_HOURS * 3600, db_path=db)
+        except Exception as e:
+            if not _flush_warned:
+                _flush_warned = True
+                _log(f"flush failed, dropping spans: {e}")
+            return 0
+        return len(rows)
+
+
+atexit.register(flush)
+
+
+# ─────────────────────────────────────────────────────────
+# Reporting
+# ─────────────────────────────────────────────────────────
+
+def percentile(sorted_values: list, p: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def stage_stats(since_minutes: float = 60, name: str = None, db_path=None) -> dict:
+    """{span_name: {"count", "p50", "p90", "p99", "max", "mean"}} in ms."""
+    since_ts = time.time() - since_minutes * 60
+    out = {}
+    durations = state_store.get_span_durations(since_ts, name=name, db_path=db_path or DB_PATH)
+    for span_name, values in durations.items():
+        out[span_name] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": values[-1],
+            "mean": round(sum(values) / len(values), 3),
+        }
+    return out
+
+
+def slowest(limit: int = 10, name: str = None, since_minutes: float = 24 * 60, db_path=None) -> list[dict]:
+    """Slowest root spans (or spans named `name`) in the window."""
+    since_ts = time.time() - since_minutes * 60
+    return state_store.get_slowest_spans(since_ts, name=name, limit=limit, db_path=db_path or DB_PATH)
+
+
+def get_trace(trace_or_decision_id: str, db_path=None) -> list[dict]:
+    """Spans of a trace as a depth-first list; each dict gains "depth" and "offset_ms"."""
+    spans = state_store.get_trace_spans(trace_or_decision_id, db_path=db_path or DB_PATH)
+    if not spans:
+        return []
+    by_id = {s["span_id"]: s for s in spans}
+    children = {}
+    for s in spans:
+        parent = s["parent_id"] if s["parent_id"] in by_id else None
+        children.setdefault(parent, []).append(s)
+    t0 = min(s["start_ts"] for s in spans)
+
+    out = []
+
+    def walk(parent, depth):
+        for s in children.get(parent, []):
+            s["depth"] = depth
+            s["offset_ms"] = round((s["start_ts"] - t0) * 1000, 3)
+            s["attrs"] = json.loads(s.pop("attrs_json") or "{}")
+            out.append(s)
+            walk(s["span_id"], depth + 1)
+
+    walk(None, 0)
+    return out
+
+
+def _print_stats(stats: dict):
+    if not stats:
+        print("No spans in window.")
+        return
+    print(f"{'span':<32} {'count':>7} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}  (ms)")
+    for span_name in sorted(stats):
+        st = stats[span_name]
+        print(f"{span_name:<32} {st['count']:>7} {st['p50']:>9.2f} {st['p90']:>9.2f} "
+              f"{st['p99']:>9.2f} {st['max']:>9.2f}")
+
+
+def _print_trace(spans: list):
+    if not spans:
+        print("Trace not found.")
+        return
+    print(f"trace {spans[0]['trace_id']}")
+    for s in spans:
+        extra = " ".join(f"{k}={v}" for k, v in s["attrs"].items())
+        dec = f" decision={s['decision_id']}" if s["decision_id"] else ""
+        flag = "" if s["status"] == "ok" else f" [{s['status'].upper()}]"
+        print(f"  +{s['offset_ms']:>9.1f}ms {'  ' * s['depth']}{s['name']:<28} "
+              f"{s['duration_ms']:>9.2f}ms{flag}{dec} {extra}".rstrip())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hot-path trace spans")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_stats = sub.add_parser("stats", help="per-stage latency percentiles")
+    p_stats.add_argument("--minutes", type=float, default=60)
+    p_stats.add_argument("--name")
+    p_slow = sub.add_parser("slowest", help="slowest traces")
+    p_slow.add_argument("-n", type=int, default=10)
+    p_slow.add_argument("--name")
+    p_slow.add_argument("--minutes", type=float, default=24 * 60)
+    p_trace = sub.add_parser("trace", help="span tree for a trace_id or decision_id")
+    p_trace.add_argument("id")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "stats":
+        _print_stats(stage_stats(args.minutes, name=args.name))
+    elif args.cmd == "slowest":
+        for s in slowest(args.n, name=args.name, since_minutes=args.minutes):
+            started = datetime.fromtimestamp(s["start_ts"], timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"{s['duration_ms']:>10.2f}ms  {started}  {s['name']:<24} trace={s['trace_id']}"
+                  + (f" decision={s['decision_id']}" if s["decision_id"] else ""))
+    elif args.cmd == "trace":
+        _print_trace(get_trace(args.id))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,23 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parents[1]
 POSITIONS_FILE = BASE_DIR / "state" / "positions.json"
 
-def score_tradeability(signal: dict) -> int:
+def _open_position_tokens() -> set:
+    """Tokens with an OPEN position (anti-crowding). Empty set if unreadable."""
+    tokens = set()
+    try:
+        with open(POSITIONS_FILE) as f:
+            positions_data = json.load(f)
+            positions = positions_data.get("positions", positions_data)
+            
+            for pos in positions:
+                if pos.get("status") == "OPEN":
+                    tokens.add(pos.get("token"))
+    except:
+        pass  # If can't read positions, assume not crowded
+    return tokens
+
+
+def score_tradeability(signal: dict, now: datetime = None, open_tokens: set = None) -> int:
     """
     Score signal tradeability across 6 components:
     1. Momentum (0-25)
@@ -25,6 +41,9 @@ def score_tradeability(signal: dict) -> int:
     6. Anti-Crowding (0-10)
     
     Total: 0-100, minimum 55 to trade.
+
+    now / open_tokens: optional overrides for batch callers (replay_columnar
+    vectorizes this function and must match it exactly).
     """
     score = 0
     components = {}
@@ -152,7 +171,7 @@ def score_tradeability(signal: dict) -> int:
         signal_ts = signal.get("timestamp", "")
         if signal_ts:
             signal_time = datetime.fromisoformat(signal_ts.replace("Z", "+00:00"))
-            age_minutes = (datetime.now(timezone.utc) - signal_time).total_seconds() / 60
+            age_minutes = ((now or datetime.now(timezone.utc)) - signal_time).total_seconds() / 60
             
             if age_minutes < 5:
                 timing_score = 15
@@ -196,17 +215,10 @@ def score_tradeability(signal: dict) -> int:
     token = signal.get("token", "")
     
     # Check if already in positions
-    try:
-        with open(POSITIONS_FILE) as f:
-            positions_data = json.load(f)
-            positions = positions_data.get("positions", positions_data)
-            
-            for pos in positions:
-                if pos.get("status") == "OPEN" and pos.get("token") == token:
-                    crowding_score = 0  # Already holding, max crowding penalty
-                    break
-    except:
-        pass  # If can't read positions, assume not crowded
+    if open_tokens is None:
+        open_tokens = _open_position_tokens()
+    if token in open_tokens:
+        crowding_score = 0  # Already holding, max crowding penalty
     
     # TODO: Check for multiple signals on same token from different sources in last hour
     # This would require reading signal history (signal_window.json or similar)
@@ -130,18 +130,39 @@ def _save_source(source_name: str, data: dict):
             pass
 
 
+# path → ((mtime_ns, size), data); files are re-parsed only when they change
+_sources_cache: dict[str, tuple] = {}
+
+
 def _load_all_sources() -> dict[str, dict]:
-    """Load all source accuracy files."""
+    """Load all source accuracy files (cached per file, keyed by mtime/size)."""
     sources = {}
+    seen = set()
     SOURCE_DIR.mkdir(parents=True, exist_ok=True)
-    for f in SOURCE_DIR.glob("*.json"):
-        try:
-            with open(f, "r") as fh:
-                data = json.load(fh)
-            name = data.get("source_name", f.stem)
-            sources[name] = data
-        except (json.JSONDecodeError, KeyError):
-            continue
+    with os.scandir(SOURCE_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            key = (st.st_mtime_ns, st.st_size)
+            cached = _sources_cache.get(entry.path)
+            if cached and cached[0] == key:
+                data = cached[1]
+            else:
+                try:
+                    with open(entry.path, "r") as fh:
+                        data = json.load(fh)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    continue
+                _sources_cache[entry.path] = (key, data)
+            seen.add(entry.path)
+            name = data.get("source_name", entry.name[:-5])
+            sources[name] = dict(data)  # callers update top-level fields
+    for path in set(_sources_cache) - seen:
+        del _sources_cache[path]
     return sources
 
 
@@ -2,7 +2,9 @@
 """
 Vector Database (RAG Architecture) — Sprint 5.8.1 through 5.8.5
 
-Uses ChromaDB for semantic search over trade history.
+Semantic search over trade history. Default backend is the in-process
+vector_index.LocalVectorIndex (NumPy, hashed n-gram embeddings, no model
+download); set SANAD_VECTOR_BACKEND=chroma for the original ChromaDB store.
 
 5.8.1 — ChromaDB install + setup
 5.8.2 — Trade log embeddings
@@ -11,7 +13,7 @@ Uses ChromaDB for semantic search over trade history.
 5.8.5 — DuckDB/Parquet for quantitative data (stub — activates with volume)
 
 Reads: genius-memory/wins/, losses/, state/trade_history.json
-Writes: state/chromadb/ (persistent storage)
+Writes: state/vector_index/ (local backend) or state/chromadb/ (chroma backend)
 
 Used by: Strategy Layer to find similar past setups.
 """
@@ -26,14 +28,16 @@ SCRIPT_DIR = Path(__file__).resolve().parent
 BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
 STATE_DIR = BASE_DIR / "state"
 CHROMA_PATH = STATE_DIR / "chromadb"
+INDEX_PATH = STATE_DIR / "vector_index"
 WINS_DIR = BASE_DIR / "genius-memory" / "wins"
 LOSSES_DIR = BASE_DIR / "genius-memory" / "losses"
 TRADE_HISTORY = BASE_DIR / "state" / "trade_history.json"
-REGIME_LATEST = BASE_DIR / "genius-memory" / "regime-data" / "latest.json"
 
 COLLECTION_NAME = "trade_logs"
+VECTOR_BACKEND = os.environ.get("SANAD_VECTOR_BACKEND", "local").lower()
 
 sys.path.insert(0, str(SCRIPT_DIR))
+import regime_classifier
 
 
 def _log(msg):
@@ -70,12 +74,15 @@ _collection = None
 
 
 def get_collection():
-    """Get or create the ChromaDB collection."""
+    """Get or create the collection (LocalVectorIndex, or ChromaDB if configured)."""
     global _client, _collection
 
     if _collection is not None:
         return _collection
 
+    if VECTOR_BACKEND != "chroma":
+        return _get_local_index()
+
     try:
         import chromadb
         from chromadb.config import Settings
@@ -103,6 +110,28 @@ def get_collection():
         return None
 
 
+def _get_local_index():
+    """Open the local index; seed expert knowledge so get_rag_context works cold."""
+    global _collection
+    try:
+        from vector_index import LocalVectorIndex
+        index = LocalVectorIndex(INDEX_PATH)
+    except Exception as e:
+        _log(f"Local vector index init failed: {e}")
+        return None
+
+    missing = [e for e in EXPERT_KNOWLEDGE if e["id"] not in index]
+    if missing:
+        index.upsert(
+            ids=[e["id"] for e in missing],
+            documents=[e["content"] for e in missing],
+            metadatas=[e["metadata"] for e in missing],
+        )
+    _collection = index
+    _log(f"Local vector index ready: {index.count()} documents")
+    return _collection
+
+
 # ─────────────────────────────────────────────────────────
 # 5.8.2 — Trade Log Embeddings
 # ─────────────────────────────────────────────────────────
@@ -297,14 +326,30 @@ def query_similar(query_text: str, n_results: int = 10, where: dict = None) -> l
 # 5.8.4 — Regime-Weighted Retrieval
 # ─────────────────────────────────────────────────────────
 
-def query_regime_weighted(query_text: str, n_results: int = 10) -> list:
+def query_regime_weighted(query_text: str, n_results: int = 10, signal: dict = None) -> list:
     """Query with regime weighting.
 
     1. First: search ONLY same-regime trades
     2. If insufficient: fall back to cross-regime with penalty
+
+    The regime is the precomputed one for the signal's cluster (BTC/1d without a signal).
     """
-    regime_data = _load_json(REGIME_LATEST, {})
-    current_regime = regime_data.get("combined_tag", "UNKNOWN")
+    current_regime = regime_classifier.get_regime_tag(signal)
+
+    collection = get_collection()
+    if current_regime != "UNKNOWN" and hasattr(collection, "query_weighted"):
+        # Local index: both steps in one scoring pass
+        try:
+            results = collection.query_weighted(query_text, "regime", current_regime,
+                                                n_results=n_results, penalty=1.3)
+        except Exception as e:
+            _log(f"Query error: {e}")
+            return []
+        for r in results:
+            match = r.pop("field_match")
+            r["regime_match"] = match
+            r["regime_penalty"] = 0 if match else 0.3
+        return results
 
     # Same-regime first
     same_regime = query_similar(
@@ -471,7 +516,7 @@ def load_expert_knowledge() -> int:
     """Index all expert knowledge entries into ChromaDB."""
     collection = get_collection()
     if not collection:
-        _log("ERROR: ChromaDB not available")
+        _log("ERROR: vector store not available")
         return 0
     
     count = 0
@@ -596,10 +641,10 @@ def init_parquet_store():
 def run():
     _log("=== VECTOR DB SETUP ===")
 
-    # 5.8.1: Init ChromaDB
+    # 5.8.1: Init vector store
     collection = get_collection()
     if not collection:
-        _log("FAILED: ChromaDB not available")
+        _log("FAILED: vector store not available")
         return
 
     # 5.8.2: Index trades
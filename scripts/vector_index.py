@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Local Vector Index — in-process replacement for the ChromaDB collection.
+Deterministic Python + NumPy. No model download, no network.
+
+Embedding: signed feature hashing of word unigrams, word bigrams and
+character trigrams (crc32 → DIM buckets), L2-normalised. Same text gives
+the same vector in every process.
+
+Storage (state/vector_index/):
+  vectors_d{DIM}.f32 — append-only float32 rows, memory-mapped for queries
+  docs.jsonl         — append-only {"id", "document", "metadata"}; commit
+                       marker for the vector row with the same position
+Re-upserting an id appends a new row and retires the old one; nothing is
+rewritten. Other processes' appends are picked up on the next query by
+reading the docs.jsonl tail.
+
+Filtering: one boolean bitmap per (field, value) for BITMAP_FIELDS, ANDed
+into the candidate mask before scoring. Other metadata fields are matched
+by scan.
+
+Exposes the subset of the Chroma collection API vector_db uses
+(upsert / count / query) plus query_weighted() for single-pass
+regime-weighted retrieval.
+"""
+
+import fcntl
+import json
+import re
+import threading
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+DIM = 128
+BITMAP_FIELDS = ("type", "regime", "strategy", "result", "tier", "source")
+
+_WORD_RE = re.compile(r"[a-z0-9$%.+-]+")
+_FULL_SCAN_FRACTION = 0.25  # above this candidate share, score every row and mask
+
+
+def embed_text(text: str, dim: int = DIM) -> np.ndarray:
+    """Hashed n-gram embedding (unit length float32; zero vector for empty text)."""
+    vec = np.zeros(dim, dtype=np.float32)
+    words = _WORD_RE.findall((text or "").lower())
+    features = []
+    for w in words:
+        features.append("w:" + w)
+        padded = f"#{w}#"
+        features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    features.extend(f"b:{a}_{b}" for a, b in zip(words, words[1:]))
+
+    for f in features:
+        h = zlib.crc32(f.encode())
+        vec[h % dim] += -1.0 if h & 0x80000000 else 1.0
+    norm = float(np.linalg.norm(vec))
+    if norm > 0:
+        vec /= norm
+    return vec
+
+
+class LocalVectorIndex:
+    """Append-only memory-mapped vector index with bitmap metadata filters."""
+
+    def __init__(self, path, dim: int = DIM):
+        self.path = Path(path)
+        self.dim = dim
+        self.vectors_path = self.path / f"vectors_d{dim}.f32"
+        self.docs_path = self.path / "docs.jsonl"
+        self.lock_path = self.path / ".lock"
+        self._lock = threading.Lock()
+
+        self._ids: list = []
+        self._documents: list = []
+        self._metadatas: list = []
+        self._id_row: dict = {}
+        self._alive = np.zeros(0, dtype=bool)
+        self._bitmaps: dict = {}
+        self._offset = 0  # bytes of docs.jsonl consumed
+        self._matrix = None
+        self._matrix_rows = 0
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._refresh()
+
+    # ── state ──
+
+    def __contains__(self, doc_id):
+        with self._lock:
+            self._refresh()
+            return str(doc_id) in self._id_row
+
+    def count(self) -> int:
+        """Live documents (superseded rows excluded)."""
+        with self._lock:
+            self._refresh()
+            return len(self._id_row)
+
+    def _grow(self, n: int):
+        cap = len(self._alive)
+        if n <= cap:
+            return
+        new_cap = max(n, cap * 2, 1024)
+        alive = np.zeros(new_cap, dtype=bool)
+        alive[:cap] = self._alive
+        self._alive = alive
+        for key, bm in self._bitmaps.items():
+            grown = np.zeros(new_cap, dtype=bool)
+            grown[:cap] = bm
+            self._bitmaps[key] = grown
+
+    def _add_row(self, doc_id: str, document: str, metadata: dict):
+        row = len(self._ids)
+        self._grow(row + 1)
+        old = self._id_row.get(doc_id)
+        if old is not None:
+            self._alive[old] = False
+        self._id_row[doc_id] = row
+        self._alive[row] = True
+        self._ids.append(doc_id)
+        self._documents.append(document)
+        self._metadatas.append(metadata)
+        for field in BITMAP_FIELDS:
+            if field in metadata:
+                key = (field, str(metadata[field]))
+                bm = self._bitmaps.get(key)
+                if bm is None:
+                    bm = self._bitmaps[key] = np.zeros(len(self._alive), dtype=bool)
+                bm[row] = True
+
+    def _refresh(self):
+        """Pull rows appended (by any process) since the last read. Caller holds _lock."""
+        try:
+            size = self.docs_path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size <= self._offset:
+            return
+        with open(self.docs_path, "rb") as f:
+            f.seek(self._offset)
+            chunk = f.read(size - self._offset)
+        end = chunk.rfind(b"\n") + 1  # complete lines only
+        for line in chunk[:end].splitlines():
+            rec = json.loads(line)
+            self._add_row(rec["id"], rec.get("document", ""), rec.get("metadata") or {})
+        self._offset += end
+
+    def _vectors(self) -> np.ndarray:
+        n = len(self._ids)
+        if self._matrix is None or self._matrix_rows != n:
+            self._matrix = (np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+                            if n else np.zeros((0, self.dim), dtype=np.float32))
+            self._matrix_rows = n
+        return self._matrix
+
+    # ── writes ──
+
+    def upsert(self, ids, documents, metadatas=None, embeddings=None):
+        """Append (or supersede) documents. Chroma-compatible keyword names."""
+        ids = [str(i) for i in ids]
+        metadatas = metadatas or [{} for _ in ids]
+        if embeddings is None:
+            vectors = np.stack([embed_text(d, self.dim) for d in documents]) if ids else None
+        else:
+            vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), self.dim)
+        if not ids:
+            return
+
+        lines = b"".join(
+            json.dumps({"id": i, "document": d, "metadata": m}, default=str).encode() + b"\n"
+            for i, d, m in zip(ids, documents, metadatas)
+        )
+        with self._lock, open(self.lock_path, "w") as lockfile:
+            fcntl.flock(lockfile, fcntl.LOCK_EX)
+            try:
+                self._refresh()
+                # Drop vector rows orphaned by a crash between the two appends
+                with open(self.vectors_path, "ab") as vf:
+                    vf.truncate(len(self._ids) * self.dim * 4)
+                    vf.write(vectors.tobytes())
+                with open(self.docs_path, "ab") as df:
+                    df.write(lines)
+                self._refresh()
+            finally:
+                fcntl.flock(lockfile, fcntl.LOCK_UN)
+
+    # ── reads ──
+
+    def _mask(self, where: dict | None) -> np.ndarray:
+        n = len(self._ids)
+        mask = self._alive[:n].copy()
+        for field, value in (where or {}).items():
+            if field.startswith("$"):
+                raise ValueError(f"Unsupported where operator: {field}")
+            if field in BITMAP_FIELDS:
+                bm = self._bitmaps.get((field, str(value)))
+                if bm is None:
+                    return np.zeros(n, dtype=bool)
+                mask &= bm[:n]
+            else:
+                rows = np.flatnonzero(mask)
+                keep = [r for r in rows if self._metadatas[r].get(field) == value]
+                mask[:] = False
+                mask[keep] = True
+        return mask
+
+    def _distances(self, q: np.ndarray, mask: np.ndarray):
+        """(rows, squared-L2 distances) for candidate rows; unit vectors → 2 - 2·cos."""
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return rows, np.zeros(0, dtype=np.float32)
+        V = self._vectors()
+        if len(rows) > _FULL_SCAN_FRACTION * len(V):
+            sims = (V @ q)[rows]
+        else:
+            sims = V[rows] @ q
+        return rows, 2.0 - 2.0 * sims
+
+    def _top(self, rows, dist, k):
+        if len(rows) > k:
+            part = np.argpartition(dist, k - 1)[:k]
+            rows, dist = rows[part], dist[part]
+        order = np.argsort(dist, kind="stable")
+        return rows[order], dist[order]
+
+    def _result(self, row, distance) -> dict:
+        return {
+            "id": self._ids[row],
+            "document": self._documents[row],
+            "metadata": self._metadatas[row],
+            "distance": float(distance),
+        }
+
+    def search(self, query_text: str, n_results: int = 10, where: dict = None) -> list:
+        """Top-k nearest live documents matching `where` (equality on metadata)."""
+        q = embed_text(query_text, self.dim)
+        with self._lock:
+            self._refresh()
+            rows, dist = self._distances(q, self._mask(where))
+            rows, dist = self._top(rows, dist, max(1, n_results))
+            return [self._result(r, d) for r, d in zip(rows, dist)]
+
+    def query(self, query_texts, n_results: int = 10, where: dict = None, **_):
+        """Chroma-shaped result: {"ids": [[...]], "documents": [[...]], ...}."""
+        out = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for text in query_texts:
+            hits = self.search(text, n_results=n_results, where=where)
+            out["ids"].append([h["id"] for h in hits])
+            out["documents"].append([h["document"] for h in hits])
+            out["metadatas"].append([h["metadata"] for h in hits])
+            out["distances"].append([h["distance"] for h in hits])
+        return out
+
+    def query_weighted(self, query_text: str, field: str, value, n_results: int = 10,
+                       penalty: float = 1.3, min_matches: int = None) -> list:
+        """
+        One scoring pass for "same `field` first, else cross-field with penalty".
+
+        If at least min_matches (default n_results // 2) documents have
+        metadata[field] == value, returns the top-k among them only.
+        Otherwise ranks everything with non-matching distances × penalty.
+        Each hit carries "field_match".
+        """
+        if min_matches is None:
+            min_matches = n_results // 2
+        q = embed_text(query_text, self.dim)
+        with self._lock:
+            self._refresh()
+            same = self._mask({field: value})
+            if min(int(same.sum()), n_results) >= min_matches:
+                rows, dist = self._distances(q, same)
+            else:
+                rows, dist = self._distances(q, self._mask(None))
+                dist = np.where(same[rows], dist, dist * penalty)
+            top_rows, top_dist = self._top(rows, dist, max(1, n_results))
+
+            hits = []
+            for r, d in zip(top_rows, top_dist):
+                hit = self._result(r, d)
+                hit["field_match"] = bool(same[r])
+                hits.append(hit)
+            return hits
@@ -4,6 +4,7 @@ Venue Detection - Single source of truth for CEX vs DEX classification
 
 Used by: sanad_pipeline (Stage 6 + Stage 7), paper_execution, OMS
 Ensures consistent venue detection across entire execution path.
+CEX choice comes from listing_index when the pair is indexed.
 """
 
 # Canonical DEX exchange list
@@ -84,8 +85,13 @@ def detect_venue(token_profile: dict, signal: dict = None) -> dict:
             }
             exchange = chain_defaults.get(chain, "raydium")
     else:
-        # CEX: prefer binance, fallback to first available
-        if "binance" in exchange_list_lower:
+        # CEX: where the pair actually trades (listing index), else prefer binance,
+        # fallback to first available
+        listed_on = _indexed_venue(token_profile, signal)
+        if listed_on:
+            exchange = listed_on
+            reason += f"; listing index → {listed_on}"
+        elif "binance" in exchange_list_lower:
             exchange = "binance"
         elif exchange_list:
             # Pick first non-DEX exchange
@@ -106,6 +112,19 @@ def detect_venue(token_profile: dict, signal: dict = None) -> dict:
     }
 
 
+def _indexed_venue(token_profile: dict, signal: dict = None) -> str | None:
+    """Preferred CEX from listing_index for the token's USDT pair, if listed."""
+    token = (token_profile.get("symbol") or token_profile.get("token")
+             or (signal or {}).get("symbol") or (signal or {}).get("token"))
+    if not token:
+        return None
+    try:
+        import listing_index
+        return listing_index.venue(token)
+    except Exception:
+        return None
+
+
 def get_price_from_decision_data(signal: dict, strategy_result: dict = None, decision_record: dict = None) -> float:
     """
     Extract price from decision data in priority order.
@@ -21,6 +21,7 @@ import json
 import time
 import psutil
 import shutil
+import signal
 import subprocess
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
@@ -201,6 +202,7 @@ def _compile_diagnostic_package(context, age_minutes):
     - Stall context (token, stage, errors)
     - Stall frequency (last 2 hours)
     - Circuit breaker states
+    - Latest sampling profile (SANAD_PROFILE=1 runs) — top frames + flamegraph file
     """
     try:
         diagnostic = []
@@ -251,10 +253,10 @@ def _compile_diagnostic_package(context, age_minutes):
         
         # 4. Circuit breakers
         try:
-            circuit_file = STATE_DIR / "circuit_breakers.json"
-            if circuit_file.exists():
-                breakers = json.load(open(circuit_file))
-                open_breakers = [k for k, v in breakers.items() if v.get("state") == "OPEN"]
+            import breaker_registry
+            breakers = breaker_registry.all_states()
+            if breakers:
+                open_breakers = [k for k, v in breakers.items() if str(v.get("state", "")).lower() == "open"]
                 if open_breakers:
                     diagnostic.append(f"\n⚠️ Circuit Breakers OPEN: {', '.join(open_breakers)}")
                 else:
@@ -262,6 +264,21 @@ def _compile_diagnostic_package(context, age_minutes):
         except:
             pass
         
+        # 5. Latest sampling profile (router first, else any entry point)
+        try:
+            import sampling_profiler
+            profile_path = (sampling_profiler.latest_profile("signal_router")
+                            or sampling_profiler.latest_profile())
+            if profile_path:
+                age_min = (time.time() - profile_path.stat().st_mtime) / 60
+                diagnostic.append(f"\n🔥 Latest profile ({age_min:.0f}min old): {profile_path}")
+                diagnostic.append("```")
+                diagnostic.append(sampling_profiler.summarize(profile_path, top=8))
+                diagnostic.append("```")
+                diagnostic.append("  Flamegraph: flamegraph.pl < file > out.svg (or load into speedscope)")
+        except Exception as e:
+            diagnostic.append(f"\n🔥 Profile unavailable: {e}")
+        
         return "\n".join(diagnostic)
     
     except Exception as e:
@@ -1267,6 +1284,15 @@ def check_stale_locks():
     return removed
 
 
+def _request_profile_dump(proc, wait_s=0.5):
+    """SIGUSR2 → profiled runs (SANAD_PROFILE=1) write their stack samples before we kill them."""
+    try:
+        proc.send_signal(signal.SIGUSR2)
+        proc.wait(timeout=wait_s)  # unprofiled processes die on SIGUSR2 (default action)
+    except (psutil.TimeoutExpired, psutil.NoSuchProcess, psutil.AccessDenied):
+        pass
+
+
 def check_zombie_processes():
     """Kill any trading script running >600s."""
     killed = []
@@ -1287,7 +1313,11 @@ def check_zombie_processes():
                         runtime = time.time() - proc.info['create_time']
                         
                         if runtime > LONG_RUNNING_PROCESS_SEC:
-                            proc.kill()
+                            _request_profile_dump(proc)
+                            try:
+                                proc.kill()
+                            except psutil.NoSuchProcess:
+                                pass  # unprofiled run already exited on SIGUSR2
                             killed.append(f"{pattern} (PID {proc.info['pid']}, {runtime:.0f}s)")
                             _log(f"Killed zombie: {pattern} (PID {proc.info['pid']})", "WARNING")
             except (psutil.NoSuchProcess, psutil.AccessDenied):
@@ -31,6 +31,7 @@ BASE_DIR = Path(os.environ.get("SANAD_HOME", str(SCRIPT_DIR.parent)))
 sys.path.insert(0, str(SCRIPT_DIR))
 
 from helius_client import get_recent_transactions
+import funding_graph
 
 # Paths
 STATE_DIR = BASE_DIR / "state"
@@ -205,20 +206,24 @@ def is_bot_wallet(wallet_addr: str) -> bool:
 def detect_sybil_cluster(wallet_addr: str, known_clusters: dict) -> bool:
     """
     Check if wallet is part of a known sybil cluster.
-    Uses funding source detection from helius_client.
+    Uses the shared funding graph (funding_graph.py): siblings are every wallet
+    its funder has funded across all tokens analysed so far.
+
+    known_clusters: parent_wallet → addresses, filled in as clusters are found
+    so repeated checks within a run skip the lookup.
     """
-    # Get first transaction to find funding source
-    txs = get_recent_transactions(wallet_addr, limit=5)
-    if not txs:
+    for addresses in known_clusters.values():
+        if wallet_addr in addresses:
+            return True
+
+    cluster = funding_graph.wallet_cluster(wallet_addr)
+    if not cluster:
         return False
-    
-    # Check last (earliest) transaction for funding source
-    earliest = txs[-1]
-    # For now, simple heuristic: if wallet has very few transactions, might be sybil
-    # Full implementation would track funding sources across all wallets
-    
-    # TODO: Implement full sybil detection with funding graph
-    return False
+
+    known_clusters[cluster["parent_wallet"]] = cluster["addresses"]
+    _log(f"Sybil cluster: {wallet_addr[:8]}... funded by {cluster['parent_wallet'][:8]}... "
+         f"({cluster['child_count']} siblings)")
+    return True
 
 
 # ---------------------------------------------------------------------------
@@ -405,6 +410,7 @@ def run_discovery():
         if t.get("pnl", 0) > 0 and t.get("exit_time")
     ]
     
+    known_clusters: dict = {}
     for trade in recent_wins[-10:]:  # Last 10 wins
         token = trade.get("token")
         entry_time = trade.get("entry_time")
@@ -414,7 +420,7 @@ def run_discovery():
         if token and entry_time and exit_time:
             front_runners = discover_front_runners(token, entry_time, exit_time, pnl)
             for fr in front_runners:
-                if not is_bot_wallet(fr):
+                if not is_bot_wallet(fr) and not detect_sybil_cluster(fr, known_clusters):
                     add_candidate(
                         fr,
                         "front_runner",
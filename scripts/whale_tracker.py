@@ -2,6 +2,10 @@
 """
 Whale Tracker — Signal generator from coordinated whale wallet accumulation.
 Uses existing helius_client.py for all Solana RPC calls.
+
+Polling is incremental: each wallet keeps a `last_signature` cursor in state so
+only transactions newer than the previous run are fetched, and wallets are
+polled concurrently (helius_client's rate limiter is shared across threads).
 """
 import json
 import sys
@@ -9,6 +13,7 @@ import os
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add scripts to path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -35,6 +40,13 @@ ALERT_FILE = BASE_DIR / "state" / "whale_distribution_alerts.json"
 CRON_HEALTH = BASE_DIR / "state" / "cron_health.json"
 LOG_FILE = BASE_DIR / "execution-logs" / "whale_tracker.log"
 
+# Polling — overridable via whale_wallets.json
+DEFAULT_POLL_CONCURRENCY = 8       # Worker threads (Helius 10 req/s budget is shared)
+DEFAULT_MAX_NEW_TX_PER_POLL = 50   # Signatures fetched per page when catching up to the cursor
+MAX_POLL_PAGES = 10                # Pages per wallet per run before the rest of the gap is skipped
+COLD_START_TX_LIMIT = 20           # First poll for a wallet with no cursor
+ACTIVITY_WINDOW_HOURS = 6          # Parsed transactions kept in state
+
 def _log(msg: str):
     """Append to log file with timestamp."""
     timestamp = datetime.now(timezone.utc).isoformat()
@@ -104,10 +116,54 @@ def _update_cron_health(status: str = "ok"):
     with open(CRON_HEALTH, "w") as f:
         json.dump(health, f, indent=2)
 
+class MintActivityIndex:
+    """
+    mint → recent BUY / SELL entries across all tracked wallets.
+
+    Maintained incrementally as parsed transactions arrive, so accumulation and
+    distribution detection are lookups instead of a rescan of every wallet.
+    Built per run from the already-expired state, so it never holds stale entries.
+    """
+
+    def __init__(self):
+        self._by_action = {"BUY": defaultdict(list), "SELL": defaultdict(list)}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "MintActivityIndex":
+        index = cls()
+        for wallet_addr, activity in state.items():
+            for tx in activity.get("transactions", []):
+                index.add(wallet_addr, activity, tx)
+        return index
+
+    def add(self, wallet_addr: str, activity: dict, tx: dict):
+        bucket = self._by_action.get(tx.get("action"))
+        if bucket is None:
+            return
+        bucket[tx["mint"]].append({
+            "wallet": wallet_addr,
+            "name": activity.get("name", "Unknown"),
+            "grade": activity.get("grade", "C"),
+            "sol_amount": tx.get("sol_amount", 0),
+            "timestamp": tx["timestamp"],
+            "ts": datetime.fromisoformat(tx["timestamp"]),
+        })
+
+    def recent(self, action: str, since: datetime) -> dict[str, list[dict]]:
+        """mint → entries for `action` newer than `since`."""
+        out = {}
+        for mint, entries in self._by_action[action].items():
+            recent = [e for e in entries if e["ts"] > since]
+            if recent:
+                out[mint] = recent
+        return out
+
+
 def _parse_transaction(tx: dict, wallet_address: str) -> dict | None:
     """
     Parse transaction to detect BUY or SELL of a token.
-    Returns: {"action": "BUY"|"SELL", "mint": str, "sol_amount": float, "timestamp": str}
+    Returns: {"action": "BUY"|"SELL", "mint": str, "sol_amount": float, "timestamp": str,
+              "signature": str}
     """
     # Simplified parser — looks for token transfers and SOL movements
     # In production, this would use Helius parsed transaction data
@@ -146,7 +202,8 @@ def _parse_transaction(tx: dict, wallet_address: str) -> dict | None:
                             "action": "BUY",
                             "mint": mint,
                             "sol_amount": sol_spent,
-                            "timestamp": ts
+                            "timestamp": ts,
+                            "signature": tx.get("signature"),
                         }
                 
                 # If wallet sent tokens → SELL
@@ -155,7 +212,8 @@ def _parse_transaction(tx: dict, wallet_address: str) -> dict | None:
                         "action": "SELL",
                         "mint": mint,
                         "sol_amount": 0,  # Don't need SOL amount for sells
-                        "timestamp": ts
+                        "timestamp": ts,
+                        "signature": tx.get("signature"),
                     }
         
         return None
@@ -163,7 +221,7 @@ def _parse_transaction(tx: dict, wallet_address: str) -> dict | None:
         _log(f"ERROR parsing transaction: {e}")
         return None
 
-def _detect_accumulation(state: dict, config: dict) -> list[dict]:
+def _detect_accumulation(state: dict, config: dict, index: MintActivityIndex | None = None) -> list[dict]:
     """
     Detect coordinated accumulation across wallets.
     Returns list of signals to generate.
@@ -176,22 +234,9 @@ def _detect_accumulation(state: dict, config: dict) -> list[dict]:
     grade_weights = config.get("grade_weights", {"S": 3.0, "A": 2.0, "B": 1.0, "C": 0.5})
     
     # Group buys by mint
-    mint_buys = defaultdict(list)
-    
-    for wallet_addr, activity in state.items():
-        recent = [
-            tx for tx in activity.get("transactions", [])
-            if tx.get("action") == "BUY" and
-            datetime.fromisoformat(tx["timestamp"]) > now - window
-        ]
-        for tx in recent:
-            mint_buys[tx["mint"]].append({
-                "wallet": wallet_addr,
-                "name": activity.get("name", "Unknown"),
-                "grade": activity.get("grade", "C"),
-                "sol_amount": tx["sol_amount"],
-                "timestamp": tx["timestamp"]
-            })
+    if index is None:
+        index = MintActivityIndex.from_state(state)
+    mint_buys = index.recent("BUY", now - window)
     
     # Check accumulation threshold
     for mint, buys in mint_buys.items():
@@ -212,7 +257,7 @@ def _detect_accumulation(state: dict, config: dict) -> list[dict]:
                     continue
                 
                 # Calculate accumulation window
-                timestamps = [datetime.fromisoformat(b["timestamp"]) for b in buys]
+                timestamps = [b["ts"] for b in buys]
                 window_hours = (max(timestamps) - min(timestamps)).total_seconds() / 3600
                 
                 # Enrich with Birdeye data
@@ -255,7 +300,7 @@ def _detect_accumulation(state: dict, config: dict) -> list[dict]:
     
     return signals
 
-def _detect_distribution(state: dict) -> list[dict]:
+def _detect_distribution(state: dict, index: MintActivityIndex | None = None) -> list[dict]:
     """
     Detect when 2+ whales are selling same token (distribution warning).
     Returns list of alerts.
@@ -265,20 +310,9 @@ def _detect_distribution(state: dict) -> list[dict]:
     window = timedelta(hours=6)
     
     # Group sells by mint
-    mint_sells = defaultdict(list)
-    
-    for wallet_addr, activity in state.items():
-        recent = [
-            tx for tx in activity.get("transactions", [])
-            if tx.get("action") == "SELL" and
-            datetime.fromisoformat(tx["timestamp"]) > now - window
-        ]
-        for tx in recent:
-            mint_sells[tx["mint"]].append({
-                "wallet": wallet_addr,
-                "name": activity.get("name", "Unknown"),
-                "timestamp": tx["timestamp"]
-            })
+    if index is None:
+        index = MintActivityIndex.from_state(state)
+    mint_sells = index.recent("SELL", now - window)
     
     # Check distribution threshold (2+ whales selling)
     for mint, sells in mint_sells.items():
@@ -287,7 +321,10 @@ def _detect_distribution(state: dict) -> list[dict]:
             alerts.append({
                 "mint": mint,
                 "wallets_selling": unique_wallets,
-                "details": sells,
+                "details": [
+                    {"wallet": s["wallet"], "name": s["name"], "timestamp": s["timestamp"]}
+                    for s in sells
+                ],
                 "timestamp": datetime.now(timezone.utc).isoformat()
             })
             _log(f"DISTRIBUTION WARNING: {mint[:8]}... — {unique_wallets} whales selling")
@@ -312,6 +349,83 @@ def _write_signal(signal: dict):
     
     _log(f"Signal written: {filename}")
 
+def _tx_epoch(tx: dict) -> float | None:
+    ts = tx.get("block_time") or tx.get("timestamp")
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    try:
+        return datetime.fromisoformat(ts).timestamp() if ts else None
+    except ValueError:
+        return None
+
+
+def _poll_wallet(address: str, cursor: str | None, max_new: int,
+                 cutoff: datetime) -> tuple[list | None, bool]:
+    """
+    Fetch transactions newer than `cursor` (or a cold-start page if no cursor).
+
+    Pages backwards with `before=` until the cursor or the activity window is
+    reached. Returns (newest-first transactions or None on failure, truncated):
+    truncated means MAX_POLL_PAGES ran out first and older in-window
+    transactions were skipped.
+    """
+    if not cursor:
+        return get_recent_transactions(address, limit=COLD_START_TX_LIMIT), False
+    out, before = [], None
+    for _ in range(MAX_POLL_PAGES):
+        page = get_recent_transactions(address, limit=max_new, until=cursor,
+                                       max_enhanced=max_new, before=before)
+        if page is None:
+            return None, False  # cursor stays put; the whole gap is retried next run
+        out.extend(page)
+        if len(page) < max_new:
+            return out, False  # reached the cursor
+        oldest = page[-1]
+        oldest_ts = _tx_epoch(oldest)
+        if oldest_ts is not None and oldest_ts <= cutoff.timestamp():
+            return out, False  # anything older is outside the window anyway
+        before = oldest.get("signature")
+        if not before:
+            break
+    return out, True
+
+
+def _merge_wallet_transactions(state: dict, index: MintActivityIndex, wallet: dict,
+                               transactions: list, cutoff: datetime) -> int:
+    """Parse new transactions into wallet state + index, advance cursor. Returns count added."""
+    address = wallet["address"]
+    name = wallet.get("label", wallet.get("name", "Unknown"))
+
+    # Initialize wallet state if new
+    if address not in state:
+        state[address] = {
+            "name": name,
+            "grade": wallet.get("grade", "B"),  # Default to B if not specified
+            "transactions": []
+        }
+    activity = state[address]
+
+    # Newest signature first — becomes next run's cursor
+    newest = next((tx.get("signature") for tx in transactions if tx.get("signature")), None)
+    if newest:
+        activity["last_signature"] = newest
+
+    seen = {tx.get("signature") for tx in activity.get("transactions", []) if tx.get("signature")}
+    added = 0
+    for tx in transactions:
+        parsed = _parse_transaction(tx, address)
+        if not parsed or not parsed.get("timestamp"):
+            continue
+        if parsed.get("signature") and parsed["signature"] in seen:
+            continue
+        if datetime.fromisoformat(parsed["timestamp"]) <= cutoff:
+            continue
+        activity.setdefault("transactions", []).append(parsed)
+        index.add(address, activity, parsed)
+        added += 1
+    return added
+
+
 def run_tracker(test_mode: bool = False):
     """Main tracker logic."""
     _log("=== WHALE TRACKER START ===")
@@ -365,61 +479,60 @@ def run_tracker(test_mode: bool = False):
     
     # Track active wallets
     wallets = [w for w in config.get("wallets", []) if w.get("active", True)]
-    _log(f"Tracking {len(wallets)} active wallets")
+    concurrency = max(1, int(config.get("poll_concurrency", DEFAULT_POLL_CONCURRENCY)))
+    max_new = int(config.get("max_new_tx_per_poll", DEFAULT_MAX_NEW_TX_PER_POLL))
+    _log(f"Tracking {len(wallets)} active wallets ({concurrency} concurrent pollers)")
     
-    # Poll each wallet for recent transactions
-    for wallet in wallets:
-        address = wallet["address"]
-        name = wallet.get("label", wallet.get("name", "Unknown"))
-        
-        _log(f"Polling {name} — {address[:8]}...")
-        
-        # Get recent transactions via existing helius_client
-        try:
-            transactions = get_recent_transactions(address, limit=20)
-            if not transactions:
-                _log(f"  No transactions returned for {name}")
+    # Expire old activity, then index what's left (one pass; new txs are added incrementally)
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=ACTIVITY_WINDOW_HOURS)
+    for activity in state.values():
+        activity["transactions"] = [
+            tx for tx in activity.get("transactions", [])
+            if datetime.fromisoformat(tx["timestamp"]) > cutoff
+        ]
+    index = MintActivityIndex.from_state(state)
+    
+    # Poll wallets concurrently; merge results on this thread
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(_poll_wallet, w["address"], state.get(w["address"], {}).get("last_signature"),
+                        max_new, cutoff): w
+            for w in wallets
+        }
+        for future in as_completed(futures):
+            wallet = futures[future]
+            address = wallet["address"]
+            name = wallet.get("label", wallet.get("name", "Unknown"))
+            try:
+                transactions, truncated = future.result()
+                if transactions is None:
+                    _log(f"  No transactions returned for {name} ({address[:8]}...)")
+                    continue
+                if not transactions:
+                    continue
+                
+                added = _merge_wallet_transactions(state, index, wallet, transactions, cutoff)
+                _log(f"  {name}: {added} new transactions, {len(state[address]['transactions'])} in window")
+                if truncated:
+                    state[address]["gaps_skipped"] = state[address].get("gaps_skipped", 0) + 1
+                    _log(f"  WARNING {name}: more than {MAX_POLL_PAGES * max_new} new transactions since "
+                         f"last poll, older in-window ones skipped "
+                         f"({state[address]['gaps_skipped']} gap(s) skipped so far)")
+                
+            except Exception as e:
+                _log(f"ERROR polling {name}: {e}")
                 continue
-            
-            # Initialize wallet state if new
-            if address not in state:
-                state[address] = {
-                    "name": name,
-                    "grade": wallet.get("grade", "B"),  # Default to B if not specified
-                    "transactions": []
-                }
-            
-            # Parse transactions
-            new_txs = []
-            for tx in transactions:
-                parsed = _parse_transaction(tx, address)
-                if parsed:
-                    new_txs.append(parsed)
-            
-            # Add new transactions to state (avoid duplicates)
-            existing_hashes = set()
-            state[address]["transactions"] = [
-                tx for tx in state[address].get("transactions", [])
-                if datetime.fromisoformat(tx["timestamp"]) > datetime.now(timezone.utc) - timedelta(hours=6)
-            ]
-            state[address]["transactions"].extend(new_txs)
-            
-            _log(f"  {name}: {len(new_txs)} new transactions, {len(state[address]['transactions'])} in window")
-            
-        except Exception as e:
-            _log(f"ERROR polling {name}: {e}")
-            continue
     
     # Save updated state
     _save_state(state)
     
     # Detect accumulation patterns
-    signals = _detect_accumulation(state, config)
+    signals = _detect_accumulation(state, config, index)
     for signal in signals:
         _write_signal(signal)
     
     # Detect distribution warnings AND generate SHORT signals
-    alerts = _detect_distribution(state)
+    alerts = _detect_distribution(state, index)
     if alerts:
         ALERT_FILE.parent.mkdir(parents=True, exist_ok=True)
         with open(ALERT_FILE, "w") as f:
@@ -5,6 +5,8 @@ Manages persistent WebSocket connections for real-time data.
 
 Streams:
 - Binance: trade streams for watchlist tokens
+- Binance: partial-depth (20-level) books → state/depth/ for depth_cache,
+  recorded once a minute to state/depth/tape/ for fill_engine replays
 - MEXC: trade streams for watchlist tokens
 - PumpPortal: managed separately (pumpfun_monitor.py)
 
@@ -34,6 +36,7 @@ STATE_DIR = BASE_DIR / "state"
 WS_STATE_PATH = STATE_DIR / "ws_manager_state.json"
 PRICE_CACHE_PATH = STATE_DIR / "price_cache.json"
 WATCHLIST_PATH = CONFIG_DIR / "watchlist.json"
+sys.path.insert(0, str(SCRIPT_DIR))
 
 BINANCE_WS = "wss://stream.binance.com:9443/ws"
 MEXC_WS = "wss://wbs.mexc.com/ws"
@@ -42,6 +45,8 @@ RECONNECT_MIN = 3
 RECONNECT_MAX = 60
 HEALTH_CHECK_INTERVAL = 30
 STALE_THRESHOLD_S = 120  # 2 min without message = stale
+DEPTH_WRITE_INTERVAL_S = 1.0  # per-symbol book publish throttle (stream pushes every 100 ms)
+DEPTH_TAPE_INTERVAL_S = 60    # per-symbol book recording for fill_engine replays
 
 
 def _log(tag, msg):
@@ -80,14 +85,13 @@ def _load_watchlist_symbols() -> list[str]:
 
 
 def _update_price_cache(symbol: str, price: float, source: str):
-    """Update price cache with real-time WebSocket price."""
-    cache = _load_json(PRICE_CACHE_PATH, {})
-    cache[symbol] = {
+    """Update price cache with real-time WebSocket price (same lock as the other cache writers)."""
+    from dex_price_poller import merge_price_cache
+    merge_price_cache({symbol: {
         "price": price,
         "source": source,
         "timestamp": _now().isoformat(),
-    }
-    _save_json(PRICE_CACHE_PATH, cache)
+    }}, PRICE_CACHE_PATH)
 
 
 class StreamState:
@@ -186,6 +190,48 @@ async def binance_stream(state: StreamState, symbols: list[str]):
             await asyncio.sleep(delay)
 
 
+async def binance_depth_stream(state: StreamState, symbols: list[str]):
+    """Connect to Binance partial-depth streams and publish books for depth_cache."""
+    import websockets
+    from depth_cache import write_ws_snapshot, append_tape
+
+    streams = [f"{s.lower()}@depth20@100ms" for s in symbols[:10]]  # Max 10
+    url = f"wss://stream.binance.com:9443/stream?streams={'/'.join(streams)}"
+    last_write, last_tape = {}, {}
+
+    while True:
+        try:
+            _log("BINANCE-DEPTH", f"Connecting to {len(streams)} streams...")
+            async with websockets.connect(url, ping_interval=20, ping_timeout=10) as ws:
+                state.record_connect()
+
+                async for message in ws:
+                    try:
+                        data = json.loads(message)
+                        # Partial book payloads carry no symbol: take it from the stream name
+                        symbol = data.get("stream", "").split("@")[0].upper()
+                        book = data.get("data", {})
+                        if not symbol or not book.get("bids") or not book.get("asks"):
+                            continue
+                        state.record_message()
+                        now = time.time()
+                        if now - last_write.get(symbol, 0) >= DEPTH_WRITE_INTERVAL_S:
+                            write_ws_snapshot(symbol, book["bids"], book["asks"], ts=now)
+                            last_write[symbol] = now
+                        if now - last_tape.get(symbol, 0) >= DEPTH_TAPE_INTERVAL_S:
+                            append_tape(symbol, book["bids"], book["asks"], ts=now)
+                            last_tape[symbol] = now
+                    except (json.JSONDecodeError, KeyError, ValueError, OSError):
+                        pass
+
+        except Exception as e:
+            state.record_disconnect(e)
+            delay = min(state.reconnect_delay * 2, RECONNECT_MAX)
+            state.reconnect_delay = delay
+            _log("BINANCE-DEPTH", f"Reconnecting in {delay}s...")
+            await asyncio.sleep(delay)
+
+
 # ─────────────────────────────────────────────────────
 # MEXC WebSocket
 # ─────────────────────────────────────────────────────
@@ -279,11 +325,13 @@ async def run_all():
 
     states = {
         "binance": StreamState("binance"),
+        "binance_depth": StreamState("binance_depth"),
         "mexc": StreamState("mexc"),
     }
 
     tasks = [
         asyncio.create_task(binance_stream(states["binance"], symbols)),
+        asyncio.create_task(binance_depth_stream(states["binance_depth"], symbols)),
         asyncio.create_task(mexc_stream(states["mexc"], symbols)),
         asyncio.create_task(health_monitor(states)),
     ]